@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文档元数据提取基准测试脚本
+
+对比旧版 DocumentManager._extract_document_meta（逐个尝试12个日期正则）与
+DocumentHeaderParser（单次扫描 + LRU缓存）在实际数据目录上的耗时，并检查
+两者的提取结果是否一致。
+
+默认扫描 data/raw 和 data/analysis；没有数据时可用 --generate 生成按
+save_to_markdown 格式写入的临时文档。
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import shutil
+import tempfile
+import argparse
+from pathlib import Path
+from datetime import datetime, date, timedelta
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.web_server.document_header import DocumentHeaderParser
+
+
+def legacy_extract_document_meta(file_path: str):
+    """旧版元数据提取实现（不含日志），用于对比"""
+    meta = {
+        'title': os.path.basename(file_path).replace('.md', '').replace('_', ' '),
+        'date': datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d')
+    }
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            lines = [f.readline() for _ in range(20)]
+            content = ''.join(lines)
+
+        title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
+        if title_match:
+            meta['title'] = title_match.group(1).strip()
+
+        if 'analyzed' in file_path and not meta['title'].startswith('竞争分析摘要：'):
+            meta['title'] = f"竞争分析摘要：{meta['title']}"
+
+        filename = os.path.basename(file_path)
+        filename_date_match = re.match(r'^(\d{4}-\d{2}-\d{2})_', filename)
+        filename_month_match = re.match(r'^(\d{4}-\d{2})\.md$', filename)
+        filename_date_fallback = None
+        if filename_date_match:
+            filename_date_fallback = filename_date_match.group(1)
+        elif filename_month_match:
+            filename_date_fallback = f"{filename_month_match.group(1)}-01"
+
+        date_patterns = [
+            r'发布于[：:]\s*(\d{4}\s*年\s*\d{1,2}\s*月\s*\d{1,2}\s*日)',
+            r'发表于[：:]\s*(\d{4}年\d{1,2}月\d{1,2}日)',
+            r'发布(?:日期|时间)[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
+            r'\*\*发布时间[：:]\*\*\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
+            r'\*\*发布时间[：:]\*\*\s*(\d{4}年\d{1,2}月\d{1,2}日)',
+            r'\*\*发布时间\*\*[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
+            r'\*\*发布日期[：:]\*\*\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
+            r'\*\*发布时间[：:]\*\*\s*(\d{4}-\d{1,2})',
+            r'发布时间为\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
+            r'发布日期为\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
+            r'(\d{4}年\d{1,2}月\d{1,2}日)',
+            r'(\d{4}[-/]\d{1,2}[-/]\d{1,2})\s+\d{1,2}[:：]\d{1,2}'
+        ]
+        date_extracted = False
+        for pattern in date_patterns:
+            date_match = re.search(pattern, content, re.MULTILINE)
+            if date_match:
+                date_str = date_match.group(1).strip()
+                if '年' in date_str and '月' in date_str and '日' in date_str:
+                    date_str = date_str.replace(' ', '')
+                    date_str = date_str.replace('年', '-').replace('月', '-').replace('日', '')
+                    parts = date_str.split('-')
+                    if len(parts) == 3:
+                        year, month, day = parts
+                        date_str = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+                date_str = date_str.replace('/', '-')
+                if re.match(r'^\d{4}-\d{1,2}$', date_str):
+                    date_str = f"{date_str}-01"
+                meta['date'] = date_str
+                date_extracted = True
+                break
+        if not date_extracted and filename_date_fallback:
+            meta['date'] = filename_date_fallback
+
+        author_match = re.search(r'作者[：:]\s*(.+?)[\r\n]', content, re.MULTILINE)
+        if author_match:
+            meta['author'] = author_match.group(1).strip()
+
+        source_type_match = re.search(r'\*\*类型[：:]\*\*\s*([A-Za-z-]+)', content, re.MULTILINE)
+        if source_type_match:
+            meta['source_type'] = source_type_match.group(1).strip().upper()
+    except Exception:
+        pass
+    return meta
+
+
+def generate_documents(base_dir: str, count: int, seed: int = 42):
+    """
+    按 save_to_markdown 的头部格式生成测试文档，少量文档使用其他日期写法
+
+    Args:
+        base_dir: 输出目录（其下生成 raw/<vendor>/<type>/*.md）
+        count: 文档数量
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    vendors = ['aws', 'azure', 'gcp', 'huawei', 'tencentcloud']
+    body = "\n".join(f"Paragraph {i} about networking, VPC and load balancers." for i in range(40))
+    for i in range(count):
+        vendor = rng.choice(vendors)
+        doc_type = rng.choice(['blog', 'whatsnew'])
+        pub_date = date(2024, 1, 1) + timedelta(days=rng.randrange(700))
+        display_date = pub_date.strftime('%Y-%m-%d')
+        variant = rng.random()
+        if variant < 0.05:
+            display_date = pub_date.strftime('%Y-%m')
+        elif variant < 0.1:
+            body_prefix = f"作者: Author {i}\n\n发表于：{pub_date.year}年{pub_date.month}月{pub_date.day}日\n\n"
+        header = "\n".join([
+            f"# Document {i}",
+            "",
+            f"**原始链接:** [https://example.com/{i}](https://example.com/{i})",
+            "",
+            f"**发布时间:** {display_date}",
+            "",
+            f"**厂商:** {vendor.upper()}",
+            "",
+            f"**类型:** {doc_type.upper()}",
+            "",
+            "---",
+            "",
+        ])
+        content = header + (body_prefix if 0.05 <= variant < 0.1 else "") + body
+        type_dir = os.path.join(base_dir, 'raw', vendor, doc_type)
+        os.makedirs(type_dir, exist_ok=True)
+        with open(os.path.join(type_dir, f"{pub_date.strftime('%Y_%m_%d')}_{i}.md"), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+def collect_files(data_dir: str):
+    """收集 data/raw 和 data/analysis 下的所有文档路径"""
+    files = []
+    for sub_dir in ('raw', 'analysis'):
+        for root, _, filenames in os.walk(os.path.join(data_dir, sub_dir)):
+            files.extend(os.path.join(root, name) for name in filenames if name.endswith('.md'))
+    return files
+
+
+def measure(func, files, repeat: int) -> float:
+    """返回处理全部文件的平均耗时（毫秒）"""
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for file_path in files:
+            func(file_path)
+    return (time.perf_counter() - start_time) * 1000 / repeat
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="文档元数据提取基准测试")
+    parser.add_argument("--data-dir", default=str(project_root / 'data'), help="数据目录（包含raw和analysis）")
+    parser.add_argument("--generate", type=int, default=0, help="在临时目录生成指定数量的测试文档并使用它们")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数")
+    args = parser.parse_args()
+
+    temp_dir = None
+    data_dir = args.data_dir
+    if args.generate:
+        temp_dir = tempfile.mkdtemp(prefix='meta_bench_')
+        generate_documents(temp_dir, args.generate)
+        data_dir = temp_dir
+
+    try:
+        files = collect_files(data_dir)
+        if not files:
+            print(f"未找到文档: {data_dir}（可使用 --generate 生成测试文档）")
+            return
+
+        header_parser = DocumentHeaderParser(cache_size=len(files))
+        mismatches = [path for path in files
+                      if legacy_extract_document_meta(path) != header_parser.parse(path, os.path.getmtime(path))]
+
+        legacy_ms = measure(legacy_extract_document_meta, files, args.repeat)
+        parse_ms = measure(lambda path: header_parser.parse(path, os.path.getmtime(path)), files, args.repeat)
+        header_parser.clear()
+        header_parser.fallbacks = 0
+        cold_ms = measure(header_parser.extract, files, 1)
+        fallbacks = header_parser.fallbacks
+        warm_ms = measure(header_parser.extract, files, args.repeat)
+
+        print(f"文档数: {len(files)}  数据目录: {data_dir}")
+        print(f"{'实现':<28}{'总耗时(ms)':>12}{'每文档(us)':>12}")
+        for name, elapsed in (("旧版(12个正则逐个尝试)", legacy_ms),
+                              ("单次扫描解析(无缓存)", parse_ms),
+                              ("单次扫描解析(LRU冷启动)", cold_ms),
+                              ("单次扫描解析(LRU命中)", warm_ms)):
+            print(f"{name:<28}{elapsed:>12.2f}{elapsed * 1000 / len(files):>12.2f}")
+        print(f"启发式回退: {fallbacks}/{len(files)}  结果不一致: {len(mismatches)}")
+        for path in mismatches[:10]:
+            print(f"  {path}")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+搜索倒排索引基准测试脚本
+
+用合成文档对比旧版搜索（对标题和正文逐个做子串匹配）与倒排索引
+（SearchIndexSnapshot）的查询耗时，并检查旧版能命中的文档倒排索引是否也能
+命中，包括复合词的组成部分（load、region）和单个汉字（云、网）的查询。
+
+存在旧版命中而索引未命中的文档时以非零状态码退出。
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.web_server.search_index import DocumentIndex, SearchIndexSnapshot, count_terms
+
+VENDORS = ['aws', 'azure', 'gcp', 'huawei', 'tencentcloud', 'volcengine']
+# 英文词之间只以复合词组成部分的形式互相包含（如 load 与 load-balancer），
+# 子串匹配与按词匹配的结果可以直接比较
+WORDS = [
+    'load-balancer', 'cross-region', 'ipv6', 'v2.0', 'gateway', 'private-link',
+    'bandwidth', 'firewall', 'peering', 'transit', 'latency', 'global', 'load',
+    'balancer', 'region', 'endpoint', 'dns', 'cdn', 'vpc', 'subnet'
+]
+PHRASES = [
+    '负载均衡', '云网络', '跨区域', '网关', '私网连接', '带宽', '防火墙', '云', '网',
+    '全球加速', '对等连接', '延迟', '弹性公网', '专线', '安全组', '容器网络'
+]
+QUERIES = [
+    'load', 'balancer', 'load-balancer', 'region', 'cross-region', 'v2', 'v2.0',
+    'link', 'ipv6', '云', '网', '区', '负载均衡', '网络', '云网络 gateway', 'vpc OR 专线'
+]
+
+
+def generate_documents(count: int, seed: int = 42):
+    """
+    生成合成文档
+
+    Returns:
+        [(DocumentIndex, 正文)]
+    """
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        vendor = rng.choice(VENDORS)
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 4)))
+        translated_title = ''.join(rng.choice(PHRASES) for _ in range(rng.randint(1, 3)))
+        content = '\n'.join(
+            ' '.join(rng.choice(WORDS + PHRASES) for _ in range(rng.randint(2, 6)))
+            for _ in range(rng.randint(1, 4))
+        )
+        title_terms, title_length = count_terms(f"{title}\n{translated_title}")
+        body_terms, body_length = count_terms(content)
+        doc = DocumentIndex(
+            file_path='', vendor=vendor, doc_type='blog', filename=f"doc_{i:06d}.md",
+            title=title, translated_title=translated_title, content='', date='2025-01-01',
+            has_analysis=False, last_modified=0.0, content_hash='',
+            title_terms=title_terms, body_terms=body_terms,
+            title_length=title_length, body_length=body_length
+        )
+        documents.append((doc, content))
+    return documents
+
+
+def legacy_search(documents, query: str):
+    """旧版搜索：查询中各词（OR分组）任一组全部作为子串出现即命中"""
+    groups = [group.split() for group in query.lower().split(' or ')]
+    matched = set()
+    for doc, content in documents:
+        text = f"{doc.title}\n{doc.translated_title}\n{content}".lower()
+        if any(all(word in text for word in group) for group in groups):
+            matched.add(doc.key)
+    return matched
+
+
+def measure(func, repeat: int) -> float:
+    """返回平均耗时（毫秒）"""
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start_time) * 1000 / repeat
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="搜索倒排索引基准测试")
+    parser.add_argument("--docs", type=int, default=2000, help="合成文档数量")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数")
+    args = parser.parse_args()
+
+    documents = generate_documents(args.docs)
+    snapshot = SearchIndexSnapshot(doc for doc, _ in documents)
+
+    print(f"文档数: {len(documents)}  词项数: {snapshot.term_count}")
+    print(f"{'查询':<20}{'旧版命中':>10}{'索引命中':>10}{'漏检':>8}{'旧版(ms)':>12}{'索引(ms)':>12}")
+    total_missing = 0
+    for query in QUERIES:
+        legacy = legacy_search(documents, query)
+        indexed = {doc.key for doc, *_ in snapshot.search(query, max_results=len(documents))}
+        missing = legacy - indexed
+        total_missing += len(missing)
+        legacy_ms = measure(lambda: legacy_search(documents, query), args.repeat)
+        index_ms = measure(lambda: snapshot.search(query), args.repeat)
+        print(f"{query:<20}{len(legacy):>10}{len(indexed):>10}{len(missing):>8}"
+              f"{legacy_ms:>12.2f}{index_ms:>12.2f}")
+
+    print(f"漏检文档总数: {total_missing}")
+    return 1 if total_missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+时间线索引基准测试脚本
+
+用合成的文档目录条目对比首页时间线、本周/今日/最近K天更新的两种实现：
+- 旧实现：每次请求构建全部更新行、全量排序、逐条正则匹配+strptime解析日期，
+  并用嵌套扫描找出最近7个日期下的文档
+- 时间线索引：按日期分桶的有序索引，视图查询为区间查询
+
+不读写文件系统，只测量内存中的计算开销。
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from datetime import datetime, date, timedelta
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.web_server.document_catalog import CatalogEntry, TimelineIndex, parse_doc_date, normalize_sort_date
+
+VENDORS = ['aws', 'azure', 'gcp', 'huawei', 'tencentcloud', 'volcengine']
+DOC_TYPES = ['blog', 'whatsnew']
+
+
+def generate_entries(count: int, days: int, seed: int = 42):
+    """
+    生成合成目录条目
+
+    Args:
+        count: 文档数量
+        days: 文档日期分布的天数（以今天为终点）
+        seed: 随机种子
+
+    Returns:
+        CatalogEntry列表
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    entries = []
+    for i in range(count):
+        doc_date = today - timedelta(days=rng.randrange(days))
+        date_str = doc_date.strftime('%Y-%m-%d') if rng.random() < 0.9 else doc_date.strftime('%Y_%m_%d')
+        entries.append(CatalogEntry(
+            vendor=rng.choice(VENDORS),
+            doc_type=rng.choice(DOC_TYPES),
+            filename=f"{date_str}_doc_{i}.md",
+            has_raw=True,
+            raw_size=4096,
+            raw_title=f"Document {i}",
+            raw_date=date_str,
+            # 约80%的文档已有AI分析
+            has_analysis=rng.random() < 0.8,
+            translated_title=f"文档 {i}",
+            doc_date=parse_doc_date(date_str),
+            sort_date=normalize_sort_date(date_str)
+        ))
+    return entries
+
+
+def legacy_timeline(entries):
+    """旧的首页时间线实现：全量排序 + 嵌套扫描"""
+    timeline_updates = []
+    for entry in entries:
+        if not (entry.has_raw and entry.has_analysis):
+            continue
+        date_str = entry.raw_date
+        if re.match(r'\d{4}-\d{1,2}-\d{1,2}', date_str):
+            datetime.strptime(date_str, '%Y-%m-%d')
+        elif re.match(r'\d{4}_\d{1,2}_\d{1,2}', date_str):
+            datetime.strptime(date_str, '%Y_%m_%d')
+        else:
+            continue
+        timeline_updates.append(entry.to_update_row())
+    timeline_updates.sort(key=lambda x: x.get('date', ''), reverse=True)
+
+    unique_dates = set()
+    filtered_updates = []
+    for update in timeline_updates:
+        date_str = update.get('date', '')
+        if date_str and date_str not in unique_dates:
+            unique_dates.add(date_str)
+            filtered_updates.extend(u for u in timeline_updates if u.get('date', '') == date_str)
+            if len(unique_dates) >= 7:
+                break
+    return filtered_updates
+
+
+def legacy_range(entries, start: date, end: date):
+    """旧的本周/今日/最近K天实现：逐条解析日期后过滤、分组、排序"""
+    updates = {}
+    for entry in entries:
+        if not (entry.has_raw and entry.has_analysis):
+            continue
+        date_str = entry.raw_date
+        if re.match(r'\d{4}-\d{1,2}-\d{1,2}', date_str):
+            doc_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        elif re.match(r'\d{4}_\d{1,2}_\d{1,2}', date_str):
+            doc_date = datetime.strptime(date_str, '%Y_%m_%d').date()
+        else:
+            continue
+        if start <= doc_date <= end:
+            updates.setdefault(entry.vendor, []).append(entry.to_update_row())
+    for rows in updates.values():
+        rows.sort(key=lambda row: normalize_sort_date(row['date']), reverse=True)
+    return updates
+
+
+def measure(func, repeat: int) -> float:
+    """返回多次执行的平均耗时（毫秒）"""
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start_time) * 1000 / repeat
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="时间线索引基准测试")
+    parser.add_argument("--sizes", default="10000,50000,100000", help="文档数量列表，逗号分隔")
+    parser.add_argument("--days", type=int, default=730, help="文档日期分布的天数")
+    parser.add_argument("--repeat", type=int, default=5, help="每项查询重复次数")
+    args = parser.parse_args()
+
+    today = date.today()
+    start_of_week = today - timedelta(days=today.weekday())
+    views = [
+        ("首页(最近7个日期)", lambda entries: legacy_timeline(entries), lambda index: index.latest(7)),
+        ("本周", lambda entries: legacy_range(entries, start_of_week, start_of_week + timedelta(days=6)),
+         lambda index: index.range(start_of_week, start_of_week + timedelta(days=6))),
+        ("今日", lambda entries: legacy_range(entries, today, today), lambda index: index.range(today, today)),
+        ("最近3天", lambda entries: legacy_range(entries, today - timedelta(days=2), today),
+         lambda index: index.range(today - timedelta(days=2), today)),
+    ]
+
+    print(f"{'文档数':>8}  {'视图':<16}{'旧实现(ms)':>12}{'索引(ms)':>12}{'加速比':>10}")
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        entries = generate_entries(size, args.days)
+        build_ms = measure(lambda: TimelineIndex(entries), 1)
+        index = TimelineIndex(entries)
+        print(f"{size:>8}  {'索引构建':<16}{'':>12}{build_ms:>12.2f}")
+        for name, legacy, indexed in views:
+            legacy_ms = measure(lambda: legacy(entries), args.repeat)
+            index_ms = measure(lambda: indexed(index), args.repeat)
+            print(f"{size:>8}  {name:<16}{legacy_ms:>12.2f}{index_ms:>12.3f}{legacy_ms / max(index_ms, 1e-6):>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+元数据迁移脚本
+
+将现有的 crawler_metadata.json 和 analysis_metadata.json（包括未压缩的journal日志）
+一次性迁移到SQLite元数据库。迁移完成后将 config/metadata.yaml 中的
+storage_backend 设置为 sqlite 即可启用SQLite后端。
+"""
+
+import os
+import sys
+import logging
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.colored_logger import setup_colored_logging
+from src.utils.metadata_store import load_metadata_store_config
+from src.utils.sqlite_metadata_manager import SqliteMetadataManager
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="将JSON元数据迁移到SQLite元数据库")
+    parser.add_argument("--type", default="all", choices=["crawler", "analysis", "all"], help="要迁移的元数据类型")
+    parser.add_argument("--db-path", help="SQLite数据库路径，默认使用配置中的 metadata.sqlite.db_path")
+    args = parser.parse_args()
+    
+    # 设置日志
+    setup_colored_logging()
+    logger = logging.getLogger(__name__)
+    
+    store_config = dict(load_metadata_store_config(str(project_root)))
+    sqlite_config = dict(store_config.get('sqlite', {}) or {})
+    if args.db_path:
+        sqlite_config['db_path'] = os.path.abspath(args.db_path)
+    # 由本脚本显式执行迁移，避免初始化时自动迁移导致重复导入
+    sqlite_config['auto_migrate'] = False
+    store_config['sqlite'] = sqlite_config
+    
+    manager = SqliteMetadataManager(str(project_root), store_config)
+    logger.info(f"开始迁移元数据到: {manager.db_path}")
+    
+    counts = manager.import_from_json(
+        crawler=args.type in ('crawler', 'all'),
+        analysis=args.type in ('analysis', 'all')
+    )
+    
+    logger.info(f"迁移完成！爬虫元数据 {counts['crawler']} 条，分析元数据 {counts['analysis']} 条")
+    if store_config.get('storage_backend') != 'sqlite':
+        logger.info("将 config/metadata.yaml 中的 storage_backend 设置为 sqlite 以启用SQLite元数据库")
+
+if __name__ == "__main__":
+    main()
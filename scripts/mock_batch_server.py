@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+本地模拟的OpenAI兼容Batch API服务
+
+用于在不消耗额度的情况下验证 engine: "batch" 的完整流程（上传、创建、轮询、下载、
+写入分析文档）。实现了以下接口（路径前缀任意，如 /v1）：
+
+    POST /files                    上传 purpose=batch 的JSONL文件
+    POST /batches                  创建批处理任务
+    GET  /batches/{id}             查询批处理任务
+    GET  /files/{id}/content       下载输入/输出/错误文件
+    POST /chat/completions         实时调用（批处理失败回退时使用）
+
+批处理任务创建后经过 --delay 秒完成。每个请求的响应内容由请求中的任务说明生成，
+--fail-rate 指定的比例的请求（按 custom_id 确定）写入错误文件。
+
+用法:
+    python scripts/mock_batch_server.py --port 8765 --delay 3 --fail-rate 0.1
+
+然后在配置中把模型的 api_base 指向 http://127.0.0.1:8765/v1 ，并设置
+execution_settings.engine: "batch"（或运行 analyze 时加 --batch）。
+"""
+
+import re
+import sys
+import json
+import time
+import uuid
+import hashlib
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class MockBatchState:
+    """模拟服务的文件和批处理任务"""
+
+    def __init__(self, delay: float = 3.0, fail_rate: float = 0.0):
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.files = {}
+        self.batches = {}
+        self.chat_requests = 0
+        self.lock = threading.Lock()
+
+    def should_fail(self, custom_id: str) -> bool:
+        """按 custom_id 的hash确定请求是否失败，同一请求每次结果相同"""
+        if self.fail_rate <= 0:
+            return False
+        digest = int(hashlib.sha256(custom_id.encode('utf-8')).hexdigest()[:8], 16)
+        return digest / 0xffffffff < self.fail_rate
+
+
+def mock_completion(body: dict) -> dict:
+    """根据请求体生成 chat/completions 响应"""
+    user_content = ''
+    for message in body.get('messages', []):
+        if message.get('role') == 'user':
+            content = message.get('content')
+            if isinstance(content, list):
+                content = ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+            user_content = content or ''
+    # 用户消息最后一行（任务说明的最后一行）
+    lines = [line for line in user_content.splitlines() if line.strip()]
+    instruction = lines[-1].strip() if lines else ''
+    text = f"模拟结果 ({body.get('model')}): {instruction[:60]}"
+    prompt_tokens = len(user_content) // 4
+    return {
+        'id': f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body.get('model'),
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': len(text) // 4,
+                  'total_tokens': prompt_tokens + len(text) // 4}
+    }
+
+
+def make_handler(state: MockBatchState):
+    """创建绑定到 state 的请求处理类"""
+
+    class MockBatchHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, data, status: int = 200):
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_error(self, status: int, message: str):
+            self._send_json({'error': {'message': message, 'type': 'invalid_request_error'}}, status)
+
+        def _read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        def do_POST(self):
+            path = self.path.split('?', 1)[0]
+            body = self._read_body()
+            if path.endswith('/files'):
+                return self._upload(body)
+            if path.endswith('/batches'):
+                return self._create_batch(json.loads(body))
+            if path.endswith('/chat/completions'):
+                with state.lock:
+                    state.chat_requests += 1
+                return self._send_json(mock_completion(json.loads(body)))
+            self._send_error(404, f"未知接口: {path}")
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            match = re.search(r'/batches/([^/]+)$', path)
+            if match:
+                return self._retrieve_batch(match.group(1))
+            match = re.search(r'/files/([^/]+)/content$', path)
+            if match:
+                with state.lock:
+                    data = state.files.get(match.group(1))
+                if data is None:
+                    return self._send_error(404, "文件不存在")
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/jsonl')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            self._send_error(404, f"未知接口: {path}")
+
+        def _upload(self, body: bytes):
+            message = BytesParser(policy=default_policy).parsebytes(
+                b'Content-Type: ' + self.headers['Content-Type'].encode('latin-1') + b'\r\n\r\n' + body
+            )
+            data = None
+            purpose = None
+            for part in message.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                if name == 'file':
+                    data = part.get_payload(decode=True)
+                elif name == 'purpose':
+                    purpose = part.get_content().strip()
+            if data is None or purpose != 'batch':
+                return self._send_error(400, "需要 purpose=batch 的 file 字段")
+            file_id = f"file-{uuid.uuid4().hex[:12]}"
+            with state.lock:
+                state.files[file_id] = data
+            self._send_json({'id': file_id, 'object': 'file', 'bytes': len(data), 'purpose': 'batch'})
+
+        def _create_batch(self, payload: dict):
+            with state.lock:
+                data = state.files.get(payload.get('input_file_id'))
+                if data is None:
+                    return self._send_error(400, "input_file_id 不存在")
+                batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+                total = sum(1 for line in data.decode('utf-8').splitlines() if line.strip())
+                state.batches[batch_id] = {
+                    'id': batch_id,
+                    'object': 'batch',
+                    'endpoint': payload.get('endpoint'),
+                    'input_file_id': payload.get('input_file_id'),
+                    'completion_window': payload.get('completion_window'),
+                    'metadata': payload.get('metadata'),
+                    'status': 'validating',
+                    'created_at': int(time.time()),
+                    'output_file_id': None,
+                    'error_file_id': None,
+                    'request_counts': {'total': total, 'completed': 0, 'failed': 0}
+                }
+                batch = dict(state.batches[batch_id])
+            self._send_json(batch)
+
+        def _retrieve_batch(self, batch_id: str):
+            with state.lock:
+                batch = state.batches.get(batch_id)
+                if batch is None:
+                    return self._send_error(404, "批处理任务不存在")
+                if batch['status'] == 'validating':
+                    batch['status'] = 'in_progress'
+                elif batch['status'] == 'in_progress' and time.time() - batch['created_at'] >= state.delay:
+                    self._complete(batch)
+                batch = dict(batch)
+            self._send_json(batch)
+
+        def _complete(self, batch: dict):
+            """执行批处理中的所有请求，生成输出文件和错误文件（调用方持有锁）"""
+            outputs, errors = [], []
+            for line in state.files[batch['input_file_id']].decode('utf-8').splitlines():
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                custom_id = request['custom_id']
+                record = {'id': f"batch_req_{uuid.uuid4().hex[:12]}", 'custom_id': custom_id}
+                if state.should_fail(custom_id):
+                    record['response'] = None
+                    record['error'] = {'code': 'server_error', 'message': '模拟的请求失败'}
+                    errors.append(record)
+                else:
+                    record['response'] = {'status_code': 200, 'request_id': uuid.uuid4().hex,
+                                          'body': mock_completion(request['body'])}
+                    record['error'] = None
+                    outputs.append(record)
+            for key, records in (('output_file_id', outputs), ('error_file_id', errors)):
+                if records:
+                    file_id = f"file-{uuid.uuid4().hex[:12]}"
+                    state.files[file_id] = ''.join(
+                        json.dumps(record, ensure_ascii=False) + '\n' for record in records
+                    ).encode('utf-8')
+                    batch[key] = file_id
+            batch['status'] = 'completed'
+            batch['completed_at'] = int(time.time())
+            batch['request_counts'] = {'total': len(outputs) + len(errors), 'completed': len(outputs), 'failed': len(errors)}
+
+    return MockBatchHandler
+
+
+def create_server(host: str = '127.0.0.1', port: int = 0, delay: float = 3.0, fail_rate: float = 0.0):
+    """
+    创建模拟服务（未启动），port 为0时使用随机端口
+
+    Returns:
+        (ThreadingHTTPServer, MockBatchState)
+    """
+    state = MockBatchState(delay=delay, fail_rate=fail_rate)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的OpenAI兼容Batch API服务")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--port', type=int, default=8765, help="监听端口")
+    parser.add_argument('--delay', type=float, default=3.0, help="批处理任务从创建到完成的秒数")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="写入错误文件的请求比例 (0-1)")
+    args = parser.parse_args()
+
+    server, _ = create_server(args.host, args.port, args.delay, args.fail_rate)
+    print(f"模拟Batch API服务已启动: http://{args.host}:{server.server_port}/v1 (Ctrl+C 退出)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
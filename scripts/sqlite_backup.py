@@ -9,7 +9,6 @@ SQLite备份脚本
 
 import os
 import sys
-import json
 import sqlite3
 import logging
 import datetime
@@ -22,6 +21,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # 导入项目配置加载器和日志模块
 from src.utils.config_loader import get_config
 from src.utils.colored_logger import setup_colored_logging
+from src.utils.metadata_store import JournalMetadataStore
 
 # 初始化配置和日志
 config = get_config()
@@ -151,18 +151,30 @@ class SQLiteBackup:
             return raw_path.replace('data/raw/', 'data/analysis/', 1)
         return raw_path
         
+    def _load_metadata_file(self, metadata_file):
+        """
+        加载元数据快照并重放其追加日志（journal后端尚未压缩进快照的变更）
+        
+        没有日志文件时等同于直接读取JSON快照；只读取，不压缩日志
+        """
+        return JournalMetadataStore(metadata_file).load()
+    
+    def _metadata_exists(self, metadata_file):
+        """快照或追加日志任一存在即视为有元数据"""
+        return os.path.exists(metadata_file) or \
+            os.path.exists(f"{metadata_file}{JournalMetadataStore.JOURNAL_SUFFIX}")
+        
     def backup_crawler_metadata(self):
         """备份爬虫元数据到SQLite"""
         logger.info("开始备份爬虫元数据")
         
         metadata_file = os.path.join(self.metadata_dir, 'crawler_metadata.json')
-        if not os.path.exists(metadata_file):
+        if not self._metadata_exists(metadata_file):
             logger.error(f"爬虫元数据文件不存在: {metadata_file}")
             return 0
         
         try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
+            metadata = self._load_metadata_file(metadata_file)
             
             cursor = self.conn.cursor()
             count = 0
@@ -208,13 +220,12 @@ class SQLiteBackup:
         logger.info("开始备份分析元数据")
         
         metadata_file = os.path.join(self.metadata_dir, 'analysis_metadata.json')
-        if not os.path.exists(metadata_file):
+        if not self._metadata_exists(metadata_file):
             logger.error(f"分析元数据文件不存在: {metadata_file}")
             return 0
         
         try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
+            metadata = self._load_metadata_file(metadata_file)
             
             cursor = self.conn.cursor()
             count = 0
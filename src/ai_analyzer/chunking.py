@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+长文档分块
+
+长文档整篇交给模型翻译时，输出可能超过 max_tokens 或请求超时，失败后只能整篇重来。
+这里按Markdown标题和段落边界把文档切分为不超过token预算的分块，各分块单独调用模型，
+结果按原顺序拼接。
+
+token数使用本地估算：安装了 tiktoken 时使用 cl100k_base 编码计数，否则按字符类别
+估算（中日韩字符每个约1个token，其他字符约4个一个token）。估算只用于控制分块大小，
+不需要与各模型的分词器完全一致。
+"""
+
+import re
+import math
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from .exceptions import AIAnalyzerError
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# 分块请求附加在任务提示之后的说明
+CHUNK_INSTRUCTION = (
+    "\n\n注意：输入是一篇长文档的第 {index}/{total} 部分，请只处理这一部分内容，"
+    "保持原有的Markdown结构，直接输出结果，不要添加开场白、总结或对其他部分的说明。"
+)
+# 各分块结果之间的分隔
+CHUNK_SEPARATOR = "\n\n"
+
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+_HEADING_RE = re.compile(r'^#{1,6}\s')
+_FENCE_RE = re.compile(r'^\s*(```|~~~)')
+# 超长段落按句子（句末标点及其后的空白）、再按空白切分
+_SENTENCE_RE = re.compile(r'[^。！？；.!?;]*(?:[。！？；.!?;]+|$)\s*')
+_WORD_RE = re.compile(r'\s+|\S+\s*')
+# 小于预算的该比例的分块并入相邻分块
+MIN_CHUNK_RATIO = 0.1
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """延迟加载 tiktoken 编码（首次加载需要读取编码文件）"""
+    global _encoding
+    if tiktoken is None:
+        return None
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                _encoding = tiktoken.get_encoding('cl100k_base')
+            except Exception as e:
+                logger.warning(f"加载 tiktoken 编码失败，改用字符估算: {e}")
+                _encoding = False
+    return _encoding or None
+
+
+def _estimate_tokens_float(text: str) -> float:
+    """估算token数（不取整，用于累加多个片段）"""
+    if not text:
+        return 0.0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return float(len(encoding.encode(text, disallowed_special=())))
+    cjk_count = len(_CJK_RE.findall(text))
+    return cjk_count + (len(text) - cjk_count) / 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的token数
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(_estimate_tokens_float(text))
+
+
+def chunk_token_budget(chunking_config: Dict[str, Any], model_max_tokens: Optional[int]) -> int:
+    """
+    计算每个分块的输入token预算
+
+    分块的输出（翻译结果）大致与输入成比例，预算取 max_input_tokens 和
+    模型 max_tokens / output_ratio 中较小的一个。
+
+    Args:
+        chunking_config: 任务的 chunking 配置
+        model_max_tokens: 模型的最大输出token数
+
+    Returns:
+        每个分块的最大输入token数
+    """
+    budget = int(chunking_config.get('max_input_tokens', 3000))
+    output_ratio = float(chunking_config.get('output_ratio', 2.0))
+    if model_max_tokens and output_ratio > 0:
+        budget = min(budget, int(model_max_tokens / output_ratio))
+    return max(100, budget)
+
+
+def _split_blocks(text: str) -> List[str]:
+    """
+    按空行和标题把文档切分为块，代码块保持完整
+
+    各块保留其后的空行，拼接所有块得到原文。
+    """
+    blocks: List[str] = []
+    current: List[str] = []
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        if _FENCE_RE.match(line):
+            if not in_fence and current:
+                # 代码块从新块开始
+                blocks.append(''.join(current))
+                current = []
+            in_fence = not in_fence
+            current.append(line)
+            continue
+        if in_fence:
+            current.append(line)
+            continue
+        if _HEADING_RE.match(line) and current:
+            blocks.append(''.join(current))
+            current = []
+        elif stripped and current and not current[-1].strip():
+            # 空行之后的新段落
+            blocks.append(''.join(current))
+            current = []
+        current.append(line)
+    if current:
+        blocks.append(''.join(current))
+    return blocks
+
+
+def _hard_split(text: str, max_tokens: int) -> List[str]:
+    """
+    切分没有空白、仍然超过预算的文本（如连续的中文）
+
+    安装了 tiktoken 时按token边界切分，否则按估算的每token字符数切分。
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        pieces = []
+        start = 0
+        for end in range(max_tokens, len(tokens) + max_tokens, max_tokens):
+            piece = encoding.decode(tokens[start:end])
+            # 多字节字符被切开时把切点往前移到完整字符处
+            while end < len(tokens) and '�' in piece[-1:] and end - start > 1:
+                end -= 1
+                piece = encoding.decode(tokens[start:end])
+            pieces.append(piece)
+            start = end
+            if start >= len(tokens):
+                break
+        return [piece for piece in pieces if piece]
+    chars_per_piece = max(1, int(len(text) * max_tokens / max(1.0, _estimate_tokens_float(text))))
+    return [text[i:i + chars_per_piece] for i in range(0, len(text), chars_per_piece)]
+
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """
+    把超过预算的块切分为可以逐个装入分块的单元
+
+    依次按行、句子、空白切分，只有没有空白的超长片段才会被硬切分；
+    各单元拼接后得到原文。
+    """
+    units: List[str] = []
+    for line in block.splitlines(keepends=True):
+        if _estimate_tokens_float(line) <= max_tokens:
+            units.append(line)
+            continue
+        for sentence in _SENTENCE_RE.findall(line):
+            if not sentence:
+                continue
+            if _estimate_tokens_float(sentence) <= max_tokens:
+                units.append(sentence)
+                continue
+            for word in _WORD_RE.findall(sentence):
+                if _estimate_tokens_float(word) <= max_tokens:
+                    units.append(word)
+                else:
+                    units.extend(_hard_split(word, max_tokens))
+    return units
+
+
+def _split_prefix(block: str, max_tokens: float) -> Tuple[str, str]:
+    """
+    取出块中不超过预算的最长前缀（按行、句子、空白边界）
+
+    Returns:
+        (前缀, 剩余部分)，预算内放不下任何单元时前缀为空
+    """
+    if max_tokens < 1:
+        return '', block
+    pieces = _split_oversized(block, int(max_tokens))
+    used = 0.0
+    count = 0
+    for piece in pieces:
+        piece_tokens = _estimate_tokens_float(piece)
+        if used + piece_tokens > max_tokens:
+            break
+        used += piece_tokens
+        count += 1
+    return ''.join(pieces[:count]), ''.join(pieces[count:])
+
+
+def split_markdown(text: str, max_tokens: int) -> List[str]:
+    """
+    按标题和段落边界把Markdown文档切分为不超过token预算的分块
+
+    尽量把多个段落放进同一个分块；当前分块已用去一半以上预算时，遇到标题就开始新分块，
+    使分块尽量与章节对齐，标题和其后的内容放在同一个分块中。单个段落超过预算时按行、
+    句子和空白继续切分；代码块不切分，超过预算时单独作为一个分块。过小的分块在不超出预算时
+    并入相邻分块。除超过预算的代码块外，分块都不超过预算。
+
+    Args:
+        text: 文档内容
+        max_tokens: 每个分块的最大token数（估算）
+
+    Returns:
+        分块列表，按顺序拼接得到原文
+    """
+    # (文本, token数, 是否为标题, 所属块序号)
+    units: List[Tuple[str, float, bool, int]] = []
+    for block_index, block in enumerate(_split_blocks(text)):
+        block_tokens = _estimate_tokens_float(block)
+        is_heading = bool(_HEADING_RE.match(block))
+        if block_tokens <= max_tokens:
+            units.append((block, block_tokens, is_heading, block_index))
+        elif _FENCE_RE.match(block):
+            logger.warning(f"代码块约 {int(block_tokens)} tokens，超过分块预算 {max_tokens}，不切分")
+            units.append((block, block_tokens, False, block_index))
+        else:
+            for index, piece in enumerate(_split_oversized(block, max_tokens)):
+                units.append((piece, _estimate_tokens_float(piece), is_heading and index == 0, block_index))
+
+    chunks: List[Tuple[str, float]] = []
+    current: List[Tuple[str, float, bool, int]] = []
+    current_tokens = 0.0
+    index = 0
+    while index < len(units):
+        unit_text, unit_tokens, is_heading, block_index = units[index]
+        if current and (current_tokens + unit_tokens > max_tokens or
+                        (is_heading and current_tokens >= max_tokens / 2)):
+            # 末尾的标题留给下一个分块，不单独成块
+            split = len(current)
+            while split and current[split - 1][2]:
+                split -= 1
+            carried = current[split:]
+            room = max_tokens - sum(u[1] for u in carried)
+            if carried and unit_tokens > room:
+                head, _ = _split_prefix(unit_text, room)
+                if head and not is_heading and not _FENCE_RE.match(unit_text):
+                    # 标题加上整个单元超出预算时，只把单元能放下的前一部分和标题放在一起，
+                    # 同一个块的剩余部分重新切分
+                    end = index
+                    while end < len(units) and units[end][3] == block_index:
+                        end += 1
+                    rest = ''.join(u[0] for u in units[index:end])[len(head):]
+                    units[index:end] = [(head, _estimate_tokens_float(head), False, block_index)] + [
+                        (piece, _estimate_tokens_float(piece), False, block_index)
+                        for piece in _split_oversized(rest, max_tokens)
+                    ]
+                    unit_tokens = units[index][1]
+                else:
+                    # 无法切分时标题留在当前分块末尾
+                    split = len(current)
+                    carried = []
+            if split:
+                chunks.append((''.join(u[0] for u in current[:split]), sum(u[1] for u in current[:split])))
+            current = carried
+            current_tokens = sum(u[1] for u in current)
+        current.append(units[index])
+        current_tokens += unit_tokens
+        index += 1
+    if current:
+        chunks.append((''.join(u[0] for u in current), current_tokens))
+
+    # 过小的分块在不超出预算时并入相邻分块，只有空白的分块总是并入，不单独发送请求
+    min_tokens = max_tokens * MIN_CHUNK_RATIO
+    merged: List[Tuple[str, float]] = []
+    for chunk_text, chunk_tokens in chunks:
+        if merged and (not chunk_text.strip() or
+                       ((chunk_tokens < min_tokens or merged[-1][1] < min_tokens) and
+                        merged[-1][1] + chunk_tokens <= max_tokens)):
+            merged[-1] = (merged[-1][0] + chunk_text, merged[-1][1] + chunk_tokens)
+        else:
+            merged.append((chunk_text, chunk_tokens))
+    return [chunk_text for chunk_text, _ in merged]
+
+
+def build_chunk_prompt(task_prompt: str, index: int, total: int) -> str:
+    """
+    分块请求的任务提示
+
+    Args:
+        task_prompt: 原任务提示
+        index: 分块序号（从0开始）
+        total: 分块总数
+
+    Returns:
+        附加了分块说明的任务提示
+    """
+    return task_prompt + CHUNK_INSTRUCTION.format(index=index + 1, total=total)
+
+
+class ChunkAssembler:
+    """
+    按原顺序拼接分块结果
+
+    分块可以以任意顺序完成，前面的分块都完成后，连续完成的分块依次交给 on_text
+    （如写入分析文档）。
+    """
+
+    def __init__(self, total: int, on_text: Optional[Callable[[str], None]] = None):
+        """
+        初始化拼接器
+
+        Args:
+            total: 分块总数
+            on_text: 按顺序输出已完成内容的回调（包括分块之间的分隔）
+        """
+        self.total = total
+        self._on_text = on_text
+        self._results: List[Optional[str]] = [None] * total
+        self._errors: Dict[int, Exception] = {}
+        self._next_to_emit = 0
+        self._lock = threading.Lock()
+
+    def add(self, index: int, text: str):
+        """记录一个分块的结果"""
+        with self._lock:
+            self._results[index] = text.strip()
+            while self._next_to_emit < self.total and self._results[self._next_to_emit] is not None:
+                if self._on_text:
+                    separator = CHUNK_SEPARATOR if self._next_to_emit > 0 else ''
+                    self._on_text(separator + self._results[self._next_to_emit])
+                self._next_to_emit += 1
+
+    def fail(self, index: int, error: Exception):
+        """记录一个分块的失败（该分块已用完重试次数）"""
+        with self._lock:
+            self._errors[index] = error
+
+    @property
+    def failed_indexes(self) -> List[int]:
+        """失败的分块序号"""
+        with self._lock:
+            return sorted(self._errors)
+
+    def result(self) -> str:
+        """
+        拼接后的完整结果
+
+        Raises:
+            AIAnalyzerError: 有分块失败或尚未完成
+        """
+        with self._lock:
+            if self._errors:
+                first_index = min(self._errors)
+                raise AIAnalyzerError(
+                    f"{len(self._errors)}/{self.total} 个分块失败 (分块 {', '.join(str(i + 1) for i in sorted(self._errors))})，"
+                    f"第一个错误: {self._errors[first_index]}"
+                )
+            if any(result is None for result in self._results):
+                raise AIAnalyzerError("分块结果不完整")
+            return CHUNK_SEPARATOR.join(self._results)
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import logging
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .openai_compatible import OpenAICompatibleAI, StreamResult, parse_stream_line, record_usage
+from ..exceptions import APIError, ParseError, StreamInterruptedError
+
+logger = logging.getLogger(__name__)
+
+
+def is_available() -> bool:
+    """是否安装了 aiohttp（asyncio执行模式的依赖）"""
+    return aiohttp is not None
+
+
+def create_client_session(max_connections: int, timeout_seconds: float = 300):
+    """
+    创建共享的 aiohttp 会话
+
+    会话内的连接池最多保持 max_connections 个连接，HTTP/1.1 keep-alive 连接在
+    请求之间复用，不必每次重新握手。
+
+    Args:
+        max_connections: 连接池的最大连接数
+        timeout_seconds: 单次请求的总超时时间（秒）
+
+    Returns:
+        aiohttp.ClientSession，需要在事件循环内使用并关闭
+    """
+    if aiohttp is None:
+        raise ImportError("asyncio执行模式需要安装 aiohttp")
+    connector = aiohttp.TCPConnector(limit=max_connections, limit_per_host=max_connections, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout_seconds))
+
+
+def retryable_exceptions() -> tuple:
+    """可重试的网络错误类型（连接失败、超时等）"""
+    if aiohttp is None:
+        return (asyncio.TimeoutError,)
+    return (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class AsyncOpenAICompatibleAI(OpenAICompatibleAI):
+    """
+    OpenAICompatibleAI 的异步版本
+
+    请求构建和响应解析与同步客户端相同，请求通过共享的 aiohttp 会话发送。
+    HTTP 429/5xx 以带状态码的 APIError 抛出，由 RetryWithExponentialBackoff.execute_async 重试。
+    """
+
+    def __init__(self, config, session):
+        super().__init__(config, session=session)
+
+    async def predict(self, prompt, document=None):
+        logger.debug(f"准备向模型 {self.model_name} (provider: {self.provider}) 发送异步请求")
+        try:
+            request_data = self._build_request_data(prompt, document=document)
+        except Exception as e:
+            logger.error(f"构建API请求数据时失败: {e}")
+            raise APIError(f"构建API请求数据失败: {e}") from e
+
+        start_time = time.time()
+        async with self.session.post(
+            request_data["url"],
+            headers=request_data["headers"],
+            json=request_data["payload"]
+        ) as response:
+            response_text = await response.text()
+            status_code = response.status
+        request_time = time.time() - start_time
+        logger.info(f"API调用完成，耗时: {request_time:.2f}秒, 响应状态码: {status_code}")
+
+        if status_code != 200:
+            error_message_base = f"API调用失败: HTTP状态码 {status_code}"
+            logger.warning(f"{error_message_base}. 响应 (前500字符): {response_text[:500]}")
+            raise APIError(error_message_base, status_code=status_code, response_text=response_text)
+
+        try:
+            response_json = json.loads(response_text)
+        except ValueError as e:
+            logger.error(f"API响应内容不是有效的JSON: {e}. 响应文本 (前500字符): {response_text[:500]}")
+            raise APIError(f"API响应内容不是有效的JSON: {e}. 响应: {response_text[:500]}") from e
+
+        if isinstance(response_json, dict):
+            record_usage(self.api_base, response_json.get('usage'))
+        try:
+            result = self._parse_response(response_json)
+            logger.info(f"解析后的响应长度: {len(result)} 字符")
+            return result
+        except ParseError as e:
+            logger.error(f"解析API响应失败: {e}")
+            raise APIError(f"解析API响应失败: {e}") from e
+
+    async def predict_stream(self, prompt, on_chunk=None, continuation=None, document=None) -> StreamResult:
+        """predict_stream 的异步版本，参数和异常与同步客户端相同"""
+        try:
+            request_data = self._build_request_data(prompt, continuation=continuation, stream=True, document=document)
+        except Exception as e:
+            logger.error(f"构建API请求数据时失败: {e}")
+            raise APIError(f"构建API请求数据失败: {e}") from e
+
+        start_time = time.time()
+        time_to_first_token = None
+        chunks = []
+        finish_reason = None
+        completion_tokens = None
+        try:
+            async with self.session.post(
+                request_data["url"],
+                headers=request_data["headers"],
+                json=request_data["payload"],
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=self.stream_idle_timeout)
+            ) as response:
+                if response.status != 200:
+                    response_text = await response.text()
+                    error_message_base = f"API调用失败: HTTP状态码 {response.status}"
+                    logger.error(f"{error_message_base}. 响应 (前500字符): {response_text[:500]}")
+                    raise APIError(error_message_base, status_code=response.status, response_text=response_text)
+                async for raw_line in response.content:
+                    event = parse_stream_line(raw_line.decode('utf-8').strip())
+                    if event is None:
+                        continue
+                    if event == '[DONE]':
+                        finish_reason = finish_reason or 'stop'
+                        break
+                    delta_text, event_finish_reason, usage = event
+                    if event_finish_reason:
+                        finish_reason = event_finish_reason
+                    if usage:
+                        record_usage(self.api_base, usage)
+                        completion_tokens = usage.get('completion_tokens')
+                    if delta_text:
+                        if time_to_first_token is None:
+                            time_to_first_token = time.time() - start_time
+                        chunks.append(delta_text)
+                        if on_chunk:
+                            on_chunk(delta_text)
+        except retryable_exceptions() as e:
+            partial_text = ''.join(chunks)
+            logger.warning(f"流式响应中断 (已收到 {len(partial_text)} 字符): {e!r}")
+            raise StreamInterruptedError(f"流式响应中断: {e!r}", partial_text=partial_text) from e
+        except ParseError as e:
+            raise APIError(f"解析流式响应失败: {e}") from e
+        if finish_reason is None:
+            # 连接被关闭但没有收到结束标记（[DONE]或finish_reason），视为中断
+            partial_text = ''.join(chunks)
+            logger.warning(f"流式响应未正常结束 (已收到 {len(partial_text)} 字符)")
+            raise StreamInterruptedError("流式响应未正常结束", partial_text=partial_text)
+
+        result = StreamResult(
+            text=''.join(chunks),
+            time_to_first_token=time_to_first_token,
+            elapsed=time.time() - start_time,
+            chunks=len(chunks),
+            completion_tokens=completion_tokens,
+            finish_reason=finish_reason
+        )
+        logger.info(
+            f"流式调用完成，耗时: {result.elapsed:.2f}秒, 首个token: {result.time_to_first_token or 0:.2f}秒, "
+            f"速度: {result.tokens_per_second:.1f} tokens/秒, 长度: {len(result.text)} 字符"
+        )
+        return result
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+OpenAI兼容的Batch API客户端
+
+批量回填（如修改提示词后重新分析全部文档）时，把请求写成Batch API的JSONL格式
+（每行一个 {custom_id, method, url, body}），上传为 purpose=batch 的文件后创建批处理
+任务，服务端在 completion_window 内异步执行，完成后下载输出文件。批处理请求不占用
+实时接口的速率限制，价格通常也更低。
+
+请求体由 OpenAICompatibleAI._build_request_data 构建，与实时调用完全一致；输出文件中
+每行的 response.body 是普通的 chat/completions 响应，由 _parse_response 解析。
+"""
+
+import json
+import time
+import logging
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+import requests
+
+from ..exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+# 批处理任务的结束状态
+BATCH_TERMINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+# 默认的请求路径（JSONL中每行的url字段）
+DEFAULT_BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+def build_batch_line(custom_id: str, payload: Dict[str, Any], endpoint: str = DEFAULT_BATCH_ENDPOINT) -> str:
+    """
+    构建批处理输入文件的一行
+
+    Args:
+        custom_id: 请求标识，输出文件中按此对应结果
+        payload: chat/completions 请求体
+        endpoint: 请求路径
+
+    Returns:
+        JSON字符串（不含换行）
+    """
+    return json.dumps({
+        'custom_id': custom_id,
+        'method': 'POST',
+        'url': endpoint,
+        'body': payload
+    }, ensure_ascii=False)
+
+
+def parse_batch_results(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    解析批处理的输出文件或错误文件
+
+    Args:
+        text: 文件内容（JSONL）
+
+    Returns:
+        custom_id 到 {status_code, body, error} 的映射；请求成功时 status_code 为200、
+        body 为 chat/completions 响应，失败时 error 为错误信息
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            logger.warning(f"跳过无法解析的批处理结果行 {line_number}: {e}")
+            continue
+        custom_id = record.get('custom_id')
+        if not custom_id:
+            logger.warning(f"批处理结果行 {line_number} 缺少 custom_id")
+            continue
+        response = record.get('response') or {}
+        status_code = response.get('status_code')
+        body = response.get('body')
+        error = record.get('error')
+        if error is None and status_code != 200:
+            error = (body or {}).get('error') if isinstance(body, dict) else None
+            error = error or f"HTTP状态码 {status_code}"
+        results[custom_id] = {'status_code': status_code, 'body': body, 'error': error}
+    return results
+
+
+class BatchAPIClient:
+    """
+    OpenAI兼容Batch API（/files、/batches）的客户端
+
+    使用模型客户端的 api_base、api_key 和共享HTTP会话。
+    """
+
+    def __init__(self, model_client: Any, endpoint: str = DEFAULT_BATCH_ENDPOINT,
+                 completion_window: str = "24h", request_timeout: float = 300):
+        """
+        初始化批处理客户端
+
+        Args:
+            model_client: OpenAICompatibleAI 实例
+            endpoint: JSONL中每行的请求路径
+            completion_window: 批处理的完成时限
+            request_timeout: 单次HTTP请求的超时时间（秒）
+        """
+        self.model_client = model_client
+        self.endpoint = endpoint
+        self.completion_window = completion_window
+        self.request_timeout = request_timeout
+        api_base = model_client.api_base.rstrip('/')
+        if api_base.endswith('/chat/completions'):
+            api_base = api_base[:-len('/chat/completions')]
+        self.api_base = api_base
+        self.session = model_client.session
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.model_client.api_key}"}
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """发送请求，非2xx响应抛出带状态码的 APIError（429/5xx可由重试策略重试）"""
+        url = f"{self.api_base}{path}"
+        response = self.session.request(method, url, headers=self._headers(), timeout=self.request_timeout, **kwargs)
+        if response.status_code >= 300:
+            raise APIError(
+                f"Batch API调用失败: {method} {path} HTTP状态码 {response.status_code}",
+                status_code=response.status_code, response_text=response.text
+            )
+        return response
+
+    def _json(self, response: requests.Response) -> Dict[str, Any]:
+        try:
+            return response.json()
+        except ValueError as e:
+            raise APIError(f"Batch API响应不是有效的JSON: {e}. 响应: {response.text[:500]}") from e
+
+    def upload(self, lines: Iterable[str], filename: str = "batch_input.jsonl") -> str:
+        """
+        上传批处理输入文件
+
+        Args:
+            lines: build_batch_line 构建的行
+            filename: 上传的文件名
+
+        Returns:
+            文件ID
+        """
+        data = ''.join(line + '\n' for line in lines).encode('utf-8')
+        response = self._request(
+            'POST', '/files',
+            data={'purpose': 'batch'},
+            files={'file': (filename, data, 'application/jsonl')}
+        )
+        file_id = self._json(response).get('id')
+        if not file_id:
+            raise APIError(f"上传批处理文件后未返回文件ID: {response.text[:500]}")
+        logger.info(f"已上传批处理输入文件 {file_id} ({len(data)} 字节)")
+        return file_id
+
+    def create(self, input_file_id: str, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        创建批处理任务
+
+        Args:
+            input_file_id: upload 返回的文件ID
+            metadata: 附加在任务上的元数据
+
+        Returns:
+            批处理任务对象
+        """
+        payload = {
+            'input_file_id': input_file_id,
+            'endpoint': self.endpoint,
+            'completion_window': self.completion_window
+        }
+        if metadata:
+            payload['metadata'] = metadata
+        batch = self._json(self._request('POST', '/batches', json=payload))
+        logger.info(f"已创建批处理任务 {batch.get('id')}，状态: {batch.get('status')}")
+        return batch
+
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        """查询批处理任务"""
+        return self._json(self._request('GET', f'/batches/{batch_id}'))
+
+    def download(self, file_id: str) -> str:
+        """下载文件内容"""
+        response = self._request('GET', f'/files/{file_id}/content')
+        response.encoding = 'utf-8'
+        return response.text
+
+    def wait(self, batch_id: str, poll_interval: float = 30, timeout: Optional[float] = None,
+             retrieve=None) -> Dict[str, Any]:
+        """
+        轮询直到批处理任务结束
+
+        Args:
+            batch_id: 批处理任务ID
+            poll_interval: 轮询间隔（秒）
+            timeout: 最长等待时间（秒），None表示不限
+            retrieve: 查询任务的函数（如加上重试的 retrieve），默认为 self.retrieve
+
+        Returns:
+            结束状态的批处理任务对象
+
+        Raises:
+            APIError: 超过等待时间
+        """
+        retrieve = retrieve or self.retrieve
+        start_time = time.time()
+        last_progress = None
+        while True:
+            batch = retrieve(batch_id)
+            status = batch.get('status')
+            counts = batch.get('request_counts') or {}
+            progress = (status, counts.get('completed'), counts.get('failed'))
+            if progress != last_progress:
+                logger.info(
+                    f"批处理任务 {batch_id} 状态: {status}, 已完成: {counts.get('completed', 0)}/"
+                    f"{counts.get('total', '?')}, 失败: {counts.get('failed', 0)}"
+                )
+                last_progress = progress
+            if status in BATCH_TERMINAL_STATUSES:
+                return batch
+            if timeout is not None and time.time() - start_time > timeout:
+                raise APIError(f"批处理任务 {batch_id} 在 {timeout} 秒内未完成 (状态: {status})")
+            time.sleep(poll_interval)
+
+    def collect_results(self, batch: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        下载结束的批处理任务的输出文件和错误文件
+
+        Args:
+            batch: 结束状态的批处理任务对象
+
+        Returns:
+            custom_id 到结果的映射，见 parse_batch_results；未出现的请求没有结果（如任务过期）
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        for key in ('error_file_id', 'output_file_id'):
+            # 输出文件后解析，同一请求同时出现时以输出文件为准
+            file_id = batch.get(key)
+            if file_id:
+                results.update(parse_batch_results(self.download(file_id)))
+        return results
+
+    def extract_text(self, result: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        从单个请求的结果中取出模型输出
+
+        Args:
+            result: collect_results 中的一项
+
+        Returns:
+            (模型输出, 错误信息)，成功时错误信息为None
+        """
+        if result.get('error') is not None:
+            return None, str(result['error'])
+        try:
+            return self.model_client._parse_response(result.get('body')), None
+        except Exception as e:
+            return None, f"解析批处理响应失败: {e}"
+
+
+def split_batches(lines: List[str], max_requests: int, max_bytes: int) -> List[List[str]]:
+    """
+    按请求数和文件大小上限拆分批处理输入
+
+    Args:
+        lines: 输入行
+        max_requests: 每个批处理的最大请求数
+        max_bytes: 每个输入文件的最大字节数
+
+    Returns:
+        各批处理的输入行
+    """
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_bytes = 0
+    for line in lines:
+        line_bytes = len(line.encode('utf-8')) + 1
+        if current and (len(current) >= max_requests or current_bytes + line_bytes > max_bytes):
+            batches.append(current)
+            current = []
+            current_bytes = 0
+        current.append(line)
+        current_bytes += line_bytes
+    if current:
+        batches.append(current)
+    return batches
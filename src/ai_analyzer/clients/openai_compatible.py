@@ -4,19 +4,234 @@ import time
 import copy
 import random
 import os
+import json
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable
+from requests.adapters import HTTPAdapter
 
 # 从父目录的 exceptions 模块导入
-from ..exceptions import APIError, ParseError, AIAnalyzerError # AIAnalyzerError 也可能需要，以防某些地方仍然引用它
+from ..exceptions import APIError, ParseError, AIAnalyzerError, StreamInterruptedError # AIAnalyzerError 也可能需要，以防某些地方仍然引用它
 
 logger = logging.getLogger(__name__)
 
+# 流式输出中断后请求模型续写时追加的提示
+CONTINUATION_PROMPT = "输出在此处中断。请从中断处继续输出剩余内容，不要重复已输出的部分，也不要添加任何说明。"
+
+# 文档放在提示的前部（系统提示 + 文档构成同一文件各任务共享的前缀，可被提供商的提示缓存复用），
+# 任务说明放在文档之后
+DOCUMENT_HEADER = "--- FILE CONTENT BELOW ---\n"
+TASK_INSTRUCTION_HEADER = "\n--- END OF FILE CONTENT ---\n\n以上是需要处理的文档内容，请按以下要求处理：\n\n"
+
+# 支持在消息内容上标注 cache_control 显式缓存的提供商（阿里云百炼 OpenAI 兼容模式）
+CACHE_CONTROL_PROVIDERS = ("aliyun_compatible_full",)
+
+# 默认的连接池大小（每个 api_base 同时保持的最大连接数）
+DEFAULT_POOL_SIZE = 10
+
+# 进程内按 api_base 共享的会话：同一端点的请求复用keep-alive连接，不必每次重新握手
+_shared_sessions: Dict[str, requests.Session] = {}
+_shared_sessions_lock = threading.Lock()
+_session_request_counts: Dict[str, int] = {}
+# 按 api_base 累计的token用量（含命中提供商提示缓存的token数）
+_usage_stats: Dict[str, Dict[str, int]] = {}
+
+
+def get_shared_session(api_base: str, pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """
+    获取 api_base 对应的共享会话（线程安全）
+
+    requests.Session 的连接池（urllib3）可以在多个线程间共享。同一 api_base 第一次
+    创建会话时的 pool_size 决定连接池大小，超出的并发请求会临时新建连接，用完后关闭。
+
+    Args:
+        api_base: API基础URL
+        pool_size: 连接池的最大连接数，应不小于同时调用该端点的线程数
+
+    Returns:
+        共享的 requests.Session
+    """
+    with _shared_sessions_lock:
+        session = _shared_sessions.get(api_base)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _shared_sessions[api_base] = session
+            _session_request_counts[api_base] = 0
+            logger.info(f"为 {api_base} 创建共享HTTP会话，连接池大小: {pool_size}")
+        return session
+
+
+def get_session_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取各共享会话的连接复用统计
+
+    Returns:
+        api_base 到 {requests, connections, reused, reuse_rate} 的映射，connections 为新建的连接数
+    """
+    stats = {}
+    with _shared_sessions_lock:
+        for api_base, session in _shared_sessions.items():
+            connections = 0
+            # http和https挂载的是同一个adapter
+            adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+            for adapter in adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+            request_count = _session_request_counts.get(api_base, 0)
+            reused = max(0, request_count - connections)
+            stats[api_base] = {
+                'requests': request_count,
+                'connections': connections,
+                'reused': reused,
+                'reuse_rate': reused / request_count if request_count else 0.0
+            }
+    return stats
+
+
+def close_shared_sessions():
+    """关闭所有共享会话及其连接"""
+    with _shared_sessions_lock:
+        for session in _shared_sessions.values():
+            session.close()
+        _shared_sessions.clear()
+        _session_request_counts.clear()
+
+
+@dataclass
+class StreamResult:
+    """流式调用的结果和速度统计"""
+    text: str
+    time_to_first_token: Optional[float]
+    elapsed: float
+    chunks: int
+    completion_tokens: Optional[int] = None
+    finish_reason: Optional[str] = None
+
+    @property
+    def tokens_per_second(self) -> float:
+        """首个token之后的生成速度，服务端未返回用量时按数据块数估算"""
+        tokens = self.completion_tokens if self.completion_tokens is not None else self.chunks
+        generation_time = self.elapsed - (self.time_to_first_token or 0.0)
+        return tokens / generation_time if generation_time > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'time_to_first_token': round(self.time_to_first_token, 3) if self.time_to_first_token is not None else None,
+            'elapsed': round(self.elapsed, 3),
+            'chunks': self.chunks,
+            'completion_tokens': self.completion_tokens,
+            'tokens_per_second': round(self.tokens_per_second, 1),
+            'finish_reason': self.finish_reason
+        }
+
+
+def parse_stream_line(line: str):
+    """
+    解析一行SSE数据
+
+    Args:
+        line: 响应中的一行文本
+
+    Returns:
+        None（非数据行）、'[DONE]'，或 (增量文本, finish_reason, usage) 元组，usage 只在最后一个数据块中出现
+    """
+    if not line or not line.startswith('data:'):
+        return None
+    data = line[5:].strip()
+    if data == '[DONE]':
+        return data
+    try:
+        event = json.loads(data)
+    except ValueError as e:
+        raise ParseError(f"无法解析流式响应数据: {data[:200]}") from e
+    if isinstance(event, dict) and 'error' in event:
+        raise ParseError(f"API返回错误: {event['error']}")
+    delta_text = ''
+    finish_reason = None
+    choices = event.get('choices') or []
+    if choices:
+        delta_text = (choices[0].get('delta') or {}).get('content') or ''
+        finish_reason = choices[0].get('finish_reason')
+    return delta_text, finish_reason, event.get('usage')
+
+
+def extract_cached_tokens(usage: Dict[str, Any]) -> int:
+    """
+    从响应的 usage 字段中取出命中提示缓存的token数
+
+    OpenAI、阿里云百炼和 Gemini 的兼容接口使用 prompt_tokens_details.cached_tokens，
+    部分提供商直接在 usage 中返回 cached_tokens。
+    """
+    details = usage.get('prompt_tokens_details') or {}
+    cached_tokens = details.get('cached_tokens')
+    if cached_tokens is None:
+        cached_tokens = usage.get('cached_tokens')
+    return int(cached_tokens or 0)
+
+
+def record_usage(api_base: str, usage: Optional[Dict[str, Any]]):
+    """
+    累计一次响应的token用量
+
+    Args:
+        api_base: API基础URL
+        usage: 响应中的 usage 字段，没有时忽略
+    """
+    if not usage:
+        return
+    prompt_tokens = int(usage.get('prompt_tokens') or 0)
+    cached_tokens = extract_cached_tokens(usage)
+    with _shared_sessions_lock:
+        stats = _usage_stats.setdefault(
+            api_base, {'responses': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0}
+        )
+        stats['responses'] += 1
+        stats['prompt_tokens'] += prompt_tokens
+        stats['cached_tokens'] += cached_tokens
+        stats['completion_tokens'] += int(usage.get('completion_tokens') or 0)
+    logger.info(f"token用量: 提示 {prompt_tokens} (命中缓存 {cached_tokens}), 输出 {usage.get('completion_tokens')}")
+
+
+def get_usage_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取各端点累计的token用量
+
+    Returns:
+        api_base 到 {responses, prompt_tokens, cached_tokens, completion_tokens, cache_hit_rate} 的映射，
+        cache_hit_rate 为命中缓存的提示token占比
+    """
+    with _shared_sessions_lock:
+        return {
+            api_base: dict(stats, cache_hit_rate=stats['cached_tokens'] / stats['prompt_tokens'] if stats['prompt_tokens'] else 0.0)
+            for api_base, stats in _usage_stats.items()
+        }
+
+
+def _count_request(api_base: str):
+    with _shared_sessions_lock:
+        _session_request_counts[api_base] = _session_request_counts.get(api_base, 0) + 1
+
+
 class OpenAICompatibleAI:
-    def __init__(self, config):
+    def __init__(self, config, session=None):
         self.model_name = config.get('model')
         self.temperature = config.get('temperature')
         self.max_tokens = config.get('max_tokens')
         self.api_key = config.get('api_key')
         self.api_base = config.get('api_base')
+        self.pool_size = config.get('pool_size', DEFAULT_POOL_SIZE)
+        # 流式请求是否要求服务端在最后返回token用量（部分提供商不支持 stream_options）
+        self.stream_include_usage = config.get('stream_include_usage', False)
+        # 流式响应两次数据之间的最大等待时间（秒），超过视为中断
+        self.stream_idle_timeout = config.get('stream_idle_timeout', 60)
+        # 是否在文档内容上标注 cache_control（显式提示缓存），未配置时按提供商自动判断
+        self.prompt_cache_control = config.get('prompt_cache_control')
         
         self.system_prompt = config.get('system_prompt', '') 
         if not self.system_prompt:
@@ -40,6 +255,10 @@ class OpenAICompatibleAI:
         
         self.provider = self._identify_provider()
         logger.info(f"已识别API提供商: {self.provider}")
+        if self.prompt_cache_control is None:
+            self.prompt_cache_control = self.provider in CACHE_CONTROL_PROVIDERS
+        # 未指定会话时使用按 api_base 共享的会话
+        self.session = session if session is not None else get_shared_session(self.api_base, self.pool_size)
     
     def _identify_provider(self):
         if not self.api_base:
@@ -64,13 +283,13 @@ class OpenAICompatibleAI:
         else:
             return "custom"
     
-    def predict(self, prompt):
+    def predict(self, prompt, document=None):
         logger.debug(f"准备向模型 {self.model_name} (provider: {self.provider}) 发送请求")
         logger.debug(f"API基础URL: {self.api_base}")
         logger.debug(f"提示词长度: {len(prompt)} 字符")
         
         try:
-            request_data = self._build_request_data(prompt)
+            request_data = self._build_request_data(prompt, document=document)
         except Exception as e:
             logger.error(f"构建API请求数据时失败: {e}")
             raise APIError(f"构建API请求数据失败: {e}") from e
@@ -82,18 +301,18 @@ class OpenAICompatibleAI:
         log_payload = copy.deepcopy(request_data["payload"])
         if "messages" in log_payload and isinstance(log_payload["messages"], list):
             for i, msg in enumerate(log_payload["messages"]):
-                if "content" in msg and len(msg["content"]) > 100:
+                if isinstance(msg.get("content"), str) and len(msg["content"]) > 100:
                     msg["content"] = msg["content"][:100] + "... [内容已省略]"
         
         logger.info(f"完整请求URL: {request_data['url']}")
         logger.info(f"使用普通请求调用 {self.provider} API")
         
         start_time = time.time()
-        session = requests.Session()
 
         try:
             logger.info(f"开始发送请求: POST {request_data['url']}")
-            response = session.post(
+            _count_request(self.api_base)
+            response = self.session.post(
                 request_data["url"],
                 headers=request_data["headers"],
                 json=request_data["payload"],
@@ -133,6 +352,8 @@ class OpenAICompatibleAI:
             logger.error(f"API响应内容不是有效的JSON: {e}. 响应文本 (前500字符): {response.text[:500]}")
             raise APIError(f"API响应内容不是有效的JSON: {e}. 响应: {response.text[:500]}") from e
         
+        if isinstance(response_json, dict):
+            record_usage(self.api_base, response_json.get('usage'))
         try:
             result = self._parse_response(response_json)
             logger.info(f"解析后的响应长度: {len(result)} 字符")
@@ -146,15 +367,121 @@ class OpenAICompatibleAI:
             logger.error(f"调用_parse_response时发生意外错误: {e}")
             raise APIError(f"解析API响应时发生意外内部错误: {e}") from e
     
-    def _build_request_data(self, prompt):
+    def predict_stream(self, prompt, on_chunk: Optional[Callable[[str], None]] = None,
+                       continuation: Optional[str] = None, document: Optional[str] = None) -> StreamResult:
+        """
+        以流式（SSE）方式调用模型，每收到一段文本就回调 on_chunk
+
+        Args:
+            prompt: 用户提示
+            on_chunk: 收到增量文本时的回调
+            continuation: 上次中断前已收到的内容，提供时要求模型从中断处续写
+            document: 文档内容，见 _build_request_data
+
+        Returns:
+            StreamResult（text 只包含本次调用收到的内容）
+
+        Raises:
+            StreamInterruptedError: 连接中断或两次数据之间超过 stream_idle_timeout
+            APIError: HTTP错误或响应无法解析
+        """
+        try:
+            request_data = self._build_request_data(prompt, continuation=continuation, stream=True, document=document)
+        except Exception as e:
+            logger.error(f"构建API请求数据时失败: {e}")
+            raise APIError(f"构建API请求数据失败: {e}") from e
+
+        logger.info(f"使用流式请求调用 {self.provider} API{' (续写)' if continuation else ''}")
+        start_time = time.time()
+        time_to_first_token = None
+        chunks = []
+        finish_reason = None
+        completion_tokens = None
+        _count_request(self.api_base)
+        try:
+            with self.session.post(
+                request_data["url"],
+                headers=request_data["headers"],
+                json=request_data["payload"],
+                timeout=(30, self.stream_idle_timeout),
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    error_message_base = f"API调用失败: HTTP状态码 {response.status_code}"
+                    logger.error(f"{error_message_base}. 响应 (前500字符): {response.text[:500]}")
+                    raise APIError(error_message_base, status_code=response.status_code, response_text=response.text)
+                response.encoding = 'utf-8'
+                for line in response.iter_lines(decode_unicode=True):
+                    event = parse_stream_line(line)
+                    if event is None:
+                        continue
+                    if event == '[DONE]':
+                        finish_reason = finish_reason or 'stop'
+                        break
+                    delta_text, event_finish_reason, usage = event
+                    if event_finish_reason:
+                        finish_reason = event_finish_reason
+                    if usage:
+                        record_usage(self.api_base, usage)
+                        completion_tokens = usage.get('completion_tokens')
+                    if delta_text:
+                        if time_to_first_token is None:
+                            time_to_first_token = time.time() - start_time
+                        chunks.append(delta_text)
+                        if on_chunk:
+                            on_chunk(delta_text)
+        except requests.exceptions.RequestException as e:
+            partial_text = ''.join(chunks)
+            logger.warning(f"流式响应中断 (已收到 {len(partial_text)} 字符): {e}")
+            raise StreamInterruptedError(f"流式响应中断: {e}", partial_text=partial_text) from e
+        except ParseError as e:
+            raise APIError(f"解析流式响应失败: {e}") from e
+        if finish_reason is None:
+            # 连接被关闭但没有收到结束标记（[DONE]或finish_reason），视为中断
+            partial_text = ''.join(chunks)
+            logger.warning(f"流式响应未正常结束 (已收到 {len(partial_text)} 字符)")
+            raise StreamInterruptedError("流式响应未正常结束", partial_text=partial_text)
+
+        result = StreamResult(
+            text=''.join(chunks),
+            time_to_first_token=time_to_first_token,
+            elapsed=time.time() - start_time,
+            chunks=len(chunks),
+            completion_tokens=completion_tokens,
+            finish_reason=finish_reason
+        )
+        logger.info(
+            f"流式调用完成，耗时: {result.elapsed:.2f}秒, 首个token: {result.time_to_first_token or 0:.2f}秒, "
+            f"速度: {result.tokens_per_second:.1f} tokens/秒, 长度: {len(result.text)} 字符"
+        )
+        return result
+
+    def _build_request_data(self, prompt, continuation=None, stream=False, document=None):
+        """
+        构建请求
+
+        Args:
+            prompt: 用户提示（提供 document 时为任务说明）
+            continuation: 流式输出中断前已收到的内容
+            stream: 是否为流式请求
+            document: 文档内容。提供时放在任务说明之前，使同一文档的各个任务共享
+                      "系统提示 + 文档" 前缀，提供商可以复用该前缀的提示缓存
+
+        Returns:
+            包含 url、headers、payload 的字典
+        """
         headers = {
             "Content-Type": "application/json"
         }
         
         messages = [
             {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": prompt}
+            {"role": "user", "content": self._build_user_content(prompt, document)}
         ]
+        if continuation:
+            # 流式输出中断后续写：把已收到的内容作为助手回复，要求模型接着输出
+            messages.append({"role": "assistant", "content": continuation})
+            messages.append({"role": "user", "content": CONTINUATION_PROMPT})
         
         if self.log_full_prompt_enabled:
             logger.info("--- 开始记录完整提示信息 (调试模式) ---")
@@ -190,12 +517,30 @@ class OpenAICompatibleAI:
         if self.enable_search and self.provider in ["specific_provider_that_supports_search"]:
             payload["enable_search"] = self.enable_search
         
+        if stream:
+            payload["stream"] = True
+            if self.stream_include_usage:
+                payload["stream_options"] = {"include_usage": True}
+        
         return {
             "url": url,
             "headers": headers,
             "payload": payload
         }
     
+    def _build_user_content(self, prompt, document=None):
+        """用户消息内容：文档在前、任务说明在后；支持显式缓存的提供商在文档上标注 cache_control"""
+        if document is None:
+            return prompt
+        document_text = f"{DOCUMENT_HEADER}{document}"
+        instruction_text = f"{TASK_INSTRUCTION_HEADER}{prompt}"
+        if not self.prompt_cache_control:
+            return document_text + instruction_text
+        return [
+            {"type": "text", "text": document_text, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": instruction_text}
+        ]
+
     def _parse_response(self, response_json):
         try:
             if response_json is None: 
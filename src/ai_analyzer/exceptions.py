@@ -12,4 +12,12 @@ class APIError(AIAnalyzerError):
     def __init__(self, message, status_code=None, response_text=None):
         super().__init__(message)
         self.status_code = status_code
-        self.response_text = response_text 
\ No newline at end of file
+        self.response_text = response_text
+
+class StreamInterruptedError(APIError):
+    """流式响应在完成前中断（连接断开、读取超时等），partial_text 为本次已收到的内容"""
+    retryable = True
+
+    def __init__(self, message, partial_text='', status_code=None, response_text=None):
+        super().__init__(message, status_code=status_code, response_text=response_text)
+        self.partial_text = partial_text
@@ -4,14 +4,16 @@ import time
 import copy
 import random
 import os # OpenAICompatibleAI._identify_provider 可能用到
+import threading
 # sys # OpenAICompatibleAI 本身不直接用sys.path
-from typing import Dict, Any, Optional # ModelManager会用到
+from typing import Dict, Any, Optional, Tuple # ModelManager会用到
 
 # 从新的 exceptions.py 导入异常类
 from .exceptions import AIAnalyzerError, ParseError, APIError
 
 # 从新的 clients 子包导入 OpenAICompatibleAI
 from .clients.openai_compatible import OpenAICompatibleAI
+from .clients.async_openai_compatible import AsyncOpenAICompatibleAI
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +30,9 @@ class ModelManager:
         """
         self.ai_config = ai_config
         self.model_profiles = ai_config.get('model_profiles', {})
+        # 已创建的同步客户端，按 (配置名称, 系统提示) 复用；客户端本身无状态，可在线程间共享
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._clients_lock = threading.Lock()
         self.active_model_profile_name = ai_config.get('active_model_profile')
 
         if not self.model_profiles:
@@ -54,6 +59,60 @@ class ModelManager:
             ValueError: 如果找不到指定的模型配置或配置无效。
             NotImplementedError: 如果模型配置中指定的类型当前不被支持。
         """
+        cache_key = (model_profile_name or self.active_model_profile_name or '', system_prompt_text)
+        with self._clients_lock:
+            client = self._clients.get(cache_key)
+            if client is not None:
+                return client
+            profile_name_to_use, model_type, client_init_config = self._resolve_client_config(
+                system_prompt_text, model_profile_name
+            )
+            if model_type == "openai_compatible":
+                logger.info(f"实例化 OpenAICompatibleAI 模型客户端，使用配置 '{profile_name_to_use}\'。")
+                # OpenAICompatibleAI 现在从 .clients.openai_compatible 导入
+                client = OpenAICompatibleAI(config=client_init_config)
+                self._clients[cache_key] = client
+                return client
+            # elif model_type == "another_model_type":
+            #     # return AnotherModelClient(config=client_init_config)
+            #     pass
+            else:
+                logger.error(f"不支持的模型类型: {model_type}")
+                raise NotImplementedError(f"模型类型 \'{model_type}\' 当前不被支持。")
+
+    def get_async_model_client(self, system_prompt_text: str, session: Any,
+                               model_profile_name: Optional[str] = None) -> Any:
+        """
+        获取异步模型客户端（asyncio执行模式使用），所有请求通过传入的共享会话发送。
+
+        Args:
+            system_prompt_text: 要传递给模型客户端的系统提示文本。
+            session: 共享的 aiohttp 会话（见 clients.async_openai_compatible.create_client_session）。
+            model_profile_name: 要使用的模型配置的名称。如果为None，则使用配置中的 active_model_profile。
+
+        Returns:
+            AsyncOpenAICompatibleAI 实例。
+
+        Raises:
+            ValueError: 如果找不到指定的模型配置或配置无效。
+            NotImplementedError: 如果模型配置中指定的类型不支持异步调用。
+        """
+        profile_name_to_use, model_type, client_init_config = self._resolve_client_config(
+            system_prompt_text, model_profile_name
+        )
+        if model_type == "openai_compatible":
+            logger.info(f"实例化 AsyncOpenAICompatibleAI 模型客户端，使用配置 '{profile_name_to_use}'。")
+            return AsyncOpenAICompatibleAI(config=client_init_config, session=session)
+        logger.error(f"不支持异步调用的模型类型: {model_type}")
+        raise NotImplementedError(f"模型类型 '{model_type}' 当前不支持异步调用。")
+
+    def _resolve_client_config(self, system_prompt_text: str, model_profile_name: Optional[str] = None):
+        """
+        解析模型配置，合并API密钥和顶层配置的回退值。
+
+        Returns:
+            (配置名称, 模型类型, 客户端初始化配置)
+        """
         profile_name_to_use = model_profile_name if model_profile_name is not None else self.active_model_profile_name
 
         if not profile_name_to_use:
@@ -102,15 +161,23 @@ class ModelManager:
                     client_init_config[key] = value_from_top_level
                     logger.info(f"Parameter '{key}' for profile '{profile_name_to_use}' set from top-level ai_config (fallback).")
 
-        logger.debug(f"为模型类型 '{model_type}' 准备的配置: {client_init_config}")
+        # 连接池大小默认与同时调用模型的线程数一致：文件并发数 × (单文件任务并发数 + 分块任务的最大分块并发数)，
+        # 分块任务在任务线程内另起分块线程调用模型
+        if 'pool_size' not in client_init_config:
+            execution_settings = self.ai_config.get('execution_settings', {})
+            pool_size = execution_settings.get('http_pool_size')
+            if not pool_size:
+                max_parallel_chunks = max(
+                    [
+                        max(1, int((task.get('chunking') or {}).get('max_parallel_chunks', 4)))
+                        for task in self.ai_config.get('tasks', []) or []
+                        if isinstance(task, dict) and (task.get('chunking') or {}).get('enabled', False)
+                    ],
+                    default=0
+                )
+                pool_size = int(self.ai_config.get('max_workers', 10)) * \
+                    (max(1, int(execution_settings.get('max_parallel_tasks_per_file', 1))) + max_parallel_chunks)
+            client_init_config['pool_size'] = int(pool_size)
 
-        if model_type == "openai_compatible":
-            logger.info(f"实例化 OpenAICompatibleAI 模型客户端，使用配置 '{profile_name_to_use}\'。")
-            # OpenAICompatibleAI 现在从 .clients.openai_compatible 导入
-            return OpenAICompatibleAI(config=client_init_config)
-        # elif model_type == "another_model_type":
-        #     # return AnotherModelClient(config=client_init_config)
-        #     pass
-        else:
-            logger.error(f"不支持的模型类型: {model_type}")
-            raise NotImplementedError(f"模型类型 \'{model_type}\' 当前不被支持。") 
\ No newline at end of file
+        logger.debug(f"为模型类型 '{model_type}' 准备的配置: {client_init_config}")
+        return profile_name_to_use, model_type, client_init_config 
\ No newline at end of file
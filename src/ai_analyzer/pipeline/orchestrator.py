@@ -8,6 +8,7 @@ from .pipeline_context import AnalysisContext
 from .pipeline_stage import PipelineStage
 from ..model_manager import ModelManager
 from ..prompt_manager import PromptManager
+from ..response_cache import ResponseCache
 # Ensure this path is correct based on your project structure for utils
 # Assuming src is in PYTHONPATH or utils is directly accessible
 from src.utils.process_lock_manager import ProcessLockManager, ProcessType
@@ -155,6 +156,18 @@ class PipelineOrchestrator:
         if defined_tasks and self.context.prompt_manager:
              self.context.prompt_manager.preload_all_task_prompts(defined_tasks)
 
+        cache_settings = self.context.ai_config.get('response_cache', {}) or {}
+        if cache_settings.get('enabled', False):
+            cache_db_path = cache_settings.get('db_path', 'data/cache/ai_responses.db')
+            if not os.path.isabs(cache_db_path):
+                cache_db_path = os.path.join(project_root_dir, cache_db_path)
+            try:
+                self.context.response_cache = ResponseCache(cache_db_path, cache_settings.get('max_size_mb', 512))
+                logger.info(f"AI响应缓存注入到 AnalysisContext: {cache_db_path}")
+            except Exception as e:
+                # 缓存不可用时照常调用API
+                logger.error(f"初始化AI响应缓存失败，将不使用缓存: {e}")
+
         self.context.process_lock_manager = ProcessLockManager.get_instance(ProcessType.ANALYZER)
         logger.info("ProcessLockManager 注入到 AnalysisContext。")
 
@@ -10,6 +10,7 @@ ModelManager = Any # Placeholder
 RateLimiter = Any # Placeholder
 RetryStrategy = Any # Placeholder
 PromptManager = Any # Placeholder
+ResponseCache = Any # Placeholder
 
 @dataclass
 class AnalysisContext:
@@ -43,6 +44,7 @@ class AnalysisContext:
     # rate_limiter: Optional[RateLimiter] = None # RateLimiter may be managed by ModelManager or thread pool
     # retry_strategy: Optional[RetryStrategy] = None # RetryStrategy might be instantiated per call or per model
     prompt_manager: Optional[PromptManager] = None # Handles loading and providing prompts
+    response_cache: Optional[ResponseCache] = None # AI响应缓存，未启用时为None
 
     # 同步原语
     process_lock_manager: Optional[ProcessLockManager] = None
@@ -5,21 +5,228 @@ import re
 import json # For potential use, though direct JSON operations might be minimal here
 import math # ADDED for math.floor
 import hashlib # ADDED for source file hash computation
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Set, Awaitable
 import threading # Added for threading.get_ident()
+import asyncio
+import concurrent.futures
 from tqdm import tqdm # Added for progress bar
 
 from ..pipeline_stage import PipelineStage
 from ..pipeline_context import AnalysisContext
-from ...exceptions import AIAnalyzerError, APIError # Assuming ParseError might be internal to model client or AI call
+from ...exceptions import AIAnalyzerError, APIError, StreamInterruptedError # Assuming ParseError might be internal to model client or AI call
 from ...retry_strategy import RetryWithExponentialBackoff
+from ...rate_limiter import AsyncTokenBucket
+from ...response_cache import make_cache_key, model_fingerprint
+from ...chunking import (
+    ChunkAssembler, build_chunk_prompt, chunk_token_budget, estimate_tokens, split_markdown
+)
+from ...clients.async_openai_compatible import (
+    create_client_session, is_available as async_client_available, retryable_exceptions as async_retryable_exceptions
+)
+from ...clients.batch_client import BATCH_TERMINAL_STATUSES, BatchAPIClient, build_batch_line, split_batches
+from ...clients.openai_compatible import record_usage
 from src.utils.thread_pool import get_thread_pool, PreciseRateLimiter
+from src.utils.analysis_sections import SectionTrackingWriter, TITLE_TASK
 from src.utils.colored_logger import Colors # Keep Colors for other potential direct uses if any, or for context
 
 logger = logging.getLogger(__name__)
 
 # THREAD_DEBUG_COLOR = Colors.BRIGHT_CYAN # REMOVED
 
+# 标题翻译结果中说明性文字之后才是标题
+TITLE_EXPLANATION_PATTERNS = [
+    "Here is the result:", "Here's the result:",
+    "Here is the translated title:", "Here's the translated title:",
+    "The translated title is:", "Translated title:",
+    "Here is my translation:", "Here's my translation:"
+]
+# 其他任务结果开头需要去掉的开场白
+COMMON_RESPONSE_PREFIXES = [
+    "I understand the task. Here is the analysis:",
+    "Based on the content, here's the summary:",
+    "Here is the information you requested:"
+]
+
+
+class StreamingSection:
+    """
+    流式任务在分析文档中的区块
+    
+    任务区块按配置顺序写入，排在前面的任务未完成时，收到的内容先缓存在内存中；
+    轮到该区块写入（attach）后，缓存和之后收到的内容直接写入文档并刷新。
+    写入文档的内容与 _clean_ai_response 的结果一致：开头的空白和开场白确定之前先不写入，
+    末尾的空白在后续内容到达时才写入。标题翻译的清理规则依赖完整结果，不边收边写。
+    同时记录多次请求（中断后续写）累计的内容和速度统计。
+    """
+    
+    # 续写连续这么多次没有产生新内容时放弃，不再消耗剩余的重试次数
+    MAX_STALLED_RESUMES = 2
+    
+    def __init__(self, task_type: str):
+        self.task_type = task_type
+        self._lock = threading.Lock()
+        self._writer: Optional[SectionTrackingWriter] = None
+        self._started = False
+        self._pending: List[str] = []
+        self._parts: List[str] = []
+        self._live = task_type != TITLE_TASK
+        # 开头的内容（空白、可能的开场白）确定之前暂存在 _lead 中
+        self._lead_resolved = False
+        self._lead = ''
+        # 暂不写入的末尾空白
+        self._trailing_whitespace = ''
+        self._start_time: Optional[float] = None
+        self.time_to_first_token: Optional[float] = None
+        self.requests = 0
+        self.resumes = 0
+        self.stalled_resumes = 0
+        self.completion_tokens: Optional[int] = None
+        # 有请求中断或服务端未返回用量时，completion_tokens 不完整，改按数据块数估算
+        self._usage_incomplete = False
+        self.finish_reason: Optional[str] = None
+        self.elapsed = 0.0
+    
+    @property
+    def text(self) -> str:
+        """目前为止收到的全部内容"""
+        with self._lock:
+            return ''.join(self._parts)
+    
+    def start_request(self):
+        """每次发送流式请求前调用，已有内容时本次请求为续写"""
+        with self._lock:
+            if self._start_time is None:
+                self._start_time = time.time()
+            self.requests += 1
+            if self._parts:
+                self.resumes += 1
+    
+    def record_result(self, result):
+        """记录一次完成的流式请求（StreamResult）的用量和结束原因"""
+        with self._lock:
+            if result.completion_tokens is not None:
+                self.completion_tokens = (self.completion_tokens or 0) + result.completion_tokens
+            else:
+                self._usage_incomplete = True
+            self.finish_reason = result.finish_reason
+    
+    def record_interruption(self, partial_text: str) -> bool:
+        """
+        记录一次中断的流式请求
+        
+        Args:
+            partial_text: 本次请求中断前收到的内容
+            
+        Returns:
+            是否值得继续重试：本次有新内容，或连续无进展的续写未超过上限
+        """
+        with self._lock:
+            if partial_text:
+                self._usage_incomplete = True
+            if partial_text or not self._parts:
+                # 有进展时从中断处续写；尚未收到任何内容时与普通请求一样重新开始
+                self.stalled_resumes = 0
+                return True
+            self.stalled_resumes += 1
+            return self.stalled_resumes < self.MAX_STALLED_RESUMES
+    
+    def _clean_incremental(self, text: str) -> str:
+        """
+        返回新内容中可以写入文档的部分（调用方持有锁）
+        
+        开头跳过空白和 COMMON_RESPONSE_PREFIXES 中的开场白；末尾的空白暂不写入，
+        最终写入的内容等于 _clean_ai_response 对完整结果的清理结果。
+        """
+        if not self._lead_resolved:
+            self._lead += text
+            lead = self._lead.lstrip()
+            if any(prefix.startswith(lead) and len(lead) < len(prefix) for prefix in COMMON_RESPONSE_PREFIXES):
+                # 可能是开场白的开头，等待更多内容
+                return ''
+            for prefix in COMMON_RESPONSE_PREFIXES:
+                if lead.startswith(prefix):
+                    lead = lead[len(prefix):].lstrip()
+                    break
+            if not lead:
+                return ''
+            self._lead_resolved = True
+            self._lead = ''
+            text = lead
+        text = self._trailing_whitespace + text
+        body = text.rstrip()
+        self._trailing_whitespace = text[len(body):]
+        return body
+    
+    def write(self, text: str):
+        """收到增量文本（on_chunk回调，可能在任务线程中调用）"""
+        with self._lock:
+            if self.time_to_first_token is None and self._start_time is not None:
+                self.time_to_first_token = time.time() - self._start_time
+            self._parts.append(text)
+            if not self._live:
+                return
+            text = self._clean_incremental(text)
+            if not text:
+                return
+            if self._writer is None:
+                self._pending.append(text)
+                return
+            if not self._started:
+                self._writer.start_section(self.task_type)
+                self._started = True
+            self._writer.write_chunk(text)
+    
+    def attach(self, writer: SectionTrackingWriter):
+        """轮到该区块写入时调用，写出已缓存的内容"""
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = writer
+            if self._pending:
+                writer.start_section(self.task_type)
+                self._started = True
+                writer.write_chunk(''.join(self._pending))
+                self._pending = []
+    
+    def finish(self, writer: SectionTrackingWriter, section):
+        """
+        任务完成后结束区块
+        
+        Args:
+            writer: 分析文档写入器
+            section: 任务结果中的 (内容, 是否为错误)，为None时不写入。已流式写入内容时
+                     成功结果不再重复写入，失败时在已写入的内容后追加错误标记；
+                     尚未写入任何内容时（如标题翻译）写入清理后的结果
+        """
+        self.attach(writer)
+        with self._lock:
+            if self._start_time is not None:
+                self.elapsed = time.time() - self._start_time
+            if not self._started:
+                if section is not None:
+                    writer.write_section(self.task_type, section[0], is_error=section[1])
+                return
+            is_error = section is not None and section[1]
+            writer.end_section(self.task_type, error_note=section[0] if is_error else None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """流式统计：首个token时间、总耗时、生成速度、请求和续写次数"""
+        with self._lock:
+            elapsed = self.elapsed or (time.time() - self._start_time if self._start_time else 0.0)
+            completion_tokens = None if self._usage_incomplete else self.completion_tokens
+            tokens = completion_tokens if completion_tokens is not None else len(self._parts)
+            generation_time = elapsed - (self.time_to_first_token or 0.0)
+            return {
+                'time_to_first_token': round(self.time_to_first_token, 3) if self.time_to_first_token is not None else None,
+                'elapsed': round(elapsed, 3),
+                'chunks': len(self._parts),
+                'completion_tokens': completion_tokens,
+                'tokens_per_second': round(tokens / generation_time, 1) if generation_time > 0 else 0.0,
+                'requests': self.requests,
+                'resumes': self.resumes,
+                'finish_reason': self.finish_reason
+            }
+
 class AnalysisExecutionStage(PipelineStage):
     def __init__(self):
         super().__init__(stage_name="AnalysisExecution")
@@ -116,26 +323,15 @@ class AnalysisExecutionStage(PipelineStage):
 
     def _clean_ai_response(self, raw_result: str, task_type: str) -> str:
         cleaned_result = raw_result.strip()
-        if task_type == "AI标题翻译":
-            explanation_patterns = [
-                "Here is the result:", "Here's the result:",
-                "Here is the translated title:", "Here's the translated title:",
-                "The translated title is:", "Translated title:",
-                "Here is my translation:", "Here's my translation:"
-            ]
-            for pattern in explanation_patterns:
+        if task_type == TITLE_TASK:
+            for pattern in TITLE_EXPLANATION_PATTERNS:
                 if pattern in cleaned_result:
                     title_part = cleaned_result.split(pattern, 1)[1].strip()
                     if title_part: return title_part
             if len(cleaned_result.strip().split('\n')) == 1 and len(cleaned_result.strip()) < 100:
                 return cleaned_result.strip()
             return cleaned_result
-        common_prefixes = [
-            "I understand the task. Here is the analysis:",
-            "Based on the content, here's the summary:",
-            "Here is the information you requested:"
-        ]
-        for prefix in common_prefixes:
+        for prefix in COMMON_RESPONSE_PREFIXES:
             if cleaned_result.startswith(prefix):
                 cleaned_result = cleaned_result[len(prefix):].strip()
                 break
@@ -145,14 +341,22 @@ class AnalysisExecutionStage(PipelineStage):
         self, 
         context: AnalysisContext, 
         model_client: Any, 
-        full_prompt: str, 
+        prompt: str, 
         task_type: str,
-        precise_rate_limiter: Optional[PreciseRateLimiter] = None
+        precise_rate_limiter: Optional[PreciseRateLimiter] = None,
+        stream_section: Optional[StreamingSection] = None,
+        document: Optional[str] = None
     ) -> str:
         thread_id = threading.get_ident()
         self.logger.debug(
             f"线程 {thread_id} 开始执行AI调用: 任务='{task_type}', 使用精确限速器={precise_rate_limiter is not None}"
         ) # REMOVED color_override
+        cache_key = self._response_cache_key(context, model_client, prompt, document)
+        if cache_key is not None:
+            cached_result = context.response_cache.get(cache_key)
+            if cached_result is not None:
+                self.logger.info(f"线程 {thread_id} 任务 '{task_type}' 命中AI响应缓存，跳过API调用")
+                return self._clean_ai_response(cached_result, task_type)
         max_retries = context.ai_config.get('max_retries', 3)
         initial_delay = context.ai_config.get('initial_retry_delay', 1.0)
         max_delay = context.ai_config.get('max_retry_delay', 60.0)
@@ -167,9 +371,11 @@ class AnalysisExecutionStage(PipelineStage):
                 wait_duration = precise_rate_limiter.wait()
                 if wait_duration and wait_duration > 0:
                      self.logger.debug(f"线程 {thread_id} 已等待 {wait_duration:.2f} 秒 (精确限速)") # REMOVED color_override
+            if stream_section is not None:
+                return self._stream_call(model_client, prompt, task_type, stream_section, document)
             self.logger.debug(f"线程 {thread_id} 发送AI请求: 任务='{task_type}' (调用 predict)") # REMOVED color_override
             start_time = time.time()
-            response = model_client.predict(full_prompt)
+            response = model_client.predict(prompt, document=document)
             end_time = time.time()
             self.logger.debug(
                 f"线程 {thread_id} 收到AI响应: 任务='{task_type}', 耗时={end_time - start_time:.2f}s"
@@ -177,6 +383,8 @@ class AnalysisExecutionStage(PipelineStage):
             return response
         try:
             result = retry_strategy.execute(api_call)
+            if cache_key is not None and self._is_valid_ai_result(result):
+                context.response_cache.put(cache_key, result, task_type)
             return self._clean_ai_response(result, task_type)
         except APIError as e:
             self.logger.error(f"线程 {thread_id} 在任务 '{task_type}' 中遭遇API错误 (已达最大重试次数): {e}") # REMOVED color_override (was on an error before, ensure it's not now)
@@ -185,6 +393,597 @@ class AnalysisExecutionStage(PipelineStage):
             self.logger.error(f"线程 {thread_id} 在任务 '{task_type}' 的AI调用中发生意外错误: {e}") # REMOVED color_override (was on an error before, ensure it's not now)
             raise AIAnalyzerError(f"Unexpected error during AI call for task '{task_type}': {e}") from e
 
+    @staticmethod
+    def _is_valid_ai_result(raw_ai_result: str) -> bool:
+        """AI返回的结果是否有效（不是错误信息，也不是过短的内容）"""
+        error_prefixes = ["API调用失败:", "API调用或重试机制失败:", "分析内容时发生意外错误:"]
+        return not any(raw_ai_result.startswith(prefix) for prefix in error_prefixes) and len(raw_ai_result.strip()) >= 5
+
+    def _response_cache_key(self, context: AnalysisContext, model_client: Any, prompt: str,
+                            document: Optional[str] = None) -> Optional[str]:
+        """计算AI响应缓存键，未启用缓存时返回None"""
+        if context.response_cache is None:
+            return None
+        return make_cache_key(model_fingerprint(model_client), getattr(model_client, 'system_prompt', ''), prompt, document)
+
+    def _stream_call(self, model_client: Any, prompt: str, task_type: str,
+                     stream_section: StreamingSection, document: Optional[str] = None) -> str:
+        """
+        发送一次流式请求，已有部分内容时要求模型从中断处续写
+        
+        Returns:
+            目前为止收到的全部内容
+            
+        Raises:
+            StreamInterruptedError: 流式响应中断且值得重试（由重试策略续写）
+            APIError: 续写连续没有进展时放弃（不可重试）
+        """
+        continuation = stream_section.text or None
+        stream_section.start_request()
+        try:
+            result = model_client.predict_stream(
+                prompt, on_chunk=stream_section.write, continuation=continuation, document=document
+            )
+        except StreamInterruptedError as e:
+            return self._raise_stream_interruption(e, task_type, stream_section)
+        stream_section.record_result(result)
+        return stream_section.text
+    
+    async def _stream_call_async(self, model_client: Any, prompt: str, task_type: str,
+                                 stream_section: StreamingSection, document: Optional[str] = None) -> str:
+        """_stream_call 的协程版本"""
+        continuation = stream_section.text or None
+        stream_section.start_request()
+        try:
+            result = await model_client.predict_stream(
+                prompt, on_chunk=stream_section.write, continuation=continuation, document=document
+            )
+        except StreamInterruptedError as e:
+            return self._raise_stream_interruption(e, task_type, stream_section)
+        stream_section.record_result(result)
+        return stream_section.text
+    
+    def _raise_stream_interruption(self, error: StreamInterruptedError, task_type: str,
+                                   stream_section: StreamingSection):
+        """根据中断前的进展决定由重试策略续写，还是直接放弃"""
+        if stream_section.record_interruption(error.partial_text):
+            if error.partial_text:
+                self.logger.warning(
+                    f"任务 '{task_type}' 的流式响应中断，已收到 {len(stream_section.text)} 字符，将从中断处续写"
+                )
+            raise error
+        raise APIError(
+            f"任务 '{task_type}' 的流式响应连续 {stream_section.stalled_resumes} 次续写没有新内容，放弃重试: {error}"
+        ) from error
+
+    def _split_task_document(self, node: Dict[str, Any], model_client: Any, content: str, file_path: str) -> List[str]:
+        """
+        按任务的 chunking 配置切分文档，未启用或文档未超过预算时返回只含原文的列表
+        
+        Args:
+            node: 任务节点
+            model_client: 模型客户端（用于按其 max_tokens 计算分块预算）
+            content: 原始文档内容
+            file_path: 原始文档路径（用于日志）
+            
+        Returns:
+            分块列表
+        """
+        chunking_config = node['config'].get('chunking') or {}
+        if not chunking_config.get('enabled', False):
+            return [content]
+        budget = chunk_token_budget(chunking_config, getattr(model_client, 'max_tokens', None))
+        content_tokens = estimate_tokens(content)
+        if content_tokens <= budget:
+            return [content]
+        chunks = split_markdown(content, budget)
+        self.logger.info(
+            f"任务 '{node['type']}' 的文档约 {content_tokens} tokens，超过分块预算 {budget}，"
+            f"切分为 {len(chunks)} 块 (文件: {file_path})"
+        )
+        return chunks
+
+    def _perform_chunked_ai_call(
+        self,
+        context: AnalysisContext,
+        model_client: Any,
+        task_prompt: str,
+        task_type: str,
+        chunks: List[str],
+        chunking_config: Optional[Dict[str, Any]],
+        precise_rate_limiter: Optional[PreciseRateLimiter] = None,
+        stream_section: Optional[StreamingSection] = None
+    ) -> str:
+        """
+        分块执行AI调用并按原顺序拼接结果
+        
+        各分块是独立的AI调用，共享限速器和响应缓存，失败时单独重试。所有分块都会执行完，
+        成功的分块写入缓存，重新分析时只需要重新调用失败的分块。
+        
+        Args:
+            context: 分析上下文
+            model_client: 模型客户端
+            task_prompt: 任务提示
+            task_type: 任务类型
+            chunks: split_markdown 切分的分块
+            chunking_config: 任务的 chunking 配置
+            precise_rate_limiter: 共享的API调用限速器
+            stream_section: 流式任务的区块，按顺序完成的分块结果依次写入
+            
+        Returns:
+            拼接后的结果
+        """
+        total = len(chunks)
+        max_parallel_chunks = max(1, int((chunking_config or {}).get('max_parallel_chunks', 4)))
+        assembler = ChunkAssembler(total, on_text=stream_section.write if stream_section is not None else None)
+        
+        def run_chunk(index: int) -> str:
+            return self._perform_ai_analysis_call(
+                context, model_client, build_chunk_prompt(task_prompt, index, total), task_type,
+                precise_rate_limiter, document=chunks[index]
+            )
+        
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(max_parallel_chunks, total), thread_name_prefix="ai-chunk"
+        ) as executor:
+            futures = {executor.submit(run_chunk, index): index for index in range(total)}
+            for future in concurrent.futures.as_completed(futures):
+                index = futures[future]
+                try:
+                    assembler.add(index, future.result())
+                except Exception as e:
+                    self.logger.error(f"任务 '{task_type}' 的分块 {index + 1}/{total} 失败: {e}")
+                    assembler.fail(index, e)
+        return assembler.result()
+
+    async def _perform_chunked_ai_call_async(
+        self,
+        context: AnalysisContext,
+        model_client: Any,
+        task_prompt: str,
+        task_type: str,
+        chunks: List[str],
+        chunking_config: Optional[Dict[str, Any]],
+        token_bucket: Optional[AsyncTokenBucket],
+        request_semaphore: asyncio.Semaphore,
+        stream_section: Optional[StreamingSection] = None
+    ) -> str:
+        """_perform_chunked_ai_call 的协程版本"""
+        total = len(chunks)
+        chunk_semaphore = asyncio.Semaphore(max(1, int((chunking_config or {}).get('max_parallel_chunks', 4))))
+        assembler = ChunkAssembler(total, on_text=stream_section.write if stream_section is not None else None)
+        
+        async def run_chunk(index: int) -> None:
+            async with chunk_semaphore:
+                try:
+                    result = await self._perform_ai_analysis_call_async(
+                        context, model_client, build_chunk_prompt(task_prompt, index, total), task_type,
+                        token_bucket, request_semaphore, document=chunks[index]
+                    )
+                except Exception as e:
+                    self.logger.error(f"任务 '{task_type}' 的分块 {index + 1}/{total} 失败: {e}")
+                    assembler.fail(index, e)
+                    return
+            assembler.add(index, result)
+        
+        await asyncio.gather(*(run_chunk(index) for index in range(total)))
+        return assembler.result()
+
+    def _build_task_graph(self, defined_tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        根据任务配置中的 depends_on 构建单个文件的任务依赖图
+        
+        Args:
+            defined_tasks: 配置中的任务列表
+            
+        Returns:
+            按配置顺序排列的任务节点，每个节点包含 index（在返回列表中的下标）、position（配置中的序号）、
+            type、config 和 depends_on（所依赖节点在返回列表中的下标集合）
+        """
+        nodes: List[Dict[str, Any]] = []
+        index_by_type: Dict[str, int] = {}
+        for position, task_config in enumerate(defined_tasks):
+            task_type = task_config.get('type')
+            if not task_type:
+                self.logger.warning(f"跳过没有类型的任务: {task_config}")
+                continue
+            index_by_type.setdefault(task_type, len(nodes))
+            nodes.append({
+                'index': len(nodes), 'position': position, 'type': task_type, 'config': task_config, 'depends_on': set()
+            })
+        
+        for index, node in enumerate(nodes):
+            depends_on = node['config'].get('depends_on') or []
+            if isinstance(depends_on, str):
+                depends_on = [depends_on]
+            for dependency in depends_on:
+                dependency_index = index_by_type.get(dependency)
+                if dependency_index is None:
+                    self.logger.warning(f"任务 '{node['type']}' 依赖的任务 '{dependency}' 未配置，忽略该依赖。")
+                elif dependency_index == index:
+                    self.logger.warning(f"任务 '{node['type']}' 不能依赖自身，忽略该依赖。")
+                else:
+                    node['depends_on'].add(dependency_index)
+        
+        # 检查循环依赖：按拓扑顺序移除节点，剩余节点说明存在环
+        remaining = {index: set(node['depends_on']) for index, node in enumerate(nodes)}
+        while True:
+            ready = [index for index, deps in remaining.items() if not deps]
+            if not ready:
+                break
+            for index in ready:
+                del remaining[index]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        if remaining:
+            cyclic_tasks = [nodes[index]['type'] for index in sorted(remaining)]
+            self.logger.error(f"任务依赖存在循环 ({', '.join(cyclic_tasks)})，改为按配置顺序串行执行。")
+            for index, node in enumerate(nodes):
+                node['depends_on'] = {index - 1} if index > 0 else set()
+        return nodes
+
+    def _run_task_graph(
+        self,
+        nodes: List[Dict[str, Any]],
+        run_task: Callable[[Dict[str, Any]], Dict[str, Any]],
+        on_task_done: Callable[[Dict[str, Any], Dict[str, Any]], None],
+        write_task_section: Callable[[Dict[str, Any], Dict[str, Any]], None],
+        max_parallel_tasks: int = 1,
+        attach_next_section: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> None:
+        """
+        按依赖关系执行单个文件的任务，互不依赖的任务并发执行
+        
+        on_task_done 和 write_task_section 只在调用线程中执行；任务区块按配置顺序写入，
+        某个任务完成后，排在它前面的任务都已完成时才写入。
+        
+        Args:
+            nodes: _build_task_graph 返回的任务节点
+            run_task: 执行单个任务的函数，返回任务结果
+            on_task_done: 任务完成后（其依赖任务提交之前）调用
+            write_task_section: 按配置顺序写入任务结果时调用
+            max_parallel_tasks: 同时执行的最大任务数，为1时按配置顺序串行执行
+            attach_next_section: 下一个待写入的任务（尚未完成）确定后调用，流式任务借此直接写入文档
+        """
+        outcomes: Dict[int, Dict[str, Any]] = {}
+        next_to_write = 0
+        
+        def complete(index: int, outcome: Dict[str, Any]):
+            nonlocal next_to_write
+            outcomes[index] = outcome
+            on_task_done(nodes[index], outcome)
+            while next_to_write < len(nodes) and next_to_write in outcomes:
+                write_task_section(nodes[next_to_write], outcomes[next_to_write])
+                next_to_write += 1
+            if attach_next_section and next_to_write < len(nodes):
+                attach_next_section(nodes[next_to_write])
+        
+        if attach_next_section and nodes:
+            attach_next_section(nodes[0])
+        
+        try:
+            max_parallel_tasks = int(max_parallel_tasks)
+        except (TypeError, ValueError):
+            max_parallel_tasks = 1
+        if max_parallel_tasks <= 1 or len(nodes) <= 1:
+            # 串行执行：按配置顺序执行依赖已满足的第一个任务
+            pending = list(range(len(nodes)))
+            while pending:
+                index = next(i for i in pending if nodes[i]['depends_on'].issubset(outcomes))
+                pending.remove(index)
+                complete(index, run_task(nodes[index]))
+            return
+        
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(max_parallel_tasks, len(nodes)), thread_name_prefix="ai-task"
+        ) as executor:
+            running: Dict[concurrent.futures.Future, int] = {}
+            submitted: Set[int] = set()
+            while len(outcomes) < len(nodes):
+                for index, node in enumerate(nodes):
+                    if index not in submitted and node['depends_on'].issubset(outcomes):
+                        submitted.add(index)
+                        running[executor.submit(run_task, node)] = index
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        self.logger.error(f"任务 '{nodes[index]['type']}' 执行异常: {e}", exc_info=True)
+                        outcome = {
+                            'status': {'success': False, 'error': str(e), 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')},
+                            'result': None,
+                            'section': None
+                        }
+                    complete(index, outcome)
+
+    def _build_task_prompt(self, context: AnalysisContext, task_type: str,
+                           analysis_content_for_file: Dict[str, str]) -> Optional[str]:
+        """
+        获取任务的提示词
+        
+        Args:
+            context: 分析上下文
+            task_type: 任务类型
+            analysis_content_for_file: 已完成任务的结果（只读）
+            
+        Returns:
+            提示词，为空时跳过该任务
+        """
+        # 特殊处理AI竞争分析任务：根据标题前缀选择提示词
+        if task_type == "AI竞争分析":
+            # 先检查是否已经有标题翻译结果
+            title_translation = analysis_content_for_file.get("AI标题翻译", "").strip()
+            if title_translation:
+                self.logger.info(f"根据标题前缀选择竞争分析提示词: {title_translation[:50]}...")
+                return context.prompt_manager.get_competitive_analysis_prompt(title_translation)
+            # 如果没有标题翻译结果，使用默认的竞争分析提示词
+            self.logger.warning(f"未找到标题翻译结果，使用默认竞争分析提示词")
+        return context.prompt_manager.get_task_prompt(task_type)
+
+    def _task_outcome(self, node: Dict[str, Any], file_path: str, raw_ai_result: Optional[str] = None,
+                      error: Optional[Exception] = None,
+                      stream_section: Optional[StreamingSection] = None) -> Dict[str, Any]:
+        """
+        根据AI调用结果或异常生成任务结果
+        
+        Args:
+            node: 任务节点
+            file_path: 原始文档路径
+            raw_ai_result: AI返回的原始结果
+            error: AI调用抛出的异常
+            stream_section: 流式任务的区块，其统计信息记录在任务状态的 stream 字段
+            
+        Returns:
+            包含 status（任务状态）、result（清理后的结果，失败时为None）和
+            section（需要写入分析文档的 (内容, 是否为错误)，不需要写入时为None）的字典
+        """
+        task_type = node['type']
+        task_status_entry = {'success': False, 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
+        if stream_section is not None and stream_section.requests:
+            task_status_entry['stream'] = stream_section.get_stats()
+            self.logger.info(f"任务 '{task_type}' 流式统计 (文件 '{file_path}'): {task_status_entry['stream']}")
+        should_output_to_file = task_type == "AI标题翻译" or node['config'].get('output', True)
+        try:
+            if error is not None:
+                raise error
+            if not self._is_valid_ai_result(raw_ai_result):
+                raise AIAnalyzerError(f"AI analysis for task '{task_type}' returned error or invalid result: {raw_ai_result}")
+            cleaned_result = self._clean_ai_response(raw_ai_result, task_type)
+            task_status_entry['success'] = True
+            return {
+                'status': task_status_entry,
+                'result': cleaned_result,
+                'section': (cleaned_result, False) if should_output_to_file else None
+            }
+        except Exception as e:
+            self.logger.error(f"在任务 '{task_type}' (文件 '{file_path}') 中发生错误: {e}", exc_info=True)
+            task_status_entry['error'] = str(e)
+            section = None
+            if should_output_to_file:
+                sanitized_error_message = str(e).replace('-->', '--&gt;').replace('<!--', '&lt;!--')
+                section = (f"<!-- ERROR: {sanitized_error_message} -->", True)
+            return {'status': task_status_entry, 'result': None, 'section': section}
+
+    def _skipped_task_outcome(self, task_type: str) -> Dict[str, Any]:
+        """提示词为空时跳过任务的结果"""
+        self.logger.warning(f"因prompt为空跳过任务 '{task_type}' 。")
+        return {
+            'status': {'success': False, 'error': 'Empty prompt', 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')},
+            'result': None,
+            'section': None
+        }
+
+    def _execute_task(
+        self,
+        context: AnalysisContext,
+        model_client: Any,
+        node: Dict[str, Any],
+        total_tasks: int,
+        content: str,
+        file_path: str,
+        analysis_content_for_file: Dict[str, str],
+        precise_rate_limiter: Optional[PreciseRateLimiter] = None,
+        stream_section: Optional[StreamingSection] = None
+    ) -> Dict[str, Any]:
+        """
+        执行单个AI任务（可能在任务线程中调用）
+        
+        Args:
+            context: 分析上下文
+            model_client: 模型客户端
+            node: 任务节点
+            total_tasks: 配置中的任务总数（用于日志）
+            content: 原始文档内容
+            file_path: 原始文档路径
+            analysis_content_for_file: 已完成任务的结果（只读）
+            precise_rate_limiter: 共享的API调用限速器
+            stream_section: 流式任务的区块，提供时以流式方式调用
+            
+        Returns:
+            任务结果，见 _task_outcome
+        """
+        task_type = node['type']
+        task_prompt_text = self._build_task_prompt(context, task_type, analysis_content_for_file)
+        if not task_prompt_text:
+            return self._skipped_task_outcome(task_type)
+        self.logger.info(f"执行任务 [{node['position']+1}/{total_tasks}]: {task_type} for file {file_path}")
+        chunks = self._split_task_document(node, model_client, content, file_path)
+        try:
+            if len(chunks) > 1:
+                raw_ai_result = self._perform_chunked_ai_call(
+                    context, model_client, task_prompt_text, task_type, chunks, node['config'].get('chunking'),
+                    precise_rate_limiter, stream_section
+                )
+            else:
+                # 文档内容作为各任务共享的提示前缀，任务提示放在其后
+                raw_ai_result = self._perform_ai_analysis_call(
+                    context, model_client, task_prompt_text, task_type, precise_rate_limiter, stream_section,
+                    document=content
+                )
+        except Exception as e:
+            return self._task_outcome(node, file_path, error=e, stream_section=stream_section)
+        return self._task_outcome(node, file_path, raw_ai_result=raw_ai_result, stream_section=stream_section)
+
+    def _read_source_file(self, file_path: str, context: AnalysisContext, file_summary: Dict[str, Any]):
+        """
+        读取原始文档并准备分析输出路径
+        
+        Args:
+            file_path: 原始文档路径
+            context: 分析上下文
+            file_summary: 文件处理结果，写入提取到的嵌入式元数据
+            
+        Returns:
+            (文档内容, 嵌入式元数据, 分析输出文件路径)
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        self.logger.debug(f"已读取 {len(content)} 字符从 {file_path}") # REMOVED color_override
+        embedded_meta = self._extract_embedded_metadata(content)
+        file_summary['embedded_metadata'] = embedded_meta
+        if not context.analysis_output_dir or not context.raw_data_dir:
+            raise AIAnalyzerError("Analysis output or raw data directory not configured in context.")
+        relative_file_path = os.path.relpath(file_path, context.raw_data_dir)
+        analysis_output_file_path = os.path.join(context.analysis_output_dir, relative_file_path)
+        os.makedirs(os.path.dirname(analysis_output_file_path), exist_ok=True)
+        self.logger.debug(f"分析输出将保存至: {analysis_output_file_path}") # REMOVED color_override
+        return content, embedded_meta, analysis_output_file_path
+
+    def _create_stream_sections(self, nodes: List[Dict[str, Any]], model_client: Any) -> Dict[int, StreamingSection]:
+        """
+        为配置了 stream: true 且输出到分析文档的任务创建流式区块
+        
+        Returns:
+            节点下标到流式区块的映射
+        """
+        if not hasattr(model_client, 'predict_stream'):
+            if any(node['config'].get('stream') for node in nodes):
+                self.logger.warning(f"模型客户端 {type(model_client).__name__} 不支持流式调用，stream 配置将被忽略。")
+            return {}
+        return {
+            node['index']: StreamingSection(node['type'])
+            for node in nodes
+            if node['config'].get('stream') and node['config'].get('output', True)
+        }
+
+    def _make_task_callbacks(
+        self,
+        outfile: SectionTrackingWriter,
+        analysis_content_for_file: Dict[str, str],
+        current_file_tasks_status: Dict[str, Dict[str, Any]],
+        stream_sections: Optional[Dict[int, StreamingSection]] = None
+    ):
+        """
+        创建任务图执行时使用的回调
+        
+        Returns:
+            (on_task_done, write_task_section, attach_next_section)
+        """
+        stream_sections = stream_sections or {}
+        
+        def on_task_done(node: Dict[str, Any], outcome: Dict[str, Any]):
+            task_type = node['type']
+            if outcome.get('result') is not None:
+                analysis_content_for_file[task_type] = outcome['result']
+            current_file_tasks_status[task_type] = outcome['status']
+        
+        def write_task_section(node: Dict[str, Any], outcome: Dict[str, Any]):
+            # 区块按配置顺序写入，与串行执行时的文档结构一致
+            stream_section = stream_sections.get(node['index'])
+            if stream_section is not None:
+                stream_section.finish(outfile, outcome.get('section'))
+            elif outcome.get('section') is not None:
+                body, is_error = outcome['section']
+                outfile.write_section(node['type'], body, is_error=is_error)
+        
+        def attach_next_section(node: Dict[str, Any]):
+            # 流式任务轮到写入时，已收到和之后收到的内容直接写入文档
+            stream_section = stream_sections.get(node['index'])
+            if stream_section is not None:
+                stream_section.attach(outfile)
+        
+        return on_task_done, write_task_section, attach_next_section
+
+    def _save_file_metadata(
+        self,
+        context: AnalysisContext,
+        file_path: str,
+        normalized_path_key: str,
+        embedded_meta: Dict[str, Any],
+        analysis_content_for_file: Dict[str, str],
+        current_file_tasks_status: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """文件处理成功后更新分析元数据"""
+        with context.metadata_lock:
+            if normalized_path_key not in context.metadata:
+                context.metadata[normalized_path_key] = {'file': normalized_path_key}
+            context.metadata[normalized_path_key]['info'] = embedded_meta
+            
+            # 从分析内容中提取中文标题（如果有）
+            if analysis_content_for_file.get("AI标题翻译"):
+                raw_chinese_title = analysis_content_for_file["AI标题翻译"].strip()
+                
+                # 提取方括号内的标签作为 update_type
+                update_type_match = re.match(r'^\[(.*?)\]', raw_chinese_title)
+                if update_type_match:
+                    update_type = update_type_match.group(1).strip()
+                    # 使用正则表达式移除标题头部的如 "[标签]" 部分作为 chinese_title
+                    pure_chinese_title = re.sub(r'^\[.*?\]\s*', '', raw_chinese_title).strip()
+                else:
+                    update_type = "" # 如果没有匹配到标签，则 update_type 为空
+                    pure_chinese_title = raw_chinese_title # chinese_title 就是原始标题
+
+                # 将提取的 update_type 和处理后的中文标题添加到info字段
+                context.metadata[normalized_path_key]['info']['update_type'] = update_type
+                context.metadata[normalized_path_key]['info']['chinese_title'] = pure_chinese_title
+                
+                # 记录到日志
+                self.logger.debug(f"提取到 update_type: '{update_type}', chinese_title: '{pure_chinese_title}' (文件: {file_path})")
+            
+            if embedded_meta.get('publish_date'):
+                context.metadata[normalized_path_key]['publish_date'] = embedded_meta['publish_date']
+            context.metadata[normalized_path_key]['tasks'] = current_file_tasks_status
+            context.metadata[normalized_path_key]['last_analyzed'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            
+            # 计算并保存源文件的hash，用于检测文件内容变更
+            try:
+                with open(file_path, 'rb') as f_hash:
+                    source_hash = hashlib.sha256(f_hash.read()).hexdigest()
+                context.metadata[normalized_path_key]['source_hash'] = source_hash
+            except Exception as hash_err:
+                self.logger.warning(f"计算文件 '{file_path}' 的source_hash时出错: {hash_err}")
+            
+            context.metadata[normalized_path_key].pop('last_error', None)
+
+    def _save_failure_metadata(
+        self,
+        context: AnalysisContext,
+        file_path: str,
+        normalized_path_key: str,
+        file_summary: Dict[str, Any],
+        error: Exception
+    ) -> None:
+        """文件处理失败后记录错误和已取得的部分结果"""
+        with context.metadata_lock:
+            if normalized_path_key not in context.metadata:
+                 context.metadata[normalized_path_key] = {'file': normalized_path_key}
+            # 如果有提取到嵌入式元数据，即使出错也保存
+            if file_summary.get('embedded_metadata') and file_summary['embedded_metadata'].get('publish_date'):
+                context.metadata[normalized_path_key]['info'] = file_summary['embedded_metadata']
+                context.metadata[normalized_path_key]['publish_date'] = file_summary['embedded_metadata']['publish_date']
+            
+            # 如果成功生成了中文标题，即使其他任务失败也保存
+            if file_summary.get('task_results') and file_summary['task_results'].get('AI标题翻译'):
+                if 'info' not in context.metadata[normalized_path_key]:
+                    context.metadata[normalized_path_key]['info'] = {}
+                context.metadata[normalized_path_key]['info']['chinese_title'] = file_summary['task_results']['AI标题翻译'].strip()
+                self.logger.debug(f"即使处理失败，也将中文标题保存到元数据 (文件: {file_path})")
+            
+            context.metadata[normalized_path_key]['last_error'] = str(error)
+            context.metadata[normalized_path_key]['last_error_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
+
     def _process_single_file(
         self, 
         file_path: str, 
@@ -204,17 +1003,7 @@ class AnalysisExecutionStage(PipelineStage):
             'error': None
         }
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.logger.debug(f"已读取 {len(content)} 字符从 {file_path}") # REMOVED color_override
-            embedded_meta = self._extract_embedded_metadata(content)
-            file_summary['embedded_metadata'] = embedded_meta
-            if not context.analysis_output_dir or not context.raw_data_dir:
-                raise AIAnalyzerError("Analysis output or raw data directory not configured in context.")
-            relative_file_path = os.path.relpath(file_path, context.raw_data_dir)
-            analysis_output_file_path = os.path.join(context.analysis_output_dir, relative_file_path)
-            os.makedirs(os.path.dirname(analysis_output_file_path), exist_ok=True)
-            self.logger.debug(f"分析输出将保存至: {analysis_output_file_path}") # REMOVED color_override
+            content, embedded_meta, analysis_output_file_path = self._read_source_file(file_path, context, file_summary)
             current_file_tasks_status: Dict[str, Dict[str, Any]] = {}
             analysis_content_for_file: Dict[str,str] = {}
             defined_tasks = context.ai_config.get('tasks', [])
@@ -222,105 +1011,33 @@ class AnalysisExecutionStage(PipelineStage):
             model_client = context.model_manager.get_model_client(system_prompt_text=system_prompt_text)
             if not model_client:
                  raise AIAnalyzerError(f"未能从ModelManager获取模型客户端 (线程ID: {thread_id})。")
-            with open(analysis_output_file_path, 'w', encoding='utf-8') as outfile:
+            task_nodes = self._build_task_graph(defined_tasks)
+            max_parallel_tasks = context.ai_config.get('execution_settings', {}).get('max_parallel_tasks_per_file', 1)
+            with open(analysis_output_file_path, 'w', encoding='utf-8') as analysis_file:
+                # 记录各任务区块的字节偏移，写完后生成区块索引
+                outfile = SectionTrackingWriter(analysis_file)
                 # 写入metadata头部到分析文档顶部
                 self._write_metadata_header(outfile, embedded_meta)
                 
-                for i, task_config in enumerate(defined_tasks):
-                    task_type = task_config.get('type')
-                    if not task_type:
-                        self.logger.warning(f"跳过没有类型的任务: {task_config}") # REMOVED color_override (was warning color before)
-                        continue
-                    
-                    # 特殊处理AI竞争分析任务：根据标题前缀选择提示词
-                    if task_type == "AI竞争分析":
-                        # 先检查是否已经有标题翻译结果
-                        title_translation = analysis_content_for_file.get("AI标题翻译", "").strip()
-                        if title_translation:
-                            task_prompt_text = context.prompt_manager.get_competitive_analysis_prompt(title_translation)
-                            self.logger.info(f"根据标题前缀选择竞争分析提示词: {title_translation[:50]}...")
-                        else:
-                            # 如果没有标题翻译结果，使用默认的竞争分析提示词
-                            task_prompt_text = context.prompt_manager.get_task_prompt(task_type)
-                            self.logger.warning(f"未找到标题翻译结果，使用默认竞争分析提示词")
-                    else:
-                        task_prompt_text = context.prompt_manager.get_task_prompt(task_type)
-                    
-                    if not task_prompt_text:
-                        self.logger.warning(f"因prompt为空跳过任务 '{task_type}' 。") # REMOVED color_override (was warning color before)
-                        current_file_tasks_status[task_type] = {'success': False, 'error': 'Empty prompt', 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
-                        continue
-                    self.logger.info(f"执行任务 [{i+1}/{len(defined_tasks)}]: {task_type} for file {file_path}") # REMOVED color_override
-                    full_ai_prompt = f"{task_prompt_text}\n\n--- FILE CONTENT BELOW ---\n{content}"
-                    task_status_entry = {'success': False, 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')}
-                    try:
-                        raw_ai_result = self._perform_ai_analysis_call(
-                            context, model_client, full_ai_prompt, task_type, precise_rate_limiter
-                        )
-                        error_prefixes = ["API调用失败:", "API调用或重试机制失败:", "分析内容时发生意外错误:"]
-                        if any(raw_ai_result.startswith(prefix) for prefix in error_prefixes) or len(raw_ai_result.strip()) < 5:
-                            raise AIAnalyzerError(f"AI analysis for task '{task_type}' returned error or invalid result: {raw_ai_result}")
-                        cleaned_result = self._clean_ai_response(raw_ai_result, task_type)
-                        analysis_content_for_file[task_type] = cleaned_result
-                        task_status_entry['success'] = True
-                        should_output_to_file = task_config.get('output', True)
-                        if task_type == "AI标题翻译" or should_output_to_file:
-                            outfile.write(f"\n<!-- AI_TASK_START: {task_type} -->\n")
-                            outfile.write(f"{cleaned_result}\n")
-                            outfile.write(f"<!-- AI_TASK_END: {task_type} -->\n\n")
-                            outfile.flush()
-                    except Exception as e:
-                        self.logger.error(f"在任务 '{task_type}' (文件 '{file_path}') 中发生错误: {e}", exc_info=True)
-                        task_status_entry['error'] = str(e)
-                        should_output_to_file = task_config.get('output', True)
-                        if task_type == "AI标题翻译" or should_output_to_file:
-                            sanitized_error_message = str(e).replace('-->', '--&gt;').replace('<!--', '&lt;!--')
-                            error_message_for_file = f"<!-- ERROR: {sanitized_error_message} -->"
-                            outfile.write(f"\n<!-- AI_TASK_START: {task_type} -->\n")
-                            outfile.write(f"{error_message_for_file}\n")
-                            outfile.write(f"<!-- AI_TASK_END: {task_type} -->\n\n")
-                            outfile.flush()
-                    current_file_tasks_status[task_type] = task_status_entry
-            with context.metadata_lock:
-                if normalized_path_key not in context.metadata:
-                    context.metadata[normalized_path_key] = {'file': normalized_path_key}
-                context.metadata[normalized_path_key]['info'] = embedded_meta
-                
-                # 从分析内容中提取中文标题（如果有）
-                if analysis_content_for_file.get("AI标题翻译"):
-                    raw_chinese_title = analysis_content_for_file["AI标题翻译"].strip()
-                    
-                    # 提取方括号内的标签作为 update_type
-                    update_type_match = re.match(r'^\[(.*?)\]', raw_chinese_title)
-                    if update_type_match:
-                        update_type = update_type_match.group(1).strip()
-                        # 使用正则表达式移除标题头部的如 "[标签]" 部分作为 chinese_title
-                        pure_chinese_title = re.sub(r'^\[.*?\]\s*', '', raw_chinese_title).strip()
-                    else:
-                        update_type = "" # 如果没有匹配到标签，则 update_type 为空
-                        pure_chinese_title = raw_chinese_title # chinese_title 就是原始标题
-
-                    # 将提取的 update_type 和处理后的中文标题添加到info字段
-                    context.metadata[normalized_path_key]['info']['update_type'] = update_type
-                    context.metadata[normalized_path_key]['info']['chinese_title'] = pure_chinese_title
-                    
-                    # 记录到日志
-                    self.logger.debug(f"提取到 update_type: '{update_type}', chinese_title: '{pure_chinese_title}' (文件: {file_path})")
-                
-                if embedded_meta.get('publish_date'):
-                    context.metadata[normalized_path_key]['publish_date'] = embedded_meta['publish_date']
-                context.metadata[normalized_path_key]['tasks'] = current_file_tasks_status
-                context.metadata[normalized_path_key]['last_analyzed'] = time.strftime('%Y-%m-%d %H:%M:%S')
+                stream_sections = self._create_stream_sections(task_nodes, model_client)
                 
-                # 计算并保存源文件的hash，用于检测文件内容变更
-                try:
-                    with open(file_path, 'rb') as f_hash:
-                        source_hash = hashlib.sha256(f_hash.read()).hexdigest()
-                    context.metadata[normalized_path_key]['source_hash'] = source_hash
-                except Exception as hash_err:
-                    self.logger.warning(f"计算文件 '{file_path}' 的source_hash时出错: {hash_err}")
+                def run_task(node: Dict[str, Any]) -> Dict[str, Any]:
+                    # 依赖任务已全部完成，analysis_content_for_file 中已有其结果
+                    return self._execute_task(
+                        context, model_client, node, len(defined_tasks), content, file_path,
+                        analysis_content_for_file, precise_rate_limiter, stream_sections.get(node['index'])
+                    )
                 
-                context.metadata[normalized_path_key].pop('last_error', None)
+                on_task_done, write_task_section, attach_next_section = self._make_task_callbacks(
+                    outfile, analysis_content_for_file, current_file_tasks_status, stream_sections
+                )
+                self._run_task_graph(
+                    task_nodes, run_task, on_task_done, write_task_section, max_parallel_tasks, attach_next_section
+                )
+            outfile.save_index(analysis_output_file_path)
+            self._save_file_metadata(
+                context, file_path, normalized_path_key, embedded_meta, analysis_content_for_file, current_file_tasks_status
+            )
             file_summary['status'] = 'completed'
             file_summary['task_results'] = analysis_content_for_file
             self.logger.info(f"成功处理文件: {file_path}") # REMOVED color_override
@@ -328,26 +1045,607 @@ class AnalysisExecutionStage(PipelineStage):
             self.logger.error(f"处理文件 '{file_path}' 失败: {e}", exc_info=True)
             file_summary['status'] = 'failed'
             file_summary['error'] = str(e)
-            with context.metadata_lock:
-                if normalized_path_key not in context.metadata:
-                     context.metadata[normalized_path_key] = {'file': normalized_path_key}
-                # 如果有提取到嵌入式元数据，即使出错也保存
-                if file_summary.get('embedded_metadata') and file_summary['embedded_metadata'].get('publish_date'):
-                    context.metadata[normalized_path_key]['info'] = file_summary['embedded_metadata']
-                    context.metadata[normalized_path_key]['publish_date'] = file_summary['embedded_metadata']['publish_date']
-                
-                # 如果成功生成了中文标题，即使其他任务失败也保存
-                if file_summary.get('task_results') and file_summary['task_results'].get('AI标题翻译'):
-                    if 'info' not in context.metadata[normalized_path_key]:
-                        context.metadata[normalized_path_key]['info'] = {}
-                    context.metadata[normalized_path_key]['info']['chinese_title'] = file_summary['task_results']['AI标题翻译'].strip()
-                    self.logger.debug(f"即使处理失败，也将中文标题保存到元数据 (文件: {file_path})")
-                
-                context.metadata[normalized_path_key]['last_error'] = str(e)
-                context.metadata[normalized_path_key]['last_error_time'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            self._save_failure_metadata(context, file_path, normalized_path_key, file_summary, e)
         self.logger.debug(f"完成文件处理: {file_path}, 状态: {file_summary['status']}") # REMOVED color_override
         return file_summary
 
+    async def _perform_ai_analysis_call_async(
+        self,
+        context: AnalysisContext,
+        model_client: Any,
+        prompt: str,
+        task_type: str,
+        token_bucket: Optional[AsyncTokenBucket],
+        request_semaphore: asyncio.Semaphore,
+        stream_section: Optional[StreamingSection] = None,
+        document: Optional[str] = None
+    ) -> str:
+        """
+        异步执行一次AI调用（带限速、并发上限和重试）
+        
+        Args:
+            context: 分析上下文
+            model_client: 异步模型客户端
+            prompt: 任务提示词
+            task_type: 任务类型
+            token_bucket: 共享的令牌桶限速器，为None时不限速
+            request_semaphore: 限制同时进行的请求数
+            stream_section: 流式任务的区块，提供时以流式方式调用
+            document: 文档内容，放在任务提示之前（同一文档的各任务共享提示前缀）
+            
+        Returns:
+            清理后的AI响应
+        """
+        cache_key = self._response_cache_key(context, model_client, prompt, document)
+        if cache_key is not None:
+            cached_result = context.response_cache.get(cache_key)
+            if cached_result is not None:
+                self.logger.info(f"任务 '{task_type}' 命中AI响应缓存，跳过API调用")
+                return self._clean_ai_response(cached_result, task_type)
+        retry_strategy = RetryWithExponentialBackoff(
+            max_retries=context.ai_config.get('max_retries', 3),
+            initial_delay=context.ai_config.get('initial_retry_delay', 1.0),
+            max_delay=context.ai_config.get('max_retry_delay', 60.0)
+        )
+        
+        async def api_call():
+            if token_bucket is not None:
+                wait_duration = await token_bucket.acquire()
+                if wait_duration > 0:
+                    self.logger.debug(f"任务 '{task_type}' 已等待 {wait_duration:.2f} 秒 (令牌桶限速)")
+            async with request_semaphore:
+                if stream_section is not None:
+                    return await self._stream_call_async(model_client, prompt, task_type, stream_section, document)
+                return await model_client.predict(prompt, document=document)
+        
+        try:
+            result = await retry_strategy.execute_async(api_call, retryable_exceptions=async_retryable_exceptions())
+            if cache_key is not None and self._is_valid_ai_result(result):
+                context.response_cache.put(cache_key, result, task_type)
+            return self._clean_ai_response(result, task_type)
+        except APIError as e:
+            self.logger.error(f"任务 '{task_type}' 遭遇API错误 (已达最大重试次数): {e}")
+            raise AIAnalyzerError(f"AI API call failed for task '{task_type}' after multiple retries: {e}") from e
+        except Exception as e:
+            self.logger.error(f"任务 '{task_type}' 的AI调用中发生意外错误: {e!r}")
+            raise AIAnalyzerError(f"Unexpected error during AI call for task '{task_type}': {e!r}") from e
+
+    async def _run_task_graph_async(
+        self,
+        nodes: List[Dict[str, Any]],
+        run_task: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        on_task_done: Callable[[Dict[str, Any], Dict[str, Any]], None],
+        write_task_section: Callable[[Dict[str, Any], Dict[str, Any]], None],
+        max_parallel_tasks: int = 1,
+        attach_next_section: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> None:
+        """
+        _run_task_graph 的协程版本，依赖已满足的任务作为协程并发执行
+        
+        Args:
+            nodes: _build_task_graph 返回的任务节点
+            run_task: 执行单个任务的协程函数
+            on_task_done: 任务完成后（其依赖任务开始之前）调用
+            write_task_section: 按配置顺序写入任务结果时调用
+            max_parallel_tasks: 同时执行的最大任务数
+            attach_next_section: 下一个待写入的任务（尚未完成）确定后调用
+        """
+        try:
+            max_parallel_tasks = max(1, int(max_parallel_tasks))
+        except (TypeError, ValueError):
+            max_parallel_tasks = 1
+        outcomes: Dict[int, Dict[str, Any]] = {}
+        next_to_write = 0
+        if attach_next_section and nodes:
+            attach_next_section(nodes[0])
+        running: Dict[asyncio.Task, int] = {}
+        submitted: Set[int] = set()
+        while len(outcomes) < len(nodes):
+            for index, node in enumerate(nodes):
+                if len(running) >= max_parallel_tasks:
+                    break
+                if index not in submitted and node['depends_on'].issubset(outcomes):
+                    submitted.add(index)
+                    running[asyncio.ensure_future(run_task(node))] = index
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = running.pop(task)
+                try:
+                    outcome = task.result()
+                except Exception as e:
+                    self.logger.error(f"任务 '{nodes[index]['type']}' 执行异常: {e}", exc_info=True)
+                    outcome = {
+                        'status': {'success': False, 'error': str(e), 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')},
+                        'result': None,
+                        'section': None
+                    }
+                outcomes[index] = outcome
+                on_task_done(nodes[index], outcome)
+                while next_to_write < len(nodes) and next_to_write in outcomes:
+                    write_task_section(nodes[next_to_write], outcomes[next_to_write])
+                    next_to_write += 1
+                if attach_next_section and next_to_write < len(nodes):
+                    attach_next_section(nodes[next_to_write])
+
+    async def _process_single_file_async(
+        self,
+        file_path: str,
+        context: AnalysisContext,
+        model_client: Any,
+        token_bucket: Optional[AsyncTokenBucket],
+        request_semaphore: asyncio.Semaphore
+    ) -> Dict[str, Any]:
+        """
+        _process_single_file 的协程版本
+        
+        文件读写和元数据更新都是本地小文件操作，直接在事件循环中执行；只有AI调用会让出事件循环。
+        """
+        self.logger.debug(f"开始处理文件: {file_path} (asyncio)")
+        normalized_path_key = self._normalize_path_for_metadata(file_path, context)
+        file_summary = {
+            'file_path': file_path,
+            'normalized_key': normalized_path_key,
+            'status': 'pending',
+            'embedded_metadata': {},
+            'task_results': {},
+            'error': None
+        }
+        try:
+            content, embedded_meta, analysis_output_file_path = self._read_source_file(file_path, context, file_summary)
+            current_file_tasks_status: Dict[str, Dict[str, Any]] = {}
+            analysis_content_for_file: Dict[str, str] = {}
+            defined_tasks = context.ai_config.get('tasks', [])
+            task_nodes = self._build_task_graph(defined_tasks)
+            max_parallel_tasks = context.ai_config.get('execution_settings', {}).get('max_parallel_tasks_per_file', 1)
+            stream_sections = self._create_stream_sections(task_nodes, model_client)
+            
+            async def run_task(node: Dict[str, Any]) -> Dict[str, Any]:
+                task_type = node['type']
+                task_prompt_text = self._build_task_prompt(context, task_type, analysis_content_for_file)
+                if not task_prompt_text:
+                    return self._skipped_task_outcome(task_type)
+                self.logger.info(f"执行任务 [{node['position']+1}/{len(defined_tasks)}]: {task_type} for file {file_path}")
+                stream_section = stream_sections.get(node['index'])
+                chunks = self._split_task_document(node, model_client, content, file_path)
+                try:
+                    if len(chunks) > 1:
+                        raw_ai_result = await self._perform_chunked_ai_call_async(
+                            context, model_client, task_prompt_text, task_type, chunks, node['config'].get('chunking'),
+                            token_bucket, request_semaphore, stream_section
+                        )
+                    else:
+                        raw_ai_result = await self._perform_ai_analysis_call_async(
+                            context, model_client, task_prompt_text, task_type, token_bucket, request_semaphore,
+                            stream_section, document=content
+                        )
+                except Exception as e:
+                    return self._task_outcome(node, file_path, error=e, stream_section=stream_section)
+                return self._task_outcome(node, file_path, raw_ai_result=raw_ai_result, stream_section=stream_section)
+            
+            with open(analysis_output_file_path, 'w', encoding='utf-8') as analysis_file:
+                outfile = SectionTrackingWriter(analysis_file)
+                self._write_metadata_header(outfile, embedded_meta)
+                on_task_done, write_task_section, attach_next_section = self._make_task_callbacks(
+                    outfile, analysis_content_for_file, current_file_tasks_status, stream_sections
+                )
+                await self._run_task_graph_async(
+                    task_nodes, run_task, on_task_done, write_task_section, max_parallel_tasks, attach_next_section
+                )
+            outfile.save_index(analysis_output_file_path)
+            self._save_file_metadata(
+                context, file_path, normalized_path_key, embedded_meta, analysis_content_for_file, current_file_tasks_status
+            )
+            file_summary['status'] = 'completed'
+            file_summary['task_results'] = analysis_content_for_file
+            self.logger.info(f"成功处理文件: {file_path}")
+        except Exception as e:
+            self.logger.error(f"处理文件 '{file_path}' 失败: {e}", exc_info=True)
+            file_summary['status'] = 'failed'
+            file_summary['error'] = str(e)
+            self._save_failure_metadata(context, file_path, normalized_path_key, file_summary, e)
+        self.logger.debug(f"完成文件处理: {file_path}, 状态: {file_summary['status']}")
+        return file_summary
+
+    async def _execute_async(self, context: AnalysisContext) -> None:
+        """
+        asyncio执行模式：所有文件的AI调用在一个事件循环中并发进行
+        
+        所有请求共用一个 aiohttp 会话（连接池复用keep-alive连接），同时进行的请求数不超过
+        max_concurrent_requests，请求速率由令牌桶按 api_rate_limit 控制。等待中的请求只占用
+        协程而不占用线程。
+        """
+        execution_settings = context.ai_config.get('execution_settings', {})
+        max_concurrent_requests = max(1, int(execution_settings.get('max_concurrent_requests', 100)))
+        request_timeout = execution_settings.get('request_timeout_seconds', 300)
+        api_requests_per_minute = context.ai_config.get('api_rate_limit', 0)
+        
+        token_bucket: Optional[AsyncTokenBucket] = None
+        if api_requests_per_minute > 0:
+            api_call_burst_window_seconds = execution_settings.get('api_call_burst_window_seconds', 5)
+            if not isinstance(api_call_burst_window_seconds, int) or api_call_burst_window_seconds <= 0:
+                api_call_burst_window_seconds = 5
+            burst = max(1, math.floor(api_requests_per_minute / 60.0 * api_call_burst_window_seconds))
+            token_bucket = AsyncTokenBucket(api_requests_per_minute, burst)
+        else:
+            self.logger.warning("API速率限制未配置或为0 (api_rate_limit), AI调用将只受并发上限限制。")
+        
+        self.logger.info(f"使用 asyncio 执行 {len(context.files_to_analyze)} 个文件，最大并发请求: {max_concurrent_requests}")
+        request_semaphore = asyncio.Semaphore(max_concurrent_requests)
+        # 同时打开的分析文档数与并发请求数一致，避免一次打开所有输出文件
+        file_semaphore = asyncio.Semaphore(max_concurrent_requests)
+        system_prompt_text = context.prompt_manager.get_system_prompt()
+        
+        async with create_client_session(max_concurrent_requests, request_timeout) as session:
+            model_client = context.model_manager.get_async_model_client(system_prompt_text, session)
+            progress = tqdm(total=len(context.files_to_analyze), desc="异步分析文件", unit="file")
+            
+            async def process(file_path: str) -> Dict[str, Any]:
+                async with file_semaphore:
+                    try:
+                        return await self._process_single_file_async(
+                            file_path, context, model_client, token_bucket, request_semaphore
+                        )
+                    finally:
+                        progress.update(1)
+            
+            try:
+                results = await asyncio.gather(*(process(file_path) for file_path in context.files_to_analyze))
+            finally:
+                progress.close()
+        
+        context.analysis_results.extend(results)
+        failed_count = sum(1 for result in results if result.get('status') == 'failed')
+        self.logger.info(f"asyncio 执行完成。成功: {len(results) - failed_count}, 失败: {failed_count}")
+
+    def _prepare_batch_file(self, file_path: str, context: AnalysisContext) -> Dict[str, Any]:
+        """
+        读取批处理模式下的单个文件，返回其处理状态
+        
+        Returns:
+            包含 summary（与 _process_single_file 相同的文件处理结果）、文档内容、任务节点、
+            各任务结果等的字典；读取失败时 summary 的状态为 failed
+        """
+        normalized_path_key = self._normalize_path_for_metadata(file_path, context)
+        file_summary = {
+            'file_path': file_path,
+            'normalized_key': normalized_path_key,
+            'status': 'pending',
+            'embedded_metadata': {},
+            'task_results': {},
+            'error': None
+        }
+        job = {
+            'file_path': file_path,
+            'normalized_key': normalized_path_key,
+            'summary': file_summary,
+            'nodes': self._build_task_graph(context.ai_config.get('tasks', [])),
+            'outcomes': {},
+            'submitted': set(),
+            'analysis_content': {},
+            'tasks_status': {}
+        }
+        try:
+            job['content'], job['embedded_meta'], job['output_path'] = self._read_source_file(
+                file_path, context, file_summary
+            )
+        except Exception as e:
+            self._fail_batch_file(context, job, e)
+        return job
+
+    def _fail_batch_file(self, context: AnalysisContext, job: Dict[str, Any], error: Exception) -> None:
+        """批处理模式下记录文件处理失败"""
+        file_summary = job['summary']
+        self.logger.error(f"处理文件 '{job['file_path']}' 失败: {error}", exc_info=True)
+        file_summary['status'] = 'failed'
+        file_summary['error'] = str(error)
+        file_summary['task_results'] = job['analysis_content']
+        self._save_failure_metadata(context, job['file_path'], job['normalized_key'], file_summary, error)
+
+    def _record_batch_outcome(self, job: Dict[str, Any], node: Dict[str, Any], outcome: Dict[str, Any]) -> None:
+        """记录批处理模式下完成的任务，依赖它的任务在下一轮提交"""
+        job['outcomes'][node['index']] = outcome
+        if outcome.get('result') is not None:
+            job['analysis_content'][node['type']] = outcome['result']
+        job['tasks_status'][node['type']] = outcome['status']
+
+    def _finish_batch_task(self, job: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        """
+        所有分块都有结果后生成任务结果
+        
+        Args:
+            job: 文件处理状态
+            entry: 任务的请求状态，results 为各分块的原始响应，errors 为失败分块的错误
+        """
+        node = entry['node']
+        task_type = node['type']
+        total = len(entry['chunks'])
+        if total == 1:
+            if 0 in entry['errors']:
+                outcome = self._task_outcome(node, job['file_path'], error=entry['errors'][0])
+            else:
+                outcome = self._task_outcome(node, job['file_path'], raw_ai_result=entry['results'][0])
+        else:
+            assembler = ChunkAssembler(total)
+            for index in range(total):
+                if index in entry['errors']:
+                    assembler.fail(index, entry['errors'][index])
+                else:
+                    assembler.add(index, self._clean_ai_response(entry['results'][index], task_type))
+            try:
+                outcome = self._task_outcome(node, job['file_path'], raw_ai_result=assembler.result())
+            except Exception as e:
+                outcome = self._task_outcome(node, job['file_path'], error=e)
+        self._record_batch_outcome(job, node, outcome)
+
+    def _collect_batch_requests(self, context: AnalysisContext, model_client: Any,
+                                jobs: List[Dict[str, Any]], batch_endpoint: str) -> List[Dict[str, Any]]:
+        """
+        为依赖已满足的任务生成本轮的批处理请求
+        
+        提示词为空的任务直接跳过，所有分块都命中响应缓存的任务直接完成，不进入批处理。
+        
+        Returns:
+            请求列表，每项包含 custom_id、line（JSONL行）、job、entry、chunk 下标、提示词和文档
+        """
+        requests_to_submit: List[Dict[str, Any]] = []
+        for job_index, job in enumerate(jobs):
+            if job['summary']['status'] == 'failed':
+                continue
+            for node in job['nodes']:
+                if node['index'] in job['submitted'] or not node['depends_on'].issubset(job['outcomes']):
+                    continue
+                job['submitted'].add(node['index'])
+                task_type = node['type']
+                task_prompt_text = self._build_task_prompt(context, task_type, job['analysis_content'])
+                if not task_prompt_text:
+                    self._record_batch_outcome(job, node, self._skipped_task_outcome(task_type))
+                    continue
+                try:
+                    chunks = self._split_task_document(node, model_client, job['content'], job['file_path'])
+                    total = len(chunks)
+                    entry = {'node': node, 'chunks': chunks, 'results': [None] * total, 'errors': {}, 'pending': 0}
+                    entry_requests: List[Dict[str, Any]] = []
+                    for chunk_index, chunk in enumerate(chunks):
+                        prompt = build_chunk_prompt(task_prompt_text, chunk_index, total) if total > 1 else task_prompt_text
+                        cache_key = self._response_cache_key(context, model_client, prompt, chunk)
+                        if cache_key is not None:
+                            cached_result = context.response_cache.get(cache_key)
+                            if cached_result is not None:
+                                entry['results'][chunk_index] = cached_result
+                                continue
+                        custom_id = f"{job_index}-{node['index']}-{chunk_index}"
+                        payload = model_client._build_request_data(prompt, document=chunk)['payload']
+                        entry_requests.append({
+                            'custom_id': custom_id,
+                            'line': build_batch_line(custom_id, payload, batch_endpoint),
+                            'job': job,
+                            'entry': entry,
+                            'chunk': chunk_index,
+                            'prompt': prompt,
+                            'document': chunk,
+                            'cache_key': cache_key
+                        })
+                except Exception as e:
+                    self._record_batch_outcome(job, node, self._task_outcome(node, job['file_path'], error=e))
+                    continue
+                entry['pending'] = len(entry_requests)
+                requests_to_submit.extend(entry_requests)
+                if entry['pending'] == 0:
+                    self.logger.info(f"任务 '{task_type}' 命中AI响应缓存，不提交批处理 (文件: {job['file_path']})")
+                    self._finish_batch_task(job, entry)
+        return requests_to_submit
+
+    def _load_batch_state(self, state_path: str) -> Dict[str, Any]:
+        """读取已提交的批处理任务（输入内容的hash到批处理任务ID），用于中断后继续等待"""
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"读取批处理任务记录失败，将重新提交: {state_path} - {e}")
+            return {}
+
+    def _save_batch_state(self, state_path: str, state: Dict[str, Any]) -> None:
+        """保存已提交的批处理任务"""
+        try:
+            os.makedirs(os.path.dirname(state_path), exist_ok=True)
+            temp_path = state_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, state_path)
+        except OSError as e:
+            self.logger.warning(f"保存批处理任务记录失败: {state_path} - {e}")
+
+    def _run_batch(self, batch_client: BatchAPIClient, lines: List[str], batch_settings: Dict[str, Any],
+                   retry_strategy: RetryWithExponentialBackoff, state_path: str) -> Dict[str, Dict[str, Any]]:
+        """
+        提交一个批处理任务并等待其结束
+        
+        输入内容相同的批处理已提交过且未失败时（如上次运行在等待期间中断），继续等待该任务，
+        不重复提交。
+        
+        Returns:
+            custom_id 到结果的映射，见 parse_batch_results
+        """
+        input_hash = hashlib.sha256('\n'.join(lines).encode('utf-8')).hexdigest()
+        state = self._load_batch_state(state_path)
+        batch = None
+        previous = state.get(input_hash)
+        if previous:
+            try:
+                batch = retry_strategy.execute(batch_client.retrieve, previous['batch_id'])
+                if batch.get('status') in ('failed', 'expired', 'cancelled'):
+                    self.logger.warning(f"之前提交的批处理任务 {previous['batch_id']} 状态为 {batch.get('status')}，重新提交")
+                    batch = None
+                else:
+                    self.logger.info(f"继续等待之前提交的批处理任务 {previous['batch_id']} ({len(lines)} 个请求)")
+            except Exception as e:
+                self.logger.warning(f"查询之前提交的批处理任务 {previous['batch_id']} 失败，重新提交: {e}")
+                batch = None
+        if batch is None:
+            input_file_id = retry_strategy.execute(batch_client.upload, lines, f"batch_{input_hash[:16]}.jsonl")
+            batch = retry_strategy.execute(batch_client.create, input_file_id, {'input_hash': input_hash})
+            state[input_hash] = {
+                'batch_id': batch['id'],
+                'requests': len(lines),
+                'submitted_at': time.strftime('%Y-%m-%d %H:%M:%S')
+            }
+            self._save_batch_state(state_path, state)
+        if batch.get('status') not in BATCH_TERMINAL_STATUSES:
+            batch = batch_client.wait(
+                batch['id'],
+                poll_interval=batch_settings.get('poll_interval_seconds', 30),
+                timeout=batch_settings.get('max_wait_seconds'),
+                retrieve=lambda batch_id: retry_strategy.execute(batch_client.retrieve, batch_id)
+            )
+        if batch.get('status') != 'completed':
+            self.logger.error(f"批处理任务 {batch['id']} 未成功完成，状态: {batch.get('status')}, 错误: {batch.get('errors')}")
+        results = retry_strategy.execute(batch_client.collect_results, batch)
+        state = self._load_batch_state(state_path)
+        state.pop(input_hash, None)
+        self._save_batch_state(state_path, state)
+        return results
+
+    def _execute_batch(self, context: AnalysisContext) -> None:
+        """
+        Batch API执行模式：用于全量重新分析等批量回填
+        
+        所有文件中依赖已满足的任务打包成一个（超过上限时拆成多个）批处理任务提交，结束后
+        按轮次提交依赖它们的任务（如依赖标题翻译的竞争分析）。请求体与实时调用相同，结果
+        经过同样的清理、响应缓存、分块拼接，写入分析文档和元数据的方式与 _process_single_file
+        一致。批处理中失败或缺失的请求可以回退为实时调用。
+        """
+        batch_settings = context.ai_config.get('batch', {}) or {}
+        batch_endpoint = batch_settings.get('endpoint', '/v1/chat/completions')
+        
+        self.logger.info(f"使用 Batch API 执行 {len(context.files_to_analyze)} 个文件")
+        jobs = [self._prepare_batch_file(file_path, context) for file_path in context.files_to_analyze]
+        try:
+            system_prompt_text = context.prompt_manager.get_system_prompt()
+            model_client = context.model_manager.get_model_client(system_prompt_text=system_prompt_text)
+            if not model_client or not hasattr(model_client, '_build_request_data'):
+                raise AIAnalyzerError(f"模型客户端 {type(model_client).__name__} 不支持Batch API")
+            batch_client = BatchAPIClient(
+                model_client,
+                endpoint=batch_endpoint,
+                completion_window=batch_settings.get('completion_window', '24h'),
+                request_timeout=context.ai_config.get('execution_settings', {}).get('request_timeout_seconds', 300)
+            )
+        except Exception as e:
+            # 与逐文件执行模式一致：客户端创建失败时各文件记为失败，不中断阶段
+            self.logger.error(f"无法创建Batch API客户端: {e}")
+            for job in jobs:
+                if job['summary']['status'] != 'failed':
+                    self._fail_batch_file(context, job, e)
+                context.analysis_results.append(job['summary'])
+            return
+        
+        retry_strategy = RetryWithExponentialBackoff(
+            max_retries=context.ai_config.get('max_retries', 3),
+            initial_delay=context.ai_config.get('initial_retry_delay', 1.0),
+            max_delay=context.ai_config.get('max_retry_delay', 60.0)
+        )
+        state_path = batch_settings.get('state_path', 'data/cache/ai_batches.json')
+        if not os.path.isabs(state_path):
+            state_path = os.path.join(context.project_root_dir or os.getcwd(), state_path)
+        max_requests = max(1, int(batch_settings.get('max_requests_per_batch', 5000)))
+        max_bytes = int(float(batch_settings.get('max_file_size_mb', 100)) * 1024 * 1024)
+        fallback_to_sync = batch_settings.get('fallback_to_sync', True)
+        wave = 0
+        while True:
+            completed_before = sum(len(job['outcomes']) for job in jobs)
+            requests_to_submit = self._collect_batch_requests(context, model_client, jobs, batch_endpoint)
+            if not requests_to_submit:
+                if sum(len(job['outcomes']) for job in jobs) == completed_before:
+                    # 没有新完成的任务，所有任务都已处理
+                    break
+                # 本轮的任务都命中缓存或被跳过，依赖它们的任务在下一轮提交
+                continue
+            wave += 1
+            batches = split_batches([request['line'] for request in requests_to_submit], max_requests, max_bytes)
+            self.logger.info(f"第 {wave} 轮批处理: {len(requests_to_submit)} 个请求，分为 {len(batches)} 个批处理任务")
+            results: Dict[str, Dict[str, Any]] = {}
+            for lines in batches:
+                try:
+                    results.update(self._run_batch(batch_client, lines, batch_settings, retry_strategy, state_path))
+                except Exception as e:
+                    self.logger.error(f"批处理任务执行失败 ({len(lines)} 个请求): {e}", exc_info=True)
+            
+            fallback_limiter: Optional[PreciseRateLimiter] = None
+            for request in requests_to_submit:
+                entry = request['entry']
+                task_type = entry['node']['type']
+                result = results.get(request['custom_id'])
+                if result is None:
+                    raw_result, error_message = None, "批处理未返回该请求的结果"
+                else:
+                    raw_result, error_message = batch_client.extract_text(result)
+                    if isinstance(result.get('body'), dict):
+                        record_usage(model_client.api_base, result['body'].get('usage'))
+                if raw_result is not None and self._is_valid_ai_result(raw_result):
+                    if request['cache_key'] is not None:
+                        context.response_cache.put(request['cache_key'], raw_result, task_type)
+                elif fallback_to_sync:
+                    self.logger.warning(
+                        f"任务 '{task_type}' 的批处理请求 {request['custom_id']} 失败 ({error_message or '结果无效'})，"
+                        f"改为实时调用 (文件: {request['job']['file_path']})"
+                    )
+                    api_requests_per_minute = context.ai_config.get('api_rate_limit', 0)
+                    if fallback_limiter is None and api_requests_per_minute > 0:
+                        # 实时调用仍受 api_rate_limit 限制
+                        burst_window = context.ai_config.get('execution_settings', {}).get('api_call_burst_window_seconds', 5)
+                        if not isinstance(burst_window, int) or burst_window <= 0:
+                            burst_window = 5
+                        fallback_limiter = PreciseRateLimiter(
+                            max_calls=max(1, math.floor(api_requests_per_minute / 60.0 * burst_window)),
+                            window_seconds=burst_window
+                        )
+                    try:
+                        # 返回的是清理后的结果，再次清理不会改变内容
+                        raw_result = self._perform_ai_analysis_call(
+                            context, model_client, request['prompt'], task_type, fallback_limiter,
+                            document=request['document']
+                        )
+                    except Exception as e:
+                        entry['errors'][request['chunk']] = e
+                elif raw_result is None:
+                    entry['errors'][request['chunk']] = AIAnalyzerError(
+                        f"Batch request for task '{task_type}' failed: {error_message}"
+                    )
+                if request['chunk'] not in entry['errors']:
+                    entry['results'][request['chunk']] = raw_result
+                entry['pending'] -= 1
+                if entry['pending'] == 0:
+                    self._finish_batch_task(request['job'], entry)
+        
+        for job in jobs:
+            if job['summary']['status'] == 'failed':
+                context.analysis_results.append(job['summary'])
+                continue
+            try:
+                with open(job['output_path'], 'w', encoding='utf-8') as analysis_file:
+                    outfile = SectionTrackingWriter(analysis_file)
+                    self._write_metadata_header(outfile, job['embedded_meta'])
+                    _, write_task_section, _ = self._make_task_callbacks(
+                        outfile, job['analysis_content'], job['tasks_status']
+                    )
+                    for node in job['nodes']:
+                        write_task_section(node, job['outcomes'][node['index']])
+                outfile.save_index(job['output_path'])
+                self._save_file_metadata(
+                    context, job['file_path'], job['normalized_key'], job['embedded_meta'],
+                    job['analysis_content'], job['tasks_status']
+                )
+                job['summary']['status'] = 'completed'
+                job['summary']['task_results'] = job['analysis_content']
+                self.logger.info(f"成功处理文件: {job['file_path']}")
+            except Exception as e:
+                self._fail_batch_file(context, job, e)
+            context.analysis_results.append(job['summary'])
+        failed_count = sum(1 for job in jobs if job['summary']['status'] == 'failed')
+        self.logger.info(f"Batch API 执行完成。共 {wave} 轮批处理，成功: {len(jobs) - failed_count}, 失败: {failed_count}")
+
     def execute(self, context: AnalysisContext) -> AnalysisContext:
         self.logger.info(f"开始执行 {self.stage_name} 阶段...") # REMOVED color_override
         context.analysis_results = []
@@ -358,6 +1656,19 @@ class AnalysisExecutionStage(PipelineStage):
             self.logger.info("没有文件需要分析。")
             return context
         self.logger.info(f"准备分析 {len(context.files_to_analyze)} 个文件...") # REMOVED color_override
+        engine = context.ai_config.get('execution_settings', {}).get('engine', 'threads')
+        if engine == 'batch':
+            self._execute_batch(context)
+            self.logger.info(f"分析执行阶段完成。共获得 {len(context.analysis_results)} 个文件结果。")
+            return context
+        if engine == 'asyncio':
+            if async_client_available():
+                asyncio.run(self._execute_async(context))
+                self.logger.info(f"分析执行阶段完成。共获得 {len(context.analysis_results)} 个文件结果。")
+                return context
+            self.logger.warning("execution_settings.engine 为 asyncio，但未安装 aiohttp，改用线程池执行。")
+        elif engine != 'threads':
+            self.logger.warning(f"未知的执行引擎 '{engine}'，使用线程池执行。")
         use_dynamic_pool = context.ai_config.get('use_dynamic_pool', True)
         if use_dynamic_pool:
             max_workers = context.ai_config.get('max_workers', 4)
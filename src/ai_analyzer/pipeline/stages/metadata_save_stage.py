@@ -64,5 +64,21 @@ class MetadataSaveStage(PipelineStage):
                 self.logger.error(f"保存元数据到 '{metadata_file_path}' (加锁) 时发生错误: {e}", exc_info=True)
                 # Depending on policy, could re-raise the exception.
 
+        self._sync_sqlite_metadata(context)
+
         self.logger.info("元数据保存阶段执行完毕。")
-        return context 
\ No newline at end of file
+        return context
+
+    def _sync_sqlite_metadata(self, context: AnalysisContext) -> None:
+        """元数据存储后端为sqlite时，将刚保存的分析元数据同步到SQLite元数据库"""
+        store_config = context.config.get('metadata', {}) or {}
+        if store_config.get('storage_backend') != 'sqlite':
+            return
+
+        try:
+            from src.utils.sqlite_metadata_manager import SqliteMetadataManager
+            sqlite_manager = SqliteMetadataManager(context.project_root_dir, store_config)
+            count = sqlite_manager.import_analysis_metadata(context.metadata)
+            self.logger.info(f"已将 {count} 条分析元数据同步到SQLite元数据库: {sqlite_manager.db_path}")
+        except Exception as e:
+            self.logger.error(f"同步分析元数据到SQLite元数据库失败: {e}", exc_info=True)
@@ -1,6 +1,7 @@
 import logging
 from ..pipeline_stage import PipelineStage
 from ..pipeline_context import AnalysisContext
+from ...clients.openai_compatible import get_session_stats, get_usage_stats, close_shared_sessions
 
 logger = logging.getLogger(__name__)
 
@@ -24,5 +25,28 @@ class GlobalTeardownStage(PipelineStage):
         elif not context.process_lock_manager:
             self.logger.warning("ProcessLockManager 未在 AnalysisContext 中找到，无法尝试释放锁。")
 
+        # 记录HTTP连接复用情况并关闭共享会话
+        for api_base, stats in get_session_stats().items():
+            self.logger.info(
+                f"HTTP连接复用 {api_base}: 请求 {stats['requests']} 次, 新建连接 {stats['connections']} 个, "
+                f"复用率 {stats['reuse_rate']:.1%}"
+            )
+        close_shared_sessions()
+
+        # 记录token用量和提供商提示缓存的命中情况
+        for api_base, usage in get_usage_stats().items():
+            self.logger.info(
+                f"token用量 {api_base}: 响应 {usage['responses']} 个, 提示token {usage['prompt_tokens']} "
+                f"(命中提示缓存 {usage['cached_tokens']}, {usage['cache_hit_rate']:.1%}), 输出token {usage['completion_tokens']}"
+            )
+
+        if context.response_cache is not None:
+            stats = context.response_cache.get_stats()
+            self.logger.info(
+                f"AI响应缓存: 命中 {stats['hits']} 次, 未命中 {stats['misses']} 次 (命中率 {stats['hit_rate']:.1%}), "
+                f"写入 {stats['stores']} 条, 淘汰 {stats['evictions']} 条, 占用 {stats['bytes'] / 1024 / 1024:.1f}MB"
+            )
+            context.response_cache.close()
+
         self.logger.info("全局清理阶段执行完毕。")
         return context 
\ No newline at end of file
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 import threading
@@ -36,4 +37,44 @@ class RateLimiter:
             
             # 更新最后请求时间
             self.last_request_time = time.time()
-            return wait_time 
\ No newline at end of file
+            return wait_time
+
+
+class AsyncTokenBucket:
+    """事件循环内的令牌桶限速器（asyncio执行模式使用），等待时不占用线程"""
+    
+    def __init__(self, requests_per_minute: float, burst: int = 1):
+        """
+        初始化令牌桶
+        
+        Args:
+            requests_per_minute: 每分钟补充的令牌数（即长期平均请求速率）
+            burst: 桶容量，允许的最大突发请求数
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        # 等待者按到达顺序依次取令牌
+        self._lock = asyncio.Lock()
+        logger.info(f"初始化异步令牌桶限速器: {requests_per_minute} 请求/分钟, 突发容量 {self.capacity}")
+    
+    async def acquire(self) -> float:
+        """
+        取一个令牌，令牌不足时等待
+        
+        Returns:
+            等待的秒数
+        """
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait_time = (1 - self.tokens) / self.rate
+                await asyncio.sleep(wait_time)
+                waited += wait_time
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+AI响应缓存
+
+按内容寻址缓存模型的响应：缓存键是模型参数、系统提示、原始文档内容和任务提示的
+SHA-256。任何一项变化都会得到不同的键，不需要显式失效；源文件未变化时重新分析
+（如 --force、崩溃后重跑）直接使用缓存的响应，不再调用API。
+
+缓存保存在SQLite数据库（WAL模式）中，总大小超过上限时按最近访问时间淘汰。
+"""
+
+import os
+import time
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def model_fingerprint(model_client: Any) -> str:
+    """
+    影响模型输出的客户端参数（提供商、端点、模型、温度、最大token数）
+
+    Args:
+        model_client: 模型客户端
+
+    Returns:
+        参数的JSON字符串
+    """
+    return json.dumps({
+        'client': type(model_client).__name__.replace('Async', ''),
+        'api_base': getattr(model_client, 'api_base', None),
+        'model': getattr(model_client, 'model_name', None),
+        'temperature': getattr(model_client, 'temperature', None),
+        'max_tokens': getattr(model_client, 'max_tokens', None),
+        'enable_search': getattr(model_client, 'enable_search', None)
+    }, sort_keys=True)
+
+
+def make_cache_key(fingerprint: str, system_prompt: str, prompt: str, document: Optional[str] = None) -> str:
+    """
+    计算缓存键
+
+    Args:
+        fingerprint: model_fingerprint 的结果
+        system_prompt: 系统提示
+        prompt: 任务提示
+        document: 文档内容
+
+    Returns:
+        十六进制SHA-256
+    """
+    digest = hashlib.sha256()
+    for part in (fingerprint, system_prompt or '', document or '', prompt):
+        data = part.encode('utf-8')
+        # 各部分带长度前缀，避免不同的拆分方式拼出相同的字节序列
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """基于SQLite、按大小淘汰的AI响应缓存类"""
+
+    def __init__(self, db_path: str, max_size_mb: float = 512):
+        """
+        初始化响应缓存
+
+        Args:
+            db_path: 缓存数据库路径
+            max_size_mb: 缓存响应的最大总大小（MB），超过时淘汰最久未访问的条目
+        """
+        self.db_path = db_path
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                task_type TEXT,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses(last_access)')
+        self.current_bytes = conn.execute('SELECT COALESCE(SUM(size), 0) FROM llm_responses').fetchone()[0]
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """
+        获取缓存的响应
+
+        Args:
+            cache_key: make_cache_key 计算的键
+
+        Returns:
+            缓存的响应，不存在时返回None
+        """
+        try:
+            conn = self._get_connection()
+            row = conn.execute('SELECT response FROM llm_responses WHERE cache_key = ?', (cache_key,)).fetchone()
+            if row is not None:
+                with self._write_lock:
+                    conn.execute('UPDATE llm_responses SET last_access = ? WHERE cache_key = ?', (time.time(), cache_key))
+        except sqlite3.Error as e:
+            logger.warning(f"读取AI响应缓存失败: {e}")
+            row = None
+        with self._stats_lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def put(self, cache_key: str, response: str, task_type: Optional[str] = None):
+        """
+        缓存响应，单个响应超过缓存上限时不缓存
+
+        Args:
+            cache_key: make_cache_key 计算的键
+            response: 模型的原始响应
+            task_type: 任务类型（仅用于统计和排查）
+        """
+        size = len(response.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._write_lock:
+                conn = self._get_connection()
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    old_row = conn.execute('SELECT size FROM llm_responses WHERE cache_key = ?', (cache_key,)).fetchone()
+                    conn.execute(
+                        'INSERT OR REPLACE INTO llm_responses (cache_key, response, size, task_type, created_at, last_access) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (cache_key, response, size, task_type, now, now)
+                    )
+                    current_bytes = self.current_bytes + size - (old_row[0] if old_row else 0)
+                    evicted = 0
+                    if current_bytes > self.max_bytes:
+                        for evict_key, evict_size in conn.execute(
+                            'SELECT cache_key, size FROM llm_responses WHERE cache_key != ? ORDER BY last_access',
+                            (cache_key,)
+                        ).fetchall():
+                            conn.execute('DELETE FROM llm_responses WHERE cache_key = ?', (evict_key,))
+                            current_bytes -= evict_size
+                            evicted += 1
+                            if current_bytes <= self.max_bytes:
+                                break
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+                self.current_bytes = current_bytes
+            with self._stats_lock:
+                self.stores += 1
+                self.evictions += evicted
+        except sqlite3.Error as e:
+            logger.warning(f"写入AI响应缓存失败: {e}")
+
+    def clear(self):
+        """清空缓存"""
+        with self._write_lock:
+            self._get_connection().execute('DELETE FROM llm_responses')
+            self.current_bytes = 0
+
+    def close(self):
+        """关闭当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            命中/未命中/写入/淘汰次数、命中率和占用字节数
+        """
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
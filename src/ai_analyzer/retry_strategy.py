@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 import requests # For requests.exceptions
@@ -55,6 +56,10 @@ class RetryWithExponentialBackoff:
                 if hasattr(e, 'status_code') and e.status_code in retryable_status_codes:
                     is_retryable = True
                     logger.warning(f"捕获到可重试的 APIError (状态码: {e.status_code}): {e}")
+                elif getattr(e, 'retryable', False):
+                    # 如流式响应中断，由调用方决定续写还是重新开始
+                    is_retryable = True
+                    logger.warning(f"捕获到可重试的 APIError: {e}")
                 else:
                     status_code_info = f"状态码: {e.status_code}" if hasattr(e, 'status_code') else "无状态码"
                     logger.error(f"捕获到不可重试的 APIError ({status_code_info}): {e}. 将不会重试。")
@@ -110,4 +115,48 @@ class RetryWithExponentialBackoff:
             raise last_exception
         else:
             # This path should ideally not be reached if max_retries >= 0 and func always raises on error or returns.
-            raise RuntimeError("所有重试都失败了，但没有捕获到异常信息或函数意外正常返回 (RetryWithExponentialBackoff)") 
\ No newline at end of file
+            raise RuntimeError("所有重试都失败了，但没有捕获到异常信息或函数意外正常返回 (RetryWithExponentialBackoff)")
+
+    async def execute_async(self, func, retryable_exceptions: tuple = ()):
+        """
+        执行协程函数，失败时使用指数退避策略重试（等待期间不阻塞事件循环）
+        
+        Args:
+            func: 无参数的协程函数
+            retryable_exceptions: 视为可重试网络错误的异常类型（由异步客户端提供）
+            
+        Returns:
+            协程的返回结果
+            
+        Raises:
+            最后一次失败时抛出的异常
+        """
+        delay = self.initial_delay
+        retryable_status_codes = [429, 500, 502, 503, 504]
+
+        for retry_count in range(self.max_retries + 1):
+            try:
+                if retry_count > 0:
+                    logger.warning(f"第 {retry_count}/{self.max_retries} 次重试API调用...")
+                return await func()
+            except APIError as e:
+                if getattr(e, 'status_code', None) not in retryable_status_codes and not getattr(e, 'retryable', False):
+                    logger.error(f"捕获到不可重试的 APIError (状态码: {getattr(e, 'status_code', None)}): {e}. 将不会重试。")
+                    raise
+                if retry_count == self.max_retries:
+                    logger.error(f"APIError: 达到最大重试次数 {self.max_retries} (状态码: {e.status_code})，放弃重试")
+                    raise
+                logger.warning(f"API请求失败 (错误码: {e.status_code}): {e}")
+            except retryable_exceptions as e:
+                if retry_count == self.max_retries:
+                    logger.error(f"网络错误: 达到最大重试次数 {self.max_retries}，放弃重试")
+                    raise
+                logger.warning(f"API请求失败 (网络错误): {e!r}")
+
+            logger.warning(f"等待 {delay:.2f} 秒后重试...")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_delay)
+            jitter = delay * 0.1
+            delay = max(self.initial_delay / 2, delay + random.uniform(-jitter, jitter))
+
+        raise RuntimeError("所有重试都失败了，但没有捕获到异常信息 (RetryWithExponentialBackoff.execute_async)")
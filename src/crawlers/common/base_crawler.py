@@ -14,7 +14,7 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
-from src.utils.metadata_manager import MetadataManager
+from src.utils.metadata_manager import create_metadata_manager
 
 import requests
 from bs4 import BeautifulSoup
@@ -72,7 +72,7 @@ class BaseCrawler(ABC):
         
         # 初始化元数据管理器 - 使用线程安全的方式
         with metadata_lock:
-            self.metadata_manager = MetadataManager(base_dir)
+            self.metadata_manager = create_metadata_manager(base_dir)
             self.metadata = self.metadata_manager.get_crawler_metadata(vendor, source_type)
         
         # 初始化HTML到Markdown转换器
@@ -40,9 +40,9 @@ class CrawlerManager:
         # 获取项目根目录路径
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
         
-        # 导入MetadataManager
-        from src.utils.metadata_manager import MetadataManager
-        self.metadata_manager = MetadataManager(base_dir)
+        # 根据配置创建元数据管理器（JSON/journal 或 SQLite）
+        from src.utils.metadata_manager import create_metadata_manager
+        self.metadata_manager = create_metadata_manager(base_dir, config.get('metadata'))
         
         # 创建metadata锁，用于保护metadata的访问
         self.metadata_lock = threading.RLock()
@@ -97,6 +97,7 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--force", action="store_true", help="强制执行，忽略本地metadata或文件是否已存在")
     parser.add_argument("--file", help="指定要分析的文件路径，仅在analyze模式下有效")
     parser.add_argument("--debug", action="store_true", help="启用调试模式，输出详细的日志信息")
+    parser.add_argument("--batch", action="store_true", help="通过Batch API提交AI分析请求（适合全量重新分析），仅在analyze模式下有效")
     
     return parser.parse_args()
 
@@ -265,6 +266,9 @@ def test_main(args: argparse.Namespace) -> None:
 
 def analyze_main(args: argparse.Namespace) -> int:
     config = get_config(args)
+    if getattr(args, 'batch', False):
+        logger.info("启用Batch API模式，AI分析请求将以批处理任务提交")
+        config.setdefault('ai_analyzer', {}).setdefault('execution_settings', {})['engine'] = 'batch'
     ai_analyzer = AIAnalyzer(config=config)
 
     specific_file_provided = args.file if args.file else None
@@ -5,42 +5,161 @@
 访问日志数据库管理器
 
 使用SQLite数据库存储访问日志，提供高性能的读写操作。
+
+除明细表 access_logs 外，批量写入时在同一事务中增量维护按天汇总的统计表
+（每日PV/UV、每日访客集合、每日设备/系统/浏览器/页面计数），统计页面只读取
+汇总表，耗时与展示的天数成正比，而不随明细记录数增长。
+
+明细记录按月分区存放在 access_logs_YYYYMM 表中，视图 access_logs 合并所有分区
+并还原字典编码的字段，供跨分区查询使用。路径、标题、来源和User-Agent（连同解析出
+的设备、系统、浏览器）分别存放在字典表中，明细表只保存整数ID。
+
+清理旧记录时直接删除整月的分区；配置了归档时，超过保留月数的分区会导出为独立的
+数据库文件并用gzip压缩后从主库中删除（汇总表保留，统计数据不受影响）。
+
+访问记录先进入有界队列，由批量写入线程写入数据库，请求线程不会等待SQLite。
+队列满时按溢出策略处理：丢弃最旧的记录、按比例采样，或追加到本地溢出文件，
+待队列空闲时再由写入线程导入数据库。
 """
 
 import os
+import re
+import random
+import gzip
+import shutil
 import sqlite3
 import json
 import logging
 import time
 import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
 from contextlib import contextmanager
 import queue
 
 # 导入项目的线程池工具
 from src.utils.thread_pool import get_thread_pool
 
+# 数据库结构版本（记录在 PRAGMA user_version 中）
+# 1: 增加按天汇总的统计表
+# 2: 明细表按月分区，access_logs 改为合并所有分区的视图
+# 3: 重复出现的字符串字段改为字典编码
+SCHEMA_VERSION = 3
+
+# 字典表及其除 value 外的附加列（User-Agent的解析结果与字符串一一对应，一起存放）
+DICTIONARY_TABLES = {
+    'paths': (),
+    'titles': (),
+    'referers': (),
+    'user_agents': ('device_type', 'os', 'browser', 'is_bot')
+}
+# 每个字典表在内存中缓存的最大条目数
+DICTIONARY_CACHE_SIZE = 50000
+
+# 分区表中字典编码的列: (明细列, 字典表, 原字段名)
+_ENCODED_COLUMNS = (
+    ('path_id', 'paths', 'path'),
+    ('title_id', 'titles', 'title'),
+    ('user_agent_id', 'user_agents', 'user_agent'),
+    ('referer_id', 'referers', 'referer')
+)
+
+# 月分区表名前缀，完整表名为 access_logs_YYYYMM
+PARTITION_PREFIX = 'access_logs_'
+_PARTITION_TABLE_RE = re.compile(r'^access_logs_(\d{6})$')
+_RECORD_MONTH_RE = re.compile(r'^(\d{4})-(\d{2})')
+
+# 队列满时的溢出策略
+# drop_oldest: 丢弃队列中最旧的记录; sample: 队列超过半满后按比例采样; spill: 写入本地溢出文件，稍后导入
+OVERFLOW_POLICIES = ('drop_oldest', 'sample', 'spill')
+
+# 写入线程本次未取到新记录
+_NO_ITEM = object()
+
+# 按天计数的维度（device_type/os/browser来自user_agent_info，title来自访问记录）
+ROLLUP_DIMENSIONS = ('device_type', 'os', 'browser', 'title')
+
 class AccessLogDB:
     """访问日志数据库管理器"""
     
-    def __init__(self, db_path: str):
+    # 空闲读连接池的最大连接数
+    MAX_IDLE_READERS = 4
+    # 单次批量写入的最大记录数（突发流量时一次取出队列中积压的记录）
+    MAX_BATCH_SIZE = 500
+    # 溢出文件导入失败后的重试间隔（秒）
+    SPILL_RETRY_INTERVAL = 30.0
+    
+    def __init__(self, db_path: str, cache_size_kb: int = 8192, mmap_size_mb: int = 64,
+                 archive_after_months: int = 0, queue_size: int = 10000,
+                 overflow_policy: str = 'spill', sample_rate: float = 0.1,
+                 record_enricher: Optional[Callable[[Dict[str, Any]], None]] = None):
         """
         初始化访问日志数据库
         
         Args:
             db_path: 数据库文件路径
+            cache_size_kb: 每个连接的页缓存大小（KB）
+            mmap_size_mb: 内存映射读取的最大大小（MB），为0时不使用mmap
+            archive_after_months: 在主库中保留的月分区数（含当月），更早的分区压缩归档；为0时不归档
+            queue_size: 写入队列的最大长度
+            overflow_policy: 队列满时的溢出策略（drop_oldest、sample、spill）
+            sample_rate: sample策略下队列超过半满时保留记录的比例
+            record_enricher: 写入前在写入线程中补全访问记录的回调（如解析User-Agent），
+                让耗时的计算不占用请求线程
         """
         self.logger = logging.getLogger(__name__)
         self.db_path = db_path
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size_mb = mmap_size_mb
+        # 写操作串行化，共用一个长连接（主要由批量写入线程使用）
         self.lock = threading.RLock()
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        # 读操作从连接池中取长连接，WAL模式下读不阻塞写
+        self._reader_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=self.MAX_IDLE_READERS)
+        
+        # 月分区（按月份升序的 YYYYMM 列表，只在持有写锁时整体替换）
+        self._partitions: List[str] = []
+        self.archive_after_months = archive_after_months
+        self.archive_dir = os.path.join(os.path.dirname(db_path), 'archive')
+        self._archive_pending = False
+        # 字典表的 value -> id 缓存，只在持有写锁时访问
+        self._dictionary_cache: Dict[str, Dict[str, int]] = {table: {} for table in DICTIONARY_TABLES}
         
         # 异步写入相关
+        if overflow_policy not in OVERFLOW_POLICIES:
+            self.logger.warning(f"未知的访问日志溢出策略: {overflow_policy}，使用spill")
+            overflow_policy = 'spill'
         self._async_enabled = True
-        self._write_queue = queue.Queue()
+        self._write_queue = queue.Queue(maxsize=max(1, queue_size))
         self._thread_pool = None
+        self._writer_thread: Optional[threading.Thread] = None
         self._batch_size = 5  # 减少批量写入大小，提高响应性
         self._batch_timeout = 1.0  # 减少批量写入超时时间（秒）
+        self.overflow_policy = overflow_policy
+        self.sample_rate = sample_rate
+        self.record_enricher = record_enricher
+        
+        # 溢出文件：队列满或写入失败时追加，写入线程空闲时导入
+        self.spill_path = db_path + '.spill.jsonl'
+        self._spill_lock = threading.Lock()
+        self._spill_pending = os.path.exists(self.spill_path) or os.path.exists(self._ingesting_path)
+        self._next_spill_ingest = 0.0
+        
+        # 写入器统计
+        self._stats_lock = threading.Lock()
+        self._writer_stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'sampled_out': 0,
+            'spilled': 0,
+            'reingested': 0,
+            'write_errors': 0,
+            'last_batch_size': 0,
+            'last_batch_write_ms': 0.0,
+            'latency_max_ms': 0.0
+        }
+        self._latency_total = 0.0
         
         # 确保数据库目录存在
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -48,6 +167,10 @@ class AccessLogDB:
         # 初始化数据库
         self._init_database()
         
+        # 归档超过保留月数的分区
+        if self.archive_after_months > 0:
+            self.archive_old_partitions()
+        
         # 启动异步写入
         self._start_async_writer()
         
@@ -55,58 +178,556 @@ class AccessLogDB:
     
     def _init_database(self):
         """初始化数据库表结构"""
-        with self._get_connection() as conn:
+        with self._get_write_connection() as conn:
             cursor = conn.cursor()
             
-            # 创建访问日志表
+            # 按天汇总的统计表（只统计 path_exists = 1 的访问）
+            # new_uv 为当天首次出现的访客数，所有天求和即为总UV
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS daily_stats (
+                    date TEXT PRIMARY KEY,
+                    pv INTEGER NOT NULL DEFAULT 0,
+                    uv INTEGER NOT NULL DEFAULT 0,
+                    new_uv INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS access_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp INTEGER NOT NULL,
-                    time TEXT NOT NULL,
+                CREATE TABLE IF NOT EXISTS daily_visitors (
                     date TEXT NOT NULL,
                     ip TEXT NOT NULL,
-                    path TEXT NOT NULL,
-                    method TEXT NOT NULL,
-                    status_code INTEGER NOT NULL,
-                    title TEXT,
-                    user_agent TEXT,
-                    device_type TEXT,
-                    os TEXT,
-                    browser TEXT,
-                    is_bot INTEGER DEFAULT 0,
-                    referer TEXT,
-                    path_exists INTEGER DEFAULT 1,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
+                    PRIMARY KEY (date, ip)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS visitors (
+                    ip TEXT PRIMARY KEY,
+                    first_date TEXT NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_visitors_first_date ON visitors(first_date)')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS daily_dimension_counts (
+                    date TEXT NOT NULL,
+                    dimension TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (date, dimension, value)
+                ) WITHOUT ROWID
             ''')
             
-            # 创建索引以提高查询性能
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp ON access_logs(timestamp)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_date ON access_logs(date)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_ip ON access_logs(ip)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_path ON access_logs(path)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_path_exists ON access_logs(path_exists)')
+            # 字典表
+            for table, extra_columns in DICTIONARY_TABLES.items():
+                extra_sql = ''.join(f', {column} {"INTEGER DEFAULT 0" if column == "is_bot" else "TEXT"}'
+                                    for column in extra_columns)
+                cursor.execute(f'''
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        id INTEGER PRIMARY KEY,
+                        value TEXT NOT NULL UNIQUE{extra_sql}
+                    )
+                ''')
+            
+            version = cursor.execute('PRAGMA user_version').fetchone()[0]
+            if version < 2:
+                # 旧版的单表明细拆分到月分区
+                self._partition_legacy_table(cursor)
+            elif version < 3:
+                # 已有的月分区改为字典编码
+                self._encode_partitions(cursor)
+            
+            self._load_partitions(cursor)
+            self._migrate_schema(cursor, version)
             
             conn.commit()
+            
+            if version < 3 and self._partitions:
+                # 迁移后回收旧格式占用的空间
+                self.logger.info(f"正在压缩访问日志数据库: {self.db_path}")
+                conn.execute('VACUUM')
+    
+    def _migrate_schema(self, cursor: sqlite3.Cursor, version: int):
+        """
+        按 PRAGMA user_version 升级已有数据库（在分区和视图就绪后执行）
+        
+        Args:
+            cursor: 写连接的游标（调用方负责提交）
+            version: 升级前的结构版本
+        """
+        if version >= SCHEMA_VERSION:
+            return
+        
+        if version < 1:
+            # 已有的明细记录一次性汇总到统计表
+            self.logger.info(f"正在根据已有访问记录生成按天汇总的统计表: {self.db_path}")
+            self._rebuild_rollups(cursor)
+        
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+    
+    @staticmethod
+    def _partition_table(month: str) -> str:
+        """月分区表名"""
+        return f"{PARTITION_PREFIX}{month}"
+    
+    @staticmethod
+    def _record_month(access_info: Dict[str, Any]) -> str:
+        """
+        获取访问记录所属的月分区
+        
+        Args:
+            access_info: 访问记录
+            
+        Returns:
+            YYYYMM 格式的月份，优先使用记录的日期，其次是时间戳，都没有时为当月
+        """
+        month_match = _RECORD_MONTH_RE.match(access_info.get('date') or '')
+        if month_match:
+            return month_match.group(1) + month_match.group(2)
+        timestamp = access_info.get('timestamp')
+        if timestamp:
+            return datetime.fromtimestamp(timestamp).strftime('%Y%m')
+        return datetime.now().strftime('%Y%m')
+    
+    def _create_partition(self, cursor: sqlite3.Cursor, month: str):
+        """
+        创建月分区表及其索引（已存在时不做任何操作）
+        
+        Args:
+            cursor: 写连接的游标
+            month: YYYYMM 格式的月份
+        """
+        table = self._partition_table(month)
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                timestamp INTEGER NOT NULL,
+                time TEXT NOT NULL,
+                date TEXT NOT NULL,
+                ip TEXT NOT NULL,
+                path_id INTEGER NOT NULL,
+                method TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                title_id INTEGER,
+                user_agent_id INTEGER,
+                referer_id INTEGER,
+                path_exists INTEGER DEFAULT 1
+            )
+        ''')
+        
+        # 创建索引以提高查询性能
+        for column in ('timestamp', 'date', 'ip', 'path_id', 'path_exists'):
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column})')
+    
+    def _partition_legacy_table(self, cursor: sqlite3.Cursor):
+        """
+        将旧版的单表 access_logs 按月拆分到分区表，然后删除旧表
+        
+        Args:
+            cursor: 写连接的游标（调用方负责提交）
+        """
+        row = cursor.execute("SELECT type FROM sqlite_master WHERE name = 'access_logs'").fetchone()
+        if row is None or row['type'] != 'table':
+            return
+        
+        self.logger.info(f"正在将访问日志按月分区: {self.db_path}")
+        current_month = datetime.now().strftime('%Y%m')
+        cursor.execute('SELECT DISTINCT substr(date, 1, 7) AS month_key FROM access_logs')
+        for month_key in [row['month_key'] for row in cursor.fetchall()]:
+            month_match = _RECORD_MONTH_RE.match(month_key or '')
+            # 日期格式异常的记录归入当月分区
+            month = month_match.group(1) + month_match.group(2) if month_match else current_month
+            self._create_partition(cursor, month)
+            self._copy_encoded(cursor, 'access_logs', month, 'substr(date, 1, 7) IS ?', (month_key,))
+        
+        cursor.execute('DROP TABLE access_logs')
+    
+    def _encode_partitions(self, cursor: sqlite3.Cursor):
+        """
+        将未编码的月分区（结构版本2）改为字典编码
+        
+        Args:
+            cursor: 写连接的游标（调用方负责提交）
+        """
+        cursor.execute('DROP VIEW IF EXISTS access_logs')
+        for month in self._read_partitions(cursor):
+            table = self._partition_table(month)
+            columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})').fetchall()]
+            if 'path_id' in columns:
+                continue
+            
+            self.logger.info(f"正在对访问日志分区 {month} 做字典编码: {self.db_path}")
+            legacy_table = f'{table}_unencoded'
+            cursor.execute(f'ALTER TABLE {table} RENAME TO {legacy_table}')
+            # 索引随表改名保留原名称，先删除以便新分区使用
+            for column in ('timestamp', 'date', 'ip', 'path', 'path_exists'):
+                cursor.execute(f'DROP INDEX IF EXISTS idx_{table}_{column}')
+            self._create_partition(cursor, month)
+            self._copy_encoded(cursor, legacy_table, month)
+            cursor.execute(f'DROP TABLE {legacy_table}')
+    
+    def _copy_encoded(self, cursor: sqlite3.Cursor, source_table: str, month: str,
+                      where: str = '1', params: tuple = ()):
+        """
+        将未编码格式的明细记录写入字典编码的月分区
+        
+        Args:
+            cursor: 写连接的游标
+            source_table: 未编码格式的源表
+            month: 目标分区的月份（YYYYMM）
+            where: 源表的过滤条件
+            params: 过滤条件的参数
+        """
+        for column, table, field in _ENCODED_COLUMNS:
+            extra_columns = DICTIONARY_TABLES[table]
+            select_columns = ', '.join((self._source_value(field),) + extra_columns)
+            # 同一User-Agent对应多个解析结果时保留第一个
+            cursor.execute(f'''
+                INSERT OR IGNORE INTO {table} ({', '.join(('value',) + extra_columns)})
+                SELECT {select_columns} FROM {source_table}
+                WHERE {self._source_value(field)} IS NOT NULL AND ({where})
+            ''', params)
+        
+        cursor.execute(f'''
+            INSERT INTO {self._partition_table(month)} (
+                id, timestamp, time, date, ip, path_id, method, status_code,
+                title_id, user_agent_id, referer_id, path_exists
+            )
+            SELECT s.id, s.timestamp, s.time, s.date, s.ip, p.id, s.method, s.status_code,
+                   t.id, u.id, r.id, s.path_exists
+            FROM {source_table} s
+            LEFT JOIN paths p ON p.value = s.path
+            LEFT JOIN titles t ON t.value = s.title
+            LEFT JOIN user_agents u ON u.value = COALESCE(s.user_agent, '')
+            LEFT JOIN referers r ON r.value = s.referer
+            WHERE {where}
+        ''', params)
+    
+    @staticmethod
+    def _source_value(field: str) -> str:
+        """未编码源表中字段的取值表达式（缺失的User-Agent按空字符串编码，保留其解析结果）"""
+        return "COALESCE(user_agent, '')" if field == 'user_agent' else field
+    
+    @staticmethod
+    def _decoded_select(source: str) -> str:
+        """
+        还原字典编码字段的查询语句（列与未编码的旧版 access_logs 表一致）
+        
+        Args:
+            source: 分区表名或子查询（别名为 l）
+            
+        Returns:
+            SELECT语句
+        """
+        return f'''
+            SELECT l.id, l.timestamp, l.time, l.date, l.ip, p.value AS path, l.method, l.status_code,
+                   t.value AS title, u.value AS user_agent, u.device_type, u.os, u.browser,
+                   COALESCE(u.is_bot, 0) AS is_bot, r.value AS referer, l.path_exists
+            FROM {source} l
+            LEFT JOIN paths p ON p.id = l.path_id
+            LEFT JOIN titles t ON t.id = l.title_id
+            LEFT JOIN user_agents u ON u.id = l.user_agent_id
+            LEFT JOIN referers r ON r.id = l.referer_id
+        '''
+    
+    def _intern_values(self, cursor: sqlite3.Cursor, table: str, values: Dict[str, tuple]) -> Dict[str, int]:
+        """
+        获取字典值对应的ID，不存在的值先写入字典表
+        
+        Args:
+            cursor: 写连接的游标
+            table: 字典表名
+            values: 字典值到附加列取值的映射
+            
+        Returns:
+            该字典表的 value -> id 缓存（包含所有请求的值）
+        """
+        cache = self._dictionary_cache[table]
+        missing = [value for value in values if value not in cache]
+        if not missing:
+            return cache
+        
+        if len(cache) + len(missing) > DICTIONARY_CACHE_SIZE:
+            cache.clear()
+            missing = list(values)
+        
+        extra_columns = DICTIONARY_TABLES[table]
+        columns = ('value',) + extra_columns
+        cursor.executemany(
+            f'INSERT OR IGNORE INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})',
+            [(value,) + values[value] for value in missing]
+        )
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            cursor.execute(f'SELECT id, value FROM {table} WHERE value IN ({", ".join("?" * len(chunk))})', chunk)
+            cache.update((row['value'], row['id']) for row in cursor.fetchall())
+        return cache
+    
+    def _prune_dictionaries(self, cursor: sqlite3.Cursor):
+        """
+        删除不再被任何分区引用的字典值（清理或归档分区后调用）
+        
+        Args:
+            cursor: 写连接的游标（调用方负责提交）
+        """
+        for column, table, _ in _ENCODED_COLUMNS:
+            referenced = ' UNION '.join(
+                f'SELECT {column} FROM {self._partition_table(month)} WHERE {column} IS NOT NULL'
+                for month in self._partitions
+            )
+            cursor.execute(f'DELETE FROM {table} WHERE id NOT IN ({referenced})')
+            self._dictionary_cache[table].clear()
+    
+    @staticmethod
+    def _read_partitions(cursor: sqlite3.Cursor) -> List[str]:
+        """从数据库结构中读取已有的月分区（按月份升序的 YYYYMM 列表）"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'access_logs_%'")
+        months = []
+        for row in cursor.fetchall():
+            table_match = _PARTITION_TABLE_RE.match(row[0])
+            if table_match:
+                months.append(table_match.group(1))
+        return sorted(months)
+    
+    def _load_partitions(self, cursor: sqlite3.Cursor):
+        """
+        加载已有的月分区，确保当月分区存在，并重建合并视图
+        
+        Args:
+            cursor: 写连接的游标
+        """
+        self._partitions = self._read_partitions(cursor)
+        self._ensure_partition(cursor, datetime.now().strftime('%Y%m'))
+        self._refresh_view(cursor)
+    
+    def _ensure_partition(self, cursor: sqlite3.Cursor, month: str):
+        """
+        确保月分区存在，新建分区时同时重建合并视图
+        
+        Args:
+            cursor: 写连接的游标
+            month: YYYYMM 格式的月份
+        """
+        if month in self._partitions:
+            return
+        self._create_partition(cursor, month)
+        self._partitions = sorted(self._partitions + [month])
+        self._refresh_view(cursor)
+        # 进入新的月份后检查是否有需要归档的分区
+        self._archive_pending = self.archive_after_months > 0
+    
+    def _drop_partition(self, cursor: sqlite3.Cursor, month: str):
+        """
+        删除月分区并重建合并视图
+        
+        Args:
+            cursor: 写连接的游标
+            month: YYYYMM 格式的月份
+        """
+        self._partitions = [m for m in self._partitions if m != month]
+        cursor.execute('DROP VIEW IF EXISTS access_logs')
+        cursor.execute(f'DROP TABLE IF EXISTS {self._partition_table(month)}')
+        self._refresh_view(cursor)
+    
+    def _refresh_view(self, cursor: sqlite3.Cursor):
+        """
+        重建合并所有分区的 access_logs 视图
+        
+        Args:
+            cursor: 写连接的游标
+        """
+        cursor.execute('DROP VIEW IF EXISTS access_logs')
+        union_sql = ' UNION ALL '.join(f'SELECT * FROM {self._partition_table(month)}' for month in self._partitions)
+        cursor.execute('CREATE VIEW access_logs AS ' + self._decoded_select(f'({union_sql})'))
+    
+    def _partitions_since(self, month: str) -> List[str]:
+        """
+        获取不早于指定月份的分区表名（按月份降序）
+        
+        Args:
+            month: YYYYMM 格式的月份
+            
+        Returns:
+            分区表名列表
+        """
+        return [self._partition_table(m) for m in reversed(self._partitions) if m >= month]
+    
+    def _rebuild_rollups(self, cursor: sqlite3.Cursor):
+        """
+        根据明细表重新生成所有汇总表
+        
+        Args:
+            cursor: 写连接的游标（调用方负责提交）
+        """
+        for table in ('daily_stats', 'daily_visitors', 'daily_dimension_counts'):
+            cursor.execute(f'DELETE FROM {table}')
+        
+        cursor.execute('''
+            INSERT INTO daily_stats (date, pv)
+            SELECT date, COUNT(*) FROM access_logs WHERE path_exists = 1 GROUP BY date
+        ''')
+        cursor.execute('''
+            INSERT INTO daily_visitors (date, ip)
+            SELECT DISTINCT date, ip FROM access_logs WHERE path_exists = 1
+        ''')
+        cursor.execute('''
+            UPDATE daily_stats SET uv = (
+                SELECT COUNT(*) FROM daily_visitors WHERE daily_visitors.date = daily_stats.date
+            )
+        ''')
+        for dimension in ROLLUP_DIMENSIONS:
+            cursor.execute(f'''
+                INSERT INTO daily_dimension_counts (date, dimension, value, count)
+                SELECT date, ?, {dimension}, COUNT(*) FROM access_logs
+                WHERE path_exists = 1 AND {dimension} != ''
+                GROUP BY date, {dimension}
+            ''', (dimension,))
+        
+        self._rebuild_visitors(cursor)
+    
+    def _rebuild_visitors(self, cursor: sqlite3.Cursor):
+        """
+        根据每日访客集合重新计算每个访客的首次访问日期和每日新访客数
+        
+        Args:
+            cursor: 写连接的游标（调用方负责提交）
+        """
+        cursor.execute('DELETE FROM visitors')
+        cursor.execute('INSERT INTO visitors (ip, first_date) SELECT ip, MIN(date) FROM daily_visitors GROUP BY ip')
+        cursor.execute('''
+            UPDATE daily_stats SET new_uv = (
+                SELECT COUNT(*) FROM visitors WHERE visitors.first_date = daily_stats.date
+            )
+        ''')
+    
+    def _update_rollups(self, cursor: sqlite3.Cursor, batch: List[Dict[str, Any]]):
+        """
+        将一批访问记录累加到汇总表（与明细写入在同一事务中）
+        
+        Args:
+            cursor: 写连接的游标
+            batch: 访问记录列表
+        """
+        daily_pv: Dict[str, int] = {}
+        dimension_counts: Dict[tuple, int] = {}
+        visitor_dates: Dict[tuple, None] = {}
+        
+        for access_info in batch:
+            if not access_info.get('path_exists', True):
+                continue
+            date = access_info.get('date', '')
+            daily_pv[date] = daily_pv.get(date, 0) + 1
+            visitor_dates[(date, access_info.get('ip', ''))] = None
+            
+            user_agent_info = access_info.get('user_agent_info', {})
+            for dimension in ROLLUP_DIMENSIONS:
+                value = access_info.get(dimension) if dimension == 'title' else user_agent_info.get(dimension)
+                if value:
+                    key = (date, dimension, value)
+                    dimension_counts[key] = dimension_counts.get(key, 0) + 1
+        
+        if not daily_pv:
+            return
+        
+        # 每日访客集合：只有当天第一次出现的访客才计入当天UV
+        daily_uv: Dict[str, int] = {}
+        first_dates: Dict[str, str] = {}
+        for date, ip in visitor_dates:
+            cursor.execute('INSERT OR IGNORE INTO daily_visitors (date, ip) VALUES (?, ?)', (date, ip))
+            if cursor.rowcount > 0:
+                daily_uv[date] = daily_uv.get(date, 0) + 1
+                if ip not in first_dates or date < first_dates[ip]:
+                    first_dates[ip] = date
+        
+        # 全局访客：记录首次访问日期，迁移旧数据时可能出现更早的日期
+        daily_new_uv: Dict[str, int] = {}
+        for ip, date in first_dates.items():
+            row = cursor.execute('SELECT first_date FROM visitors WHERE ip = ?', (ip,)).fetchone()
+            if row is None:
+                cursor.execute('INSERT INTO visitors (ip, first_date) VALUES (?, ?)', (ip, date))
+            elif date < row['first_date']:
+                cursor.execute('UPDATE visitors SET first_date = ? WHERE ip = ?', (date, ip))
+                daily_new_uv[row['first_date']] = daily_new_uv.get(row['first_date'], 0) - 1
+            else:
+                continue
+            daily_new_uv[date] = daily_new_uv.get(date, 0) + 1
+        
+        cursor.executemany('''
+            INSERT INTO daily_stats (date, pv, uv, new_uv) VALUES (?, ?, ?, ?)
+            ON CONFLICT(date) DO UPDATE SET
+                pv = pv + excluded.pv, uv = uv + excluded.uv, new_uv = new_uv + excluded.new_uv
+        ''', [(date, pv, daily_uv.get(date, 0), daily_new_uv.pop(date, 0)) for date, pv in daily_pv.items()])
+        # 首次访问日期被提前的访客，原日期的新访客数需要扣减
+        cursor.executemany('UPDATE daily_stats SET new_uv = new_uv + ? WHERE date = ?',
+                           [(delta, date) for date, delta in daily_new_uv.items() if delta])
+        
+        cursor.executemany('''
+            INSERT INTO daily_dimension_counts (date, dimension, value, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT(date, dimension, value) DO UPDATE SET count = count + excluded.count
+        ''', [(date, dimension, value, count) for (date, dimension, value), count in dimension_counts.items()])
+    
+    def _connect(self) -> sqlite3.Connection:
+        """创建新的数据库连接并设置PRAGMA"""
+        conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size_mb) * 1024 * 1024}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+    
+    @contextmanager
+    def _get_write_connection(self):
+        """获取写连接的上下文管理器（持有写锁，出错时回滚）"""
+        with self.lock:
+            if self._writer_conn is None:
+                self._writer_conn = self._connect()
+            conn = self._writer_conn
+            try:
+                yield conn
+            except Exception as e:
+                conn.rollback()
+                # 回滚可能撤销了新建或删除分区、新增的字典值，重新读取分区列表并清空字典缓存
+                self._partitions = self._read_partitions(conn.cursor())
+                for cache in self._dictionary_cache.values():
+                    cache.clear()
+                self.logger.error(f"数据库操作失败: {e}")
+                raise
     
     @contextmanager
     def _get_connection(self):
-        """获取数据库连接的上下文管理器"""
-        conn = None
+        """从连接池获取读连接的上下文管理器，用完后归还"""
+        try:
+            conn = self._reader_pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
         try:
-            conn = sqlite3.connect(self.db_path, timeout=30.0)
-            conn.row_factory = sqlite3.Row  # 使结果可以通过列名访问
             yield conn
         except Exception as e:
-            if conn:
-                conn.rollback()
+            conn.rollback()
             self.logger.error(f"数据库操作失败: {e}")
             raise
         finally:
-            if conn:
+            try:
+                self._reader_pool.put_nowait(conn)
+            except queue.Full:
                 conn.close()
     
+    def close(self):
+        """关闭所有数据库连接"""
+        with self.lock:
+            if self._writer_conn is not None:
+                self._writer_conn.close()
+                self._writer_conn = None
+        while True:
+            try:
+                self._reader_pool.get_nowait().close()
+            except queue.Empty:
+                break
+    
+    @property
+    def _ingesting_path(self) -> str:
+        """正在导入的溢出文件路径"""
+        return self.spill_path + '.ingesting'
+    
     def _start_async_writer(self):
         """启动异步写入线程"""
         if not self._async_enabled:
@@ -131,94 +752,206 @@ class AccessLogDB:
             self.logger.info("异步访问日志写入器已启动")
             
         except Exception as e:
-            self.logger.error(f"启动异步写入器失败: {e}")
-            self._async_enabled = False
+            # 线程池不可用时使用独立的写入线程，保证请求线程不直接写数据库
+            self.logger.error(f"启动异步写入器失败，改用独立写入线程: {e}")
+            self._thread_pool = None
+            self._writer_thread = threading.Thread(target=self._batch_writer_loop,
+                                                   name='AccessLogBatchWriter', daemon=True)
+            self._writer_thread.start()
     
     def _batch_writer_loop(self):
         """批量写入循环"""
-        batch = []
-        last_write_time = time.time()
+        batch = []  # (入队时间, 访问记录)
+        batch_started = 0.0
         
         while True:
             try:
-                # 尝试从队列获取数据
+                # 有未写入的批次时等到批次超时，否则一直等待新记录（有待导入的溢出文件时定期醒来）
+                if batch:
+                    timeout = max(0.0, self._batch_timeout - (time.monotonic() - batch_started))
+                elif self._spill_pending:
+                    timeout = max(0.0, self._next_spill_ingest - time.monotonic()) or self._batch_timeout
+                else:
+                    timeout = None
+                
+                stop = False
                 try:
-                    access_info = self._write_queue.get(timeout=0.5)
-                    if access_info is None:  # 停止信号
-                        break
-                    batch.append(access_info)
+                    item = self._write_queue.get(timeout=timeout)
                 except queue.Empty:
-                    pass
+                    item = _NO_ITEM
                 
-                current_time = time.time()
+                # 一次取出队列中积压的记录
+                while item is not _NO_ITEM:
+                    if item is None:  # 停止信号
+                        self._write_queue.task_done()
+                        stop = True
+                        break
+                    if not batch:
+                        batch_started = time.monotonic()
+                    batch.append(item)
+                    if len(batch) >= self.MAX_BATCH_SIZE:
+                        break
+                    try:
+                        item = self._write_queue.get_nowait()
+                    except queue.Empty:
+                        item = _NO_ITEM
                 
                 # 检查是否需要写入批次
-                should_write = (
+                should_write = batch and (
+                    stop or
                     len(batch) >= self._batch_size or
-                    (batch and (current_time - last_write_time) >= self._batch_timeout)
+                    (time.monotonic() - batch_started) >= self._batch_timeout
                 )
                 
-                if should_write and batch:
-                    self._write_batch(batch)
-                    batch.clear()
-                    last_write_time = current_time
+                if should_write:
+                    self._flush_batch(batch)
+                    batch = []
+                
+                if stop:
+                    break
+                
+                if (not batch and self._spill_pending and self._write_queue.empty() and
+                        time.monotonic() >= self._next_spill_ingest):
+                    self._ingest_spill_file()
                     
             except Exception as e:
                 self.logger.error(f"批量写入循环错误: {e}")
                 time.sleep(1)
     
-    def _write_batch(self, batch: List[Dict[str, Any]]):
-        """批量写入访问记录到数据库"""
+    def _flush_batch(self, batch: List[tuple]):
+        """
+        写入队列中取出的一批记录，写入失败时按溢出策略处理
+        
+        Args:
+            batch: (入队时间, 访问记录) 列表
+        """
+        records = [access_info for _, access_info in batch]
+        start_time = time.monotonic()
+        success = self._write_batch(records)
+        end_time = time.monotonic()
+        
+        with self._stats_lock:
+            stats = self._writer_stats
+            if success:
+                stats['written'] += len(records)
+                stats['last_batch_size'] = len(records)
+                stats['last_batch_write_ms'] = (end_time - start_time) * 1000
+                latencies = [(end_time - enqueued_at) * 1000 for enqueued_at, _ in batch]
+                self._latency_total += sum(latencies)
+                stats['latency_max_ms'] = max(stats['latency_max_ms'], max(latencies))
+            else:
+                stats['write_errors'] += 1
+                if self.overflow_policy != 'spill':
+                    stats['dropped'] += len(records)
+        
+        if not success and self.overflow_policy == 'spill':
+            self._spill(records)
+        
+        for _ in batch:
+            self._write_queue.task_done()
+    
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        """
+        批量写入访问记录到数据库
+        
+        Args:
+            batch: 访问记录列表
+            
+        Returns:
+            是否写入成功
+        """
         if not batch:
-            return
+            return True
+        
+        # 在获取写锁之前补全记录
+        if self.record_enricher is not None:
+            for access_info in batch:
+                try:
+                    self.record_enricher(access_info)
+                except Exception as e:
+                    self.logger.error(f"补全访问记录失败: {e}")
             
+        archive_pending = False
         try:
-            with self.lock:
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
-                    
-                    # 准备批量插入数据
-                    insert_data = []
-                    for access_info in batch:
+            with self._get_write_connection() as conn:
+                cursor = conn.cursor()
+                
+                # 字典编码：收集本批次的字典值并获取ID
+                dictionary_values: Dict[str, Dict[str, tuple]] = {table: {} for table in DICTIONARY_TABLES}
+                for access_info in batch:
+                    for value, table in ((access_info.get('path', ''), 'paths'),
+                                         (access_info.get('title', ''), 'titles'),
+                                         (access_info.get('referer'), 'referers')):
+                        if value is not None:
+                            dictionary_values[table][value] = ()
+                    user_agent = access_info.get('user_agent') or ''
+                    if user_agent not in dictionary_values['user_agents']:
                         user_agent_info = access_info.get('user_agent_info', {})
-                        insert_data.append((
-                            access_info.get('timestamp', int(time.time())),
-                            access_info.get('time', ''),
-                            access_info.get('date', ''),
-                            access_info.get('ip', ''),
-                            access_info.get('path', ''),
-                            access_info.get('method', ''),
-                            access_info.get('status_code', 0),
-                            access_info.get('title', ''),
-                            access_info.get('user_agent', ''),
+                        dictionary_values['user_agents'][user_agent] = (
                             user_agent_info.get('device_type', ''),
                             user_agent_info.get('os', ''),
                             user_agent_info.get('browser', ''),
-                            1 if user_agent_info.get('is_bot', False) else 0,
-                            access_info.get('referer'),
-                            1 if access_info.get('path_exists', True) else 0
-                        ))
-                    
-                    # 批量插入
-                    cursor.executemany('''
-                        INSERT INTO access_logs (
-                            timestamp, time, date, ip, path, method, status_code,
-                            title, user_agent, device_type, os, browser, is_bot,
-                            referer, path_exists
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', insert_data)
-                    
-                    conn.commit()
-                    
-                    self.logger.debug(f"批量写入 {len(batch)} 条访问记录")
+                            1 if user_agent_info.get('is_bot', False) else 0
+                        )
+                ids = {table: self._intern_values(cursor, table, values)
+                       for table, values in dictionary_values.items()}
+                
+                # 准备批量插入数据（按记录所属的月分区分组）
+                insert_data: Dict[str, List[tuple]] = {}
+                for access_info in batch:
+                    path = access_info.get('path', '')
+                    title = access_info.get('title', '')
+                    user_agent = access_info.get('user_agent') or ''
+                    referer = access_info.get('referer')
+                    insert_data.setdefault(self._record_month(access_info), []).append((
+                        access_info.get('timestamp', int(time.time())),
+                        access_info.get('time', ''),
+                        access_info.get('date', ''),
+                        access_info.get('ip', ''),
+                        ids['paths'].get(path, 0) if path is not None else 0,
+                        access_info.get('method', ''),
+                        access_info.get('status_code', 0),
+                        ids['titles'].get(title) if title is not None else None,
+                        ids['user_agents'].get(user_agent),
+                        ids['referers'].get(referer) if referer is not None else None,
+                        1 if access_info.get('path_exists', True) else 0
+                    ))
+                
+                # 批量插入
+                for month, rows in insert_data.items():
+                    self._ensure_partition(cursor, month)
+                    cursor.executemany(f'''
+                        INSERT INTO {self._partition_table(month)} (
+                            timestamp, time, date, ip, path_id, method, status_code,
+                            title_id, user_agent_id, referer_id, path_exists
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', rows)
+                
+                self._update_rollups(cursor, batch)
+                
+                conn.commit()
+                
+                self.logger.debug(f"批量写入 {len(batch)} 条访问记录")
+                
+                archive_pending = self._archive_pending
+                self._archive_pending = False
                     
         except Exception as e:
             self.logger.error(f"批量写入访问记录失败: {e}")
+            return False
+        
+        # 归档在释放写锁后进行，gzip压缩期间不阻塞其他写入
+        if archive_pending:
+            self.archive_old_partitions()
+        
+        return True
     
     def record_access(self, access_info: Dict[str, Any], force_sync: bool = False):
         """
         记录访问信息到数据库
         
+        异步模式下只放入有界队列，不会等待数据库；队列满时按溢出策略处理。
+        
         Args:
             access_info: 访问信息字典
             force_sync: 是否强制同步写入，默认False（异步写入）
@@ -229,16 +962,148 @@ class AccessLogDB:
                 self._write_batch([access_info])
             else:
                 # 异步写入
-                self._write_queue.put(access_info)
+                self._enqueue(access_info)
                 
         except Exception as e:
             self.logger.error(f"记录访问信息失败: {e}")
-            # 如果异步写入失败，尝试同步写入
-            if not force_sync:
-                try:
-                    self._write_batch([access_info])
-                except Exception as sync_e:
-                    self.logger.error(f"同步写入也失败: {sync_e}")
+    
+    def _enqueue(self, access_info: Dict[str, Any]):
+        """
+        将访问记录放入写入队列（不阻塞）
+        
+        Args:
+            access_info: 访问信息字典
+        """
+        item = (time.monotonic(), access_info)
+        
+        # 采样策略：队列超过半满后只保留部分记录
+        if (self.overflow_policy == 'sample' and self._write_queue.qsize() >= self._write_queue.maxsize // 2 and
+                random.random() >= self.sample_rate):
+            with self._stats_lock:
+                self._writer_stats['sampled_out'] += 1
+            return
+        
+        try:
+            self._write_queue.put_nowait(item)
+            with self._stats_lock:
+                self._writer_stats['enqueued'] += 1
+            return
+        except queue.Full:
+            pass
+        
+        if self.overflow_policy == 'spill':
+            self._spill([access_info])
+            return
+        
+        if self.overflow_policy == 'drop_oldest':
+            try:
+                oldest = self._write_queue.get_nowait()
+                self._write_queue.task_done()
+                if oldest is None:
+                    # 不能丢弃停止信号，放回队列并丢弃当前记录
+                    self._write_queue.put(None)
+                else:
+                    self._write_queue.put_nowait(item)
+                    with self._stats_lock:
+                        self._writer_stats['enqueued'] += 1
+            except (queue.Empty, queue.Full):
+                pass
+        
+        with self._stats_lock:
+            self._writer_stats['dropped'] += 1
+    
+    def _spill(self, records: List[Dict[str, Any]]):
+        """
+        将访问记录追加到溢出文件
+        
+        Args:
+            records: 访问记录列表
+        """
+        try:
+            lines = ''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in records)
+            with self._spill_lock:
+                with open(self.spill_path, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+                self._spill_pending = True
+            with self._stats_lock:
+                self._writer_stats['spilled'] += len(records)
+        except Exception as e:
+            self.logger.error(f"写入访问日志溢出文件失败: {e}")
+            with self._stats_lock:
+                self._writer_stats['dropped'] += len(records)
+    
+    def _ingest_spill_file(self):
+        """将溢出文件中的记录导入数据库（在写入线程中执行）"""
+        with self._spill_lock:
+            if not os.path.exists(self._ingesting_path):
+                if not os.path.exists(self.spill_path):
+                    self._spill_pending = False
+                    return
+                # 改名后新的溢出记录写入新文件
+                os.replace(self.spill_path, self._ingesting_path)
+            self._spill_pending = os.path.exists(self.spill_path)
+        
+        try:
+            records = []
+            with open(self._ingesting_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            records.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue
+            
+            for start in range(0, len(records), self.MAX_BATCH_SIZE):
+                # 导入过程中队列积压或写入失败时暂停，剩余记录留待下次导入
+                if (self._write_queue.qsize() >= self._write_queue.maxsize // 2 or
+                        not self._write_batch(records[start:start + self.MAX_BATCH_SIZE])):
+                    remaining = records[start:]
+                    with open(self._ingesting_path, 'w', encoding='utf-8') as f:
+                        f.writelines(json.dumps(record, ensure_ascii=False, default=str) + '\n'
+                                     for record in remaining)
+                    with self._stats_lock:
+                        self._writer_stats['reingested'] += start
+                    self._spill_pending = True
+                    self._next_spill_ingest = time.monotonic() + self.SPILL_RETRY_INTERVAL
+                    self.logger.warning(f"访问日志溢出文件导入暂停，剩余 {len(remaining)} 条记录")
+                    return
+            
+            os.remove(self._ingesting_path)
+            with self._stats_lock:
+                self._writer_stats['reingested'] += len(records)
+            self.logger.info(f"已从溢出文件导入 {len(records)} 条访问记录")
+            
+        except Exception as e:
+            self.logger.error(f"导入访问日志溢出文件失败: {e}")
+            self._spill_pending = True
+            self._next_spill_ingest = time.monotonic() + self.SPILL_RETRY_INTERVAL
+    
+    def get_writer_stats(self) -> Dict[str, Any]:
+        """
+        获取异步写入器的统计信息
+        
+        Returns:
+            队列深度、入队/写入/丢弃/采样丢弃/溢出/导入计数、写入错误次数和排队延迟
+        """
+        with self._stats_lock:
+            stats = dict(self._writer_stats)
+            latency_total = self._latency_total
+        
+        spill_size = 0
+        for path in (self.spill_path, self._ingesting_path):
+            if os.path.exists(path):
+                spill_size += os.path.getsize(path)
+        
+        stats.update({
+            'async_enabled': self._async_enabled,
+            'overflow_policy': self.overflow_policy,
+            'queue_depth': self._write_queue.qsize(),
+            'queue_capacity': self._write_queue.maxsize,
+            'latency_avg_ms': latency_total / stats['written'] if stats['written'] else 0.0,
+            'spill_file_bytes': spill_size
+        })
+        return stats
     
     def flush_pending_writes(self):
         """刷新所有待写入的记录"""
@@ -246,9 +1111,9 @@ class AccessLogDB:
             return
             
         try:
-            # 等待队列清空
+            # 等待队列中的记录（包括正在写入的批次）全部处理完
             start_time = time.time()
-            while not self._write_queue.empty() and (time.time() - start_time) < 10:
+            while self._write_queue.unfinished_tasks and (time.time() - start_time) < 10:
                 time.sleep(0.1)
                 
             self.logger.info("已刷新所有待写入的访问记录")
@@ -257,8 +1122,9 @@ class AccessLogDB:
             self.logger.error(f"刷新待写入记录失败: {e}")
     
     def shutdown(self):
-        """关闭异步写入器"""
-        if not self._async_enabled or not self._thread_pool:
+        """关闭异步写入器和数据库连接"""
+        if not self._async_enabled or not (self._thread_pool or self._writer_thread):
+            self.close()
             return
             
         try:
@@ -266,15 +1132,20 @@ class AccessLogDB:
             self.flush_pending_writes()
             
             # 发送停止信号
-            self._write_queue.put(None)
+            self._write_queue.put(None, timeout=10)
             
             # 关闭线程池
-            self._thread_pool.shutdown(wait=True)
+            if self._thread_pool:
+                self._thread_pool.shutdown(wait=True)
+            else:
+                self._writer_thread.join(timeout=10)
             
             self.logger.info("异步访问日志写入器已关闭")
             
         except Exception as e:
             self.logger.error(f"关闭异步写入器失败: {e}")
+        finally:
+            self.close()
     
     def get_access_details(self, limit: int = 1000, include_non_existent: bool = True) -> List[Dict[str, Any]]:
         """
@@ -294,16 +1165,20 @@ class AccessLogDB:
                 # 构建查询条件
                 where_clause = ""
                 if not include_non_existent:
-                    where_clause = "WHERE path_exists = 1"
-                
-                cursor.execute(f'''
-                    SELECT * FROM access_logs 
-                    {where_clause}
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                ''', (limit,))
+                    where_clause = "WHERE l.path_exists = 1"
                 
-                rows = cursor.fetchall()
+                # 从最新的分区开始查询，取够limit条即停止
+                rows = []
+                for table in self._partitions_since(''):
+                    if len(rows) >= limit:
+                        break
+                    cursor.execute(f'''
+                        {self._decoded_select(table)}
+                        {where_clause}
+                        ORDER BY l.timestamp DESC 
+                        LIMIT ?
+                    ''', (limit - len(rows),))
+                    rows.extend(cursor.fetchall())
                 
                 # 转换为字典格式
                 access_details = []
@@ -346,65 +1221,42 @@ class AccessLogDB:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # 计算总PV和UV
-                cursor.execute('SELECT COUNT(*) as total_pv FROM access_logs WHERE path_exists = 1')
-                total_pv = cursor.fetchone()['total_pv']
-                
-                cursor.execute('SELECT COUNT(DISTINCT ip) as total_uv FROM access_logs WHERE path_exists = 1')
-                total_uv = cursor.fetchone()['total_uv']
+                # 以下统计均读取按天汇总的统计表
+                cursor.execute('SELECT COALESCE(SUM(pv), 0) AS total_pv, COALESCE(SUM(new_uv), 0) AS total_uv FROM daily_stats')
+                row = cursor.fetchone()
+                total_pv, total_uv = row['total_pv'], row['total_uv']
                 
                 # 计算今日PV和UV
                 today = datetime.now().strftime('%Y-%m-%d')
-                cursor.execute('SELECT COUNT(*) as today_pv FROM access_logs WHERE date = ? AND path_exists = 1', (today,))
-                today_pv = cursor.fetchone()['today_pv']
-                
-                cursor.execute('SELECT COUNT(DISTINCT ip) as today_uv FROM access_logs WHERE date = ? AND path_exists = 1', (today,))
-                today_uv = cursor.fetchone()['today_uv']
+                cursor.execute('SELECT pv, uv FROM daily_stats WHERE date = ?', (today,))
+                row = cursor.fetchone()
+                today_pv, today_uv = (row['pv'], row['uv']) if row else (0, 0)
                 
                 # 计算本周PV和UV
                 week_start = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime('%Y-%m-%d')
-                cursor.execute('SELECT COUNT(*) as week_pv FROM access_logs WHERE date >= ? AND path_exists = 1', (week_start,))
+                cursor.execute('SELECT COALESCE(SUM(pv), 0) AS week_pv FROM daily_stats WHERE date >= ?', (week_start,))
                 week_pv = cursor.fetchone()['week_pv']
                 
-                cursor.execute('SELECT COUNT(DISTINCT ip) as week_uv FROM access_logs WHERE date >= ? AND path_exists = 1', (week_start,))
+                cursor.execute('SELECT COUNT(DISTINCT ip) AS week_uv FROM daily_visitors WHERE date >= ?', (week_start,))
                 week_uv = cursor.fetchone()['week_uv']
                 
-                # 设备类型分布
-                cursor.execute('''
-                    SELECT device_type, COUNT(*) as count 
-                    FROM access_logs 
-                    WHERE path_exists = 1 AND device_type != ''
-                    GROUP BY device_type
-                ''')
-                device_types = [{'name': row['device_type'], 'value': row['count']} for row in cursor.fetchall()]
-                
-                # 操作系统分布
-                cursor.execute('''
-                    SELECT os, COUNT(*) as count 
-                    FROM access_logs 
-                    WHERE path_exists = 1 AND os != ''
-                    GROUP BY os
-                ''')
-                os_types = [{'name': row['os'], 'value': row['count']} for row in cursor.fetchall()]
-                
-                # 浏览器分布
-                cursor.execute('''
-                    SELECT browser, COUNT(*) as count 
-                    FROM access_logs 
-                    WHERE path_exists = 1 AND browser != ''
-                    GROUP BY browser
-                ''')
-                browser_types = [{'name': row['browser'], 'value': row['count']} for row in cursor.fetchall()]
+                # 设备类型、操作系统、浏览器分布
+                distributions = {}
+                for dimension in ('device_type', 'os', 'browser'):
+                    cursor.execute('''
+                        SELECT value, SUM(count) AS count
+                        FROM daily_dimension_counts
+                        WHERE dimension = ?
+                        GROUP BY value
+                    ''', (dimension,))
+                    distributions[dimension] = [{'name': row['value'], 'value': row['count']} for row in cursor.fetchall()]
+                device_types = distributions['device_type']
+                os_types = distributions['os']
+                browser_types = distributions['browser']
                 
                 # 最近30天PV趋势
                 thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-                cursor.execute('''
-                    SELECT date, COUNT(*) as pv 
-                    FROM access_logs 
-                    WHERE date >= ? AND path_exists = 1
-                    GROUP BY date 
-                    ORDER BY date
-                ''', (thirty_days_ago,))
+                cursor.execute('SELECT date, pv FROM daily_stats WHERE date >= ? ORDER BY date', (thirty_days_ago,))
                 
                 daily_pv_data = {row['date']: row['pv'] for row in cursor.fetchall()}
                 
@@ -417,11 +1269,11 @@ class AccessLogDB:
                 
                 # 热门页面
                 cursor.execute('''
-                    SELECT title, COUNT(*) as views 
-                    FROM access_logs 
-                    WHERE path_exists = 1 AND title != ''
-                    GROUP BY title 
-                    ORDER BY views DESC 
+                    SELECT value AS title, SUM(count) AS views
+                    FROM daily_dimension_counts
+                    WHERE dimension = 'title'
+                    GROUP BY value
+                    ORDER BY views DESC
                     LIMIT 10
                 ''')
                 top_pages = [{'title': row['title'], 'views': row['views']} for row in cursor.fetchall()]
@@ -474,17 +1326,23 @@ class AccessLogDB:
             return
         
         try:
+            # 直接批量写入，不经过有界的异步写入队列
             migrated_count = 0
+            batch = []
             with open(jsonl_file, 'r', encoding='utf-8') as f:
                 for line in f:
                     line = line.strip()
                     if line:
                         try:
-                            access_info = json.loads(line)
-                            self.record_access(access_info)
-                            migrated_count += 1
+                            batch.append(json.loads(line))
                         except json.JSONDecodeError:
                             continue
+                        if len(batch) >= self.MAX_BATCH_SIZE:
+                            if self._write_batch(batch):
+                                migrated_count += len(batch)
+                            batch = []
+            if batch and self._write_batch(batch):
+                migrated_count += len(batch)
             
             self.logger.info(f"成功从 {jsonl_file} 迁移 {migrated_count} 条记录到数据库")
             
@@ -495,26 +1353,115 @@ class AccessLogDB:
         """
         清理旧的访问记录
         
+        整月都早于截止日期的分区直接删除，只有截止日期所在月份的分区需要按日期删除记录。
+        
         Args:
             days: 保留天数，默认90天
         """
         try:
             cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+            cutoff_month = cutoff_date[:4] + cutoff_date[5:7]
             
-            with self.lock:
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
-                    
-                    cursor.execute('DELETE FROM access_logs WHERE date < ?', (cutoff_date,))
-                    deleted_count = cursor.rowcount
-                    
-                    conn.commit()
-                    
-                    self.logger.info(f"清理了 {deleted_count} 条超过 {days} 天的访问记录")
+            with self._get_write_connection() as conn:
+                cursor = conn.cursor()
+                
+                deleted_count = 0
+                for month in list(self._partitions):
+                    table = self._partition_table(month)
+                    if month < cutoff_month:
+                        deleted_count += cursor.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                        self._drop_partition(cursor, month)
+                    elif month == cutoff_month:
+                        cursor.execute(f'DELETE FROM {table} WHERE date < ?', (cutoff_date,))
+                        deleted_count += cursor.rowcount
+                
+                # 汇总表同步删除过期的天，并重新计算访客的首次访问日期
+                for table in ('daily_stats', 'daily_visitors', 'daily_dimension_counts'):
+                    cursor.execute(f'DELETE FROM {table} WHERE date < ?', (cutoff_date,))
+                self._rebuild_visitors(cursor)
+                self._prune_dictionaries(cursor)
+                
+                conn.commit()
+                
+                self.logger.info(f"清理了 {deleted_count} 条超过 {days} 天的访问记录")
                     
         except Exception as e:
             self.logger.error(f"清理旧记录失败: {e}")
     
+    def archive_old_partitions(self) -> List[str]:
+        """
+        归档超过保留月数的分区
+        
+        每个分区导出为 archive/<数据库名>_YYYYMM.db 后用gzip压缩，然后从主库中删除。
+        汇总表不受影响，统计页面仍包含已归档月份的数据。
+        
+        Returns:
+            已归档的月份列表（YYYYMM）
+        """
+        if self.archive_after_months <= 0:
+            return []
+        
+        now = datetime.now()
+        month_index = now.year * 12 + now.month - self.archive_after_months
+        keep_from = f"{month_index // 12:04d}{month_index % 12 + 1:02d}"
+        db_name = os.path.splitext(os.path.basename(self.db_path))[0]
+        
+        archived = []
+        for month in [m for m in self._partitions if m < keep_from]:
+            archive_path = os.path.join(self.archive_dir, f"{db_name}_{month}.db")
+            try:
+                os.makedirs(self.archive_dir, exist_ok=True)
+                if os.path.exists(archive_path):
+                    os.remove(archive_path)
+                
+                with self._get_write_connection() as conn:
+                    # ATTACH不能在事务中执行，导出完成后再删除分区
+                    conn.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+                    try:
+                        # 归档文件保存还原后的字段，不依赖主库的字典表
+                        conn.execute('CREATE TABLE archive.access_logs AS ' +
+                                     self._decoded_select(self._partition_table(month)))
+                        conn.commit()
+                    finally:
+                        conn.execute('DETACH DATABASE archive')
+                    self._drop_partition(conn.cursor(), month)
+                    self._prune_dictionaries(conn.cursor())
+                    conn.commit()
+                
+                # 压缩在写锁之外进行，不阻塞访问记录的写入
+                with open(archive_path, 'rb') as src, gzip.open(archive_path + '.gz', 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(archive_path)
+                archived.append(month)
+                self.logger.info(f"已归档访问日志分区 {month}: {archive_path}.gz")
+            except Exception as e:
+                self.logger.error(f"归档访问日志分区 {month} 失败: {e}")
+                break
+        
+        return archived
+    
+    def get_visits_since(self, timestamp: int) -> Dict[str, int]:
+        """
+        统计指定时间之后的PV和UV（只查询该时间所在月份及之后的分区）
+        
+        Args:
+            timestamp: 起始时间戳
+            
+        Returns:
+            包含 pv 和 uv 的字典
+        """
+        tables = self._partitions_since(datetime.fromtimestamp(timestamp).strftime('%Y%m'))
+        if not tables:
+            return {'pv': 0, 'uv': 0}
+        
+        union_sql = ' UNION ALL '.join(
+            f'SELECT ip FROM {table} WHERE timestamp >= ? AND path_exists = 1' for table in tables
+        )
+        with self._get_connection() as conn:
+            row = conn.execute(f'SELECT COUNT(*) AS pv, COUNT(DISTINCT ip) AS uv FROM ({union_sql})',
+                               (timestamp,) * len(tables)).fetchone()
+            return {'pv': row['pv'], 'uv': row['uv']}
+    
     def get_database_size(self) -> Dict[str, Any]:
         """
         获取数据库大小信息
@@ -529,20 +1476,37 @@ class AccessLogDB:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # 记录总数
-                cursor.execute('SELECT COUNT(*) as total_records FROM access_logs')
-                total_records = cursor.fetchone()['total_records']
+                # 记录总数和有效记录数（path_exists=1），直接统计各分区
+                total_records = 0
+                valid_records = 0
+                for table in self._partitions_since(''):
+                    cursor.execute(f'''
+                        SELECT COUNT(*) AS total_records, COALESCE(SUM(path_exists = 1), 0) AS valid_records
+                        FROM {table}
+                    ''')
+                    row = cursor.fetchone()
+                    total_records += row['total_records']
+                    valid_records += row['valid_records']
                 
-                # 有效记录数（path_exists=1）
-                cursor.execute('SELECT COUNT(*) as valid_records FROM access_logs WHERE path_exists = 1')
-                valid_records = cursor.fetchone()['valid_records']
+                # 已归档的分区文件
+                archive_size = 0
+                archived_partitions = 0
+                if os.path.isdir(self.archive_dir):
+                    db_name = os.path.splitext(os.path.basename(self.db_path))[0]
+                    for name in os.listdir(self.archive_dir):
+                        if name.startswith(f"{db_name}_") and name.endswith('.db.gz'):
+                            archived_partitions += 1
+                            archive_size += os.path.getsize(os.path.join(self.archive_dir, name))
                 
                 return {
                     'file_size_bytes': file_size,
                     'file_size_mb': round(file_size / 1024 / 1024, 2),
                     'total_records': total_records,
                     'valid_records': valid_records,
-                    'invalid_records': total_records - valid_records
+                    'invalid_records': total_records - valid_records,
+                    'partitions': [f"{m[:4]}-{m[4:]}" for m in self._partitions],
+                    'archived_partitions': archived_partitions,
+                    'archive_size_mb': round(archive_size / 1024 / 1024, 2)
                 }
                 
         except Exception as e:
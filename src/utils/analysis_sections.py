@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+分析文档任务区块索引
+
+分析文档由多个 `<!-- AI_TASK_START: 任务 -->` ... `<!-- AI_TASK_END: 任务 -->`
+区块组成，其中AI全文翻译往往有几十KB。AnalysisExecutionStage 在写入分析文档时
+同时生成一个旁路索引文件（`<分析文档>.sections.json`），记录每个任务区块内容的
+字节偏移和长度，以及翻译后的标题。读取方可以直接seek到某个区块或只读标题，
+不必加载整个文档。
+
+索引中记录了分析文档的大小和mtime，文档被其他工具改写后索引自动失效，
+读取方会回退到扫描整个文档。
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Any, Optional, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_SUFFIX = '.sections.json'
+SIDECAR_VERSION = 1
+TITLE_TASK = "AI标题翻译"
+
+
+def task_start_tag(task: str) -> str:
+    """任务区块开始标记"""
+    return f"<!-- AI_TASK_START: {task} -->"
+
+
+def task_end_tag(task: str) -> str:
+    """任务区块结束标记"""
+    return f"<!-- AI_TASK_END: {task} -->"
+
+
+def get_sidecar_path(analysis_path: str) -> str:
+    """
+    获取分析文档对应的区块索引文件路径
+
+    Args:
+        analysis_path: 分析文档路径
+
+    Returns:
+        索引文件路径
+    """
+    return analysis_path + SIDECAR_SUFFIX
+
+
+class SectionTrackingWriter:
+    """
+    记录任务区块字节偏移的文件写入包装器
+
+    所有写入都经过该对象，按UTF-8编码累计字节数，写入任务区块时记录区块内容的
+    偏移和长度。换行被转换（如Windows文本模式）导致文件大小与累计值不一致时，
+    不生成索引。
+    """
+
+    def __init__(self, outfile):
+        """
+        初始化写入包装器
+
+        Args:
+            outfile: 已打开的文本文件对象
+        """
+        self._outfile = outfile
+        self.position = 0
+        self.sections: Dict[str, Dict[str, int]] = {}
+        self.translated_title: Optional[str] = None
+        # 正在流式写入的区块
+        self._streaming_task: Optional[str] = None
+        self._streaming_offset = 0
+        self._streaming_text = None
+
+    def write(self, text: str) -> int:
+        """写入文本并累计字节偏移"""
+        self._outfile.write(text)
+        self.position += len(text.encode('utf-8'))
+        return len(text)
+
+    def flush(self):
+        """刷新底层文件"""
+        self._outfile.flush()
+
+    def write_section(self, task: str, body: str, is_error: bool = False):
+        """
+        写入一个任务区块并记录其内容的位置
+
+        Args:
+            task: 任务类型
+            body: 区块内容（不含换行）
+            is_error: 区块内容是否为错误标记
+        """
+        # 区块内容从开始标记之后算起（包含换行），与扫描文档得到的偏移一致
+        self.write(f"\n{task_start_tag(task)}")
+        offset = self.position
+        self.write(f"\n{body}\n")
+        # 同一任务只记录第一个区块，与按标记分割读取的行为一致
+        if task not in self.sections:
+            self.sections[task] = {'offset': offset, 'length': self.position - offset, 'error': is_error}
+            if task == TITLE_TASK:
+                self.translated_title = body.strip()
+        self.write(f"{task_end_tag(task)}\n\n")
+        self.flush()
+
+    def start_section(self, task: str):
+        """
+        开始一个流式写入的任务区块，之后用 write_chunk 写入内容、end_section 结束
+
+        Args:
+            task: 任务类型
+        """
+        self.write(f"\n{task_start_tag(task)}")
+        self._streaming_task = task
+        self._streaming_offset = self.position
+        self._streaming_text = [] if task == TITLE_TASK else None
+        self.write("\n")
+        self.flush()
+
+    def write_chunk(self, text: str):
+        """写入流式区块的一段内容并立即刷新，读取方可以看到已生成的部分"""
+        self.write(text)
+        if self._streaming_text is not None:
+            self._streaming_text.append(text)
+        self.flush()
+
+    def end_section(self, task: str, error_note: Optional[str] = None):
+        """
+        结束流式写入的任务区块
+
+        Args:
+            task: 任务类型
+            error_note: 失败时追加在已写入内容之后的错误标记，成功时为None
+        """
+        if error_note:
+            self.write(f"\n{error_note}")
+        self.write("\n")
+        offset = self._streaming_offset
+        if task not in self.sections:
+            self.sections[task] = {'offset': offset, 'length': self.position - offset, 'error': bool(error_note)}
+            if task == TITLE_TASK:
+                self.translated_title = ''.join(self._streaming_text).strip()
+        self._streaming_task = None
+        self._streaming_text = None
+        self.write(f"{task_end_tag(task)}\n\n")
+        self.flush()
+
+    def save_index(self, analysis_path: str) -> bool:
+        """
+        文件关闭后写入区块索引
+
+        Args:
+            analysis_path: 分析文档路径
+
+        Returns:
+            是否写入成功
+        """
+        try:
+            stat = os.stat(analysis_path)
+        except OSError as e:
+            logger.warning(f"无法获取分析文档信息，跳过区块索引: {analysis_path} - {e}")
+            return False
+        if stat.st_size != self.position:
+            # 换行被转换等情况下偏移不可靠，不生成索引
+            logger.warning(f"分析文档大小与写入字节数不一致，跳过区块索引: {analysis_path}")
+            remove_section_index(analysis_path)
+            return False
+        return write_section_index(analysis_path, self.sections, self.translated_title, stat)
+
+
+def write_section_index(analysis_path: str, sections: Dict[str, Dict[str, Any]],
+                        translated_title: Optional[str], stat: os.stat_result) -> bool:
+    """
+    写入区块索引文件
+
+    Args:
+        analysis_path: 分析文档路径
+        sections: 任务到 {offset, length, error} 的映射
+        translated_title: 翻译后的标题（区块内容去掉首尾空白）
+        stat: 分析文档的stat信息
+
+    Returns:
+        是否写入成功
+    """
+    index = {
+        'version': SIDECAR_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'translated_title': translated_title,
+        'sections': sections
+    }
+    sidecar_path = get_sidecar_path(analysis_path)
+    temp_path = sidecar_path + '.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(temp_path, sidecar_path)
+        return True
+    except OSError as e:
+        logger.warning(f"写入区块索引失败: {sidecar_path} - {e}")
+        return False
+
+
+def remove_section_index(analysis_path: str):
+    """删除分析文档的区块索引文件（如果存在）"""
+    try:
+        os.remove(get_sidecar_path(analysis_path))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"删除区块索引失败: {analysis_path} - {e}")
+
+
+def scan_sections(data: bytes) -> Dict[str, Dict[str, Any]]:
+    """
+    扫描文档内容，定位所有任务区块
+
+    区块内容的范围与 `content.split(start_tag)[1].split(end_tag)[0]` 一致：
+    从第一个开始标记之后，到其后的结束标记（或同名的下一个开始标记）为止。
+    开始或结束标记缺失的任务不会出现在结果中。
+
+    Args:
+        data: 文档的UTF-8字节内容
+
+    Returns:
+        任务到 {offset, length, error} 的映射
+    """
+    sections: Dict[str, Dict[str, Any]] = {}
+    prefix = b"<!-- AI_TASK_START: "
+    suffix = b" -->"
+    pos = data.find(prefix)
+    while pos != -1:
+        name_end = data.find(suffix, pos + len(prefix))
+        if name_end == -1:
+            break
+        task = data[pos + len(prefix):name_end].decode('utf-8', errors='replace')
+        if task not in sections and b'\n' not in data[pos:name_end]:
+            start_tag = task_start_tag(task).encode('utf-8')
+            end_tag = task_end_tag(task).encode('utf-8')
+            if end_tag in data:
+                offset = pos + len(start_tag)
+                next_start = data.find(start_tag, offset)
+                if next_start == -1:
+                    next_start = len(data)
+                end = data.find(end_tag, offset, next_start)
+                if end == -1:
+                    end = next_start
+                body = data[offset:end]
+                sections[task] = {'offset': offset, 'length': end - offset, 'error': b'<!-- ERROR:' in body}
+        pos = data.find(prefix, name_end)
+    return sections
+
+
+def load_section_index(analysis_path: str) -> Optional[Dict[str, Any]]:
+    """
+    加载分析文档的区块索引，索引不存在或已失效时返回None
+
+    Args:
+        analysis_path: 分析文档路径
+
+    Returns:
+        索引字典（包含 sections 和 translated_title），或None
+    """
+    try:
+        with open(get_sidecar_path(analysis_path), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        stat = os.stat(analysis_path)
+    except (OSError, ValueError):
+        return None
+    if (index.get('version') != SIDECAR_VERSION or index.get('size') != stat.st_size or
+            index.get('mtime_ns') != stat.st_mtime_ns):
+        return None
+    return index
+
+
+def build_section_index(analysis_path: str) -> Optional[Dict[str, Any]]:
+    """
+    扫描分析文档并重新生成区块索引，用于为已有文档补建索引
+
+    Args:
+        analysis_path: 分析文档路径
+
+    Returns:
+        新的索引字典，失败时返回None
+    """
+    try:
+        stat = os.stat(analysis_path)
+        with open(analysis_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        logger.warning(f"读取分析文档失败: {analysis_path} - {e}")
+        return None
+    sections = scan_sections(data)
+    translated_title = None
+    if TITLE_TASK in sections:
+        title_section = sections[TITLE_TASK]
+        translated_title = _decode_section(
+            data[title_section['offset']:title_section['offset'] + title_section['length']]
+        )
+    if not write_section_index(analysis_path, sections, translated_title, stat):
+        return None
+    return load_section_index(analysis_path)
+
+
+def _decode_section(data: bytes) -> str:
+    """按文本模式读取的规则解码区块内容（统一换行符并去掉首尾空白）"""
+    return data.decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n').strip()
+
+
+def read_task_sections(analysis_path: str, tasks: Iterable[str]) -> Dict[str, Optional[str]]:
+    """
+    读取指定任务区块的内容（去掉首尾空白）
+
+    有有效索引时只读取所需区块，否则读取整个文档后扫描。
+
+    Args:
+        analysis_path: 分析文档路径
+        tasks: 任务类型列表
+
+    Returns:
+        任务到区块内容的映射，区块标记缺失的任务为None
+
+    Raises:
+        OSError: 无法读取分析文档
+    """
+    tasks = list(tasks)
+    index = load_section_index(analysis_path)
+    result: Dict[str, Optional[str]] = {}
+    if index is not None:
+        sections = index.get('sections', {})
+        with open(analysis_path, 'rb') as f:
+            for task in tasks:
+                section = sections.get(task)
+                if section is None:
+                    result[task] = None
+                    continue
+                f.seek(section['offset'])
+                result[task] = _decode_section(f.read(section['length']))
+        return result
+
+    with open(analysis_path, 'rb') as f:
+        data = f.read()
+    sections = scan_sections(data)
+    for task in tasks:
+        section = sections.get(task)
+        result[task] = None if section is None else \
+            _decode_section(data[section['offset']:section['offset'] + section['length']])
+    return result
+
+
+def read_translated_title(analysis_path: str) -> Tuple[bool, Optional[str]]:
+    """
+    从区块索引读取翻译后的标题，不读取分析文档本身
+
+    Args:
+        analysis_path: 分析文档路径
+
+    Returns:
+        (索引是否有效, 标题区块内容)；索引无效时调用方需自行读取文档
+    """
+    index = load_section_index(analysis_path)
+    if index is None:
+        return False, None
+    return True, index.get('translated_title')
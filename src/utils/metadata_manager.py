@@ -7,6 +7,10 @@ import logging
 import threading
 from typing import Dict, Any, Optional, List, Union
 
+from src.utils.metadata_store import (
+    JsonMetadataStore, MetadataChange, create_metadata_store, load_metadata_store_config
+)
+
 logger = logging.getLogger(__name__)
 
 class MetadataManager:
@@ -18,12 +22,13 @@ class MetadataManager:
         'analysis': threading.RLock()
     }
     
-    def __init__(self, base_dir: Optional[str] = None):
+    def __init__(self, base_dir: Optional[str] = None, store_config: Optional[Dict[str, Any]] = None):
         """
         初始化元数据管理器
         
         Args:
             base_dir: 项目根目录，如果为None则使用当前目录
+            store_config: 元数据存储配置（即配置中的 `metadata` 节），如果为None则从配置文件加载
         """
         if base_dir is None:
             # 默认使用项目根目录
@@ -41,6 +46,12 @@ class MetadataManager:
         # 分析元数据文件路径
         self.analysis_metadata_file = os.path.join(self.metadata_dir, 'analysis_metadata.json')
         
+        # 创建存储后端（json整文件重写 或 journal追加日志+快照）
+        if store_config is None:
+            store_config = load_metadata_store_config(self.base_dir)
+        self.crawler_store = create_metadata_store(self.crawler_metadata_file, self._file_locks['crawler'], store_config)
+        self.analysis_store = create_metadata_store(self.analysis_metadata_file, self._file_locks['analysis'], store_config)
+        
         # 加载元数据
         self.crawler_metadata = self._load_metadata(self.crawler_metadata_file)
         self.analysis_metadata = self._load_metadata(self.analysis_metadata_file)
@@ -56,6 +67,10 @@ class MetadataManager:
             for source_type in self.crawler_metadata[vendor]:
                 self.crawler_vendor_locks[vendor][source_type] = threading.RLock()
     
+    def _get_store(self, file_path: str) -> JsonMetadataStore:
+        """根据元数据文件路径返回对应的存储后端"""
+        return self.crawler_store if 'crawler' in file_path else self.analysis_store
+    
     def _load_metadata(self, file_path: str) -> Dict[str, Any]:
         """
         加载元数据文件，使用适当的锁确保线程安全
@@ -66,10 +81,7 @@ class MetadataManager:
         Returns:
             元数据字典
         """
-        from src.utils.metadata_utils import load_metadata
-        
         lock_key = 'crawler' if 'crawler' in file_path else 'analysis'
-        lock = self._file_locks[lock_key]
         
         # 定义更新锁的函数
         def update_locks(data: Dict[str, Any]) -> None:
@@ -81,32 +93,38 @@ class MetadataManager:
                         if source_type not in self.crawler_vendor_locks[vendor]:
                             self.crawler_vendor_locks[vendor][source_type] = threading.RLock()
         
-        # 使用通用的元数据加载函数
-        return load_metadata(
-            file_path=file_path,
-            lock=lock,
-            update_locks_func=update_locks
-        )
+        # 由存储后端加载（journal后端会在快照之上重放日志）
+        return self._get_store(file_path).load(update_locks_func=update_locks)
     
     def _save_metadata(self, file_path: str, metadata: Dict[str, Any]) -> None:
         """
-        保存元数据到文件，使用适当的锁确保线程安全
+        保存完整元数据到文件，使用适当的锁确保线程安全
+        
+        journal后端下这是一次压缩：写入完整快照并清空日志
         
         Args:
             file_path: 元数据文件路径
             metadata: 元数据字典
         """
-        from src.utils.metadata_utils import save_metadata
+        self._get_store(file_path).save(metadata)
+    
+    def _persist_crawler_changes(self, changes: List[MetadataChange]) -> None:
+        """
+        持久化已应用到内存的爬虫元数据变更，调用方需持有crawler_lock
         
-        lock_key = 'crawler' if 'crawler' in file_path else 'analysis'
-        lock = self._file_locks[lock_key]
-        
-        # 使用通用的元数据保存函数
-        save_metadata(
-            file_path=file_path,
-            metadata=metadata,
-            lock=lock
-        )
+        Args:
+            changes: 变更列表，每项为(键路径, 新值)
+        """
+        self.crawler_store.persist_changes(self.crawler_metadata, changes)
+    
+    def _persist_analysis_changes(self, changes: List[MetadataChange]) -> None:
+        """
+        持久化已应用到内存的分析元数据变更，调用方需持有analysis_lock
+        
+        Args:
+            changes: 变更列表，每项为(键路径, 新值)
+        """
+        self.analysis_store.persist_changes(self.analysis_metadata, changes)
     
     def save_crawler_metadata(self, vendor: Optional[str] = None, source_type: Optional[str] = None) -> None:
         """保存爬虫元数据到文件，线程安全，支持指定vendor和source_type以减少锁范围"""
@@ -169,7 +187,7 @@ class MetadataManager:
                     self.crawler_metadata[vendor][source_type] = metadata
                     
                     # 保存元数据
-                    self.save_crawler_metadata(vendor, source_type)
+                    self._persist_crawler_changes([([vendor, source_type], metadata)])
         else:
             with self.crawler_lock:
                 # 确保vendor存在
@@ -180,7 +198,7 @@ class MetadataManager:
                 self.crawler_metadata[vendor][source_type] = metadata
                 
                 # 保存元数据
-                self.save_crawler_metadata(vendor, source_type)
+                self._persist_crawler_changes([([vendor, source_type], metadata)])
     
     def update_crawler_metadata_entry(self, vendor: str, source_type: str, url: str, data: Dict[str, Any], batch: bool = False) -> None:
         """
@@ -208,7 +226,7 @@ class MetadataManager:
                     
                     # 如果不是批量更新，立即保存元数据
                     if not batch:
-                        self.save_crawler_metadata(vendor, source_type)
+                        self._persist_crawler_changes([([vendor, source_type, url], data)])
         else:
             with self.crawler_lock:
                 # 确保vendor和source_type存在
@@ -223,7 +241,7 @@ class MetadataManager:
                 
                 # 如果不是批量更新，立即保存元数据
                 if not batch:
-                    self.save_crawler_metadata(vendor, source_type)
+                    self._persist_crawler_changes([([vendor, source_type, url], data)])
     
     def get_analysis_metadata(self, file_path: str) -> Dict[str, Any]:
         """
@@ -265,7 +283,7 @@ class MetadataManager:
             self.analysis_metadata[normalized_path].update(data)
             
             # 保存元数据
-            self.save_analysis_metadata()
+            self._persist_analysis_changes([([normalized_path], self.analysis_metadata[normalized_path])])
     
     def get_all_crawler_metadata(self) -> Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]:
         """
@@ -404,46 +422,29 @@ class MetadataManager:
         if vendor in self.crawler_vendor_locks and source_type in self.crawler_vendor_locks[vendor]:
             with self.crawler_vendor_locks[vendor][source_type]:
                 with self.crawler_lock:
-                    # 创建metadata的副本，实现事务机制
-                    import copy
-                    metadata_copy = copy.deepcopy(self.crawler_metadata)
-                    
-                    # 确保vendor和source_type存在
-                    if vendor not in metadata_copy:
-                        metadata_copy[vendor] = {}
-                    
-                    if source_type not in metadata_copy[vendor]:
-                        metadata_copy[vendor][source_type] = {}
-                    
-                    # 在副本上批量更新元数据，只更新指定的vendor和source_type，保留其他厂商的数据
-                    for url, data in entries.items():
-                        metadata_copy[vendor][source_type][url] = data
-                    
-                    # 一次性更新内存中的metadata和文件
-                    self.crawler_metadata = metadata_copy
-                    self._save_metadata(self.crawler_metadata_file, self.crawler_metadata)
-                    logger.info(f"批量更新了 {len(entries)} 个URL的元数据，保留了其他厂商的数据")
+                    self._apply_crawler_entries_batch(vendor, source_type, entries)
         else:
             with self.crawler_lock:
-                # 创建metadata的副本，实现事务机制
-                import copy
-                metadata_copy = copy.deepcopy(self.crawler_metadata)
-                
-                # 确保vendor和source_type存在
-                if vendor not in metadata_copy:
-                    metadata_copy[vendor] = {}
-                
-                if source_type not in metadata_copy[vendor]:
-                    metadata_copy[vendor][source_type] = {}
-                
-                # 在副本上批量更新元数据，只更新指定的vendor和source_type，保留其他厂商的数据
-                for url, data in entries.items():
-                    metadata_copy[vendor][source_type][url] = data
-                
-                # 一次性更新内存中的metadata和文件
-                self.crawler_metadata = metadata_copy
-                self._save_metadata(self.crawler_metadata_file, self.crawler_metadata)
-                logger.info(f"批量更新了 {len(entries)} 个URL的元数据，保留了其他厂商的数据")
+                self._apply_crawler_entries_batch(vendor, source_type, entries)
+    
+    def _apply_crawler_entries_batch(self, vendor: str, source_type: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        """
+        在副本上批量更新指定vendor和source_type的元数据并持久化，调用方需持有crawler_lock
+        
+        只复制受影响的source_type字典来实现事务机制，保留其他厂商的数据
+        
+        Args:
+            vendor: 厂商名称
+            source_type: 源类型
+            entries: 元数据字典，键为URL，值为元数据
+        """
+        source_copy = dict(self.crawler_metadata.get(vendor, {}).get(source_type, {}))
+        source_copy.update(entries)
+        
+        # 一次性更新内存中的metadata和文件
+        self.crawler_metadata.setdefault(vendor, {})[source_type] = source_copy
+        self._persist_crawler_changes([([vendor, source_type, url], data) for url, data in entries.items()])
+        logger.info(f"批量更新了 {len(entries)} 个URL的元数据，保留了其他厂商的数据")
     
     def _migrate_legacy_crawler_metadata(self) -> None:
         """
@@ -490,3 +491,27 @@ class MetadataManager:
                 logger.info(f"已备份元数据文件: {legacy_file} -> {legacy_file}.bak")
             except Exception as e:
                 logger.error(f"备份元数据文件失败: {legacy_file} - {e}")
+
+
+def create_metadata_manager(base_dir: Optional[str] = None, store_config: Optional[Dict[str, Any]] = None):
+    """
+    根据配置创建元数据管理器
+    
+    storage_backend为sqlite时返回SqliteMetadataManager，否则返回基于JSON文件的MetadataManager，
+    两者提供相同的查询和更新接口
+    
+    Args:
+        base_dir: 项目根目录，如果为None则使用默认项目根目录
+        store_config: 元数据存储配置，如果为None则从配置文件加载
+        
+    Returns:
+        元数据管理器实例
+    """
+    if store_config is None:
+        store_config = load_metadata_store_config(base_dir)
+    
+    if store_config.get('storage_backend') == 'sqlite':
+        from src.utils.sqlite_metadata_manager import SqliteMetadataManager
+        return SqliteMetadataManager(base_dir, store_config)
+    
+    return MetadataManager(base_dir, store_config)
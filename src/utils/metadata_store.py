@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, Any, Optional, List, Tuple, Callable
+
+from src.utils.metadata_utils import load_metadata, save_metadata
+
+logger = logging.getLogger(__name__)
+
+# 变更记录: (键路径, 新值)，新值为None表示删除该键
+MetadataChange = Tuple[List[str], Any]
+
+
+def apply_metadata_change(metadata: Dict[str, Any], path: List[str], value: Any) -> None:
+    """
+    将一条变更应用到嵌套的元数据字典上
+
+    Args:
+        metadata: 元数据字典（原地修改）
+        path: 键路径，例如 [vendor, source_type, url]
+        value: 新值，为None时删除该键
+    """
+    if not path:
+        return
+
+    node = metadata
+    for key in path[:-1]:
+        child = node.get(key)
+        if not isinstance(child, dict):
+            if value is None:
+                return
+            child = {}
+            node[key] = child
+        node = child
+
+    if value is None:
+        node.pop(path[-1], None)
+    else:
+        node[path[-1]] = value
+
+
+class JsonMetadataStore:
+    """整文件JSON存储后端，每次持久化都重写完整的元数据文件"""
+
+    def __init__(self, file_path: str, lock: Optional[threading.RLock] = None):
+        """
+        初始化JSON存储后端
+
+        Args:
+            file_path: 元数据JSON文件路径
+            lock: 文件I/O锁
+        """
+        self.file_path = file_path
+        self.lock = lock or threading.RLock()
+
+    def load(self, update_locks_func: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """加载完整的元数据"""
+        return load_metadata(
+            file_path=self.file_path,
+            lock=self.lock,
+            update_locks_func=update_locks_func
+        )
+
+    def save(self, metadata: Dict[str, Any]) -> bool:
+        """将完整的元数据写入JSON文件"""
+        return save_metadata(
+            file_path=self.file_path,
+            metadata=metadata,
+            lock=self.lock
+        )
+
+    def persist_changes(self, metadata: Dict[str, Any], changes: List[MetadataChange]) -> None:
+        """
+        持久化一组已经应用到内存中的变更，默认实现为整文件重写
+
+        Args:
+            metadata: 已包含变更的完整元数据
+            changes: 变更列表
+        """
+        self.save(metadata)
+
+
+class JournalMetadataStore(JsonMetadataStore):
+    """
+    追加式日志存储后端
+
+    JSON文件作为快照保留，每次条目级变更只向 `<快照>.journal` 追加一行记录；日志达到
+    阈值时压缩为新的快照。启动时先加载快照，再重放日志尾部。快照不包含尚未压缩的
+    变更，外部工具（如sqlite_backup）需要通过 load() 读取完整的元数据。
+    """
+
+    JOURNAL_SUFFIX = '.journal'
+
+    def __init__(self, file_path: str, lock: Optional[threading.RLock] = None,
+                 compact_threshold: int = 1000, fsync: bool = True):
+        """
+        初始化日志存储后端
+
+        Args:
+            file_path: 快照JSON文件路径
+            lock: 文件I/O锁
+            compact_threshold: 日志记录数达到该值时触发压缩
+            fsync: 每次追加后是否fsync
+        """
+        super().__init__(file_path, lock)
+        self.journal_path = f"{file_path}{self.JOURNAL_SUFFIX}"
+        self.compact_threshold = max(1, int(compact_threshold))
+        self.fsync = fsync
+        self._journal_records = 0
+        self._journal_file = None
+
+    def _snapshot_stamp(self) -> List[int]:
+        """返回快照文件的(mtime_ns, size)标识，用于识别快照是否被外部整体重写"""
+        try:
+            stat = os.stat(self.file_path)
+            return [stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            return [0, 0]
+
+    def _close_journal(self) -> None:
+        if self._journal_file is not None:
+            try:
+                self._journal_file.close()
+            except Exception:
+                pass
+            self._journal_file = None
+
+    def _journal_is_current(self) -> bool:
+        """判断已打开的日志句柄是否仍指向磁盘上的日志文件"""
+        try:
+            return os.fstat(self._journal_file.fileno()).st_ino == os.stat(self.journal_path).st_ino
+        except OSError:
+            return False
+
+    def _reset_journal(self) -> None:
+        """截断日志，写入与当前快照对应的头部记录"""
+        self._close_journal()
+        temp_file = f"{self.journal_path}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'base': self._snapshot_stamp()}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.journal_path)
+        self._journal_records = 0
+
+    def _header_matches_snapshot(self, header_line: str) -> bool:
+        """判断日志头部记录的快照标识是否与当前快照一致"""
+        try:
+            header = json.loads(header_line) if header_line.strip() else {}
+        except json.JSONDecodeError:
+            return False
+        return isinstance(header, dict) and header.get('base') == self._snapshot_stamp()
+
+    def _open_journal(self) -> None:
+        """打开日志用于追加，日志缺失或与快照不匹配时先重置"""
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                header_line = f.readline()
+        except FileNotFoundError:
+            header_line = ''
+
+        if not self._header_matches_snapshot(header_line):
+            self._reset_journal()
+        else:
+            # 沿用已有日志时计入其中的记录数，保证压缩阈值按实际长度触发
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                self._journal_records = max(0, sum(1 for _ in f) - 1)
+        self._journal_file = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _replay_journal(self, metadata: Dict[str, Any]) -> int:
+        """
+        将日志中的记录重放到快照数据上
+
+        Returns:
+            重放的记录数
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        replayed = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            if not self._header_matches_snapshot(f.readline()):
+                # 快照在日志之后被整体重写（例如分析流水线直接写入JSON），以快照为准
+                logger.warning(f"元数据快照已被外部更新，丢弃过期日志: {self.journal_path}")
+                return 0
+
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程崩溃时最后一行可能只写了一半，其后的内容不可信
+                    logger.warning(f"元数据日志存在不完整记录，停止重放: {self.journal_path}")
+                    break
+                apply_metadata_change(metadata, record.get('p', []), record.get('v'))
+                replayed += 1
+        return replayed
+
+    def load(self, update_locks_func: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """加载快照并重放日志"""
+        with self.lock:
+            metadata = load_metadata(file_path=self.file_path)
+            try:
+                replayed = self._replay_journal(metadata)
+            except Exception as e:
+                logger.error(f"重放元数据日志失败: {self.journal_path} - {e}")
+                replayed = 0
+
+            if update_locks_func:
+                update_locks_func(metadata)
+
+            if replayed:
+                # 加载过程保持只读，日志由写入方在达到阈值或整体保存时压缩
+                logger.info(f"已从日志重放 {replayed} 条元数据变更: {self.journal_path}")
+            return metadata
+
+    def save(self, metadata: Dict[str, Any]) -> bool:
+        """写入完整快照并清空日志（压缩）"""
+        with self.lock:
+            # 快照写入失败时保留日志，下次启动仍可重放
+            if not save_metadata(file_path=self.file_path, metadata=metadata):
+                return False
+            try:
+                self._reset_journal()
+            except Exception as e:
+                logger.error(f"重置元数据日志失败: {self.journal_path} - {e}")
+            return True
+
+    def persist_changes(self, metadata: Dict[str, Any], changes: List[MetadataChange]) -> None:
+        """
+        以追加方式记录变更，写入代价只与变更条目数相关
+
+        Args:
+            metadata: 已包含变更的完整元数据，仅在触发压缩时使用
+            changes: 变更列表
+        """
+        if not changes:
+            return
+
+        payload = ''.join(
+            json.dumps({'p': list(path), 'v': value}, ensure_ascii=False) + '\n'
+            for path, value in changes
+        )
+
+        with self.lock:
+            try:
+                if self._journal_file is not None and not self._journal_is_current():
+                    # 日志已被其他实例压缩替换，重新打开新文件
+                    self._close_journal()
+                if self._journal_file is None:
+                    self._open_journal()
+                self._journal_file.write(payload)
+                self._journal_file.flush()
+                if self.fsync:
+                    os.fsync(self._journal_file.fileno())
+                self._journal_records += len(changes)
+            except Exception as e:
+                logger.error(f"追加元数据日志失败，回退为整文件保存: {self.journal_path} - {e}")
+                self._close_journal()
+                self.save(metadata)
+                return
+
+            if self._journal_records >= self.compact_threshold:
+                logger.debug(f"元数据日志达到 {self._journal_records} 条，压缩为快照: {self.file_path}")
+                self.save(metadata)
+
+
+def load_metadata_store_config(base_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    从配置文件加载元数据存储配置
+
+    Args:
+        base_dir: 项目根目录
+
+    Returns:
+        `metadata` 配置节，加载失败时返回空字典（使用默认的json后端）
+    """
+    try:
+        from src.utils.config_loader import get_config
+        return get_config(base_dir=base_dir).get('metadata', {}) or {}
+    except Exception as e:
+        logger.warning(f"加载元数据存储配置失败，使用默认json后端: {e}")
+        return {}
+
+
+def create_metadata_store(file_path: str, lock: Optional[threading.RLock] = None,
+                          store_config: Optional[Dict[str, Any]] = None) -> JsonMetadataStore:
+    """
+    根据配置创建元数据存储后端
+
+    Args:
+        file_path: 元数据JSON文件路径
+        lock: 文件I/O锁
+        store_config: `metadata` 配置节
+
+    Returns:
+        存储后端实例
+    """
+    store_config = store_config or {}
+    backend = store_config.get('storage_backend', 'json')
+
+    if backend == 'journal':
+        journal_config = store_config.get('journal', {}) or {}
+        return JournalMetadataStore(
+            file_path,
+            lock=lock,
+            compact_threshold=journal_config.get('compact_threshold', 1000),
+            fsync=journal_config.get('fsync', True)
+        )
+
+    # sqlite后端下JSON文件只作为导出快照，按整文件方式读写
+    if backend not in ('json', 'sqlite'):
+        logger.warning(f"未知的元数据存储后端: {backend}，使用json")
+    return JsonMetadataStore(file_path, lock=lock)
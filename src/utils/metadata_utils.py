@@ -67,7 +67,7 @@ def save_metadata(
     metadata: Dict[str, Any], 
     lock: Optional[threading.RLock] = None,
     normalize_path_func: Optional[Callable[[str], str]] = None
-) -> None:
+) -> bool:
     """
     通用的元数据保存函数
     
@@ -76,6 +76,9 @@ def save_metadata(
         metadata: 要保存的元数据字典
         lock: 用于确保线程安全的锁对象，如果为None则不使用锁
         normalize_path_func: 用于标准化文件路径的函数，如果为None则不标准化路径
+        
+    Returns:
+        保存成功返回True，否则返回False
     """
     # 使用锁确保线程安全（如果提供了锁）
     if lock:
@@ -112,8 +115,10 @@ def save_metadata(
         os.chmod(file_path, 0o666)  # 所有用户可读写
         
         logger.debug(f"元数据已保存到: {file_path}")
+        return True
     except Exception as e:
         logger.error(f"保存元数据文件失败: {file_path} - {e}")
+        return False
     finally:
         # 确保在函数返回前释放锁
         if lock:
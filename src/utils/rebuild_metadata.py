@@ -14,6 +14,10 @@ print("DEBUG: rebuild_metadata.py SCRIPT HAS STARTED AND THIS PRINT IS VISIBLE")
 
 from src.utils.colored_logger import setup_colored_logging
 from src.utils.metadata_manager import MetadataManager
+from src.utils.metadata_store import load_metadata_store_config
+from src.utils.analysis_sections import (
+    read_task_sections, load_section_index, build_section_index, remove_section_index
+)
 
 # 设置日志
 setup_colored_logging()
@@ -113,34 +117,18 @@ def check_analysis_file_completeness(filepath: str, required_tasks: List[str]) -
     }
     
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # 有区块索引时只读取各任务区块，否则读取整个文件
+        task_sections = read_task_sections(filepath, required_tasks)
         
         # 检查每个必要任务是否存在且完整
         for task in required_tasks:
-            start_tag = f"<!-- AI_TASK_START: {task} -->"
-            end_tag = f"<!-- AI_TASK_END: {task} -->"
             error_tag_pattern = r"<!-- ERROR:.*?-->" # 正则表达式以匹配错误标记及其内容
-            
-            has_start_tag = start_tag in content
-            has_end_tag = end_tag in content
+            task_content = task_sections.get(task)
 
-            if not has_start_tag or not has_end_tag:
+            if task_content is None:
                 result['is_complete'] = False # 标记缺失，文件结构不完整
                 result['missing_tasks'].append(task)
             else:
-                # 标记都存在，提取任务内容
-                task_content = "" # Default to empty string
-                try:
-                    task_content_full = content.split(start_tag)[1]
-                    task_content = task_content_full.split(end_tag)[0].strip()
-                except IndexError:
-                    result['is_complete'] = False
-                    result['missing_tasks'].append(f"{task} (标记存在但无法提取内容)")
-                    # This task cannot be further processed, but other tasks might still be checked.
-                    # The overall is_complete is already False.
-                    continue # Move to the next task for checking its presence
-
                 is_error_task = bool(re.search(error_tag_pattern, task_content, re.IGNORECASE))
 
                 if is_error_task:
@@ -335,21 +323,16 @@ def deep_check_analysis_file(filepath: str, required_tasks: List[str]) -> Dict[s
     }
     
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # 有区块索引时只读取各任务区块，否则读取整个文件
+        task_sections = read_task_sections(filepath, required_tasks)
         
         # 检查每个必要任务的内容
         for task in required_tasks:
-            start_tag = f"<!-- AI_TASK_START: {task} -->"
-            end_tag = f"<!-- AI_TASK_END: {task} -->"
-            
-            if start_tag not in content or end_tag not in content:
+            task_content = task_sections.get(task)
+            if task_content is None:
                 # 任务标记不存在，由基本检查处理，这里跳过
                 continue
             
-            # 提取任务内容
-            task_content = content.split(start_tag)[1].split(end_tag)[0].strip()
-            
             # 验证任务内容
             validation_result = validate_task_content(task, task_content)
             
@@ -404,7 +387,14 @@ def rebuild_metadata(base_dir: Optional[str] = None, type: str = 'all', force_cl
     # 记录所有处理过的文件路径，用于清理无效记录
     processed_file_paths = set()
     # 初始化元数据管理器
-    metadata_manager = MetadataManager(base_dir)
+    store_config = load_metadata_store_config(base_dir)
+    sqlite_manager = None
+    if store_config.get('storage_backend') == 'sqlite':
+        # 重建在JSON元数据上进行：先从SQLite导出最新数据，重建完成后再导回
+        from src.utils.sqlite_metadata_manager import SqliteMetadataManager
+        sqlite_manager = SqliteMetadataManager(base_dir, store_config)
+        sqlite_manager.export_to_json()
+    metadata_manager = MetadataManager(base_dir, store_config)
     
     if force_clear:
         if type == 'crawler':
@@ -570,6 +560,10 @@ def rebuild_metadata(base_dir: Optional[str] = None, type: str = 'all', force_cl
                     files_to_delete.append((filepath, reason))
                     continue
                 
+                # 为没有区块索引（或索引已失效）的分析文件补建索引
+                if load_section_index(filepath) is None:
+                    build_section_index(filepath)
+                
                 # 检查分析文件是否完整
                 completeness_result = check_analysis_file_completeness(filepath, required_tasks)
                 if not completeness_result['is_complete']:
@@ -867,6 +861,7 @@ def rebuild_metadata(base_dir: Optional[str] = None, type: str = 'all', force_cl
         for filepath, reason in files_to_delete:
             try:
                 os.remove(filepath)
+                remove_section_index(filepath)
                 deleted_files_count += 1
                 log_error_red(f"已删除文件: {filepath}, 原因: {reason}")
                 
@@ -926,6 +921,13 @@ def rebuild_metadata(base_dir: Optional[str] = None, type: str = 'all', force_cl
         metadata_manager.save_crawler_metadata()
         metadata_manager.save_analysis_metadata()
     
+    if sqlite_manager:
+        sqlite_manager.import_from_json(
+            crawler=type in ('crawler', 'all'),
+            analysis=type in ('analysis', 'all')
+        )
+        logger.info(f"已将重建后的元数据同步到SQLite元数据库: {sqlite_manager.db_path}")
+    
     # 总结统计信息
     logger.info(f"重建任务总结: 处理了 {processed_files} 个文件")
     logger.info(f"成功更新: {successful_updates} 个文件")
@@ -0,0 +1,470 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基于SQLite的元数据管理器
+
+与MetadataManager提供相同的接口，但元数据按条目存储在SQLite数据库（WAL模式）中，
+并在vendor、source_type、filepath和URL上建立索引。查询和批量更新只触及相关的行，
+不需要把整个元数据加载到内存或重写整个文件。
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List, Tuple
+
+from src.utils.metadata_utils import save_metadata
+from src.utils.metadata_store import JournalMetadataStore
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteMetadataManager:
+    """SQLite元数据管理器，负责管理所有元数据（爬虫和分析）"""
+
+    def __init__(self, base_dir: Optional[str] = None, store_config: Optional[Dict[str, Any]] = None):
+        """
+        初始化SQLite元数据管理器
+
+        Args:
+            base_dir: 项目根目录，如果为None则使用默认项目根目录
+            store_config: 元数据存储配置（即配置中的 `metadata` 节）
+        """
+        if base_dir is None:
+            # 默认使用项目根目录
+            self.base_dir = os.path.abspath(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        else:
+            self.base_dir = base_dir
+
+        store_config = store_config or {}
+        sqlite_config = store_config.get('sqlite', {}) or {}
+
+        # 元数据文件路径（JSON文件作为导出快照保留，供sqlite_backup等工具使用）
+        self.metadata_dir = os.path.join(self.base_dir, 'data', 'metadata')
+        os.makedirs(self.metadata_dir, exist_ok=True)
+        self.crawler_metadata_file = os.path.join(self.metadata_dir, 'crawler_metadata.json')
+        self.analysis_metadata_file = os.path.join(self.metadata_dir, 'analysis_metadata.json')
+
+        db_path = sqlite_config.get('db_path', 'data/metadata/metadata.db')
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(self.base_dir, db_path)
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        self.cache_size_kb = int(sqlite_config.get('cache_size_kb', 16384))
+
+        # 写操作串行化，读操作使用各线程自己的连接并发执行（WAL模式下读不阻塞写）
+        self.write_lock = threading.RLock()
+        self._local = threading.local()
+
+        self._init_database()
+
+        # 首次使用时从现有JSON文件迁移
+        if sqlite_config.get('auto_migrate', True) and self._is_empty():
+            if os.path.exists(self.crawler_metadata_file) or os.path.exists(self.analysis_metadata_file):
+                logger.info("SQLite元数据库为空，从现有JSON元数据文件迁移")
+                self.import_from_json()
+
+    def _connect(self) -> sqlite3.Connection:
+        """创建新的数据库连接并设置PRAGMA"""
+        # isolation_level=None: 由_transaction显式控制事务边界
+        conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{self.cache_size_kb}')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """写事务的上下文管理器，出错时回滚"""
+        with self.write_lock:
+            conn = self._get_connection()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                yield conn
+                conn.execute('COMMIT')
+            except Exception as e:
+                conn.execute('ROLLBACK')
+                logger.error(f"元数据库写入失败: {e}")
+                raise
+
+    def _init_database(self) -> None:
+        """初始化数据库表结构和索引"""
+        with self._transaction() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS crawler_metadata (
+                    vendor TEXT NOT NULL,
+                    source_type TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    filepath TEXT,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (vendor, source_type, url)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS analysis_metadata (
+                    file_path TEXT PRIMARY KEY,
+                    vendor TEXT,
+                    source_type TEXT,
+                    data TEXT NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS analysis_tasks (
+                    file_path TEXT NOT NULL,
+                    task_name TEXT NOT NULL,
+                    success INTEGER,
+                    PRIMARY KEY (file_path, task_name),
+                    FOREIGN KEY (file_path) REFERENCES analysis_metadata(file_path) ON DELETE CASCADE
+                )
+            ''')
+
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_crawler_vendor ON crawler_metadata(vendor)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_crawler_source_type ON crawler_metadata(source_type)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_crawler_filepath ON crawler_metadata(filepath)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_crawler_url ON crawler_metadata(url)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_analysis_vendor_source ON analysis_metadata(vendor, source_type)')
+
+    def _is_empty(self) -> bool:
+        """判断数据库中是否还没有任何元数据"""
+        conn = self._get_connection()
+        crawler_row = conn.execute('SELECT 1 FROM crawler_metadata LIMIT 1').fetchone()
+        analysis_row = conn.execute('SELECT 1 FROM analysis_metadata LIMIT 1').fetchone()
+        return crawler_row is None and analysis_row is None
+
+    def _normalize_path(self, file_path: str) -> str:
+        """标准化文件路径为相对项目根目录的路径，与MetadataManager保持一致"""
+        return os.path.relpath(file_path, self.base_dir)
+
+    @staticmethod
+    def _split_raw_path(normalized_path: str) -> Tuple[Optional[str], Optional[str]]:
+        """从 data/raw/{vendor}/{source_type}/file.md 形式的路径中提取vendor和source_type"""
+        parts = normalized_path.replace('\\', '/').split('/')
+        if len(parts) >= 5 and parts[0] == 'data':
+            return parts[2], parts[3]
+        return None, None
+
+    @staticmethod
+    def _crawler_row(vendor: str, source_type: str, url: str, data: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (vendor, source_type, url, data.get('filepath'), json.dumps(data, ensure_ascii=False))
+
+    def _upsert_crawler_rows(self, conn: sqlite3.Connection, rows: List[Tuple[Any, ...]]) -> None:
+        conn.executemany('''
+            INSERT INTO crawler_metadata (vendor, source_type, url, filepath, data)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(vendor, source_type, url) DO UPDATE SET
+                filepath = excluded.filepath,
+                data = excluded.data
+        ''', rows)
+
+    def _write_analysis_entry(self, conn: sqlite3.Connection, normalized_path: str, entry: Dict[str, Any]) -> None:
+        """写入单个分析元数据条目及其任务索引"""
+        vendor, source_type = self._split_raw_path(normalized_path)
+        conn.execute('''
+            INSERT INTO analysis_metadata (file_path, vendor, source_type, data)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(file_path) DO UPDATE SET
+                vendor = excluded.vendor,
+                source_type = excluded.source_type,
+                data = excluded.data
+        ''', (normalized_path, vendor, source_type, json.dumps(entry, ensure_ascii=False)))
+
+        conn.execute('DELETE FROM analysis_tasks WHERE file_path = ?', (normalized_path,))
+        tasks = entry.get('tasks')
+        if isinstance(tasks, dict) and tasks:
+            conn.executemany(
+                'INSERT INTO analysis_tasks (file_path, task_name, success) VALUES (?, ?, ?)',
+                [
+                    (normalized_path, task_name, 1 if isinstance(task, dict) and task.get('success') else 0)
+                    for task_name, task in tasks.items()
+                ]
+            )
+
+    def save_crawler_metadata(self, vendor: Optional[str] = None, source_type: Optional[str] = None) -> None:
+        """
+        导出爬虫元数据到JSON文件
+
+        条目在更新时已经提交到数据库，这里只刷新JSON快照，供仍直接读取JSON文件的工具使用
+        """
+        save_metadata(self.crawler_metadata_file, self.get_all_crawler_metadata())
+
+    def save_analysis_metadata(self) -> None:
+        """导出分析元数据到JSON文件"""
+        save_metadata(self.analysis_metadata_file, self.get_all_analysis_metadata())
+
+    def export_to_json(self) -> None:
+        """将数据库中的全部元数据导出为JSON文件"""
+        self.save_crawler_metadata()
+        self.save_analysis_metadata()
+
+    def get_crawler_metadata(self, vendor: str, source_type: str) -> Dict[str, Dict[str, Any]]:
+        """
+        获取指定厂商和源类型的爬虫元数据
+
+        Args:
+            vendor: 厂商名称
+            source_type: 源类型
+
+        Returns:
+            爬虫元数据字典
+        """
+        rows = self._get_connection().execute(
+            'SELECT url, data FROM crawler_metadata WHERE vendor = ? AND source_type = ?',
+            (vendor, source_type)
+        ).fetchall()
+        return {row['url']: json.loads(row['data']) for row in rows}
+
+    def update_crawler_metadata(self, vendor: str, source_type: str, metadata: Dict[str, Dict[str, Any]]) -> None:
+        """
+        更新指定厂商和源类型的整个爬虫元数据字典
+
+        Args:
+            vendor: 厂商名称
+            source_type: 源类型
+            metadata: 元数据字典
+        """
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM crawler_metadata WHERE vendor = ? AND source_type = ?', (vendor, source_type))
+            self._upsert_crawler_rows(
+                conn, [self._crawler_row(vendor, source_type, url, data) for url, data in metadata.items()]
+            )
+
+    def update_crawler_metadata_entry(self, vendor: str, source_type: str, url: str, data: Dict[str, Any], batch: bool = False) -> None:
+        """
+        更新指定URL的爬虫元数据
+
+        单行写入代价很低，因此batch参数只为兼容MetadataManager的接口而保留，写入总是立即提交
+
+        Args:
+            vendor: 厂商名称
+            source_type: 源类型
+            url: 文章URL
+            data: 元数据
+            batch: 是否为批量更新
+        """
+        with self._transaction() as conn:
+            self._upsert_crawler_rows(conn, [self._crawler_row(vendor, source_type, url, data)])
+
+    def update_crawler_metadata_entries_batch(self, vendor: str, source_type: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        """
+        在一个事务中批量更新多个URL的爬虫元数据
+
+        Args:
+            vendor: 厂商名称
+            source_type: 源类型
+            entries: 元数据字典，键为URL，值为元数据
+        """
+        if not entries:
+            return
+
+        with self._transaction() as conn:
+            self._upsert_crawler_rows(
+                conn, [self._crawler_row(vendor, source_type, url, data) for url, data in entries.items()]
+            )
+        logger.info(f"批量更新了 {len(entries)} 个URL的元数据")
+
+    def get_analysis_metadata(self, file_path: str) -> Dict[str, Any]:
+        """
+        获取指定文件的分析元数据
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            分析元数据字典
+        """
+        row = self._get_connection().execute(
+            'SELECT data FROM analysis_metadata WHERE file_path = ?',
+            (self._normalize_path(file_path),)
+        ).fetchone()
+        return json.loads(row['data']) if row else {}
+
+    def update_analysis_metadata(self, file_path: str, data: Dict[str, Any]) -> None:
+        """
+        更新分析元数据，与MetadataManager一样按顶层字段合并
+
+        Args:
+            file_path: 文件路径
+            data: 元数据
+        """
+        normalized_path = self._normalize_path(file_path)
+        with self._transaction() as conn:
+            row = conn.execute(
+                'SELECT data FROM analysis_metadata WHERE file_path = ?', (normalized_path,)
+            ).fetchone()
+            entry = json.loads(row['data']) if row else {}
+            entry.update(data)
+            self._write_analysis_entry(conn, normalized_path, entry)
+
+    def get_all_crawler_metadata(self) -> Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]:
+        """
+        获取所有爬虫元数据
+
+        Returns:
+            所有爬虫元数据，结构与crawler_metadata.json一致
+        """
+        result: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {}
+        rows = self._get_connection().execute(
+            'SELECT vendor, source_type, url, data FROM crawler_metadata ORDER BY vendor, source_type'
+        )
+        for row in rows:
+            result.setdefault(row['vendor'], {}).setdefault(row['source_type'], {})[row['url']] = json.loads(row['data'])
+        return result
+
+    def get_all_analysis_metadata(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取所有分析元数据
+
+        Returns:
+            所有分析元数据，结构与analysis_metadata.json一致
+        """
+        rows = self._get_connection().execute('SELECT file_path, data FROM analysis_metadata')
+        return {row['file_path']: json.loads(row['data']) for row in rows}
+
+    def get_crawler_metadata_by_filepath(self, file_path: str) -> Dict[str, Any]:
+        """
+        根据文件路径获取爬虫元数据，使用filepath索引查找
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            爬虫元数据
+        """
+        row = self._get_connection().execute(
+            'SELECT vendor, source_type, url, data FROM crawler_metadata WHERE filepath = ? LIMIT 1',
+            (file_path,)
+        ).fetchone()
+        if not row:
+            return {}
+
+        metadata = json.loads(row['data'])
+        return {
+            'url': row['url'],
+            'title': metadata.get('title', ''),
+            'crawl_time': metadata.get('crawl_time', ''),
+            'vendor': row['vendor'],
+            'source_type': row['source_type']
+        }
+
+    def get_files_by_vendor_and_type(self, vendor: str, source_type: str) -> List[str]:
+        """
+        获取指定厂商和源类型的所有文件路径
+
+        Args:
+            vendor: 厂商名称
+            source_type: 源类型
+
+        Returns:
+            文件路径列表
+        """
+        rows = self._get_connection().execute(
+            'SELECT filepath FROM crawler_metadata WHERE vendor = ? AND source_type = ? AND filepath IS NOT NULL',
+            (vendor, source_type)
+        ).fetchall()
+        return [row['filepath'] for row in rows]
+
+    def check_analysis_tasks(self, file_path: str, tasks: Optional[List[str]] = None) -> bool:
+        """
+        检查文件的分析任务是否全部完成（任务有记录即视为完成，与MetadataManager一致）
+
+        Args:
+            file_path: 文件路径
+            tasks: 任务列表，如果为None则检查所有任务
+
+        Returns:
+            True如果所有任务都已完成，否则False
+        """
+        normalized_path = self._normalize_path(file_path)
+        conn = self._get_connection()
+
+        if not tasks:
+            row = conn.execute(
+                'SELECT 1 FROM analysis_tasks WHERE file_path = ? LIMIT 1', (normalized_path,)
+            ).fetchone()
+            return row is not None
+
+        wanted = list(set(tasks))
+        placeholders = ','.join('?' * len(wanted))
+        row = conn.execute(
+            f'SELECT COUNT(*) AS done FROM analysis_tasks WHERE file_path = ? AND task_name IN ({placeholders})',
+            [normalized_path] + wanted
+        ).fetchone()
+        return row['done'] == len(wanted)
+
+    def import_crawler_metadata(self, metadata: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]) -> int:
+        """
+        用完整的爬虫元数据字典替换数据库中的爬虫元数据
+
+        Args:
+            metadata: 结构与crawler_metadata.json一致的字典
+
+        Returns:
+            导入的条目数
+        """
+        rows = [
+            self._crawler_row(vendor, source_type, url, data)
+            for vendor, vendor_data in metadata.items() if isinstance(vendor_data, dict)
+            for source_type, source_data in vendor_data.items() if isinstance(source_data, dict)
+            for url, data in source_data.items() if isinstance(data, dict)
+        ]
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM crawler_metadata')
+            self._upsert_crawler_rows(conn, rows)
+        return len(rows)
+
+    def import_analysis_metadata(self, metadata: Dict[str, Dict[str, Any]]) -> int:
+        """
+        用完整的分析元数据字典替换数据库中的分析元数据
+
+        Args:
+            metadata: 结构与analysis_metadata.json一致的字典
+
+        Returns:
+            导入的条目数
+        """
+        count = 0
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM analysis_tasks')
+            conn.execute('DELETE FROM analysis_metadata')
+            for file_path, entry in metadata.items():
+                if isinstance(entry, dict):
+                    self._write_analysis_entry(conn, file_path, entry)
+                    count += 1
+        return count
+
+    def import_from_json(self, crawler: bool = True, analysis: bool = True) -> Dict[str, int]:
+        """
+        从现有的JSON元数据文件一次性迁移到数据库（未压缩的journal日志也会被重放）
+
+        Args:
+            crawler: 是否迁移爬虫元数据
+            analysis: 是否迁移分析元数据
+
+        Returns:
+            各类元数据导入的条目数
+        """
+        counts = {'crawler': 0, 'analysis': 0}
+        if crawler:
+            data = JournalMetadataStore(self.crawler_metadata_file).load()
+            counts['crawler'] = self.import_crawler_metadata(data)
+            logger.info(f"已从 {self.crawler_metadata_file} 导入 {counts['crawler']} 条爬虫元数据")
+        if analysis:
+            data = JournalMetadataStore(self.analysis_metadata_file).load()
+            counts['analysis'] = self.import_analysis_metadata(data)
+            logger.info(f"已从 {self.analysis_metadata_file} 导入 {counts['analysis']} 条分析元数据")
+        return counts
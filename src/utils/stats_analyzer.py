@@ -6,7 +6,7 @@ import json
 import glob
 from datetime import datetime
 from collections import defaultdict
-from src.utils.metadata_manager import MetadataManager
+from src.utils.metadata_manager import create_metadata_manager
 
 class StatsAnalyzer:
     """统计分析器，用于分析元数据和文件统计信息"""
@@ -20,7 +20,7 @@ class StatsAnalyzer:
             self.base_dir = base_dir
         
         # 初始化数据
-        self.metadata_manager = MetadataManager(base_dir)
+        self.metadata_manager = create_metadata_manager(base_dir)
         self.all_metadata = {}
         self.crawler_metadata = {}
         self.analysis_metadata = self.metadata_manager.get_all_analysis_metadata()
@@ -0,0 +1,577 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+竞争分析Web服务器 - 文档目录缓存
+
+在内存中维护 data/raw 与 data/analysis 下所有文档的目录信息（标题、翻译标题、
+日期、大小、是否有分析版本等），按mtime增量更新。厂商页、首页时间线、
+本周/今日/近期更新、搜索等视图都从这里查询，不再在每个请求中遍历目录、
+解析文档头部和读取整个分析文件。
+"""
+
+import os
+import re
+import time
+import bisect
+import logging
+import threading
+from stat import S_ISREG
+from dataclasses import dataclass
+from datetime import datetime, date
+from typing import Dict, List, Any, Optional, Tuple
+
+# 文档页面的URL前缀（后接 vendor/doc_type/filename）
+RAW_PAGE_PREFIX = '/document/'
+ANALYSIS_PAGE_PREFIX = '/analysis/document/'
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """文档目录条目"""
+    vendor: str
+    doc_type: str
+    filename: str
+    # 原始文档信息（has_raw为False时无效）
+    has_raw: bool = False
+    raw_mtime: float = 0.0
+    raw_size: int = 0
+    raw_title: str = ""
+    raw_date: str = ""
+    # AI分析文档信息（has_analysis为False时无效）
+    has_analysis: bool = False
+    analysis_mtime: float = 0.0
+    analysis_size: int = 0
+    analysis_title: str = ""
+    analysis_date: str = ""
+    translated_title: str = ""
+    # 由raw_date解析出的日期，无法解析时为None
+    doc_date: Optional[date] = None
+    # 用于排序的标准化日期字符串（YYYY-MM-DD）
+    sort_date: str = "1970-01-01"
+
+    @property
+    def key(self) -> str:
+        """文档键: vendor/doc_type/filename"""
+        return f"{self.vendor}/{self.doc_type}/{self.filename}"
+
+    @property
+    def display_title(self) -> str:
+        """时间线展示标题：优先使用翻译标题"""
+        return self.translated_title or self.raw_title
+
+    @property
+    def analysis_page_title(self) -> str:
+        """AI分析文档页面标题，与 DocumentManager.get_analysis_document 一致"""
+        return self.translated_title or f"AI分析: {self.analysis_title}"
+
+    def to_update_row(self) -> Dict[str, Any]:
+        """转换为首页时间线/本周/今日更新使用的行"""
+        return {
+            'filename': self.filename,
+            'path': self.key,
+            'title': self.display_title,
+            'original_title': self.raw_title,
+            'translated_title': self.translated_title,
+            'date': self.raw_date,
+            'doc_type': self.doc_type,
+            'vendor': self.vendor,
+            'size': self.raw_size
+        }
+
+    def to_raw_row(self) -> Dict[str, Any]:
+        """转换为厂商原始文档列表使用的行"""
+        return {
+            'filename': self.filename,
+            'path': self.key,
+            'title': self.raw_title,
+            'date': self.raw_date,
+            'size': self.raw_size,
+            'has_analysis': self.has_analysis,
+            'source_type': self.doc_type.upper()
+        }
+
+    def to_analysis_row(self) -> Dict[str, Any]:
+        """转换为厂商AI分析文档列表使用的行"""
+        return {
+            'filename': self.filename,
+            'path': self.key,
+            'title': self.translated_title or self.analysis_title,
+            'date': self.analysis_date,
+            'size': self.analysis_size,
+            'has_raw': self.has_raw,
+            'source_type': self.doc_type.upper()
+        }
+
+
+def parse_doc_date(date_str: str) -> Optional[date]:
+    """
+    解析文档日期，规则与各更新视图一致：支持 YYYY-MM-DD 与 YYYY_MM_DD
+
+    Args:
+        date_str: 日期字符串
+
+    Returns:
+        日期，无法解析时返回None
+    """
+    if not date_str:
+        return None
+    try:
+        if re.match(r'\d{4}-\d{1,2}-\d{1,2}', date_str):
+            return datetime.strptime(date_str, '%Y-%m-%d').date()
+        if re.match(r'\d{4}_\d{1,2}_\d{1,2}', date_str):
+            return datetime.strptime(date_str, '%Y_%m_%d').date()
+    except (ValueError, TypeError):
+        return None
+    return None
+
+
+def normalize_sort_date(date_str: str) -> str:
+    """
+    生成用于排序的标准化日期字符串
+
+    Args:
+        date_str: 日期字符串
+
+    Returns:
+        标准化后的日期字符串
+    """
+    if not date_str:
+        return '1970-01-01'
+
+    # 处理华为月度格式：YYYY-MM -> YYYY-MM-01
+    if re.match(r'^\d{4}-\d{1,2}$', date_str):
+        year, month = date_str.split('-')
+        return f"{year}-{month.zfill(2)}-01"
+
+    # 处理下划线格式：YYYY_MM_DD -> YYYY-MM-DD
+    if re.match(r'^\d{4}_\d{1,2}_\d{1,2}$', date_str):
+        return date_str.replace('_', '-')
+
+    return date_str
+
+
+class TimelineIndex:
+    """
+    时间线二级索引
+
+    将同时有原始文档和AI分析、且日期可解析的条目按日期分桶，日期升序保存，
+    每个桶内按厂商分组保存预先构建好的更新行。"最近N个日期"、"本周"、"今日"、
+    "最近K天"等视图都转换为对有序日期列表的区间查询。索引构建后只读。
+    """
+
+    def __init__(self, entries):
+        """
+        构建时间线索引
+
+        Args:
+            entries: 目录条目序列（不满足时间线条件的条目会被忽略）
+        """
+        buckets: Dict[date, Dict[str, List[CatalogEntry]]] = {}
+        for entry in entries:
+            if entry.has_raw and entry.has_analysis and entry.doc_date is not None:
+                buckets.setdefault(entry.doc_date, {}).setdefault(entry.vendor, []).append(entry)
+
+        # 升序日期列表，供bisect区间查询
+        self.dates: List[date] = sorted(buckets)
+        # 日期 -> 厂商 -> 更新行列表
+        self._rows: Dict[date, Dict[str, List[Dict[str, Any]]]] = {}
+        self.size = 0
+        for doc_date, vendors in buckets.items():
+            self._rows[doc_date] = {
+                vendor: [entry.to_update_row() for entry in sorted(vendor_entries, key=lambda e: e.key)]
+                for vendor, vendor_entries in sorted(vendors.items())
+            }
+            self.size += sum(len(vendor_entries) for vendor_entries in vendors.values())
+
+    def latest(self, n: int) -> List[Dict[str, Any]]:
+        """
+        获取最近n个有更新的日期下的所有更新，按日期降序排列
+
+        Args:
+            n: 日期个数
+
+        Returns:
+            更新行列表
+        """
+        result = []
+        for doc_date in reversed(self.dates[-n:] if n > 0 else []):
+            for rows in self._rows[doc_date].values():
+                result.extend(rows)
+        return result
+
+    def range(self, start: date, end: date) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        获取日期区间内按厂商分组的更新，每个厂商内按日期降序排列
+
+        Args:
+            start: 起始日期（包含）
+            end: 结束日期（包含）
+
+        Returns:
+            厂商到更新行列表的映射
+        """
+        lo = bisect.bisect_left(self.dates, start)
+        hi = bisect.bisect_right(self.dates, end)
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        for doc_date in reversed(self.dates[lo:hi]):
+            for vendor, rows in self._rows[doc_date].items():
+                result.setdefault(vendor, []).extend(rows)
+        return result
+
+
+class DocumentCatalog:
+    """文档目录缓存类"""
+
+    # 未订阅文件变更通知时，两次全量mtime检查之间的最小间隔（秒）
+    REFRESH_INTERVAL = 30
+
+    def __init__(self, raw_dir: str, analyzed_dir: str, document_manager: Any):
+        """
+        初始化文档目录缓存
+
+        Args:
+            raw_dir: 原始数据目录路径
+            analyzed_dir: 分析数据目录路径
+            document_manager: 文档管理器实例（用于解析文档头部和翻译标题）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.raw_dir = raw_dir
+        self.analyzed_dir = analyzed_dir
+        self.document_manager = document_manager
+
+        # 条目字典整体替换（写时复制），读取方拿到的引用不会被修改
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_refresh = 0.0
+        self._watched = False
+        # 每次内容变化递增，供派生视图判断缓存是否有效
+        self.version = 0
+        # 时间线索引，按版本号惰性重建
+        self._timeline_index: Optional[TimelineIndex] = None
+        self._timeline_version = -1
+        # 文档页面路径到标题的映射，按版本号惰性重建
+        self._title_map: Dict[str, str] = {}
+        self._title_map_version = -1
+
+        self.logger.info("文档目录缓存初始化完成")
+
+    # ---------- 查询 ----------
+
+    def get_entries(self) -> Dict[str, CatalogEntry]:
+        """
+        获取全部目录条目
+
+        Returns:
+            文档键到条目的映射（只读）
+        """
+        self._ensure_fresh()
+        return self._entries
+
+    def get_entry(self, vendor: str, doc_type: str, filename: str) -> Optional[CatalogEntry]:
+        """
+        获取单个文档条目，会重新检查该文档的mtime
+
+        Args:
+            vendor: 厂商名称
+            doc_type: 文档类型
+            filename: 文件名
+
+        Returns:
+            目录条目，文档不存在时返回None
+        """
+        self._ensure_fresh()
+        return self._refresh_keys([(vendor, doc_type, filename)]).get(f"{vendor}/{doc_type}/{filename}")
+
+    def get_vendor_entries(self, vendor: str) -> List[CatalogEntry]:
+        """
+        获取厂商的全部文档条目
+
+        Args:
+            vendor: 厂商名称
+
+        Returns:
+            条目列表
+        """
+        return [entry for entry in self.get_entries().values() if entry.vendor == vendor]
+
+    def get_timeline_entries(self) -> List[CatalogEntry]:
+        """
+        获取时间线视图使用的条目：同时有原始文档和AI分析、且日期可解析
+
+        Returns:
+            条目列表
+        """
+        return [entry for entry in self.get_entries().values()
+                if entry.has_raw and entry.has_analysis and entry.doc_date is not None]
+
+    def get_timeline_index(self) -> TimelineIndex:
+        """
+        获取时间线索引，目录内容变化后在下次查询时重建
+
+        Returns:
+            TimelineIndex实例（只读）
+        """
+        self._ensure_fresh()
+        # 先读版本号再读条目：条目总是先于版本号更新，构建期间的变化会在下次查询时被发现
+        version = self.version
+        index = self._timeline_index
+        if index is None or self._timeline_version != version:
+            start_time = time.time()
+            index = TimelineIndex(self._entries.values())
+            self._timeline_index = index
+            self._timeline_version = version
+            self.logger.debug(f"时间线索引重建完成，共 {index.size} 个文档、{len(index.dates)} 个日期，"
+                              f"耗时 {time.time() - start_time:.3f}秒")
+        return index
+
+    def get_page_title(self, path: str) -> Optional[str]:
+        """
+        获取文档页面路径对应的标题，供访问日志使用
+
+        已加载后只读取内存中的映射，不触发目录检查；映射中没有的文档页面
+        （如刚写入、尚未收到变更通知的文档）单独检查一次该文档。
+
+        Args:
+            path: 请求路径，如 /document/aws/blog/xxx.md 或 /analysis/document/aws/blog/xxx.md
+
+        Returns:
+            文档标题，不是文档页面或文档不存在时返回None
+        """
+        if not self._loaded:
+            self._ensure_fresh()
+        version = self.version
+        title_map = self._title_map
+        if self._title_map_version != version:
+            title_map = self._build_title_map(self._entries)
+            self._title_map = title_map
+            self._title_map_version = version
+
+        title = title_map.get(path)
+        if title is not None:
+            return title
+
+        for prefix, is_analysis in ((ANALYSIS_PAGE_PREFIX, True), (RAW_PAGE_PREFIX, False)):
+            if path.startswith(prefix):
+                parts = path[len(prefix):].split('/', 2)
+                if len(parts) < 3:
+                    return None
+                entry = self._refresh_keys([tuple(parts)]).get('/'.join(parts))
+                if entry is None:
+                    return None
+                if is_analysis:
+                    return entry.analysis_page_title if entry.has_analysis else None
+                return entry.raw_title if entry.has_raw else None
+        return None
+
+    @staticmethod
+    def _build_title_map(entries: Dict[str, CatalogEntry]) -> Dict[str, str]:
+        """构建文档页面路径到标题的映射"""
+        title_map = {}
+        for key, entry in entries.items():
+            if entry.has_raw:
+                title_map[RAW_PAGE_PREFIX + key] = entry.raw_title
+            if entry.has_analysis:
+                title_map[ANALYSIS_PAGE_PREFIX + key] = entry.analysis_page_title
+        return title_map
+
+    # ---------- 维护 ----------
+
+    def watch(self, notifier: Any):
+        """
+        订阅文件变更通知，之后只按事件增量更新，不再定期全量检查mtime
+
+        Args:
+            notifier: FileChangeNotifier实例
+        """
+        notifier.subscribe(self.handle_file_changes)
+        self._watched = True
+
+    def handle_file_changes(self, events: List[Any]):
+        """
+        处理文件变更事件，只更新受影响的文档条目
+
+        Args:
+            events: FileChangeEvent列表
+        """
+        keys = set()
+        for event in events:
+            if event.event_type == 'rescan':
+                self.invalidate()
+                return
+            parts = event.parts
+            if event.root in ('raw', 'analysis') and len(parts) == 3:
+                keys.add(tuple(parts))
+
+        if keys and self._loaded:
+            self._refresh_keys(keys)
+
+    def invalidate(self):
+        """标记需要在下次查询时全量检查mtime"""
+        self._last_refresh = 0.0
+        self._loaded = False
+
+    def _ensure_fresh(self):
+        """首次查询时全量加载；未订阅变更通知时按间隔全量检查mtime"""
+        if self._loaded and (self._watched or time.time() - self._last_refresh < self.REFRESH_INTERVAL):
+            return
+        with self._lock:
+            if self._loaded and (self._watched or time.time() - self._last_refresh < self.REFRESH_INTERVAL):
+                return
+            self._full_refresh()
+
+    def _list_files(self, base_dir: str) -> Dict[Tuple[str, str, str], os.stat_result]:
+        """列出目录下的所有文档文件及其stat信息"""
+        result = {}
+        if not os.path.isdir(base_dir):
+            return result
+        for vendor in os.listdir(base_dir):
+            vendor_dir = os.path.join(base_dir, vendor)
+            if not os.path.isdir(vendor_dir):
+                continue
+            for doc_type in os.listdir(vendor_dir):
+                type_dir = os.path.join(vendor_dir, doc_type)
+                if not os.path.isdir(type_dir):
+                    continue
+                for filename in os.listdir(type_dir):
+                    if not filename.endswith('.md'):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(type_dir, filename))
+                    except OSError:
+                        continue
+                    if S_ISREG(stat.st_mode):
+                        result[(vendor, doc_type, filename)] = stat
+        return result
+
+    def _full_refresh(self):
+        """遍历目录，只重新解析mtime变化的文档"""
+        start_time = time.time()
+        raw_files = self._list_files(self.raw_dir)
+        analysis_files = self._list_files(self.analyzed_dir)
+
+        old_entries = self._entries
+        entries: Dict[str, CatalogEntry] = {}
+        changed = 0
+        for parts in raw_files.keys() | analysis_files.keys():
+            key = '/'.join(parts)
+            entry = self._build_entry(parts, raw_files.get(parts), analysis_files.get(parts),
+                                      old_entries.get(key))
+            if entry is not old_entries.get(key):
+                changed += 1
+            entries[key] = entry
+
+        if changed or len(entries) != len(old_entries):
+            self._entries = entries
+            self.version += 1
+        self._loaded = True
+        self._last_refresh = time.time()
+        self.logger.debug(f"文档目录刷新完成，共 {len(entries)} 个文档，更新 {changed} 个，"
+                          f"耗时 {time.time() - start_time:.2f}秒")
+
+    def _refresh_keys(self, keys) -> Dict[str, CatalogEntry]:
+        """
+        重新检查指定文档并增量更新条目
+
+        Args:
+            keys: (vendor, doc_type, filename) 序列
+
+        Returns:
+            更新后的条目字典
+        """
+        with self._lock:
+            entries = self._entries
+            updated: Dict[str, Optional[CatalogEntry]] = {}
+            for vendor, doc_type, filename in keys:
+                key = f"{vendor}/{doc_type}/{filename}"
+                raw_stat = self._stat(os.path.join(self.raw_dir, vendor, doc_type, filename))
+                analysis_stat = self._stat(os.path.join(self.analyzed_dir, vendor, doc_type, filename))
+                old_entry = entries.get(key)
+                if raw_stat is None and analysis_stat is None:
+                    if old_entry is not None:
+                        updated[key] = None
+                    continue
+                entry = self._build_entry((vendor, doc_type, filename), raw_stat, analysis_stat, old_entry)
+                if entry is not old_entry:
+                    updated[key] = entry
+
+            if updated:
+                entries = dict(entries)
+                for key, entry in updated.items():
+                    if entry is None:
+                        entries.pop(key, None)
+                    else:
+                        entries[key] = entry
+                self._entries = entries
+                self.version += 1
+            return entries
+
+    @staticmethod
+    def _stat(path: str) -> Optional[os.stat_result]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat if S_ISREG(stat.st_mode) else None
+
+    def _build_entry(self, parts: Tuple[str, str, str], raw_stat: Optional[os.stat_result],
+                     analysis_stat: Optional[os.stat_result],
+                     old_entry: Optional[CatalogEntry]) -> CatalogEntry:
+        """
+        构建文档条目，mtime未变化的部分沿用旧条目
+
+        Args:
+            parts: (vendor, doc_type, filename)
+            raw_stat: 原始文档stat，不存在时为None
+            analysis_stat: 分析文档stat，不存在时为None
+            old_entry: 旧条目
+
+        Returns:
+            新条目；完全未变化时返回旧条目本身
+        """
+        vendor, doc_type, filename = parts
+        default_title = filename.replace('.md', '')
+
+        raw_unchanged = (old_entry is not None and old_entry.has_raw == (raw_stat is not None) and
+                         (raw_stat is None or (old_entry.raw_mtime == raw_stat.st_mtime and
+                                               old_entry.raw_size == raw_stat.st_size)))
+        analysis_unchanged = (old_entry is not None and
+                              old_entry.has_analysis == (analysis_stat is not None) and
+                              (analysis_stat is None or
+                               (old_entry.analysis_mtime == analysis_stat.st_mtime and
+                                old_entry.analysis_size == analysis_stat.st_size)))
+        if raw_unchanged and analysis_unchanged:
+            return old_entry
+
+        fields: Dict[str, Any] = {}
+        if raw_unchanged:
+            for name in ('has_raw', 'raw_mtime', 'raw_size', 'raw_title', 'raw_date', 'doc_date', 'sort_date'):
+                fields[name] = getattr(old_entry, name)
+        elif raw_stat is not None:
+            meta = self.document_manager._extract_document_meta(
+                os.path.join(self.raw_dir, vendor, doc_type, filename)
+            )
+            raw_date = meta.get('date', '')
+            fields.update(
+                has_raw=True, raw_mtime=raw_stat.st_mtime, raw_size=raw_stat.st_size,
+                raw_title=meta.get('title', default_title), raw_date=raw_date,
+                doc_date=parse_doc_date(raw_date), sort_date=normalize_sort_date(raw_date)
+            )
+
+        if analysis_unchanged:
+            for name in ('has_analysis', 'analysis_mtime', 'analysis_size', 'analysis_title',
+                         'analysis_date', 'translated_title'):
+                fields[name] = getattr(old_entry, name)
+        elif analysis_stat is not None:
+            analysis_path = os.path.join(self.analyzed_dir, vendor, doc_type, filename)
+            meta = self.document_manager._extract_document_meta(analysis_path)
+            fields.update(
+                has_analysis=True, analysis_mtime=analysis_stat.st_mtime,
+                analysis_size=analysis_stat.st_size,
+                analysis_title=meta.get('title', default_title),
+                analysis_date=meta.get('date', ''),
+                translated_title=self.document_manager._extract_translated_title(analysis_path) or ""
+            )
+
+        return CatalogEntry(vendor=vendor, doc_type=doc_type, filename=filename, **fields)
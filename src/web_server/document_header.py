@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+竞争分析Web服务器 - 文档头部解析器
+
+解析文档头部的元数据（标题、发布日期、作者、类型）。针对
+BaseCrawler.save_to_markdown 写入的固定头部格式：
+
+    # 标题
+    **原始链接:** [url](url)
+    **发布时间:** 2025-04-10
+    **厂商:** AWS
+    **类型:** BLOG
+
+用一个预编译的组合模式对前20行做一次扫描即可取得标题、发布时间和类型；
+头部没有完整日期或前20行中有优先级更高的日期标记时，才回退到启发式日期模式。解析结果按 (路径, mtime, 大小) 缓存在LRU中。
+"""
+
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+# 只读取前20行，metadata应该在文件头部
+HEADER_LINES = 20
+
+# 读取头部时每次读取的字符数
+_READ_CHUNK = 4096
+
+# 单次扫描头部的组合模式：标题行，以及 save_to_markdown 在行首写入的发布时间/类型字段
+_HEADER_RE = re.compile(
+    r'^(?:#\s+(?P<title>.+)$|\*\*(?P<field>发布时间|类型)[：:]\*\*\s*(?P<value>[^\n]*))',
+    re.MULTILINE
+)
+_HEADER_FULL_DATE_RE = re.compile(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}')
+_SOURCE_TYPE_RE = re.compile(r'[A-Za-z-]+')
+_SOURCE_TYPE_ANYWHERE_RE = re.compile(r'\*\*类型[：:]\*\*\s*([A-Za-z-]+)')
+_AUTHOR_RE = re.compile(r'作者[：:]\s*(.+?)[\r\n]')
+
+_FILENAME_DATE_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})_')
+_FILENAME_MONTH_RE = re.compile(r'^(\d{4}-\d{2})\.md$')  # 华为月度格式
+_YEAR_MONTH_RE = re.compile(r'^\d{4}-\d{1,2}$')
+
+# 启发式日期模式，按优先级排列，同时支持中英文标点符号
+DATE_PATTERNS = [re.compile(pattern, re.MULTILINE) for pattern in (
+    # 常见的显式标记日期格式 - 支持中英文冒号和其他常见变体
+    r'发布于[：:]\s*(\d{4}\s*年\s*\d{1,2}\s*月\s*\d{1,2}\s*日)',  # 发布于: 2025 年 9 月 17 日
+    r'发表于[：:]\s*(\d{4}年\d{1,2}月\d{1,2}日)',  # 匹配爬虫注入的"发表于"时间
+    r'发布(?:日期|时间)[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',  # 发布日期: 2025-04-10
+    r'\*\*发布时间[：:]\*\*\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',  # **发布时间:** 2025-04-10
+    r'\*\*发布时间[：:]\*\*\s*(\d{4}年\d{1,2}月\d{1,2}日)',    # **发布时间:** 2025年4月10日
+    r'\*\*发布时间\*\*[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})', # **发布时间**: 2025-04-10
+    r'\*\*发布日期[：:]\*\*\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',  # **发布日期:** 2025-04-10
+    # 华为月度格式
+    r'\*\*发布时间[：:]\*\*\s*(\d{4}-\d{1,2})',               # **发布时间:** 2025-05
+    r'发布时间为\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',            # 发布时间为 2025-04-01
+    r'发布日期为\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',            # 发布日期为 2025-04-01
+    # 中文日期格式
+    r'(\d{4}年\d{1,2}月\d{1,2}日)',                         # 2025年4月10日
+    # 含时间的日期格式
+    r'(\d{4}[-/]\d{1,2}[-/]\d{1,2})\s+\d{1,2}[:：]\d{1,2}'   # 2025-04-10 10:30
+)]
+# 头部"**发布时间:** YYYY-MM-DD"对应上面的第4个模式，
+# 只有前3个模式都不匹配时，头部日期才是最终结果
+_HEADER_DATE_PRIORITY = 3
+_PRIORITY_GUARD_RE = re.compile('|'.join(p.pattern for p in DATE_PATTERNS[:_HEADER_DATE_PRIORITY]))
+
+
+def normalize_date(date_str: str) -> str:
+    """
+    标准化提取到的日期字符串
+
+    Args:
+        date_str: 原始日期字符串
+
+    Returns:
+        YYYY-MM-DD 格式的日期（无法识别的部分保持原样）
+    """
+    date_str = date_str.strip()
+    # 处理中文日期格式 (2025年4月10日 -> 2025-04-10 或 2025 年 9 月 17 日 -> 2025-09-17)
+    if '年' in date_str and '月' in date_str and '日' in date_str:
+        date_str = date_str.replace(' ', '')
+        date_str = date_str.replace('年', '-').replace('月', '-').replace('日', '')
+        parts = date_str.split('-')
+        if len(parts) == 3:
+            year, month, day = parts
+            date_str = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+    # 统一分隔符为横杠
+    date_str = date_str.replace('/', '-')
+    # 华为月度格式处理：如果只有年月，添加默认日期
+    if _YEAR_MONTH_RE.match(date_str):
+        date_str = f"{date_str}-01"
+    return date_str
+
+
+class DocumentHeaderParser:
+    """文档头部解析器类"""
+
+    def __init__(self, cache_size: int = 4096):
+        """
+        初始化文档头部解析器
+
+        Args:
+            cache_size: LRU缓存的最大条目数，为0时不缓存
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[int, int, Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # 走启发式回退的次数，用于观察头部格式覆盖率
+        self.fallbacks = 0
+
+    def extract(self, file_path: str) -> Dict[str, str]:
+        """
+        提取文档元数据
+
+        Args:
+            file_path: 文档路径
+
+        Returns:
+            文档元数据（调用方可自由修改返回的字典）
+
+        Raises:
+            OSError: 文件不存在或无法访问
+        """
+        stat = os.stat(file_path)
+
+        if self.cache_size > 0:
+            with self._lock:
+                cached = self._cache.get(file_path)
+                if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                    self._cache.move_to_end(file_path)
+                    self.hits += 1
+                    return dict(cached[2])
+
+        meta = self.parse(file_path, stat.st_mtime)
+
+        if self.cache_size > 0:
+            with self._lock:
+                self.misses += 1
+                self._cache[file_path] = (stat.st_mtime_ns, stat.st_size, meta)
+                self._cache.move_to_end(file_path)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return dict(meta)
+
+    def parse(self, file_path: str, mtime: float) -> Dict[str, str]:
+        """
+        解析文档头部（不使用缓存）
+
+        Args:
+            file_path: 文档路径
+            mtime: 文件修改时间，没有可用日期时作为默认日期
+
+        Returns:
+            文档元数据
+        """
+        filename = os.path.basename(file_path)
+        meta = {'title': filename.replace('.md', '').replace('_', ' '), 'date': ''}
+        date_str = None
+
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = self._read_header(f)
+
+            title = None
+            header_date = None
+            source_type = None
+            for match in _HEADER_RE.finditer(content):
+                field = match.group('field')
+                if field is None:
+                    if title is None:
+                        title = match.group('title').strip()
+                elif field == '发布时间':
+                    if header_date is None:
+                        date_match = _HEADER_FULL_DATE_RE.match(match.group('value'))
+                        if date_match:
+                            header_date = date_match.group(0)
+                elif source_type is None:
+                    type_match = _SOURCE_TYPE_RE.match(match.group('value'))
+                    if type_match:
+                        source_type = type_match.group(0)
+
+            if title is not None:
+                meta['title'] = title
+
+            # 类型字段不在行首时按全文匹配
+            if source_type is None and '类型' in content:
+                type_match = _SOURCE_TYPE_ANYWHERE_RE.search(content)
+                if type_match:
+                    source_type = type_match.group(1)
+
+            # 判断是分析文档还是原始文档
+            # 对于分析文档，如果标题没有"竞争分析摘要："前缀，则添加
+            if 'analyzed' in file_path and not meta['title'].startswith('竞争分析摘要：'):
+                meta['title'] = f"竞争分析摘要：{meta['title']}"
+
+            # 头部日期之前没有更高优先级的日期标记时直接采用，否则回退到启发式模式
+            if header_date is not None and _PRIORITY_GUARD_RE.search(content) is None:
+                date_str = normalize_date(header_date)
+            else:
+                self.fallbacks += 1
+                date_str = self._match_date_patterns(content)
+                if date_str is None:
+                    date_str = self._filename_date(filename)
+
+            # 尝试从内容中提取作者
+            if '作者' in content:
+                author_match = _AUTHOR_RE.search(content)
+                if author_match:
+                    meta['author'] = author_match.group(1).strip()
+
+            if source_type is not None:
+                meta['source_type'] = source_type.upper()
+
+        except Exception as e:
+            self.logger.error(f"提取文档元数据时出错: {e}")
+
+        # 没有可用日期时使用文件修改时间
+        meta['date'] = date_str or datetime.fromtimestamp(mtime).strftime('%Y-%m-%d')
+        return meta
+
+    @staticmethod
+    def _read_header(f) -> str:
+        """读取文件的前 HEADER_LINES 行"""
+        content = f.read(_READ_CHUNK)
+        while True:
+            parts = content.split('\n', HEADER_LINES)
+            if len(parts) > HEADER_LINES:
+                # 去掉第HEADER_LINES行之后的内容
+                return content[:len(content) - len(parts[HEADER_LINES])]
+            chunk = f.read(_READ_CHUNK)
+            if not chunk:
+                return content
+            content += chunk
+
+    def _match_date_patterns(self, content: str) -> Optional[str]:
+        """按优先级依次尝试启发式日期模式"""
+        for pattern in DATE_PATTERNS:
+            date_match = pattern.search(content)
+            if date_match:
+                date_str = normalize_date(date_match.group(1))
+                self.logger.debug(f"从内容中提取到日期: {date_str} (使用模式: {pattern.pattern})")
+                return date_str
+        return None
+
+    def _filename_date(self, filename: str) -> Optional[str]:
+        """从文件名中提取日期（如果存在）"""
+        filename_date_match = _FILENAME_DATE_RE.match(filename)
+        if filename_date_match:
+            self.logger.debug(f"从文件名中提取到日期: {filename_date_match.group(1)}")
+            return filename_date_match.group(1)
+        filename_month_match = _FILENAME_MONTH_RE.match(filename)
+        if filename_month_match:
+            # 华为月度文档：2025-05.md -> 2025-05-01 (添加默认日期)
+            date_str = f"{filename_month_match.group(1)}-01"
+            self.logger.debug(f"华为月度文档日期标准化: {filename} -> {date_str}")
+            return date_str
+        return None
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            缓存条目数、命中/未命中次数和启发式回退次数
+        """
+        with self._lock:
+            return {
+                'cache_entries': len(self._cache),
+                'cache_size': self.cache_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'fallbacks': self.fallbacks
+            }
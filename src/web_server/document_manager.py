@@ -13,7 +13,8 @@ import logging
 import markdown
 from typing import Dict, Any, Optional
 from flask import send_from_directory, abort
-from datetime import datetime
+from src.web_server.document_header import DocumentHeaderParser
+from src.utils.analysis_sections import read_translated_title
 
 class DocumentManager:
     """文档管理器类"""
@@ -29,6 +30,8 @@ class DocumentManager:
         self.logger = logging.getLogger(__name__)
         self.raw_dir = raw_dir
         self.analyzed_dir = analyzed_dir
+        # 文档头部解析器（带LRU缓存）
+        self.header_parser = DocumentHeaderParser()
         
         self.logger.info("文档管理器初始化完成")
     
@@ -148,7 +151,9 @@ class DocumentManager:
     
     def _extract_document_meta(self, file_path: str) -> Dict[str, str]:
         """
-        从文档头部提取元数据（简化版）
+        从文档头部提取元数据
+        
+        优先按爬虫写入的固定头部格式单次扫描解析，结果按 (路径, mtime, 大小) 缓存
         
         Args:
             file_path: 文档路径
@@ -156,114 +161,7 @@ class DocumentManager:
         Returns:
             文档元数据
         """
-        meta = {
-            'title': os.path.basename(file_path).replace('.md', '').replace('_', ' '),
-            'date': datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d')
-        }
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                # 只读取前20行，metadata应该在文件头部
-                lines = [f.readline() for _ in range(20)]
-                content = ''.join(lines)
-            
-            # 尝试从内容中提取标题
-            title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-            if title_match:
-                meta['title'] = title_match.group(1).strip()
-            
-            # 判断是分析文档还是原始文档
-            is_analysis = 'analyzed' in file_path
-            
-            # 对于分析文档，如果标题没有"竞争分析摘要："前缀，则添加
-            if is_analysis and not meta['title'].startswith('竞争分析摘要：'):
-                meta['title'] = f"竞争分析摘要：{meta['title']}"
-            
-            # 从文件名中提取日期（如果存在）
-            filename = os.path.basename(file_path)
-            filename_date_match = re.match(r'^(\d{4}-\d{2}-\d{2})_', filename)
-            filename_month_match = re.match(r'^(\d{4}-\d{2})\.md$', filename)  # 华为月度格式
-            
-            filename_date_fallback = None
-            if filename_date_match:
-                filename_date_fallback = filename_date_match.group(1)
-            elif filename_month_match:
-                # 华为月度文档：2025-05.md -> 2025-05-01 (添加默认日期)
-                year_month = filename_month_match.group(1)
-                filename_date_fallback = f"{year_month}-01"
-                self.logger.debug(f"华为月度文档日期标准化: {filename} -> {filename_date_fallback}")
-            
-            # 尝试从内容中提取日期 - 优先使用发布日期，而不是文件修改时间
-            # 尝试匹配多种可能的日期格式，同时支持中英文标点符号
-            date_patterns = [
-                # 常见的显式标记日期格式 - 支持中英文冒号和其他常见变体
-                r'发布于[：:]\s*(\d{4}\s*年\s*\d{1,2}\s*月\s*\d{1,2}\s*日)',  # 发布于: 2025 年 9 月 17 日
-                r'发表于[：:]\s*(\d{4}年\d{1,2}月\d{1,2}日)',  # 匹配爬虫注入的"发表于"时间
-                r'发布(?:日期|时间)[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',  # 发布日期: 2025-04-10
-                r'\*\*发布时间[：:]\*\*\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',  # **发布时间:** 2025-04-10
-                r'\*\*发布时间[：:]\*\*\s*(\d{4}年\d{1,2}月\d{1,2}日)',    # **发布时间:** 2025年4月10日
-                r'\*\*发布时间\*\*[：:]\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})', # **发布时间**: 2025-04-10
-                r'\*\*发布日期[：:]\*\*\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',  # **发布日期:** 2025-04-10
-                # 华为月度格式 - 新增专门处理
-                r'\*\*发布时间[：:]\*\*\s*(\d{4}-\d{1,2})',               # **发布时间:** 2025-05
-                r'发布时间为\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',            # 发布时间为 2025-04-01
-                r'发布日期为\s*(\d{4}[-/]\d{1,2}[-/]\d{1,2})',            # 发布日期为 2025-04-01
-                # 中文日期格式
-                r'(\d{4}年\d{1,2}月\d{1,2}日)',                         # 2025年4月10日
-                # 含时间的日期格式
-                r'(\d{4}[-/]\d{1,2}[-/]\d{1,2})\s+\d{1,2}[:：]\d{1,2}'   # 2025-04-10 10:30
-            ]
-            
-            # 日期提取标志，表示是否已成功提取日期
-            date_extracted = False
-            
-            for pattern in date_patterns:
-                date_match = re.search(pattern, content, re.MULTILINE)
-                if date_match:
-                    date_str = date_match.group(1).strip()
-                    # 处理中文日期格式 (2025年4月10日 -> 2025-04-10 或 2025 年 9 月 17 日 -> 2025-09-17)
-                    if '年' in date_str and '月' in date_str and '日' in date_str:
-                        # 移除所有空格
-                        date_str = date_str.replace(' ', '')
-                        # 替换中文字符
-                        date_str = date_str.replace('年', '-').replace('月', '-').replace('日', '')
-                        # 确保月份和日期是两位数
-                        parts = date_str.split('-')
-                        if len(parts) == 3:
-                            year, month, day = parts
-                            date_str = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-                    # 统一分隔符为横杠
-                    date_str = date_str.replace('/', '-')
-                    
-                    # 华为月度格式处理：如果只有年月，添加默认日期
-                    if re.match(r'^\d{4}-\d{1,2}$', date_str):
-                        date_str = f"{date_str}-01"
-                        self.logger.debug(f"华为月度日期标准化: {date_match.group(1)} -> {date_str}")
-                    
-                    meta['date'] = date_str
-                    date_extracted = True
-                    self.logger.debug(f"从内容中提取到日期: {date_str} (使用模式: {pattern})")
-                    break
-            
-            # 如果从内容中没有提取到日期，但从文件名中提取到了，使用文件名中的日期
-            if not date_extracted and filename_date_fallback:
-                meta['date'] = filename_date_fallback
-                self.logger.debug(f"从文件名中提取到日期: {filename_date_fallback}")
-            
-            # 尝试从内容中提取作者
-            author_match = re.search(r'作者[：:]\s*(.+?)[\r\n]', content, re.MULTILINE)
-            if author_match:
-                meta['author'] = author_match.group(1).strip()
-                
-            # 尝试从内容中提取source_type
-            source_type_match = re.search(r'\*\*类型[：:]\*\*\s*([A-Za-z-]+)', content, re.MULTILINE)
-            if source_type_match:
-                meta['source_type'] = source_type_match.group(1).strip().upper()
-        
-        except Exception as e:
-            self.logger.error(f"提取文档元数据时出错: {e}")
-        
-        return meta
+        return self.header_parser.extract(file_path)
     
     def _render_document(self, file_path: str) -> str:
         """
@@ -295,8 +193,6 @@ class DocumentManager:
         Returns:
             处理后的markdown内容
         """
-        import re
-        
         lines = content.split('\n')
         processed_lines = []
         
@@ -344,25 +240,28 @@ class DocumentManager:
             翻译后的标题，如果没有找到则返回None
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 查找AI标题翻译任务的开始和结束标记
-            start_marker = "<!-- AI_TASK_START: AI标题翻译 -->"
-            end_marker = "<!-- AI_TASK_END: AI标题翻译 -->"
-            
-            start_idx = content.find(start_marker)
-            if start_idx == -1:
-                return None
+            # 优先从区块索引中读取，不必加载整个分析文档
+            index_valid, translated_title = read_translated_title(file_path)
+            if not index_valid:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
                 
-            start_idx += len(start_marker)
-            end_idx = content.find(end_marker, start_idx)
-            
-            if end_idx == -1:
-                return None
-            
-            # 提取翻译后的标题
-            translated_title = content[start_idx:end_idx].strip()
+                # 查找AI标题翻译任务的开始和结束标记
+                start_marker = "<!-- AI_TASK_START: AI标题翻译 -->"
+                end_marker = "<!-- AI_TASK_END: AI标题翻译 -->"
+                
+                start_idx = content.find(start_marker)
+                if start_idx == -1:
+                    return None
+                    
+                start_idx += len(start_marker)
+                end_idx = content.find(end_marker, start_idx)
+                
+                if end_idx == -1:
+                    return None
+                
+                # 提取翻译后的标题
+                translated_title = content[start_idx:end_idx].strip()
             
             # 如果标题为空或只包含空白字符，返回None
             if not translated_title:
@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+竞争分析Web服务器 - 文件变更通知服务
+
+监视 data/raw 和 data/analysis 目录，把精确到文件的新增/修改/删除事件推送给
+订阅的管理器，使各管理器的缓存可以增量更新而不依赖TTL全量重扫：
+1. Linux上使用inotify（通过ctypes调用libc，无额外依赖）
+2. inotify不可用时回退为定时轮询mtime
+3. 短时间内的连续事件合并后批量分发
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Callable, Optional, Tuple
+
+# 事件类型
+EVENT_CREATED = 'created'
+EVENT_MODIFIED = 'modified'
+EVENT_DELETED = 'deleted'
+# 事件丢失（如inotify队列溢出）时通知订阅者全量刷新
+EVENT_RESCAN = 'rescan'
+
+# inotify常量（见 <sys/inotify.h>）
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE |
+               _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+@dataclass(frozen=True)
+class FileChangeEvent:
+    """文件变更事件"""
+    root: str           # 监视的根目录名称，例如 raw / analysis
+    rel_path: str       # 相对根目录的路径，例如 aws/blog/xxx.md；rescan事件为空
+    event_type: str     # created / modified / deleted / rescan
+
+    @property
+    def parts(self) -> List[str]:
+        """相对路径的各级名称"""
+        return self.rel_path.split('/') if self.rel_path else []
+
+
+class FileChangeNotifier:
+    """文件变更通知服务类"""
+
+    def __init__(self, roots: Dict[str, str], backend: str = 'auto',
+                 poll_interval: float = 5.0, debounce: float = 0.5,
+                 suffixes: Tuple[str, ...] = ('.md',)):
+        """
+        初始化文件变更通知服务
+
+        Args:
+            roots: 根目录名称到路径的映射，例如 {'raw': data/raw, 'analysis': data/analysis}
+            backend: auto / inotify / polling
+            poll_interval: 轮询模式下的扫描间隔（秒）
+            debounce: 事件合并窗口（秒），窗口内无新事件时分发
+            suffixes: 关注的文件后缀
+        """
+        self.logger = logging.getLogger(__name__)
+        self.roots = {name: os.path.abspath(path) for name, path in roots.items()}
+        self.requested_backend = backend
+        self.poll_interval = max(0.5, float(poll_interval))
+        self.debounce = max(0.0, float(debounce))
+        self.suffixes = suffixes
+        self.backend: Optional[str] = None
+
+        self._subscribers: List[Callable[[List[FileChangeEvent]], None]] = []
+        self._pending: Dict[Tuple[str, str], str] = {}
+        self._last_event_time = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # inotify状态
+        self._libc = None
+        self._fd: Optional[int] = None
+        self._watches: Dict[int, Tuple[str, str]] = {}  # wd -> (根目录名称, 相对目录)
+
+        # 轮询状态
+        self._snapshot: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    def subscribe(self, callback: Callable[[List[FileChangeEvent]], None]) -> None:
+        """
+        订阅文件变更事件
+
+        Args:
+            callback: 回调函数，参数为一批合并后的事件
+        """
+        self._subscribers.append(callback)
+
+    @property
+    def is_running(self) -> bool:
+        """服务是否正在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """启动监视线程"""
+        if self.is_running:
+            return
+
+        self.backend = 'polling'
+        if self.requested_backend in ('auto', 'inotify'):
+            if self._init_inotify():
+                self.backend = 'inotify'
+            elif self.requested_backend == 'inotify':
+                self.logger.warning("inotify不可用，回退为轮询模式")
+
+        if self.backend == 'polling':
+            self._snapshot = self._scan()
+
+        self._stop_event.clear()
+        target = self._inotify_loop if self.backend == 'inotify' else self._polling_loop
+        self._thread = threading.Thread(target=target, name='file-change-notifier', daemon=True)
+        self._thread.start()
+        self.logger.info(f"文件变更通知服务已启动，模式: {self.backend}，"
+                         f"监视目录: {', '.join(self.roots.values())}")
+
+    def stop(self) -> None:
+        """停止监视线程并释放资源"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._close_inotify()
+        self.logger.info("文件变更通知服务已停止")
+
+    # ---------- 事件收集与分发 ----------
+
+    def _is_relevant(self, name: str) -> bool:
+        """判断文件名是否需要关注（忽略临时文件和隐藏文件）"""
+        return not name.startswith('.') and name.endswith(self.suffixes)
+
+    def _add_event(self, root: str, rel_path: str, event_type: str) -> None:
+        """记录一个待分发事件，同一文件的多次事件合并为最后的状态"""
+        key = (root, rel_path)
+        previous = self._pending.get(key)
+        if previous == EVENT_CREATED and event_type == EVENT_MODIFIED:
+            event_type = EVENT_CREATED
+        self._pending[key] = event_type
+        self._last_event_time = time.monotonic()
+
+    def _flush(self, force: bool = False) -> None:
+        """合并窗口结束后把待分发事件推送给订阅者"""
+        if not self._pending:
+            return
+        if not force and time.monotonic() - self._last_event_time < self.debounce:
+            return
+
+        pending, self._pending = self._pending, {}
+        if any(event_type == EVENT_RESCAN for event_type in pending.values()):
+            events = [FileChangeEvent(root, '', EVENT_RESCAN) for root in self.roots]
+        else:
+            events = [FileChangeEvent(root, rel_path, event_type)
+                      for (root, rel_path), event_type in pending.items()]
+
+        self.logger.debug(f"分发 {len(events)} 个文件变更事件")
+        for callback in list(self._subscribers):
+            try:
+                callback(events)
+            except Exception as e:
+                self.logger.error(f"处理文件变更事件失败 ({getattr(callback, '__qualname__', callback)}): {e}")
+
+    # ---------- inotify模式 ----------
+
+    def _init_inotify(self) -> bool:
+        """初始化inotify并为所有已存在的目录添加监视"""
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        except (OSError, AttributeError) as e:
+            self.logger.info(f"无法初始化inotify: {e}")
+            return False
+
+        self._libc = libc
+        self._fd = fd
+        for root, root_path in self.roots.items():
+            if os.path.isdir(root_path):
+                self._add_watch_tree(root, '', emit_files=False)
+            else:
+                self.logger.warning(f"监视目录不存在: {root_path}")
+        return True
+
+    def _close_inotify(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+        self._watches = {}
+
+    def _add_watch(self, root: str, rel_dir: str) -> bool:
+        """为单个目录添加监视"""
+        path = os.path.join(self.roots[root], rel_dir) if rel_dir else self.roots[root]
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                self.logger.error("inotify监视数量达到上限(fs.inotify.max_user_watches)，部分目录变更将无法感知")
+            else:
+                self.logger.debug(f"添加目录监视失败 {path}: {os.strerror(err)}")
+            return False
+        self._watches[wd] = (root, rel_dir)
+        return True
+
+    def _add_watch_tree(self, root: str, rel_dir: str, emit_files: bool) -> None:
+        """
+        递归为目录树添加监视
+
+        Args:
+            root: 根目录名称
+            rel_dir: 相对目录
+            emit_files: 是否为目录中已存在的文件生成created事件（新建目录时，
+                        文件可能在监视生效前就已写入）
+        """
+        if not self._add_watch(root, rel_dir):
+            return
+        path = os.path.join(self.roots[root], rel_dir) if rel_dir else self.roots[root]
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return
+        for entry in entries:
+            child = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                self._add_watch_tree(root, child, emit_files)
+            elif emit_files and self._is_relevant(entry.name):
+                self._add_event(root, child, EVENT_CREATED)
+
+    def _inotify_loop(self) -> None:
+        """inotify事件循环"""
+        while not self._stop_event.is_set():
+            timeout = self.debounce if self._pending else 1.0
+            try:
+                readable, _, _ = select.select([self._fd], [], [], timeout)
+            except (OSError, ValueError):
+                break
+            if readable:
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    data = b''
+                except OSError as e:
+                    self.logger.error(f"读取inotify事件失败: {e}")
+                    break
+                self._handle_inotify_data(data)
+            self._flush()
+        self._flush(force=True)
+
+    def _handle_inotify_data(self, data: bytes) -> None:
+        """解析一批inotify事件"""
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                self.logger.warning("inotify事件队列溢出，通知订阅者全量刷新")
+                self._add_event('', '', EVENT_RESCAN)
+                continue
+
+            watch = self._watches.get(wd)
+            if watch is None:
+                continue
+            root, rel_dir = watch
+
+            if mask & _IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                if not rel_dir:
+                    # 根目录本身被删除或移动，无法继续精确跟踪
+                    self._add_event('', '', EVENT_RESCAN)
+                continue
+            if not name:
+                continue
+
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._add_watch_tree(root, rel_path, emit_files=True)
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    # 目录被移走时其中文件不会逐个产生事件，交给订阅者全量刷新
+                    self._add_event('', '', EVENT_RESCAN)
+                continue
+
+            if not self._is_relevant(name):
+                continue
+            if mask & (_IN_DELETE | _IN_MOVED_FROM):
+                self._add_event(root, rel_path, EVENT_DELETED)
+            elif mask & _IN_MOVED_TO:
+                self._add_event(root, rel_path, EVENT_CREATED)
+            elif mask & _IN_CLOSE_WRITE:
+                self._add_event(root, rel_path, EVENT_MODIFIED)
+            # IN_CREATE的普通文件等到IN_CLOSE_WRITE再通知，避免读到写了一半的内容
+
+    # ---------- 轮询模式 ----------
+
+    def _scan(self) -> Dict[Tuple[str, str], Tuple[int, int]]:
+        """扫描所有根目录，返回 (根目录名称, 相对路径) -> (mtime_ns, size)"""
+        result: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        for root, root_path in self.roots.items():
+            for dirpath, _dirnames, filenames in os.walk(root_path):
+                rel_dir = os.path.relpath(dirpath, root_path).replace(os.sep, '/')
+                for filename in filenames:
+                    if not self._is_relevant(filename):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(dirpath, filename))
+                    except OSError:
+                        continue
+                    rel_path = filename if rel_dir == '.' else f"{rel_dir}/{filename}"
+                    result[(root, rel_path)] = (stat.st_mtime_ns, stat.st_size)
+        return result
+
+    def _polling_loop(self) -> None:
+        """轮询事件循环：比较两次扫描结果生成事件"""
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                current = self._scan()
+            except Exception as e:
+                self.logger.error(f"扫描监视目录失败: {e}")
+                continue
+
+            previous = self._snapshot
+            for key, stamp in current.items():
+                old_stamp = previous.get(key)
+                if old_stamp is None:
+                    self._add_event(key[0], key[1], EVENT_CREATED)
+                elif old_stamp != stamp:
+                    self._add_event(key[0], key[1], EVENT_MODIFIED)
+            for key in previous.keys() - current.keys():
+                self._add_event(key[0], key[1], EVENT_DELETED)
+            self._snapshot = current
+            self._flush(force=True)
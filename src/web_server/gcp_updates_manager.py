@@ -10,6 +10,7 @@ GCP更新管理器
 import os
 import re
 import logging
+import threading
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
@@ -32,6 +33,11 @@ class GcpUpdatesManager:
         self._cache = None
         self._cache_time = None
         self._cache_ttl = 300  # 缓存5分钟
+        # 按月度文件缓存的解析结果，文件变更时只重新解析对应文件
+        self._file_updates: Dict[str, List[Dict[str, Any]]] = {}
+        self._cache_lock = threading.Lock()
+        # 订阅文件变更通知后缓存不再按TTL过期
+        self._watched = False
         
         self.logger.info("GCP更新管理器初始化完成")
     
@@ -47,14 +53,11 @@ class GcpUpdatesManager:
         """
         # 检查缓存
         if not force_refresh and self._cache is not None:
+            if self._watched:
+                return self._cache
             if self._cache_time and (datetime.now() - self._cache_time).seconds < self._cache_ttl:
                 return self._cache
         
-        # 解析所有月度文件
-        all_updates = []
-        products = set()
-        months = set()
-        
         if not os.path.exists(self.gcp_whatsnew_dir):
             self.logger.warning(f"GCP whatsnew目录不存在: {self.gcp_whatsnew_dir}")
             return {
@@ -64,17 +67,37 @@ class GcpUpdatesManager:
                 'total_count': 0
             }
         
-        # 遍历所有月度文件
+        # 解析所有月度文件
+        file_updates = {}
         for filename in sorted(os.listdir(self.gcp_whatsnew_dir), reverse=True):
             if not filename.endswith('.md'):
                 continue
             
             file_path = os.path.join(self.gcp_whatsnew_dir, filename)
             month_key = filename.replace('.md', '')
+            file_updates[month_key] = self._parse_monthly_file(file_path, month_key)
+        
+        with self._cache_lock:
+            self._file_updates = file_updates
+            result = self._aggregate_updates()
+        
+        self.logger.info(f"解析完成: {result['total_count']} 条更新, "
+                         f"{len(result['products'])} 个产品, {len(result['months'])} 个月份")
+        return result
+    
+    def _aggregate_updates(self) -> Dict[str, Any]:
+        """
+        由按文件缓存的解析结果汇总出完整数据并更新缓存
+        
+        Returns:
+            包含所有更新数据的字典
+        """
+        all_updates = []
+        products = set()
+        months = set()
+        
+        for month_key, file_updates in self._file_updates.items():
             months.add(month_key)
-            
-            # 解析文件
-            file_updates = self._parse_monthly_file(file_path, month_key)
             for update in file_updates:
                 products.add(update['product'])
                 all_updates.append(update)
@@ -93,10 +116,49 @@ class GcpUpdatesManager:
         # 更新缓存
         self._cache = result
         self._cache_time = datetime.now()
-        
-        self.logger.info(f"解析完成: {len(all_updates)} 条更新, {len(products)} 个产品, {len(months)} 个月份")
         return result
     
+    def watch(self, notifier: Any):
+        """
+        订阅文件变更通知，之后按事件增量更新缓存，不再按TTL过期
+        
+        Args:
+            notifier: FileChangeNotifier实例
+        """
+        notifier.subscribe(self.handle_file_changes)
+        self._watched = True
+    
+    def handle_file_changes(self, events: List[Any]):
+        """
+        处理文件变更事件：只重新解析发生变化的月度文件
+        
+        Args:
+            events: FileChangeEvent列表
+        """
+        changed = set()
+        for event in events:
+            if event.event_type == 'rescan':
+                self._cache = None
+                return
+            parts = event.parts
+            if event.root == 'raw' and len(parts) == 3 and parts[0] == 'gcp' and parts[1] == 'whatsnew':
+                changed.add(parts[2])
+        
+        if not changed or self._cache is None:
+            return
+        
+        with self._cache_lock:
+            for filename in changed:
+                month_key = filename.replace('.md', '')
+                file_path = os.path.join(self.gcp_whatsnew_dir, filename)
+                if os.path.isfile(file_path):
+                    self._file_updates[month_key] = self._parse_monthly_file(file_path, month_key)
+                else:
+                    self._file_updates.pop(month_key, None)
+            result = self._aggregate_updates()
+        
+        self.logger.info(f"GCP更新缓存已增量更新 {len(changed)} 个月度文件，共 {result['total_count']} 条更新")
+    
     def get_filtered_updates(self, product: Optional[str] = None, 
                              month: Optional[str] = None,
                              update_type: Optional[str] = None,
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+竞争分析Web服务器 - 页面缓存
+
+缓存文档页面渲染后的HTML，按占用字节数做LRU淘汰。缓存键包含文档文件的
+mtime和大小，文件被重新爬取或分析后自动失效，不需要显式清理。
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Hashable
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    """缓存的页面"""
+    body: bytes
+    etag: str
+    last_modified: float
+
+
+def make_etag(key: Hashable) -> str:
+    """
+    根据缓存键生成ETag
+
+    Args:
+        key: 缓存键（需包含所有影响页面内容的因素）
+
+    Returns:
+        ETag值（不含引号）
+    """
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+class PageCache:
+    """按字节数限制大小的LRU页面缓存类"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        初始化页面缓存
+
+        Args:
+            max_bytes: 缓存页面的最大总字节数，超过时淘汰最久未使用的页面
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_bytes = max_bytes
+        self._pages: "OrderedDict[Hashable, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[CachedPage]:
+        """
+        获取缓存的页面
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的页面，不存在时返回None
+        """
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, key: Hashable, page: CachedPage):
+        """
+        缓存页面，单个页面超过最大字节数时不缓存
+
+        Args:
+            key: 缓存键
+            page: 页面
+        """
+        size = len(page.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old_page = self._pages.pop(key, None)
+            if old_page is not None:
+                self.current_bytes -= len(old_page.body)
+            self._pages[key] = page
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self.current_bytes -= len(evicted.body)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._pages.clear()
+            self.current_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            缓存页面数、占用字节数和命中情况
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'pages': len(self._pages),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
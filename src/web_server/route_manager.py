@@ -10,18 +10,19 @@
 import logging
 from typing import Any, Dict, List, Optional
 from flask import Flask, render_template, abort, request, jsonify
-from flask import redirect, url_for, session, flash
-from datetime import datetime, timedelta
+from flask import redirect, url_for, session, flash, Response
+from datetime import datetime, timedelta, timezone
 import json
 import os
 from src.utils.config_loader import get_config
+from src.web_server.page_cache import PageCache, CachedPage, make_etag
 
 class RouteManager:
     """路由管理器类"""
     
     def __init__(self, app: Flask, document_manager: Any, vendor_manager: Any, 
                  admin_manager: Any, stats_manager: Any, search_manager: Any = None,
-                 gcp_updates_manager: Any = None):
+                 gcp_updates_manager: Any = None, document_catalog: Any = None):
         """
         初始化路由管理器
         
@@ -33,6 +34,7 @@ class RouteManager:
             stats_manager: 统计管理器实例
             search_manager: 搜索管理器实例
             gcp_updates_manager: GCP更新管理器实例
+            document_catalog: 文档目录缓存实例，为None时使用厂商管理器的目录缓存
         """
         self.logger = logging.getLogger(__name__)
         self.app = app
@@ -42,11 +44,18 @@ class RouteManager:
         self.stats_manager = stats_manager
         self.search_manager = search_manager
         self.gcp_updates_manager = gcp_updates_manager
+        self.document_catalog = document_catalog or vendor_manager.catalog
         
         # 从配置中读取是否启用访问日志
         config = get_config()
         self.enable_access_log = config.get('webserver', {}).get('enable_access_log', True)
         
+        # 文档页面渲染结果缓存
+        page_cache_config = config.get('webserver', {}).get('page_cache', {}) or {}
+        self.page_cache = None
+        if page_cache_config.get('enabled', True):
+            self.page_cache = PageCache(int(page_cache_config.get('max_size_mb', 64) * 1024 * 1024))
+        
         # 注册所有路由
         self._register_routes()
         
@@ -79,100 +88,13 @@ class RouteManager:
         def index():
             vendors = self.vendor_manager.get_vendors()
             
-            # 获取所有厂商的所有更新数据
-            all_updates = {}
-            if os.path.exists(self.vendor_manager.raw_dir):
-                for vendor in os.listdir(self.vendor_manager.raw_dir):
-                    vendor_dir = os.path.join(self.vendor_manager.raw_dir, vendor)
-                    
-                    if os.path.isdir(vendor_dir):
-                        vendor_updates = []
-                        
-                        # 遍历厂商的所有文档类型
-                        for doc_type in os.listdir(vendor_dir):
-                            type_dir = os.path.join(vendor_dir, doc_type)
-                            
-                            if os.path.isdir(type_dir):
-                                # 遍历此类型下的所有文件
-                                for filename in os.listdir(type_dir):
-                                    file_path = os.path.join(type_dir, filename)
-                                    
-                                    if os.path.isfile(file_path) and filename.endswith('.md'):
-                                        # 检查是否有AI分析版本
-                                        analysis_path = os.path.join(self.vendor_manager.analyzed_dir, vendor, doc_type, filename)
-                                        if not os.path.isfile(analysis_path):
-                                            continue  # 如果没有分析版本，跳过此文件
-                                        
-                                        # 提取文档信息
-                                        meta = self.document_manager._extract_document_meta(file_path)
-                                        date_str = meta.get('date', '')
-                                        
-                                        # 只获取有日期的文档
-                                        if date_str:
-                                            try:
-                                                # 处理不同的日期格式
-                                                import re
-                                                from datetime import datetime
-                                                
-                                                if re.match(r'\d{4}-\d{1,2}-\d{1,2}', date_str):
-                                                    doc_date = datetime.strptime(date_str, '%Y-%m-%d')
-                                                elif re.match(r'\d{4}_\d{1,2}_\d{1,2}', date_str):
-                                                    doc_date = datetime.strptime(date_str, '%Y_%m_%d')
-                                                else:
-                                                    continue
-                                                
-                                                # 获取分析文档的翻译标题
-                                                translated_title = self.document_manager._extract_translated_title(analysis_path)
-                                                original_title = meta.get('title', filename.replace('.md', ''))
-                                                
-                                                vendor_updates.append({
-                                                    'filename': filename,
-                                                    'path': f"{vendor}/{doc_type}/{filename}",
-                                                    'title': translated_title if translated_title else original_title,
-                                                    'original_title': original_title,
-                                                    'translated_title': translated_title,
-                                                    'date': date_str,
-                                                    'doc_type': doc_type,
-                                                    'vendor': vendor,
-                                                    'size': os.path.getsize(file_path)
-                                                })
-                                            except (ValueError, TypeError) as e:
-                                                self.logger.debug(f"解析日期出错: {date_str}, {e}")
-                        
-                        # 如果有更新，按日期排序并添加到结果中
-                        if vendor_updates:
-                            vendor_updates.sort(key=lambda x: x.get('date', ''), reverse=True)
-                            all_updates[vendor] = vendor_updates
-            
-            # 将所有厂商的更新整合成一个按日期排序的列表
-            timeline_updates = []
-            for vendor, updates in all_updates.items():
-                for update in updates:
-                    timeline_updates.append(update)
-            
-            # 按日期降序排序
-            timeline_updates.sort(key=lambda x: x.get('date', ''), reverse=True)
-            
-            # 获取最近7个有更新的日期节点
-            unique_dates = set()
-            filtered_updates = []
-            
-            for update in timeline_updates:
-                date_str = update.get('date', '')
-                if date_str and date_str not in unique_dates:
-                    unique_dates.add(date_str)
-                    # 找出这个日期的所有更新
-                    date_updates = [u for u in timeline_updates if u.get('date', '') == date_str]
-                    filtered_updates.extend(date_updates)
-                    # 如果已经有7个不同的日期，就停止
-                    if len(unique_dates) >= 7:
-                        break
+            timeline_updates = self._get_timeline_updates()
             
             return render_template(
                 'index.html',
                 title='云服务厂商竞争分析',
                 vendors=vendors,
-                timeline_updates=filtered_updates
+                timeline_updates=timeline_updates
             )
         
         # 本周更新页面 - 显示所有厂商本周的更新
@@ -299,6 +221,15 @@ class RouteManager:
                 gcp_updates=gcp_updates_data
             )
     
+    def _get_timeline_updates(self) -> List[Dict[str, Any]]:
+        """
+        获取首页时间线数据（最近7个有更新的日期下的所有已分析文档）
+        
+        Returns:
+            时间线更新列表，按日期降序排列
+        """
+        return self.document_catalog.get_timeline_index().latest(7)
+    
     def _register_gcp_updates_routes(self):
         """注册GCP更新相关路由"""
         # GCP更新浏览器页面
@@ -397,6 +328,10 @@ class RouteManager:
         # 文档页面 - 显示特定文档内容
         @self.app.route('/document/<vendor>/<doc_type>/<path:filename>', endpoint='document_page')
         def document_page(vendor, doc_type, filename):
+            return self._cached_document_view('raw', vendor, doc_type, filename, None,
+                                              lambda: render_document_page(vendor, doc_type, filename))
+        
+        def render_document_page(vendor, doc_type, filename):
             document_info = self.document_manager.get_document(vendor, doc_type, filename)
             if not document_info:
                 abort(404)
@@ -419,6 +354,10 @@ class RouteManager:
         # AI分析文档页面 - 显示特定文档的AI分析内容
         @self.app.route('/analysis/document/<vendor>/<doc_type>/<path:filename>', endpoint='analysis_document_page')
         def analysis_document_page(vendor, doc_type, filename):
+            return self._cached_document_view('analysis', vendor, doc_type, filename, None,
+                                              lambda: render_analysis_document_page(vendor, doc_type, filename))
+        
+        def render_analysis_document_page(vendor, doc_type, filename):
             analysis_info = self.document_manager.get_analysis_document(vendor, doc_type, filename)
             if not analysis_info:
                 self.logger.warning(f"请求的分析文档不存在: {vendor}/{doc_type}/{filename}")
@@ -443,6 +382,10 @@ class RouteManager:
         # 带tab参数的分析文档页面路由
         @self.app.route('/analysis/document/<vendor>/<doc_type>/<path:filename>/<tab>', endpoint='analysis_document_page_with_tab')
         def analysis_document_page_with_tab(vendor, doc_type, filename, tab):
+            return self._cached_document_view('analysis', vendor, doc_type, filename, tab,
+                                              lambda: render_analysis_document_page_with_tab(vendor, doc_type, filename, tab))
+        
+        def render_analysis_document_page_with_tab(vendor, doc_type, filename, tab):
             analysis_info = self.document_manager.get_analysis_document(vendor, doc_type, filename)
             if not analysis_info:
                 self.logger.warning(f"请求的分析文档不存在: {vendor}/{doc_type}/{filename}")
@@ -475,6 +418,85 @@ class RouteManager:
         def analysis_raw_file(vendor, doc_type, filename):
             return self.document_manager.get_analysis_raw_file(vendor, doc_type, filename)
     
+    def _document_signature(self, vendor: str, doc_type: str, filename: str):
+        """
+        获取文档原始文件和分析文件的 (mtime_ns, 大小, mtime)，文件不存在时为None
+        
+        Args:
+            vendor: 厂商名称
+            doc_type: 文档类型
+            filename: 文件名
+            
+        Returns:
+            (原始文件签名, 分析文件签名)
+        """
+        signature = []
+        for base_dir in (self.document_manager.raw_dir, self.document_manager.analyzed_dir):
+            try:
+                stat = os.stat(os.path.join(base_dir, vendor, doc_type, filename))
+                signature.append((stat.st_mtime_ns, stat.st_size, stat.st_mtime))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def _cached_document_view(self, view_type: str, vendor: str, doc_type: str, filename: str,
+                              tab: Optional[str], render_page):
+        """
+        带缓存和条件请求支持的文档页面渲染
+        
+        缓存键和ETag包含文档文件的mtime/大小、视图类型、tab、referrer和管理员登录状态等，
+        浏览器带着匹配的 If-None-Match 再次访问时直接返回304。
+        
+        Args:
+            view_type: 视图类型（raw 或 analysis）
+            vendor: 厂商名称
+            doc_type: 文档类型
+            filename: 文件名
+            tab: 分析页面的tab，没有时为None
+            render_page: 缓存未命中时渲染页面的函数
+            
+        Returns:
+            Flask响应
+        """
+        if self.page_cache is None:
+            return render_page()
+        
+        raw_signature, analysis_signature = self._document_signature(vendor, doc_type, filename)
+        primary_signature = raw_signature if view_type == 'raw' else analysis_signature
+        if primary_signature is None:
+            # 文档不存在，交给原有逻辑处理（404或重定向）
+            return render_page()
+        
+        # 页脚中的年份也来自模板上下文
+        key = (view_type, vendor, doc_type, filename, tab, request.referrer or '',
+               self.admin_manager.is_logged_in(), datetime.now().year, raw_signature, analysis_signature)
+        etag = make_etag(key)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            self._set_cache_headers(response, etag, primary_signature[2])
+            return response
+        
+        page = self.page_cache.get(key)
+        if page is None:
+            rendered = render_page()
+            if not isinstance(rendered, str):
+                return rendered
+            page = CachedPage(rendered.encode('utf-8'), etag, primary_signature[2])
+            self.page_cache.put(key, page)
+        
+        response = Response(page.body, mimetype='text/html')
+        self._set_cache_headers(response, page.etag, page.last_modified)
+        return response.make_conditional(request)
+    
+    @staticmethod
+    def _set_cache_headers(response: Response, etag: str, last_modified: float):
+        """设置文档页面的缓存校验响应头"""
+        response.set_etag(etag)
+        response.last_modified = datetime.fromtimestamp(last_modified, timezone.utc)
+        # 浏览器每次都需要校验，页面内容随登录状态变化
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Cookie')
+    
     def _register_admin_routes(self):
         """注册管理员相关路由"""
         # 统计页面 - 显示文件统计对比（需要登录）
@@ -812,59 +834,32 @@ class RouteManager:
                     )
                     return jsonify(search_results)
                 
-                # 回退到旧的标题搜索逻辑（如果搜索管理器未初始化）
+                # 回退到标题搜索逻辑（如果搜索管理器未初始化）
                 search_results = []
-                if os.path.exists(self.vendor_manager.raw_dir):
-                    for vendor in os.listdir(self.vendor_manager.raw_dir):
-                        # 如果指定了厂商过滤，则只搜索指定厂商
-                        if vendor_filter and vendor != vendor_filter:
-                            continue
-                            
-                        vendor_dir = os.path.join(self.vendor_manager.raw_dir, vendor)
-                        
-                        if os.path.isdir(vendor_dir):
-                            # 遍历厂商的所有文档类型
-                            for doc_type in os.listdir(vendor_dir):
-                                type_dir = os.path.join(vendor_dir, doc_type)
-                                
-                                if os.path.isdir(type_dir):
-                                    # 遍历此类型下的所有文件
-                                    for filename in os.listdir(type_dir):
-                                        file_path = os.path.join(type_dir, filename)
-                                        
-                                        if os.path.isfile(file_path) and filename.endswith('.md'):
-                                            # 检查是否有AI分析版本
-                                            analysis_path = os.path.join(self.vendor_manager.analyzed_dir, vendor, doc_type, filename)
-                                            
-                                            # 提取文档信息
-                                            meta = self.document_manager._extract_document_meta(file_path)
-                                            title = meta.get('title', filename.replace('.md', ''))
-                                            date_str = meta.get('date', '')
-                                            
-                                            # 获取分析文档的翻译标题
-                                            translated_title = ""
-                                            if os.path.isfile(analysis_path):
-                                                translated_title = self.document_manager._extract_translated_title(analysis_path)
-                                            
-                                            # 进行关键词匹配 - 同时匹配原始标题和翻译标题
-                                            keyword_lower = keyword.lower()
-                                            title_match = keyword_lower in title.lower()
-                                            translated_title_match = translated_title and keyword_lower in translated_title.lower()
-                                            
-                                            if title_match or translated_title_match:
-                                                search_results.append({
-                                                    'filename': filename,
-                                                    'path': f"{vendor}/{doc_type}/{filename}",
-                                                    'title': title,
-                                                    'translated_title': translated_title,
-                                                    'vendor': vendor,
-                                                    'doc_type': doc_type,
-                                                    'date': date_str,
-                                                    'has_analysis': os.path.isfile(analysis_path),
-                                                    'snippet': '',
-                                                    'match_type': 'title',
-                                                    'relevance_score': 0
-                                                })
+                keyword_lower = keyword.lower()
+                for entry in self.document_catalog.get_entries().values():
+                    # 如果指定了厂商过滤，则只搜索指定厂商
+                    if not entry.has_raw or (vendor_filter and entry.vendor != vendor_filter):
+                        continue
+                    
+                    # 进行关键词匹配 - 同时匹配原始标题和翻译标题
+                    title_match = keyword_lower in entry.raw_title.lower()
+                    translated_title_match = entry.translated_title and keyword_lower in entry.translated_title.lower()
+                    
+                    if title_match or translated_title_match:
+                        search_results.append({
+                            'filename': entry.filename,
+                            'path': entry.key,
+                            'title': entry.raw_title,
+                            'translated_title': entry.translated_title,
+                            'vendor': entry.vendor,
+                            'doc_type': entry.doc_type,
+                            'date': entry.raw_date,
+                            'has_analysis': entry.has_analysis,
+                            'snippet': '',
+                            'match_type': 'title',
+                            'relevance_score': 0
+                        })
                 
                 # 最多返回50个结果
                 return jsonify(search_results[:50])
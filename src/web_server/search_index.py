@@ -0,0 +1,585 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+竞争分析Web服务器 - 搜索倒排索引
+
+提供搜索管理器使用的分词和倒排索引：
+1. 英文/数字按词切分（复合词同时索引各组成部分），中文按单字和二元组(bigram)切分
+2. 标题和正文分字段的倒排表
+3. 支持AND/OR的多词查询与BM25排序
+4. 索引快照构建完成后不再修改，可被多个搜索线程并发读取
+5. 索引可持久化到磁盘，启动时通过mmap加载，倒排表按需解码
+"""
+
+import os
+import sys
+import json
+import math
+import mmap
+import re
+import heapq
+import struct
+import logging
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple, FrozenSet, Iterable
+
+logger = logging.getLogger(__name__)
+
+# 英文单词、数字（允许内部的点和连字符，例如 ipv6、100gbps、v2.0）
+_WORD_PATTERN = r'[a-z0-9]+(?:[.\-][a-z0-9]+)*'
+# CJK统一汉字、扩展A区和兼容汉字
+_CJK_PATTERN = r'[㐀-䶿一-鿿豈-﫿]+'
+_TOKEN_RE = re.compile(f'{_WORD_PATTERN}|{_CJK_PATTERN}')
+_CJK_RE = re.compile(_CJK_PATTERN)
+# 复合词（load-balancer、cross-region、v2.0）内部的分隔符
+_COMPOUND_SEP_RE = re.compile(r'[.\-]')
+
+# 查询中表示"或"关系的分隔符
+OR_SEPARATORS = ('or', '|', '||')
+
+
+@dataclass
+class DocumentIndex:
+    """文档索引数据类"""
+    file_path: str
+    vendor: str
+    doc_type: str
+    filename: str
+    title: str
+    translated_title: str
+    content: str
+    date: str
+    has_analysis: bool
+    last_modified: float
+    content_hash: str
+    analysis_modified: float = 0.0
+    title_terms: Dict[str, int] = field(default_factory=dict)
+    body_terms: Dict[str, int] = field(default_factory=dict)
+    title_length: int = 0
+    body_length: int = 0
+
+    @property
+    def key(self) -> str:
+        """文档键: vendor/doc_type/filename"""
+        return f"{self.vendor}/{self.doc_type}/{self.filename}"
+
+
+# 持久化时保存的文档字段（正文和词频不保存，正文按需从原文件读取）
+_PERSISTED_DOC_FIELDS = (
+    'vendor', 'doc_type', 'filename', 'title', 'translated_title', 'date',
+    'has_analysis', 'last_modified', 'analysis_modified', 'content_hash',
+    'title_length', 'body_length'
+)
+
+
+def tokenize(text: str, query: bool = False) -> List[str]:
+    """
+    将文本切分为词项
+
+    英文与数字按词切分并转小写，连续的中文字符切分为重叠的二元组。
+    索引时复合词除整词外还记录各组成部分，中文还记录每个单字，使
+    "balancer"、"region"、"云" 这类查询仍能命中包含它们的文档；
+    查询时复合词只取各组成部分，多字中文只取二元组，单字作为独立词项。
+
+    Args:
+        text: 待切分文本
+        query: 是否为查询词切分
+
+    Returns:
+        词项列表（保留重复，用于统计词频）
+    """
+    if not text:
+        return []
+
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group(0)
+        if _CJK_RE.match(token):
+            if len(token) == 1:
+                tokens.append(token)
+                continue
+            if not query:
+                tokens.extend(token)
+            tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        elif _COMPOUND_SEP_RE.search(token):
+            if not query:
+                tokens.append(token)
+            tokens.extend(_COMPOUND_SEP_RE.split(token))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def count_terms(text: str) -> Tuple[Dict[str, int], int]:
+    """
+    统计文本的词频
+
+    Args:
+        text: 文本
+
+    Returns:
+        (词频字典, 词项总数)
+    """
+    tokens = tokenize(text)
+    return dict(Counter(tokens)), len(tokens)
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """
+    解析搜索查询
+
+    以空白分隔的多个词之间为AND关系，`OR`/`|` 分隔的各组之间为OR关系。
+    例如 `负载均衡 aws OR gcp` 解析为 [[负载, 载均, 均衡, aws], [gcp]]。
+
+    Args:
+        query: 原始查询字符串
+
+    Returns:
+        OR分组列表，每组为需要同时命中的词项列表
+    """
+    groups: List[List[str]] = []
+    current: List[str] = []
+
+    for part in query.replace('|', ' | ').split():
+        if part.lower() in OR_SEPARATORS:
+            if current:
+                groups.append(current)
+            current = []
+            continue
+        for token in tokenize(part, query=True):
+            if token not in current:
+                current.append(token)
+
+    if current:
+        groups.append(current)
+    return groups
+
+
+class PersistedPostings:
+    """
+    磁盘上的倒排索引文件（通过mmap只读访问）
+
+    文件格式：
+        头部: 魔数(8字节) + 尾部偏移(uint64) + 尾部长度(uint64)
+        倒排区: 每个倒排表为小端uint32序列 [doc_id, tf, doc_id, tf, ...]
+        尾部: JSON，包含文档表和 词项 -> [标题偏移, 标题长度, 正文偏移, 正文长度]
+    """
+
+    MAGIC = b'CNSIDX01'
+    FORMAT_VERSION = 2
+    HEADER = struct.Struct('<8sQQ')
+
+    def __init__(self, path: str):
+        """
+        打开并映射索引文件
+
+        Args:
+            path: 索引文件路径
+
+        Raises:
+            ValueError: 文件格式或版本不匹配
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, footer_offset, footer_length = self.HEADER.unpack_from(self._mm, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"索引文件格式不匹配: {path}")
+
+        footer = json.loads(self._mm[footer_offset:footer_offset + footer_length].decode('utf-8'))
+        if footer.get('version') != self.FORMAT_VERSION:
+            raise ValueError(f"索引文件版本不匹配: {path}")
+
+        self.docs: List[Dict[str, Any]] = footer.get('docs', [])
+        self.terms: Dict[str, List[int]] = footer.get('terms', {})
+
+    def _decode(self, offset: int, length: int) -> Dict[int, int]:
+        """解码一个倒排表"""
+        if not length:
+            return {}
+        values = array('I')
+        values.frombytes(self._mm[offset:offset + length])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return dict(zip(values[0::2], values[1::2]))
+
+    def title_posting(self, term: str) -> Dict[int, int]:
+        """标题字段倒排表"""
+        entry = self.terms.get(term)
+        return self._decode(entry[0], entry[1]) if entry else {}
+
+    def body_posting(self, term: str) -> Dict[int, int]:
+        """正文字段倒排表"""
+        entry = self.terms.get(term)
+        return self._decode(entry[2], entry[3]) if entry else {}
+
+    @classmethod
+    def write(cls, path: str, docs: List[Dict[str, Any]],
+              postings: Iterable[Tuple[str, Dict[int, int], Dict[int, int]]]) -> None:
+        """
+        原子地写入索引文件
+
+        Args:
+            path: 索引文件路径
+            docs: 文档记录列表，下标即doc_id
+            postings: (词项, 标题倒排表, 正文倒排表) 序列
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = f"{path}.tmp"
+
+        def encode(posting: Dict[int, int]) -> bytes:
+            values = array('I')
+            for doc_id in sorted(posting):
+                values.append(doc_id)
+                values.append(posting[doc_id])
+            if sys.byteorder == 'big':
+                values.byteswap()
+            return values.tobytes()
+
+        terms: Dict[str, List[int]] = {}
+        with open(temp_path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, 0, 0))
+            offset = cls.HEADER.size
+            for term, title_posting, body_posting in postings:
+                title_bytes = encode(title_posting)
+                body_bytes = encode(body_posting)
+                f.write(title_bytes)
+                f.write(body_bytes)
+                terms[term] = [offset, len(title_bytes), offset + len(title_bytes), len(body_bytes)]
+                offset += len(title_bytes) + len(body_bytes)
+
+            footer = json.dumps(
+                {'version': cls.FORMAT_VERSION, 'docs': docs, 'terms': terms},
+                ensure_ascii=False, separators=(',', ':')
+            ).encode('utf-8')
+            f.write(footer)
+            f.seek(0)
+            f.write(cls.HEADER.pack(cls.MAGIC, offset, len(footer)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+
+class SearchIndexSnapshot:
+    """
+    不可变的倒排索引快照
+
+    快照由两部分组成：可选的磁盘索引（mmap）作为基础，加上内存中的增量倒排表。
+    文档更新时生成新快照：旧doc_id记入删除集合，新版本以新doc_id追加到增量部分，
+    未变化的部分在新旧快照间共享。搜索管理器在索引刷新时整体替换快照引用，
+    正在执行的搜索继续使用旧快照，因此搜索过程不需要持有锁。
+    """
+
+    # BM25参数
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    # 标题字段相对正文的权重
+    TITLE_WEIGHT = 3.0
+    # 标题与查询完全一致时的额外加分
+    EXACT_TITLE_BONUS = 5.0
+    # 有AI分析版本的文档加分
+    ANALYSIS_BONUS = 0.5
+
+    def __init__(self, docs: Iterable[DocumentIndex] = (), base: Optional[PersistedPostings] = None):
+        """
+        构建索引快照
+
+        Args:
+            docs: 文档序列。未指定base时按文档的title_terms/body_terms构建内存倒排表；
+                  指定base时为与磁盘索引doc_id一一对应的文档表
+            base: 磁盘索引
+        """
+        self.base = base
+        self.docs: Tuple[DocumentIndex, ...] = tuple(docs)
+        self.deleted: FrozenSet[int] = frozenset()
+        self.doc_ids: Dict[str, int] = {doc.key: doc_id for doc_id, doc in enumerate(self.docs)}
+        self.title_postings: Dict[str, Dict[int, int]] = {}
+        self.body_postings: Dict[str, Dict[int, int]] = {}
+        # 尚未写入磁盘索引的文档数（用于判断何时需要重新持久化）
+        self.pending_docs = 0
+
+        if base is None:
+            for doc_id, doc in enumerate(self.docs):
+                for term, tf in doc.title_terms.items():
+                    self.title_postings.setdefault(term, {})[doc_id] = tf
+                for term, tf in doc.body_terms.items():
+                    self.body_postings.setdefault(term, {})[doc_id] = tf
+            self.pending_docs = len(self.docs)
+
+        self._compute_stats()
+
+    def _compute_stats(self) -> None:
+        """统计有效文档数、平均字段长度和厂商文档集合"""
+        vendor_docs: Dict[str, set] = {}
+        title_total = 0
+        body_total = 0
+        for doc_id in self.doc_ids.values():
+            doc = self.docs[doc_id]
+            vendor_docs.setdefault(doc.vendor, set()).add(doc_id)
+            title_total += doc.title_length
+            body_total += doc.body_length
+
+        doc_count = len(self.doc_ids)
+        self.doc_count = doc_count
+        self.vendor_docs: Dict[str, FrozenSet[int]] = {
+            vendor: frozenset(ids) for vendor, ids in vendor_docs.items()
+        }
+        self.avg_title_length = (title_total / doc_count) if doc_count else 0.0
+        self.avg_body_length = (body_total / doc_count) if doc_count else 0.0
+
+    @classmethod
+    def load(cls, path: str, raw_dir: str) -> 'SearchIndexSnapshot':
+        """
+        从磁盘索引文件加载快照，只解析文档表和词项目录，倒排表在查询时按需解码
+
+        Args:
+            path: 索引文件路径
+            raw_dir: 原始数据目录，用于还原文档路径
+
+        Returns:
+            索引快照
+        """
+        base = PersistedPostings(path)
+        docs = []
+        for record in base.docs:
+            doc = DocumentIndex(file_path='', content='', **record)
+            doc.file_path = os.path.join(raw_dir, doc.vendor, doc.doc_type, doc.filename)
+            docs.append(doc)
+        return cls(docs, base=base)
+
+    def save(self, path: str) -> None:
+        """
+        将快照合并（去除已删除的文档并重新编号）后写入磁盘索引文件
+
+        Args:
+            path: 索引文件路径
+        """
+        live_ids = sorted(self.doc_ids.values())
+        id_map = {old_id: new_id for new_id, old_id in enumerate(live_ids)}
+        docs = [
+            {name: getattr(self.docs[old_id], name) for name in _PERSISTED_DOC_FIELDS}
+            for old_id in live_ids
+        ]
+
+        def remap(posting: Dict[int, int]) -> Dict[int, int]:
+            return {id_map[doc_id]: tf for doc_id, tf in posting.items() if doc_id in id_map}
+
+        def iter_postings():
+            for term in sorted(self.terms()):
+                title_posting = remap(self._title_posting(term))
+                body_posting = remap(self._body_posting(term))
+                if title_posting or body_posting:
+                    yield term, title_posting, body_posting
+
+        PersistedPostings.write(path, docs, iter_postings())
+
+    def terms(self) -> set:
+        """索引中的全部词项"""
+        terms = set(self.title_postings) | set(self.body_postings)
+        if self.base is not None:
+            terms.update(self.base.terms)
+        return terms
+
+    @property
+    def term_count(self) -> int:
+        """索引中的不同词项数"""
+        return len(self.terms())
+
+    @property
+    def pending_changes(self) -> int:
+        """相对磁盘索引的未持久化变更数（追加的文档 + 删除的文档）"""
+        return self.pending_docs + len(self.deleted)
+
+    def get(self, key: str) -> Optional[DocumentIndex]:
+        """按文档键获取有效文档"""
+        doc_id = self.doc_ids.get(key)
+        return self.docs[doc_id] if doc_id is not None else None
+
+    def with_changes(self, updated: Iterable[DocumentIndex] = (),
+                     removed: Iterable[str] = (),
+                     touched: Iterable[DocumentIndex] = ()) -> 'SearchIndexSnapshot':
+        """
+        基于当前快照生成包含增量变更的新快照，当前快照保持不变
+
+        Args:
+            updated: 新增或内容已变化的文档（需带有title_terms/body_terms）
+            removed: 被删除的文档键
+            touched: 内容未变、只需更新元数据（如mtime）的文档，沿用原doc_id
+
+        Returns:
+            新快照
+        """
+        snapshot = SearchIndexSnapshot.__new__(SearchIndexSnapshot)
+        snapshot.base = self.base
+        docs = list(self.docs)
+        doc_ids = dict(self.doc_ids)
+        deleted = set(self.deleted)
+        title_postings = dict(self.title_postings)
+        body_postings = dict(self.body_postings)
+        copied_title: set = set()
+        copied_body: set = set()
+
+        for doc in touched:
+            doc_id = doc_ids.get(doc.key)
+            if doc_id is not None:
+                docs[doc_id] = doc
+
+        updated = list(updated)
+        for key in list(removed) + [doc.key for doc in updated]:
+            doc_id = doc_ids.pop(key, None)
+            if doc_id is not None:
+                deleted.add(doc_id)
+
+        for doc in updated:
+            doc_id = len(docs)
+            docs.append(doc)
+            doc_ids[doc.key] = doc_id
+            # 写时复制：每个词项的倒排表在本次变更中只复制一次
+            for term, tf in doc.title_terms.items():
+                if term not in copied_title:
+                    title_postings[term] = dict(title_postings.get(term, ()))
+                    copied_title.add(term)
+                title_postings[term][doc_id] = tf
+            for term, tf in doc.body_terms.items():
+                if term not in copied_body:
+                    body_postings[term] = dict(body_postings.get(term, ()))
+                    copied_body.add(term)
+                body_postings[term][doc_id] = tf
+
+        snapshot.docs = tuple(docs)
+        snapshot.doc_ids = doc_ids
+        snapshot.deleted = frozenset(deleted)
+        snapshot.title_postings = title_postings
+        snapshot.body_postings = body_postings
+        snapshot.pending_docs = self.pending_docs + len(updated)
+        snapshot._compute_stats()
+        return snapshot
+
+    def _merge_posting(self, base_posting: Dict[int, int],
+                       delta_posting: Optional[Dict[int, int]]) -> Dict[int, int]:
+        """合并基础倒排表和增量倒排表，并过滤已删除的文档"""
+        if delta_posting:
+            posting = dict(base_posting)
+            posting.update(delta_posting)
+        else:
+            posting = base_posting
+        if self.deleted:
+            posting = {doc_id: tf for doc_id, tf in posting.items() if doc_id not in self.deleted}
+        return posting
+
+    def _title_posting(self, term: str) -> Dict[int, int]:
+        base_posting = self.base.title_posting(term) if self.base is not None else {}
+        return self._merge_posting(base_posting, self.title_postings.get(term))
+
+    def _body_posting(self, term: str) -> Dict[int, int]:
+        base_posting = self.base.body_posting(term) if self.base is not None else {}
+        return self._merge_posting(base_posting, self.body_postings.get(term))
+
+    def _idf(self, df: int) -> float:
+        """BM25的逆文档频率"""
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def _bm25(self, tf: int, length: int, avg_length: float, idf: float) -> float:
+        """BM25单词项得分"""
+        norm = 1 - self.BM25_B + self.BM25_B * (length / avg_length if avg_length else 1.0)
+        return idf * tf * (self.BM25_K1 + 1) / (tf + self.BM25_K1 * norm)
+
+    def _match_group(self, terms: List[str],
+                     term_postings: Dict[str, Tuple[Dict[int, int], Dict[int, int]]],
+                     allowed: Optional[FrozenSet[int]]) -> set:
+        """求一个AND分组命中的文档集合，从最短的倒排表开始求交集"""
+        matches = sorted(
+            (term_postings[term][0].keys() | term_postings[term][1].keys() for term in terms),
+            key=len
+        )
+        if not matches or not matches[0]:
+            return set()
+
+        result = set(matches[0])
+        if allowed is not None:
+            result &= allowed
+        for matched in matches[1:]:
+            if not result:
+                break
+            result &= matched
+        return result
+
+    def search(self, query: str, vendor_filter: str = "", search_content: bool = True,
+               max_results: int = 50) -> List[Tuple[DocumentIndex, float, bool, bool]]:
+        """
+        在快照上执行查询
+
+        Args:
+            query: 查询字符串
+            vendor_filter: 厂商过滤器（可选）
+            search_content: 是否匹配正文，为False时只匹配标题
+            max_results: 最大返回结果数
+
+        Returns:
+            [(文档, 得分, 标题是否命中, 正文是否命中)]，按得分降序
+        """
+        groups = parse_query(query)
+        if not groups or not self.doc_count:
+            return []
+
+        allowed: Optional[FrozenSet[int]] = None
+        if vendor_filter:
+            allowed = self.vendor_docs.get(vendor_filter)
+            if not allowed:
+                return []
+
+        # 每个词项的倒排表只取一次，匹配和打分共用
+        term_postings: Dict[str, Tuple[Dict[int, int], Dict[int, int]]] = {}
+        for terms in groups:
+            for term in terms:
+                if term not in term_postings:
+                    term_postings[term] = (
+                        self._title_posting(term),
+                        self._body_posting(term) if search_content else {}
+                    )
+
+        candidates: set = set()
+        for terms in groups:
+            candidates |= self._match_group(terms, term_postings, allowed)
+        if not candidates:
+            return []
+
+        query_norm = query.strip().lower()
+        weights = [
+            (title_posting, self._idf(len(title_posting)) if title_posting else 0.0,
+             body_posting, self._idf(len(body_posting)) if body_posting else 0.0)
+            for title_posting, body_posting in term_postings.values()
+        ]
+
+        scored = []
+        for doc_id in candidates:
+            doc = self.docs[doc_id]
+            score = 0.0
+            title_hit = False
+            body_hit = False
+            for title_posting, title_idf, body_posting, body_idf in weights:
+                tf = title_posting.get(doc_id)
+                if tf:
+                    title_hit = True
+                    score += self.TITLE_WEIGHT * self._bm25(
+                        tf, doc.title_length, self.avg_title_length, title_idf
+                    )
+                tf = body_posting.get(doc_id)
+                if tf:
+                    body_hit = True
+                    score += self._bm25(tf, doc.body_length, self.avg_body_length, body_idf)
+
+            if query_norm and (doc.title.lower() == query_norm or
+                               (doc.translated_title and doc.translated_title.lower() == query_norm)):
+                score += self.EXACT_TITLE_BONUS
+            if doc.has_analysis:
+                score += self.ANALYSIS_BONUS
+            scored.append((round(score, 4), doc.date or "", doc_id, title_hit, body_hit))
+
+        top = heapq.nlargest(max_results, scored, key=lambda item: (item[0], item[1]))
+        return [(self.docs[doc_id], score, title_hit, body_hit)
+                for score, _, doc_id, title_hit, body_hit in top]
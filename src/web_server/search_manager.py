@@ -5,9 +5,9 @@
 竞争分析Web服务器 - 搜索管理器
 
 负责处理全文搜索功能，包括：
-1. 文档内容全文搜索
+1. 基于倒排索引的文档全文搜索（中英文分词、AND/OR查询、BM25排序）
 2. 匹配内容摘要片段提取
-3. 搜索索引缓存机制
+3. 搜索索引缓存机制（可持久化到磁盘，重启后增量更新）
 """
 
 import os
@@ -15,10 +15,15 @@ import re
 import logging
 import hashlib
 import time
+import threading
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, field
+from dataclasses import dataclass, replace
 from threading import Lock
 
+from src.web_server.search_index import (
+    DocumentIndex, SearchIndexSnapshot, count_terms, OR_SEPARATORS
+)
+
 
 @dataclass
 class SearchResult:
@@ -36,22 +41,6 @@ class SearchResult:
     relevance_score: float = 0.0  # 相关性得分
 
 
-@dataclass
-class DocumentIndex:
-    """文档索引数据类"""
-    file_path: str
-    vendor: str
-    doc_type: str
-    filename: str
-    title: str
-    translated_title: str
-    content: str
-    date: str
-    has_analysis: bool
-    last_modified: float
-    content_hash: str
-
-
 class SearchManager:
     """搜索管理器类"""
     
@@ -63,8 +52,11 @@ class SearchManager:
     INDEX_CACHE_TTL = 300  # 5分钟
     # 最大缓存文档数
     MAX_CACHED_DOCS = 5000
+    # 未持久化的变更达到该数量时重写磁盘索引
+    INDEX_PERSIST_THRESHOLD = 200
     
-    def __init__(self, raw_dir: str, analyzed_dir: str, document_manager: Any):
+    def __init__(self, raw_dir: str, analyzed_dir: str, document_manager: Any,
+                 index_path: Optional[str] = None, document_catalog: Any = None):
         """
         初始化搜索管理器
         
@@ -72,20 +64,52 @@ class SearchManager:
             raw_dir: 原始数据目录路径
             analyzed_dir: 分析数据目录路径
             document_manager: 文档管理器实例
+            index_path: 磁盘索引文件路径，为None时索引只保存在内存中
+            document_catalog: 共享的文档目录缓存，提供标题、日期和翻译标题
         """
         self.logger = logging.getLogger(__name__)
         self.raw_dir = raw_dir
         self.analyzed_dir = analyzed_dir
         self.document_manager = document_manager
+        self.index_path = index_path
+        self.document_catalog = document_catalog
         
-        # 文档索引缓存
-        self._index_cache: Dict[str, DocumentIndex] = {}
+        # 当前生效的倒排索引快照，构建完成后整体替换
+        self._snapshot: Optional[SearchIndexSnapshot] = None
         self._index_lock = Lock()
+        # 保证同一时间只有一个线程在重建索引
+        self._build_lock = Lock()
         self._last_index_time: float = 0
         self._index_dirty = True  # 标记索引是否需要刷新
+        # 订阅文件变更通知后不再依赖TTL定期全量扫描
+        self._watched = False
+        
+        if self.index_path:
+            self._load_persisted_index()
         
         self.logger.info("搜索管理器初始化完成")
     
+    def _load_persisted_index(self):
+        """加载磁盘索引，并在后台线程中按mtime增量同步启动前发生的变更"""
+        if not os.path.exists(self.index_path):
+            return
+        
+        start_time = time.time()
+        try:
+            snapshot = SearchIndexSnapshot.load(self.index_path, self.raw_dir)
+        except Exception as e:
+            self.logger.warning(f"加载搜索索引文件失败，将重新构建: {self.index_path} - {e}")
+            return
+        
+        with self._index_lock:
+            self._snapshot = snapshot
+        self.logger.info(f"已加载搜索索引文件，共 {snapshot.doc_count} 个文档，"
+                         f"耗时 {(time.time() - start_time) * 1000:.1f}毫秒")
+        
+        # 已有快照可立即提供搜索，增量同步不阻塞首次请求
+        threading.Thread(target=self._ensure_index_fresh, name='search-index-refresh',
+                         daemon=True).start()
+    
     def search(self, keyword: str, vendor_filter: str = "", 
                search_content: bool = True, max_results: int = 50) -> List[Dict[str, Any]]:
         """
@@ -104,67 +128,120 @@ class SearchManager:
             return []
         
         keyword = keyword.strip()
-        keyword_lower = keyword.lower()
         
         # 确保索引是最新的
         self._ensure_index_fresh()
         
+        # 读取当前快照引用即可，快照本身不可变，搜索无需持有锁
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+        
+        matches = snapshot.search(
+            keyword,
+            vendor_filter=vendor_filter,
+            search_content=search_content,
+            max_results=max_results
+        )
+        
+        # 只为最终返回的结果提取摘要
+        query_words = [word for group in self._split_query_words(keyword) for word in group]
         results: List[SearchResult] = []
+        for doc_index, relevance_score, title_match, content_match in matches:
+            snippet = ""
+            if search_content:
+                snippet = self._build_snippet(doc_index, keyword, query_words)
+            if not snippet:
+                snippet = self._generate_default_snippet(self._read_document_content(doc_index))
+            
+            results.append(SearchResult(
+                filename=doc_index.filename,
+                path=f"{doc_index.vendor}/{doc_index.doc_type}/{doc_index.filename}",
+                title=doc_index.title,
+                translated_title=doc_index.translated_title,
+                vendor=doc_index.vendor,
+                doc_type=doc_index.doc_type,
+                date=doc_index.date,
+                has_analysis=doc_index.has_analysis,
+                snippet=snippet,
+                match_type=self._determine_match_type(title_match, False, content_match),
+                relevance_score=relevance_score
+            ))
+        
+        return [self._result_to_dict(r) for r in results]
+    
+    def _split_query_words(self, keyword: str) -> List[List[str]]:
+        """
+        按OR分组拆分查询中的原始词（不做分词），用于摘要定位
         
-        with self._index_lock:
-            for doc_key, doc_index in self._index_cache.items():
-                # 应用厂商过滤
-                if vendor_filter and doc_index.vendor != vendor_filter:
-                    continue
-                
-                # 检查标题匹配
-                title_match = keyword_lower in doc_index.title.lower()
-                translated_title_match = (doc_index.translated_title and 
-                                         keyword_lower in doc_index.translated_title.lower())
-                
-                # 检查内容匹配
-                content_match = False
-                snippet = ""
-                if search_content and doc_index.content:
-                    content_match, snippet = self._search_in_content(
-                        doc_index.content, keyword
-                    )
-                
-                # 计算相关性得分和匹配类型
-                if title_match or translated_title_match or content_match:
-                    match_type = self._determine_match_type(
-                        title_match, translated_title_match, content_match
-                    )
-                    relevance_score = self._calculate_relevance(
-                        keyword_lower, doc_index, title_match, 
-                        translated_title_match, content_match
-                    )
-                    
-                    # 如果只有标题匹配，尝试从内容生成摘要
-                    if not snippet and doc_index.content:
-                        snippet = self._generate_default_snippet(doc_index.content)
-                    
-                    result = SearchResult(
-                        filename=doc_index.filename,
-                        path=f"{doc_index.vendor}/{doc_index.doc_type}/{doc_index.filename}",
-                        title=doc_index.title,
-                        translated_title=doc_index.translated_title,
-                        vendor=doc_index.vendor,
-                        doc_type=doc_index.doc_type,
-                        date=doc_index.date,
-                        has_analysis=doc_index.has_analysis,
-                        snippet=snippet,
-                        match_type=match_type,
-                        relevance_score=relevance_score
-                    )
-                    results.append(result)
-        
-        # 按相关性得分排序
-        results.sort(key=lambda x: (-x.relevance_score, x.date or ""), reverse=False)
-        results.sort(key=lambda x: x.relevance_score, reverse=True)
-        
-        # 限制结果数量并转换为字典
-        return [self._result_to_dict(r) for r in results[:max_results]]
+        Args:
+            keyword: 搜索关键词
+            
+        Returns:
+            OR分组列表
+        """
+        groups: List[List[str]] = [[]]
+        for part in keyword.replace('|', ' | ').split():
+            if part.lower() in OR_SEPARATORS:
+                groups.append([])
+            else:
+                groups[-1].append(part)
+        return [group for group in groups if group]
+    
+    def _build_snippet(self, doc_index: DocumentIndex, keyword: str, query_words: List[str]) -> str:
+        """
+        为命中文档提取摘要：优先匹配完整查询，其次匹配其中的单个词；
+        原文中找不到时再尝试AI分析文档（中文查询通常命中分析内容）
+        
+        Args:
+            doc_index: 文档索引
+            keyword: 完整查询
+            query_words: 查询中的单个词
+            
+        Returns:
+            摘要片段，未找到时返回空字符串
+        """
+        candidates = [keyword] + [word for word in query_words if word != keyword]
+        content = self._read_document_content(doc_index)
+        
+        for word in candidates:
+            matched, snippet = self._search_in_content(content, word)
+            if matched:
+                return snippet
+        
+        if doc_index.has_analysis:
+            analysis_path = os.path.join(self.analyzed_dir, doc_index.vendor,
+                                         doc_index.doc_type, doc_index.filename)
+            try:
+                with open(analysis_path, 'r', encoding='utf-8') as f:
+                    analysis_content = f.read()
+            except Exception:
+                return ""
+            for word in candidates:
+                matched, snippet = self._search_in_content(analysis_content, word)
+                if matched:
+                    return snippet
+        
+        return ""
+    
+    def _read_document_content(self, doc_index: DocumentIndex) -> str:
+        """
+        获取文档原文；索引中不保存正文，只为返回的结果按需读取
+        
+        Args:
+            doc_index: 文档索引
+            
+        Returns:
+            文档内容，读取失败时返回空字符串
+        """
+        if doc_index.content:
+            return doc_index.content
+        try:
+            with open(doc_index.file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except Exception as e:
+            self.logger.debug(f"读取文档失败 {doc_index.file_path}: {e}")
+            return ""
     
     def _search_in_content(self, content: str, keyword: str) -> Tuple[bool, str]:
         """
@@ -330,49 +407,6 @@ class SearchManager:
         else:
             return "content"
     
-    def _calculate_relevance(self, keyword_lower: str, doc_index: DocumentIndex,
-                            title_match: bool, translated_title_match: bool,
-                            content_match: bool) -> float:
-        """
-        计算搜索结果的相关性得分
-        
-        得分规则：
-        - 标题完全匹配: +50
-        - 翻译标题完全匹配: +45
-        - 标题包含关键词: +30
-        - 翻译标题包含关键词: +25
-        - 内容包含关键词: +10
-        - 有AI分析版本: +5
-        """
-        score = 0.0
-        
-        # 标题匹配得分
-        if title_match:
-            if doc_index.title.lower() == keyword_lower:
-                score += 50
-            else:
-                score += 30
-        
-        if translated_title_match:
-            if doc_index.translated_title.lower() == keyword_lower:
-                score += 45
-            else:
-                score += 25
-        
-        # 内容匹配得分
-        if content_match:
-            score += 10
-            # 计算关键词在内容中出现的次数，增加得分
-            content_lower = doc_index.content.lower() if doc_index.content else ""
-            occurrences = content_lower.count(keyword_lower)
-            score += min(occurrences * 0.5, 10)  # 最多额外加10分
-        
-        # 有分析版本加分
-        if doc_index.has_analysis:
-            score += 5
-        
-        return score
-    
     def _result_to_dict(self, result: SearchResult) -> Dict[str, Any]:
         """将SearchResult转换为字典"""
         return {
@@ -394,22 +428,39 @@ class SearchManager:
         current_time = time.time()
         
         # 检查是否需要刷新索引
-        if (self._index_dirty or 
-            current_time - self._last_index_time > self.INDEX_CACHE_TTL):
-            self._build_index()
+        if not self._needs_refresh(current_time):
+            return
+        
+        # 已有快照时不阻塞搜索：其他线程正在重建则直接使用旧快照
+        if not self._build_lock.acquire(blocking=self._snapshot is None):
+            return
+        try:
+            if self._snapshot is None or self._needs_refresh(time.time()):
+                self._build_index()
+        finally:
+            self._build_lock.release()
+    
+    def _needs_refresh(self, current_time: float) -> bool:
+        """索引被标记为失效，或未订阅变更通知且超过TTL时需要刷新"""
+        if self._index_dirty:
+            return True
+        return not self._watched and current_time - self._last_index_time > self.INDEX_CACHE_TTL
     
     def _build_index(self):
-        """构建或刷新文档索引"""
-        self.logger.info("开始构建搜索索引...")
+        """构建或增量刷新文档索引：只重新索引mtime发生变化的文档"""
+        self.logger.info("开始刷新搜索索引...")
         start_time = time.time()
         
-        new_index: Dict[str, DocumentIndex] = {}
-        doc_count = 0
-        
         if not os.path.exists(self.raw_dir):
             self.logger.warning(f"原始数据目录不存在: {self.raw_dir}")
             return
         
+        snapshot = self._snapshot or SearchIndexSnapshot()
+        seen = set()
+        updated: List[DocumentIndex] = []
+        touched: List[DocumentIndex] = []
+        limit_reached = False
+        
         for vendor in os.listdir(self.raw_dir):
             vendor_dir = os.path.join(self.raw_dir, vendor)
             if not os.path.isdir(vendor_dir):
@@ -429,80 +480,271 @@ class SearchManager:
                         continue
                     
                     doc_key = f"{vendor}/{doc_type}/{filename}"
+                    cached = snapshot.get(doc_key)
                     
-                    # 检查缓存中是否有该文档且未修改
-                    last_modified = os.path.getmtime(file_path)
-                    if doc_key in self._index_cache:
-                        cached = self._index_cache[doc_key]
-                        if cached.last_modified == last_modified:
-                            new_index[doc_key] = cached
-                            doc_count += 1
-                            continue
-                    
-                    # 需要重新索引该文档
-                    try:
-                        doc_index = self._index_document(
-                            file_path, vendor, doc_type, filename, last_modified
-                        )
-                        if doc_index:
-                            new_index[doc_key] = doc_index
-                            doc_count += 1
-                    except Exception as e:
-                        self.logger.error(f"索引文档失败 {file_path}: {e}")
+                    # 限制最大缓存数，已索引的文档不受影响
+                    if cached is None and len(seen) >= self.MAX_CACHED_DOCS:
+                        limit_reached = True
+                        continue
+                    seen.add(doc_key)
                     
-                    # 限制最大缓存数
-                    if doc_count >= self.MAX_CACHED_DOCS:
-                        self.logger.warning(f"达到最大缓存文档数限制: {self.MAX_CACHED_DOCS}")
-                        break
+                    status, doc_index = self._check_document(cached, vendor, doc_type, filename)
+                    if status == 'updated':
+                        updated.append(doc_index)
+                    elif status == 'touched':
+                        touched.append(doc_index)
         
-        # 更新缓存
-        with self._index_lock:
-            self._index_cache = new_index
-            self._last_index_time = time.time()
-            self._index_dirty = False
+        if limit_reached:
+            self.logger.warning(f"达到最大缓存文档数限制: {self.MAX_CACHED_DOCS}")
+        
+        removed = [key for key in snapshot.doc_ids if key not in seen]
+        snapshot = self._apply_changes(snapshot, updated, removed, touched, force_persist=True)
         
         elapsed = time.time() - start_time
-        self.logger.info(f"搜索索引构建完成，共 {doc_count} 个文档，耗时 {elapsed:.2f}秒")
+        self.logger.info(f"搜索索引刷新完成，共 {snapshot.doc_count} 个文档"
+                         f"（新增/更新 {len(updated)}，删除 {len(removed)}），耗时 {elapsed:.2f}秒")
     
-    def _index_document(self, file_path: str, vendor: str, doc_type: str, 
-                        filename: str, last_modified: float) -> Optional[DocumentIndex]:
+    def _check_document(self, cached: Optional[DocumentIndex], vendor: str, doc_type: str,
+                        filename: str) -> Tuple[str, Optional[DocumentIndex]]:
         """
-        索引单个文档
+        检查单个文档相对索引的状态
         
         Args:
-            file_path: 文件路径
+            cached: 索引中的当前版本
             vendor: 厂商
             doc_type: 文档类型
             filename: 文件名
-            last_modified: 最后修改时间
             
         Returns:
-            文档索引对象
+            (状态, 文档)，状态为 missing / unchanged / touched / updated / error
         """
-        # 读取文件内容
+        file_path = os.path.join(self.raw_dir, vendor, doc_type, filename)
+        try:
+            last_modified = os.path.getmtime(file_path)
+        except OSError:
+            return 'missing', None
+        if not os.path.isfile(file_path):
+            return 'missing', None
+        
+        # 检查索引中是否有该文档且原文和分析文档均未修改
+        analysis_modified = self._get_analysis_mtime(vendor, doc_type, filename)
+        if (cached is not None and cached.last_modified == last_modified and
+                cached.analysis_modified == analysis_modified):
+            return 'unchanged', cached
+        
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
         except Exception as e:
             self.logger.error(f"读取文件失败 {file_path}: {e}")
-            return None
+            return 'error', None
         
-        # 计算内容哈希
+        # mtime变化但内容哈希相同（例如文件被重写），只更新mtime，不重新分词
         content_hash = hashlib.md5(content.encode('utf-8')).hexdigest()
+        if (cached is not None and cached.content_hash == content_hash and
+                cached.analysis_modified == analysis_modified):
+            return 'touched', replace(cached, last_modified=last_modified)
         
-        # 提取元数据
-        meta = self.document_manager._extract_document_meta(file_path)
-        title = meta.get('title', filename.replace('.md', ''))
-        date_str = meta.get('date', '')
+        # 需要重新索引该文档
+        try:
+            doc_index = self._index_document(
+                file_path, vendor, doc_type, filename, last_modified,
+                analysis_modified, content=content
+            )
+        except Exception as e:
+            self.logger.error(f"索引文档失败 {file_path}: {e}")
+            return 'error', None
+        return ('updated', doc_index) if doc_index else ('error', None)
+    
+    def _apply_changes(self, snapshot: SearchIndexSnapshot, updated: List[DocumentIndex],
+                       removed: List[str], touched: List[DocumentIndex],
+                       force_persist: bool = False) -> SearchIndexSnapshot:
+        """
+        生成包含变更的新快照，必要时写入磁盘，然后整体替换当前快照引用
         
-        # 检查是否有分析版本
-        analysis_path = os.path.join(self.analyzed_dir, vendor, doc_type, filename)
-        has_analysis = os.path.isfile(analysis_path)
+        Args:
+            snapshot: 基础快照
+            updated: 新增或内容变化的文档
+            removed: 删除的文档键
+            touched: 只需更新元数据的文档
+            force_persist: 全量刷新后是否立即持久化尚无磁盘索引的快照
+            
+        Returns:
+            新快照
+        """
+        if updated or removed or touched:
+            snapshot = snapshot.with_changes(updated=updated, removed=removed, touched=touched)
+        
+        # 在锁外生成新快照，必要时写入磁盘并重新映射，再整体替换引用
+        if self.index_path and ((force_persist and snapshot.base is None) or
+                                snapshot.pending_changes >= self.INDEX_PERSIST_THRESHOLD):
+            snapshot = self._persist_snapshot(snapshot)
+        
+        with self._index_lock:
+            self._snapshot = snapshot
+            if force_persist:
+                self._last_index_time = time.time()
+                self._index_dirty = False
+        return snapshot
+    
+    def watch(self, notifier: Any):
+        """
+        订阅文件变更通知，之后按事件增量更新索引，不再按TTL定期全量扫描
+        
+        Args:
+            notifier: FileChangeNotifier实例
+        """
+        notifier.subscribe(self.handle_file_changes)
+        self._watched = True
+    
+    def handle_file_changes(self, events: List[Any]):
+        """
+        处理文件变更事件：原始文档或分析文档变化时只重新索引对应的文档
+        
+        Args:
+            events: FileChangeEvent列表
+        """
+        keys = set()
+        for event in events:
+            if event.event_type == 'rescan':
+                self.invalidate_cache()
+                return
+            parts = event.parts
+            if event.root in ('raw', 'analysis') and len(parts) == 3:
+                keys.add(tuple(parts))
+        
+        if not keys:
+            return
         
-        # 获取翻译标题
-        translated_title = ""
+        with self._build_lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                # 尚未构建索引，首次搜索时会完整构建
+                return
+            
+            updated: List[DocumentIndex] = []
+            touched: List[DocumentIndex] = []
+            removed: List[str] = []
+            for vendor, doc_type, filename in keys:
+                doc_key = f"{vendor}/{doc_type}/{filename}"
+                cached = snapshot.get(doc_key)
+                if cached is None and snapshot.doc_count >= self.MAX_CACHED_DOCS:
+                    continue
+                status, doc_index = self._check_document(cached, vendor, doc_type, filename)
+                if status == 'missing' and cached is not None:
+                    removed.append(doc_key)
+                elif status == 'updated':
+                    updated.append(doc_index)
+                elif status == 'touched':
+                    touched.append(doc_index)
+            
+            if updated or removed or touched:
+                self._apply_changes(snapshot, updated, removed, touched)
+                self.logger.info(f"搜索索引已增量更新: 新增/更新 {len(updated)}，删除 {len(removed)}")
+    
+    def _persist_snapshot(self, snapshot: SearchIndexSnapshot) -> SearchIndexSnapshot:
+        """
+        将快照写入磁盘索引并重新通过mmap加载，加载后的快照不再持有增量倒排表
+        
+        Args:
+            snapshot: 待持久化的快照
+            
+        Returns:
+            基于新索引文件的快照，写入失败时返回原快照
+        """
+        try:
+            snapshot.save(self.index_path)
+            return SearchIndexSnapshot.load(self.index_path, self.raw_dir)
+        except Exception as e:
+            self.logger.error(f"保存搜索索引文件失败: {self.index_path} - {e}")
+            return snapshot
+    
+    def flush_index(self):
+        """将尚未持久化的索引变更写入磁盘（用于服务关闭时）"""
+        if not self.index_path:
+            return
+        with self._build_lock:
+            snapshot = self._snapshot
+            if snapshot is None or (snapshot.base is not None and not snapshot.pending_changes):
+                return
+            snapshot = self._persist_snapshot(snapshot)
+            with self._index_lock:
+                self._snapshot = snapshot
+        self.logger.info(f"搜索索引已写入磁盘: {self.index_path}")
+    
+    def _get_analysis_mtime(self, vendor: str, doc_type: str, filename: str) -> float:
+        """获取分析文档的修改时间，不存在时返回0"""
+        try:
+            return os.path.getmtime(os.path.join(self.analyzed_dir, vendor, doc_type, filename))
+        except OSError:
+            return 0.0
+    
+    def _index_document(self, file_path: str, vendor: str, doc_type: str, 
+                        filename: str, last_modified: float,
+                        analysis_modified: float = 0.0,
+                        content: Optional[str] = None) -> Optional[DocumentIndex]:
+        """
+        索引单个文档
+        
+        Args:
+            file_path: 文件路径
+            vendor: 厂商
+            doc_type: 文档类型
+            filename: 文件名
+            last_modified: 最后修改时间
+            analysis_modified: 分析文档的最后修改时间
+            content: 已读取的文件内容，为None时从文件读取
+            
+        Returns:
+            文档索引对象（不保存正文，正文在生成摘要时按需读取）
+        """
+        # 读取文件内容
+        if content is None:
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                self.logger.error(f"读取文件失败 {file_path}: {e}")
+                return None
+        
+        # 计算内容哈希
+        content_hash = hashlib.md5(content.encode('utf-8')).hexdigest()
+        
+        # 提取元数据：优先使用文档目录缓存中已解析的结果
+        analysis_path = os.path.join(self.analyzed_dir, vendor, doc_type, filename)
+        entry = None
+        if self.document_catalog is not None:
+            entry = self.document_catalog.get_entry(vendor, doc_type, filename)
+        if entry is not None and entry.has_raw:
+            title = entry.raw_title
+            date_str = entry.raw_date
+            has_analysis = entry.has_analysis
+            translated_title = entry.translated_title
+        else:
+            meta = self.document_manager._extract_document_meta(file_path)
+            title = meta.get('title', filename.replace('.md', ''))
+            date_str = meta.get('date', '')
+            # 检查是否有分析版本
+            has_analysis = os.path.isfile(analysis_path)
+            translated_title = ""
+            if has_analysis:
+                translated_title = self.document_manager._extract_translated_title(analysis_path) or ""
+        
+        # 获取分析内容
+        analysis_content = ""
         if has_analysis:
-            translated_title = self.document_manager._extract_translated_title(analysis_path) or ""
+            try:
+                with open(analysis_path, 'r', encoding='utf-8') as f:
+                    analysis_content = f.read()
+            except Exception as e:
+                self.logger.warning(f"读取分析文件失败 {analysis_path}: {e}")
+        
+        # 分词：标题字段包含原始标题和翻译标题，正文字段包含原文和AI分析内容
+        title_terms, title_length = count_terms(f"{title}\n{translated_title}")
+        body_terms, body_length = count_terms(
+            self._clean_content_for_search(content) + "\n" +
+            self._clean_content_for_search(analysis_content)
+        )
         
         return DocumentIndex(
             file_path=file_path,
@@ -511,11 +753,16 @@ class SearchManager:
             filename=filename,
             title=title,
             translated_title=translated_title,
-            content=content,
+            content="",
             date=date_str,
             has_analysis=has_analysis,
             last_modified=last_modified,
-            content_hash=content_hash
+            content_hash=content_hash,
+            analysis_modified=analysis_modified,
+            title_terms=title_terms,
+            body_terms=body_terms,
+            title_length=title_length,
+            body_length=body_length
         )
     
     def invalidate_cache(self):
@@ -527,10 +774,15 @@ class SearchManager:
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
         with self._index_lock:
+            snapshot = self._snapshot
             return {
-                'cached_docs': len(self._index_cache),
+                'cached_docs': snapshot.doc_count if snapshot else 0,
+                'indexed_terms': snapshot.term_count if snapshot else 0,
+                'pending_changes': snapshot.pending_changes if snapshot else 0,
+                'index_path': self.index_path,
                 'last_index_time': self._last_index_time,
                 'cache_age_seconds': time.time() - self._last_index_time if self._last_index_time else 0,
                 'is_dirty': self._index_dirty,
+                'watched': self._watched,
                 'cache_ttl': self.INDEX_CACHE_TTL
             }
@@ -14,12 +14,14 @@ from typing import Dict, List, Any
 
 from src.web_server.base_server import BaseServer
 from src.web_server.document_manager import DocumentManager
+from src.web_server.document_catalog import DocumentCatalog
 from src.web_server.vendor_manager import VendorManager
 from src.web_server.admin_manager import AdminManager
 from src.web_server.stats_manager import StatsManager
 from src.web_server.search_manager import SearchManager
 from src.web_server.route_manager import RouteManager
 from src.web_server.gcp_updates_manager import GcpUpdatesManager
+from src.web_server.file_watcher import FileChangeNotifier
 from src.utils.process_lock_manager import ProcessLockManager, ProcessType
 from src.web_server.socket_manager import SocketManager
 from src.utils.config_loader import get_config
@@ -72,6 +74,9 @@ class WebServer(BaseServer):
         # 注册路由
         self._register_routes()
         
+        # 启动文件变更通知服务
+        self._init_file_watcher()
+        
         self.logger.info("Web服务器初始化完成")
     
     def _init_managers(self):
@@ -79,8 +84,14 @@ class WebServer(BaseServer):
         # 初始化文档管理器
         self.document_manager = DocumentManager(self.raw_dir, self.analyzed_dir)
         
+        # 初始化文档目录缓存（厂商页、首页时间线和搜索共享）
+        self.document_catalog = DocumentCatalog(self.raw_dir, self.analyzed_dir, self.document_manager)
+        
         # 初始化厂商管理器
-        self.vendor_manager = VendorManager(self.raw_dir, self.analyzed_dir, self.document_manager)
+        self.vendor_manager = VendorManager(
+            self.raw_dir, self.analyzed_dir, self.document_manager,
+            document_catalog=self.document_catalog
+        )
         
         # 初始化管理员管理器
         self.admin_manager = AdminManager(self.base_dir)
@@ -88,12 +99,22 @@ class WebServer(BaseServer):
         # 从配置中读取是否启用访问日志
         config = get_config()
         enable_access_log = config.get('webserver', {}).get('enable_access_log', True)
+        access_log_db_config = config.get('webserver', {}).get('access_log_db', {}) or {}
         
         # 初始化统计管理器
-        self.stats_manager = StatsManager(self.data_dir, enable_access_log)
-        
-        # 初始化搜索管理器
-        self.search_manager = SearchManager(self.raw_dir, self.analyzed_dir, self.document_manager)
+        self.stats_manager = StatsManager(self.data_dir, enable_access_log, access_log_db_config,
+                                          document_catalog=self.document_catalog)
+        
+        # 初始化搜索管理器（可选将索引持久化到数据目录）
+        search_config = config.get('webserver', {}).get('search', {}) or {}
+        search_index_path = None
+        if search_config.get('persist_index', True):
+            search_index_path = os.path.join(self.data_dir, 'search_index', 'search_index.bin')
+        self.search_manager = SearchManager(
+            self.raw_dir, self.analyzed_dir, self.document_manager,
+            index_path=search_index_path,
+            document_catalog=self.document_catalog
+        )
         
         # 初始化GCP更新管理器
         self.gcp_updates_manager = GcpUpdatesManager(self.raw_dir)
@@ -110,9 +131,28 @@ class WebServer(BaseServer):
             self.admin_manager,
             self.stats_manager,
             self.search_manager,
-            self.gcp_updates_manager
+            self.gcp_updates_manager,
+            document_catalog=self.document_catalog
         )
     
+    def _init_file_watcher(self):
+        """创建文件变更通知服务，并让各管理器订阅 data/raw 和 data/analysis 的变更"""
+        self.file_watcher = None
+        watch_config = get_config().get('webserver', {}).get('file_watch', {}) or {}
+        if not watch_config.get('enabled', True):
+            return
+        
+        self.file_watcher = FileChangeNotifier(
+            {'raw': self.raw_dir, 'analysis': self.analyzed_dir},
+            backend=watch_config.get('backend', 'auto'),
+            poll_interval=watch_config.get('poll_interval', 5),
+            debounce=watch_config.get('debounce', 0.5)
+        )
+        # 文档目录缓存需先于搜索管理器更新，搜索索引会读取其中的标题信息
+        for manager in (self.document_catalog, self.search_manager, self.gcp_updates_manager):
+            manager.watch(self.file_watcher)
+        self.file_watcher.start()
+    
     def _release_lock(self):
         """释放进程锁"""
         # 仅当 process_lock_manager 存在时才尝试释放（即非Debug模式）
@@ -131,6 +171,14 @@ class WebServer(BaseServer):
             if hasattr(self, 'stats_manager') and self.stats_manager:
                 self.stats_manager.shutdown()
             
+            # 停止文件变更通知服务
+            if getattr(self, 'file_watcher', None):
+                self.file_watcher.stop()
+            
+            # 持久化搜索索引的未保存变更
+            if hasattr(self, 'search_manager') and self.search_manager:
+                self.search_manager.flush_index()
+            
             # 释放进程锁
             self._release_lock()
             
@@ -15,23 +15,28 @@ import re
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Set
 from flask import request
-import threading
 
 # 导入SQLite访问日志数据库管理器
 from src.utils.access_log_db import AccessLogDB
+from src.web_server.user_agent_parser import UserAgentParser
 
 class StatsManager:
     """统计管理类"""
     
-    def __init__(self, data_dir: str, enable_access_log: bool = True):
+    def __init__(self, data_dir: str, enable_access_log: bool = True,
+                 access_log_db_config: Optional[Dict[str, Any]] = None, document_catalog=None):
         """
         初始化统计管理器
         
         Args:
             data_dir: 数据目录路径
             enable_access_log: 是否启用访问日志记录，默认True
+            access_log_db_config: 访问日志数据库参数（cache_size_kb、mmap_size_mb、archive_after_months、
+                queue_size、overflow_policy、sample_rate）
+            document_catalog: 文档目录缓存，提供时从内存中的路径-标题映射获取文档标题
         """
         self.logger = logging.getLogger(__name__)
+        self.document_catalog = document_catalog
         
         self.data_dir = data_dir
         self.enable_access_log = enable_access_log
@@ -42,9 +47,7 @@ class StatsManager:
             self.main_access_db = None
             self.all_access_db = None
             self.server_start_time = datetime.now()
-            self._user_agent_cache = {}
-            self._user_agent_cache_lock = threading.RLock()
-            self._max_cache_size = 1000
+            self.user_agent_parser = None
             return
         
         # 获取项目根目录
@@ -52,18 +55,32 @@ class StatsManager:
         project_root = os.path.dirname(os.path.dirname(current_dir))
         
         # 初始化SQLite数据库
+        access_log_db_config = access_log_db_config or {}
+        db_options = {
+            'cache_size_kb': int(access_log_db_config.get('cache_size_kb', 8192)),
+            'mmap_size_mb': int(access_log_db_config.get('mmap_size_mb', 64)),
+            'archive_after_months': int(access_log_db_config.get('archive_after_months', 0)),
+            'queue_size': int(access_log_db_config.get('queue_size', 10000)),
+            'overflow_policy': access_log_db_config.get('overflow_policy', 'spill'),
+            'sample_rate': float(access_log_db_config.get('sample_rate', 0.1))
+        }
         db_dir = os.path.join(data_dir, 'sqlite')
         os.makedirs(db_dir, exist_ok=True)
         
+        # 用户代理解析器（带LRU缓存），只在主访问日志数据库的写入线程中使用
+        self.user_agent_parser = UserAgentParser(
+            cache_size=int(access_log_db_config.get('user_agent_cache_size', 4096))
+        )
+        
         # 主访问日志数据库（用于统计分析，不包含404等无效访问）
         self.main_db_path = os.path.join(db_dir, 'access_logs.db')
-        self.main_access_db = AccessLogDB(self.main_db_path)
+        self.main_access_db = AccessLogDB(self.main_db_path, record_enricher=self._enrich_access_info, **db_options)
         
         # 完整访问日志数据库（包含所有访问记录）
         logs_dir = os.path.join(project_root, 'logs')
         os.makedirs(logs_dir, exist_ok=True)
         self.all_db_path = os.path.join(logs_dir, 'all_access_logs.db')
-        self.all_access_db = AccessLogDB(self.all_db_path)
+        self.all_access_db = AccessLogDB(self.all_db_path, **db_options)
         
         # 兼容性：保留旧的文件路径用于迁移
         self.access_log_file = os.path.join(data_dir, 'access_log.json')
@@ -74,11 +91,6 @@ class StatsManager:
         # 记录服务器启动时间
         self.server_start_time = datetime.now()
         
-        # 用户代理解析缓存（提高性能）
-        self._user_agent_cache = {}
-        self._user_agent_cache_lock = threading.RLock()
-        self._max_cache_size = 1000  # 最大缓存条目数
-        
         # 迁移现有数据
         self._migrate_existing_data()
         
@@ -114,122 +126,22 @@ class StatsManager:
         except Exception as e:
             self.logger.error(f"迁移现有数据失败: {e}")
     
-    def _parse_user_agent(self, user_agent_string: str) -> Dict[str, Any]:
+    def _enrich_access_info(self, access_info: Dict[str, Any]):
         """
-        解析用户代理字符串，优先使用 user-agents 库。
-        使用缓存机制提高性能。
+        补全访问记录的用户代理信息（在主访问日志数据库的写入线程中调用）
         
         Args:
-            user_agent_string: 用户代理字符串
-            
-        Returns:
-            解析后的用户代理信息字典，包含 device_type, os, browser, is_bot。
+            access_info: 访问记录，user_agent_info 为空时解析 user_agent
         """
-        # 检查缓存
-        with self._user_agent_cache_lock:
-            if user_agent_string in self._user_agent_cache:
-                return self._user_agent_cache[user_agent_string]
-        
-        device_type = 'Other'
-        os_name = 'Unknown'
-        browser_name = 'Unknown'
-        is_bot = False
-        
-        try:
-            # 尝试使用 user-agents 库
-            from user_agents import parse
-            user_agent = parse(user_agent_string)
-            
-            # 设备类型
-            if user_agent.is_mobile:
-                device_type = 'Mobile'
-            elif user_agent.is_tablet:
-                device_type = 'Tablet'
-            elif user_agent.is_pc:
-                device_type = 'PC'
-            else:
-                device_type = 'Other'
-            
-            # 操作系统
-            if user_agent.os.family:
-                os_name = f"{user_agent.os.family}"
-                if user_agent.os.version_string:
-                    os_name += f" {user_agent.os.version_string}"
-            
-            # 浏览器
-            if user_agent.browser.family:
-                browser_name = f"{user_agent.browser.family}"
-                if user_agent.browser.version_string:
-                    browser_name += f" {user_agent.browser.version_string}"
-            
-            # 是否为机器人
-            is_bot = user_agent.is_bot
-            
-        except ImportError:
-            # 如果没有安装 user-agents 库，使用简单的字符串匹配
-            user_agent_lower = user_agent_string.lower()
-            
-            # 简单的设备类型检测
-            if any(mobile in user_agent_lower for mobile in ['mobile', 'android', 'iphone', 'ipad']):
-                if 'ipad' in user_agent_lower:
-                    device_type = 'Tablet'
-                else:
-                    device_type = 'Mobile'
-            else:
-                device_type = 'PC'
-            
-            # 简单的操作系统检测
-            if 'windows' in user_agent_lower:
-                os_name = 'Windows'
-            elif 'mac' in user_agent_lower or 'darwin' in user_agent_lower:
-                os_name = 'macOS'
-            elif 'linux' in user_agent_lower:
-                os_name = 'Linux'
-            elif 'android' in user_agent_lower:
-                os_name = 'Android'
-            elif 'ios' in user_agent_lower or 'iphone' in user_agent_lower or 'ipad' in user_agent_lower:
-                os_name = 'iOS'
-            
-            # 简单的浏览器检测
-            if 'chrome' in user_agent_lower:
-                browser_name = 'Chrome'
-            elif 'firefox' in user_agent_lower:
-                browser_name = 'Firefox'
-            elif 'safari' in user_agent_lower and 'chrome' not in user_agent_lower:
-                browser_name = 'Safari'
-            elif 'edge' in user_agent_lower:
-                browser_name = 'Edge'
-            
-            # 简单的机器人检测
-            bot_indicators = ['bot', 'crawler', 'spider', 'scraper', 'curl', 'wget']
-            is_bot = any(indicator in user_agent_lower for indicator in bot_indicators)
-        
-        except Exception as e:
-            self.logger.error(f"解析用户代理失败: {e}")
-        
-        result = {
-            'device_type': device_type,
-            'os': os_name,
-            'browser': browser_name,
-            'is_bot': is_bot
-        }
-        
-        # 添加到缓存
-        with self._user_agent_cache_lock:
-            # 如果缓存已满，清理一半的条目
-            if len(self._user_agent_cache) >= self._max_cache_size:
-                # 简单的LRU策略：删除前一半的条目
-                cache_items = list(self._user_agent_cache.items())
-                self._user_agent_cache = dict(cache_items[len(cache_items)//2:])
-            
-            self._user_agent_cache[user_agent_string] = result
-        
-        return result
+        if not access_info.get('user_agent_info'):
+            access_info['user_agent_info'] = self.user_agent_parser.parse(access_info.get('user_agent') or '')
     
     def _get_document_title(self, path: str, document_manager = None) -> str:
         """
         获取文档标题
         
+        有文档目录缓存时直接查内存中的路径-标题映射，否则通过文档管理器读取文档
+        
         Args:
             path: 请求路径
             document_manager: 文档管理器实例
@@ -237,6 +149,13 @@ class StatsManager:
         Returns:
             文档标题或路径
         """
+        if self.document_catalog is not None:
+            try:
+                return self.document_catalog.get_page_title(path) or path
+            except Exception as e:
+                self.logger.error(f"获取文档标题失败: {e}")
+                return path
+        
         if not document_manager:
             return path
         
@@ -320,7 +239,7 @@ class StatsManager:
                 'status_code': status_code_val,
                 'title': '',  # 延迟计算标题
                 'user_agent': user_agent,
-                'user_agent_info': {},  # 延迟解析用户代理
+                'user_agent_info': {},  # 由写入线程解析用户代理
                 'timestamp': int(time.time()),
                 'referer': request.referrer if request else None,
                 'path_exists': path_exists
@@ -343,10 +262,10 @@ class StatsManager:
             
             # 只有对于需要记录到主数据库的请求，才进行详细计算
             access_info['title'] = self._get_document_title(path, document_manager)
-            access_info['user_agent_info'] = self._parse_user_agent(user_agent)
             
             # 对于合法的、非静态/favicon的请求，记录到主访问日志数据库
-            self.main_access_db.record_access(access_info)
+            # （用户代理在写入线程中由 _enrich_access_info 解析）
+            self.main_access_db.record_access(dict(access_info))
             
             # 只在DEBUG级别记录详细访问信息，减少日志输出
             self.logger.debug(
@@ -413,26 +332,12 @@ class StatsManager:
             # 添加服务器启动时间
             stats['server_start_time'] = self.server_start_time.strftime('%Y-%m-%d %H:%M:%S')
             
-            # 使用数据库查询计算服务器启动后的PV、UV，而不是获取大量记录
+            # 使用数据库查询计算服务器启动后的PV、UV（只查询启动月份之后的分区）
             start_timestamp = int(self.server_start_time.timestamp())
             try:
-                with self.main_access_db._get_connection() as conn:
-                    cursor = conn.cursor()
-                    
-                    # 计算服务器启动后的PV
-                    cursor.execute(
-                        'SELECT COUNT(*) as server_start_pv FROM access_logs WHERE timestamp >= ? AND path_exists = 1',
-                        (start_timestamp,)
-                    )
-                    stats['server_start_pv'] = cursor.fetchone()['server_start_pv']
-                    
-                    # 计算服务器启动后的UV
-                    cursor.execute(
-                        'SELECT COUNT(DISTINCT ip) as server_start_uv FROM access_logs WHERE timestamp >= ? AND path_exists = 1',
-                        (start_timestamp,)
-                    )
-                    stats['server_start_uv'] = cursor.fetchone()['server_start_uv']
-                    
+                server_start_visits = self.main_access_db.get_visits_since(start_timestamp)
+                stats['server_start_pv'] = server_start_visits['pv']
+                stats['server_start_uv'] = server_start_visits['uv']
             except Exception as db_e:
                 self.logger.error(f"计算服务器启动后统计数据失败: {db_e}")
                 stats['server_start_pv'] = 0
@@ -479,14 +384,17 @@ class StatsManager:
                     'path': self.main_db_path,
                     'size_mb': main_db_info['file_size_mb'],
                     'total_records': main_db_info['total_records'],
-                    'valid_records': main_db_info['valid_records']
+                    'valid_records': main_db_info['valid_records'],
+                    'writer': self.main_access_db.get_writer_stats(),
+                    'user_agent_parser': self.user_agent_parser.get_stats()
                 },
                 'all_database': {
                     'path': self.all_db_path,
                     'size_mb': all_db_info['file_size_mb'],
                     'total_records': all_db_info['total_records'],
                     'valid_records': all_db_info['valid_records'],
-                    'invalid_records': all_db_info['invalid_records']
+                    'invalid_records': all_db_info['invalid_records'],
+                    'writer': self.all_access_db.get_writer_stats()
                 }
             }
             
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+竞争分析Web服务器 - User-Agent解析器
+
+解析访问日志中的User-Agent（设备类型、操作系统、浏览器、是否为机器人）。
+优先使用 user-agents 库，未安装时回退到简单的字符串匹配。
+
+user-agents 库的解析依赖大量正则，代价较高：
+- 常见爬虫/脚本的User-Agent先由一个预编译的特征模式识别，不进入完整解析，
+  也不写入缓存（爬虫的User-Agent种类多、重复少，会挤掉正常浏览器的缓存条目）
+- 其余User-Agent的解析结果保存在有大小上限的LRU缓存中
+"""
+
+import re
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any
+
+try:
+    from user_agents import parse as parse_user_agent
+except ImportError:
+    parse_user_agent = None
+
+# 常见爬虫、脚本和扫描器的特征（cubot是手机品牌，需要排除）
+_BOT_RE = re.compile(
+    r'(?<!cu)bot\b|crawl|spider|slurp|scrap|curl/|wget/|python-requests|python-urllib|aiohttp|httpx|'
+    r'go-http-client|okhttp|java/|libwww|httpclient|headlesschrome|phantomjs|facebookexternalhit|'
+    r'feedfetcher|mediapartners|uptime|pingdom|zgrab|masscan|nmap|nikto|sqlmap',
+    re.IGNORECASE
+)
+# User-Agent中的产品标识，如 Googlebot/2.1
+_PRODUCT_RE = re.compile(r'([A-Za-z][\w.\-]*)/(\d[\w.]*)')
+
+
+class UserAgentParser:
+    """带LRU缓存和爬虫预分类的User-Agent解析器类"""
+
+    def __init__(self, cache_size: int = 4096):
+        """
+        初始化User-Agent解析器
+
+        Args:
+            cache_size: LRU缓存的最大条目数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # 由特征模式直接识别为机器人的次数
+        self.bot_prefiltered = 0
+
+    def parse(self, user_agent_string: str) -> Dict[str, Any]:
+        """
+        解析User-Agent
+
+        Args:
+            user_agent_string: User-Agent字符串
+
+        Returns:
+            包含 device_type, os, browser, is_bot 的字典（调用方不应修改）
+        """
+        user_agent_string = user_agent_string or ''
+        with self._lock:
+            cached = self._cache.get(user_agent_string)
+            if cached is not None:
+                self._cache.move_to_end(user_agent_string)
+                self.hits += 1
+                return cached
+
+        bot_match = _BOT_RE.search(user_agent_string)
+        if bot_match:
+            with self._lock:
+                self.bot_prefiltered += 1
+            return self._bot_result(user_agent_string, bot_match)
+
+        result = self._parse_full(user_agent_string)
+        with self._lock:
+            self.misses += 1
+            self._cache[user_agent_string] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _bot_result(user_agent_string: str, bot_match: re.Match) -> Dict[str, Any]:
+        """根据爬虫特征生成解析结果，浏览器字段使用包含特征的产品标识"""
+        signature = bot_match.group(0).lower().rstrip('/')
+        browser_name = bot_match.group(0).rstrip('/')
+        for product in _PRODUCT_RE.finditer(user_agent_string):
+            if signature in product.group(1).lower():
+                browser_name = f"{product.group(1)} {product.group(2)}"
+                break
+        return {
+            'device_type': 'Other',
+            'os': 'Other',
+            'browser': browser_name,
+            'is_bot': True
+        }
+
+    def _parse_full(self, user_agent_string: str) -> Dict[str, Any]:
+        """完整解析User-Agent（优先使用 user-agents 库）"""
+        device_type = 'Other'
+        os_name = 'Unknown'
+        browser_name = 'Unknown'
+        is_bot = False
+
+        try:
+            if parse_user_agent is not None:
+                user_agent = parse_user_agent(user_agent_string)
+
+                # 设备类型
+                if user_agent.is_mobile:
+                    device_type = 'Mobile'
+                elif user_agent.is_tablet:
+                    device_type = 'Tablet'
+                elif user_agent.is_pc:
+                    device_type = 'PC'
+                else:
+                    device_type = 'Other'
+
+                # 操作系统
+                if user_agent.os.family:
+                    os_name = f"{user_agent.os.family}"
+                    if user_agent.os.version_string:
+                        os_name += f" {user_agent.os.version_string}"
+
+                # 浏览器
+                if user_agent.browser.family:
+                    browser_name = f"{user_agent.browser.family}"
+                    if user_agent.browser.version_string:
+                        browser_name += f" {user_agent.browser.version_string}"
+
+                # 是否为机器人
+                is_bot = user_agent.is_bot
+            else:
+                # 如果没有安装 user-agents 库，使用简单的字符串匹配
+                user_agent_lower = user_agent_string.lower()
+
+                # 简单的设备类型检测
+                if any(mobile in user_agent_lower for mobile in ['mobile', 'android', 'iphone', 'ipad']):
+                    if 'ipad' in user_agent_lower:
+                        device_type = 'Tablet'
+                    else:
+                        device_type = 'Mobile'
+                else:
+                    device_type = 'PC'
+
+                # 简单的操作系统检测
+                if 'windows' in user_agent_lower:
+                    os_name = 'Windows'
+                elif 'mac' in user_agent_lower or 'darwin' in user_agent_lower:
+                    os_name = 'macOS'
+                elif 'linux' in user_agent_lower:
+                    os_name = 'Linux'
+                elif 'android' in user_agent_lower:
+                    os_name = 'Android'
+                elif 'ios' in user_agent_lower or 'iphone' in user_agent_lower or 'ipad' in user_agent_lower:
+                    os_name = 'iOS'
+
+                # 简单的浏览器检测
+                if 'chrome' in user_agent_lower:
+                    browser_name = 'Chrome'
+                elif 'firefox' in user_agent_lower:
+                    browser_name = 'Firefox'
+                elif 'safari' in user_agent_lower and 'chrome' not in user_agent_lower:
+                    browser_name = 'Safari'
+                elif 'edge' in user_agent_lower:
+                    browser_name = 'Edge'
+
+                # 机器人已在 parse 中由 _BOT_RE 预分类
+
+        except Exception as e:
+            self.logger.error(f"解析用户代理失败: {e}")
+
+        return {
+            'device_type': device_type,
+            'os': os_name,
+            'browser': browser_name,
+            'is_bot': is_bot
+        }
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            缓存条目数、命中/未命中次数、命中率和爬虫预分类次数
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'cache_entries': len(self._cache),
+                'cache_size': self.cache_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'bot_prefiltered': self.bot_prefiltered
+            }